@@ -3,6 +3,7 @@ extends Control
 
 
 const INDEX_DIR: String = "res://source/common/registry/indexes/"
+const INDEX_BUILDER: String = "res://update_content_indexes.py"
 
 var file_dialog: EditorFileDialog
 var last_dir: String
@@ -53,7 +54,10 @@ func _on_preview_file_dialog_file_selected(path: String) -> void:
 	current_content_index = resource
 	
 	output_view.text += "## Content Name: %s\n" % current_content_index.content_name
-	output_view.text += "## Entries size: %d\n" % current_content_index.entries.size()
+	output_view.text += "## Entries size: %d (%d deleted)\n" % [
+		current_content_index.entries.size(),
+		current_content_index.entries.filter(func(d): return d.get(&"deleted", false)).size()
+	]
 	
 	var dictionary_as_string: String
 	
@@ -131,6 +135,9 @@ func _on_generate_dialog_confirmed(generate_dialog: ConfirmationDialog) -> void:
 	generate_content_index(content_name, path, filters)
 
 
+## Entries, ids, hashes, tombstones and version come from
+## update_content_indexes.py, so the editor and the script never disagree;
+## this only creates the index, runs the script and stamps slug/id metadata.
 func generate_content_index(
 	content_name: String,
 	path: String,
@@ -138,90 +145,89 @@ func generate_content_index(
 ) -> void:
 	var content_index: ContentIndex
 	var content_index_path: String = INDEX_DIR + content_name + "_index.tres"
-	var resource_paths: PackedStringArray = get_resource_file_paths(path, filters)
 	
 	if ResourceLoader.exists(content_index_path):
 		content_index = ResourceLoader.load(content_index_path)
 	else:
 		content_index = ContentIndex.new()
-	content_index.content_name = content_name
-	content_index.version = int(Time.get_unix_time_from_system())
+		content_index.content_name = content_name
+	if content_index.scan_path != path or content_index.filters != filters:
+		content_index.scan_path = path
+		content_index.filters = filters
+		var save_error: Error = ResourceSaver.save(content_index, content_index_path)
+		if save_error:
+			printerr(error_string(save_error))
+			return
 	
-	var entries: Array[Dictionary]
-	for resource_path: String in resource_paths:
-		var resource: Resource = ResourceLoader.load(resource_path)
+	if not run_index_builder(content_name):
+		return
+	
+	content_index = ResourceLoader.load(content_index_path, "", ResourceLoader.CACHE_MODE_REPLACE)
+	for entry: Dictionary in content_index.entries:
+		if entry.get(&"deleted", false):
+			continue
+		var resource: Resource = ResourceLoader.load(entry[&"path"])
 		if not resource:
 			continue
-		
-		var slug: StringName = resource_path.get_file().get_basename()
-		var id: int = get_slug_id(content_index, slug)
-		
-		resource.set_meta(&"slug", slug)
-		resource.set_meta(&"id", id)
-		ResourceSaver.save(resource, resource_path)
-		
-		entries.append({
-			&"id": id,
-			&"slug": slug,
-			&"path": resource_path,
-			&"hash": FileAccess.get_sha256(resource_path)
-		})
-		if id == content_index.next_id:
-			content_index.next_id += 1
-	
-	content_index.entries = entries
-	
-	var error: Error = ResourceSaver.save(content_index, content_index_path)
-	if error:
-		printerr(error_string(error))
-	else:
-		var accept_dialog: AcceptDialog = AcceptDialog.new()
-		accept_dialog.canceled.connect(accept_dialog.queue_free)
-		accept_dialog.confirmed.connect(func():
-			accept_dialog.queue_free()
-			_on_preview_file_dialog_file_selected(content_index_path)
-			)
-		accept_dialog.dialog_text = "Content index: %s generated at %s\nWant to preview it ?" % [content_name, content_index_path]
-		EditorInterface.popup_dialog_centered(accept_dialog)
-#endregion
-
-
-func get_resource_file_paths(
-	path: String,
-	filters: PackedStringArray
-) -> PackedStringArray:
-	var dir := DirAccess.open(path)
-	if not dir:
-		printerr(error_string(DirAccess.get_open_error()))
-	var file_paths := PackedStringArray()
-	dir.list_dir_begin()
-	var file_path: String = dir.get_next()
+		if resource.get_meta(&"slug", &"") == entry[&"slug"] and resource.get_meta(&"id", -1) == entry[&"id"]:
+			continue
+		resource.set_meta(&"slug", entry[&"slug"])
+		resource.set_meta(&"id", entry[&"id"])
+		ResourceSaver.save(resource, entry[&"path"])
 	
-	while file_path:
-		if dir.current_is_dir():
-			file_paths.append_array(get_resource_file_paths(path + "/" + file_path, filters))
-		else:
-			var full_path: String = path + "/" + file_path
-			for filter: String in filters:
-				if full_path.match(filter):
-					file_paths.append(full_path)
-					break
-		file_path = dir.get_next()
+	var accept_dialog: AcceptDialog = AcceptDialog.new()
+	accept_dialog.canceled.connect(accept_dialog.queue_free)
+	accept_dialog.confirmed.connect(func():
+		accept_dialog.queue_free()
+		_on_preview_file_dialog_file_selected(content_index_path)
+		)
+	accept_dialog.dialog_text = "Content index: %s generated at %s\nWant to preview it ?" % [content_name, content_index_path]
+	EditorInterface.popup_dialog_centered(accept_dialog)
+
+
+## Runs update_content_indexes.py for one index. Python is only needed by
+## this button; on failure the reason is shown in an editor dialog.
+func run_index_builder(content_name: String) -> bool:
+	var python: String = find_python()
+	if python.is_empty():
+		show_generate_error(
+			"Generating content indexes needs Python 3 on PATH (python3 or python).\n"
+			+ "Install it, or run `python %s %s` from the project root."
+			% [INDEX_BUILDER.trim_prefix("res://"), content_name]
+		)
+		return false
 	
-	dir.list_dir_end()
-	return file_paths
-
-
-func get_slug_id(content_index: ContentIndex, slug: StringName) -> int:
-	var entry: Dictionary
-	var entry_index: int = content_index.entries.find_custom(
-		func(d: Dictionary):
-			return d[&"slug"] == slug
+	var output: Array = []
+	var exit_code: int = OS.execute(
+		python, [ProjectSettings.globalize_path(INDEX_BUILDER), content_name], output, true
 	)
-	if entry_index == -1:
-		return content_index.next_id
-	else:
-		return content_index.entries[entry_index][&"id"]
+	var text: String = "".join(output).strip_edges()
+	print_plugin(text)
+	if exit_code != 0:
+		show_generate_error("%s %s failed (exit code %d):\n\n%s" % [
+			INDEX_BUILDER.trim_prefix("res://"), content_name, exit_code, text
+		])
+		return false
+	return true
+
+
+func find_python() -> String:
+	for python: String in ["python3", "python"]:
+		var output: Array = []
+		if OS.execute(python, ["--version"], output, true) == 0 and "Python 3" in "".join(output):
+			return python
+	return ""
+
+
+func show_generate_error(message: String) -> void:
+	push_error("TinyMMO plugin - " + message)
+	var error_dialog: AcceptDialog = AcceptDialog.new()
+	error_dialog.title = "Content index not generated"
+	error_dialog.dialog_text = message
+	error_dialog.confirmed.connect(error_dialog.queue_free)
+	error_dialog.canceled.connect(error_dialog.queue_free)
+	EditorInterface.popup_dialog_centered(error_dialog)
+#endregion
 
 
 func _on_clear_button_pressed() -> void:
@@ -254,54 +260,9 @@ func _on_update_file_dialog_file_selected(path: String) -> void:
 		print_plugin("Scan path of content index empty.")
 		return
 	
-	print_plugin("Update content index not implemented yet.")
-	#var resource_paths: PackedStringArray = get_resource_file_paths(
-		#content_index.scan_path, content_index.filters
-	#)
-	#var entries: Array[Dictionary] = content_index.entries
-	#var used_paths: PackedStringArray = entries.map(func(d): return d[&"path"])
-	#
-	#
-	#for resource_path: String in resource_paths:
-		#var resource: Resource = ResourceLoader.load(resource_path)
-		#if not resource:
-			#continue
-		#
-		#var entry_index: int = content_index.entries.find_custom(
-			#func(d: Dictionary):
-				#return d[&"slug"] == slug
-		#)
-		#
-		#var slug: StringName = resource_path.get_file().get_basename()
-		#var id: int = get_slug_id(content_index, slug)
-		#
-		#resource.set_meta(&"slug", slug)
-		#resource.set_meta(&"id", id)
-		#ResourceSaver.save(resource, resource_path)
-		#
-		#entries.append({
-			#&"id": id,
-			#&"slug": slug,
-			#&"path": resource_path,
-			#&"hash": FileAccess.get_sha256(resource_path)
-		#})
-		#if id == content_index.next_id:
-			#content_index.next_id += 1
-	#
-	#content_index.entries = entries
-	#
-	#var error: Error = ResourceSaver.save(content_index, content_index_path)
-	#if error:
-		#printerr(error_string(error))
-	#else:
-		#var accept_dialog: AcceptDialog = AcceptDialog.new()
-		#accept_dialog.canceled.connect(accept_dialog.queue_free)
-		#accept_dialog.confirmed.connect(func():
-			#accept_dialog.queue_free()
-			#_on_file_dialog_file_selected(content_index_path)
-			#)
-		#accept_dialog.dialog_text = "%s generated at %s\nWant to preview it ?" % [content_name, content_index_path]
-		#EditorInterface.popup_dialog_centered(accept_dialog)
+	if run_index_builder(content_index.content_name):
+		ResourceLoader.load(path, "", ResourceLoader.CACHE_MODE_REPLACE)
+		_on_preview_file_dialog_file_selected(path)
 
 
 func _on_update_file_dialog_canceled() -> void:
@@ -1,181 +1,209 @@
 #!/usr/bin/env python3
 """
 Generate item metadata from loot tables and crafting recipes.
-Creates a JSON lookup table for tooltips showing harvest sources and crafting recipes.
+Creates a JSON lookup table for tooltips showing harvest sources and crafting recipes,
+plus item_metadata.bin, the same data with slug/id indexes for lazy lookups
+(see tinymmo_tools/content/item_metadata.py).
+
+Runs are incremental: .content_cache/item_metadata_deps.json records which
+loot tables and recipes contributed to which items. Only the items of
+changed source files are re-queried and patched into the existing JSON;
+every other record is written back byte-for-byte. Pass --full to rebuild
+everything.
 """
 
-import os
+import argparse
+import hashlib
 import json
-import re
+import time
 from pathlib import Path
 from collections import defaultdict
 
+from tinymmo_tools.content import drops, item_metadata, scan
+from tinymmo_tools.content.cache import CACHE_DIR, RACY_WINDOW_NS
+from tinymmo_tools.content.db import open_database
 
-def parse_tres_file(filepath):
-    """Parse a .tres resource file and extract relevant data."""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
-    return content
 
+DEPS_PATH = CACHE_DIR / 'item_metadata_deps.json'
+# Bump when the layout of a metadata record changes.
+DEPS_VERSION = 1
 
-def extract_loot_entries(tres_content):
-    """Extract loot entries from a HarvestLootTable .tres file."""
-    items = []
-    
-    # Find loot_entries array
-    loot_match = re.search(r'loot_entries = Array\[Dictionary\]\(\[(.*?)\]\)', tres_content, re.DOTALL)
-    if loot_match:
-        entries_text = loot_match.group(1)
-        # Split by dictionary boundaries
-        dict_pattern = r'\{([^}]+)\}'
-        for match in re.finditer(dict_pattern, entries_text):
-            entry_text = match.group(1)
-            # Extract item_slug
-            slug_match = re.search(r'"item_slug":\s*&"([^"]+)"', entry_text)
-            if slug_match:
-                items.append({'slug': slug_match.group(1), 'is_rare': False})
-    
-    # Find rare_bonus_entries array
-    rare_match = re.search(r'rare_bonus_entries = Array\[Dictionary\]\(\[(.*?)\]\)', tres_content, re.DOTALL)
-    if rare_match:
-        entries_text = rare_match.group(1)
-        dict_pattern = r'\{([^}]+)\}'
-        for match in re.finditer(dict_pattern, entries_text):
-            entry_text = match.group(1)
-            slug_match = re.search(r'"item_slug":\s*&"([^"]+)"', entry_text)
-            if slug_match:
-                items.append({'slug': slug_match.group(1), 'is_rare': True})
-    
-    return items
 
-
-def parse_loot_tables(loot_tables_dir):
-    """Parse all loot tables and create harvest sources mapping."""
+def query_harvest_sources(db, slugs=None):
+    """Map item slugs (all, or only `slugs`) to the loot tables that can drop them.
+    
+    One source per (table, item): its exact drop rate and expected quantity
+    per harvest roll from that table (all of its entries combined). is_rare
+    is set when the table only drops the item as a rare bonus.
+    """
     harvest_sources = defaultdict(list)
     
-    for filepath in Path(loot_tables_dir).glob('*.tres'):
-        filename = filepath.stem
-        # Extract class and tier from filename (e.g., "miner_t1_loot_table")
-        match = re.match(r'(\w+)_t(\d+)_loot_table', filename)
-        if not match:
-            continue
-        
-        class_name = match.group(1)
-        tier = int(match.group(2))
-        
-        tres_content = parse_tres_file(filepath)
-        items = extract_loot_entries(tres_content)
-        
-        for item in items:
-            harvest_sources[item['slug']].append({
-                'class': class_name,
-                'tier': tier,
-                'is_rare': item['is_rare']
-            })
+    # Class and tier come from the filename (e.g., "miner_t1_loot_table")
+    rows = db.execute("""
+        SELECT d.item_slug, t.path, t.slug, t.harvest_class, t.tier, MIN(d.is_rare) AS is_rare
+        FROM loot_drops d JOIN loot_tables t ON t.path = d.path
+        WHERE t.harvest_class != '' AND d.item_slug != ''
+          AND (?1 IS NULL OR d.item_slug IN (SELECT value FROM json_each(?1)))
+        GROUP BY t.path, d.item_slug
+        ORDER BY t.path, MIN(d.is_rare), MIN(d.position)
+    """, (_json_list(slugs),)).fetchall()
+    table_paths = None if slugs is None else {row['path'] for row in rows}
+    table_drops = {table.slug: table for table in drops.load_table_drops(db, table_paths)}
+    for row in rows:
+        item = table_drops[row['slug']].items[row['item_slug']]
+        harvest_sources[row['item_slug']].append({
+            'class': row['harvest_class'],
+            'tier': row['tier'],
+            'is_rare': bool(row['is_rare']),
+            'drop_rate': round(item.drop_rate, 6),
+            'expected_per_harvest': round(item.mean, 6)
+        })
     
     return harvest_sources
 
 
-def extract_recipe_data(tres_content, filename):
-    """Extract recipe data from a CraftingRecipe .tres file."""
-    recipe_data = {
-        'recipe_name': filename.replace('_', ' ').title().replace('Recipe', '').strip(),
-        'class': 'miner',  # default
-        'level': 1,
-        'slug': filename,
-        'outputs': []
-    }
-    
-    # Extract recipe name
-    name_match = re.search(r'recipe_name = &?"([^"]+)"', tres_content)
-    if name_match:
-        recipe_data['recipe_name'] = name_match.group(1)
-    
-    # Extract required class
-    class_match = re.search(r'required_class = "([^"]+)"', tres_content)
-    if class_match:
-        recipe_data['class'] = class_match.group(1)
-    
-    # Extract required level
-    level_match = re.search(r'required_level = (\d+)', tres_content)
-    if level_match:
-        recipe_data['level'] = int(level_match.group(1))
-    
-    # Extract slug
-    slug_match = re.search(r'slug = &?"([^"]+)"', tres_content)
-    if slug_match:
-        recipe_data['slug'] = slug_match.group(1)
-    
-    # Extract output items
-    output_match = re.search(r'output_1_slug = &?"([^"]+)"', tres_content)
-    if output_match and output_match.group(1):
-        recipe_data['outputs'].append(output_match.group(1))
+def query_crafted_by(db, slugs=None):
+    """Map item slugs (all, or only `slugs`) to the recipes that output them."""
+    crafted_by = defaultdict(list)
     
-    output2_match = re.search(r'output_2_slug = &?"([^"]+)"', tres_content)
-    if output2_match and output2_match.group(1):
-        recipe_data['outputs'].append(output2_match.group(1))
+    rows = db.execute("""
+        SELECT s.item_slug, r.recipe_name, r.required_class, r.required_level, r.slug
+        FROM recipe_slots s JOIN recipes r ON r.path = s.path
+        WHERE s.direction = 'output'
+          AND (?1 IS NULL OR s.item_slug IN (SELECT value FROM json_each(?1)))
+        ORDER BY r.path, s.slot
+    """, (_json_list(slugs),))
+    for row in rows:
+        crafted_by[row['item_slug']].append({
+            'recipe_name': row['recipe_name'],
+            'class': row['required_class'],
+            'level': row['required_level'],
+            'slug': row['slug']
+        })
     
-    return recipe_data
+    return crafted_by
 
 
-def parse_recipes(recipes_dir):
-    """Parse all recipes and create crafted_by mapping."""
-    crafted_by = defaultdict(list)
-    
-    for filepath in Path(recipes_dir).rglob('*.tres'):
-        tres_content = parse_tres_file(filepath)
-        
-        # Skip if not a CraftingRecipe
-        if 'script_class="CraftingRecipe"' not in tres_content and 'CraftingRecipe' not in tres_content:
-            continue
-        
-        recipe_data = extract_recipe_data(tres_content, filepath.stem)
-        
-        # Add recipe to each output item
-        for output_slug in recipe_data['outputs']:
-            if output_slug:  # Skip empty slugs
-                crafted_by[output_slug].append({
-                    'recipe_name': recipe_data['recipe_name'],
-                    'class': recipe_data['class'],
-                    'level': recipe_data['level'],
-                    'slug': recipe_data['slug']
-                })
+def _json_list(values):
+    return None if values is None else json.dumps(sorted(values))
+
+
+def query_sources(db):
+    """Signature and contributed item slugs of every loot table, recipe and content index file."""
+    sources = {}
+    rows = db.execute("SELECT path, kind, mtime_ns, size FROM files WHERE kind IN ('loot_table', 'recipe', 'index')")
+    for row in rows:
+        sources[row['path']] = {'kind': row['kind'], 'signature': [row['mtime_ns'], row['size']], 'items': []}
     
-    return crafted_by
+    rows = db.execute("""
+        SELECT DISTINCT d.path, d.item_slug
+        FROM loot_drops d JOIN loot_tables t ON t.path = d.path
+        WHERE t.harvest_class != '' AND d.item_slug != ''
+        UNION
+        SELECT DISTINCT path, item_slug FROM recipe_slots WHERE direction = 'output'
+        ORDER BY 1, 2
+    """)
+    for row in rows:
+        sources[row['path']]['items'].append(row['item_slug'])
+    return sources
+
+
+def load_deps(output_text):
+    """The dependency manifest of the last run, if it describes `output_text`."""
+    try:
+        deps = json.loads(DEPS_PATH.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    if deps.get('version') != DEPS_VERSION or deps.get('output_sha256') != _sha256(output_text):
+        return None
+    return deps
+
+
+def _sha256(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
 
 
-def generate_item_metadata():
-    """Generate complete item metadata JSON."""
+def touched_sources(deps, sources):
+    """Source files added, removed or changed since the manifest was written."""
+    racy_ns = deps['generated_at_ns'] - RACY_WINDOW_NS
+    touched = set(sources).symmetric_difference(deps['sources'])
+    for path, source in sources.items():
+        old = deps['sources'].get(path)
+        if old is not None and (old['signature'] != source['signature'] or source['signature'][0] >= racy_ns):
+            touched.add(path)
+    return touched
+
+
+def generate_item_metadata(use_cache=True, jobs=None, full=False):
+    """Generate complete item metadata JSON, patching only changed items when possible."""
     project_root = Path(__file__).parent
-    loot_tables_dir = project_root / 'source' / 'server' / 'world' / 'components' / 'harvesting' / 'loot_tables'
-    recipes_dir = project_root / 'source' / 'common' / 'gameplay' / 'crafting' / 'recipes'
     output_file = project_root / 'source' / 'common' / 'gameplay' / 'items' / 'item_metadata.json'
-    
-    print("Parsing loot tables...")
-    harvest_sources = parse_loot_tables(loot_tables_dir)
-    print(f"Found {len(harvest_sources)} items with harvest sources")
-    
-    print("Parsing recipes...")
-    crafted_by = parse_recipes(recipes_dir)
-    print(f"Found {len(crafted_by)} items that can be crafted")
-    
-    # Combine all items
-    all_items = set(harvest_sources.keys()) | set(crafted_by.keys())
-    
-    metadata = {}
-    for item_slug in sorted(all_items):
-        metadata[item_slug] = {
-            'harvest_sources': harvest_sources.get(item_slug, []),
-            'crafted_by': crafted_by.get(item_slug, [])
-        }
-    
-    # Write output
+    binary_file = output_file.with_suffix('.bin')
+    started_ns = time.time_ns()
+    
+    previous_text = output_file.read_text(encoding='utf-8') if output_file.exists() else None
+    deps = load_deps(previous_text) if use_cache and not full and previous_text is not None else None
+    
+    with open_database(use_cache, jobs, project_root) as db:
+        sources = query_sources(db)
+        if deps is None:
+            print("Querying loot tables...")
+            harvest_sources = query_harvest_sources(db)
+            print(f"Found {len(harvest_sources)} items with harvest sources")
+            
+            print("Querying recipes...")
+            crafted_by = query_crafted_by(db)
+            print(f"Found {len(crafted_by)} items that can be crafted")
+            
+            # Combine all items
+            all_items = set(harvest_sources.keys()) | set(crafted_by.keys())
+            metadata = {}
+        else:
+            touched = touched_sources(deps, sources)
+            if not touched and binary_file.exists():
+                print("Item metadata is up to date")
+                return
+            affected = set()
+            for path in touched:
+                for source in (deps['sources'].get(path), sources.get(path)):
+                    if source is not None:
+                        affected.update(source['items'])
+            print(f"Incremental: {len(touched)} of {len(sources)} source files changed, "
+                  f"{len(affected)} items to refresh")
+            harvest_sources = query_harvest_sources(db, affected)
+            crafted_by = query_crafted_by(db, affected)
+            all_items = affected
+            metadata = json.loads(previous_text)
+        
+        item_ids = item_metadata.query_item_ids(db)
+    
+    for item_slug in all_items:
+        if harvest_sources.get(item_slug) or crafted_by.get(item_slug):
+            metadata[item_slug] = {
+                'harvest_sources': harvest_sources.get(item_slug, []),
+                'crafted_by': crafted_by.get(item_slug, [])
+            }
+        else:
+            metadata.pop(item_slug, None)
+    metadata = dict(sorted(metadata.items()))
+    
+    # Write output (untouched files keep their mtime)
+    text = json.dumps(metadata, indent=2, ensure_ascii=False)
     output_file.parent.mkdir(parents=True, exist_ok=True)
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(metadata, f, indent=2, ensure_ascii=False)
+    if text != previous_text:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(text)
+    binary_size = item_metadata.write(binary_file, metadata, item_ids)
+    
+    if use_cache:
+        DEPS_PATH.write_text(json.dumps({
+            'version': DEPS_VERSION, 'generated_at_ns': started_ns,
+            'output_sha256': _sha256(text), 'sources': sources,
+        }), encoding='utf-8')
     
-    print(f"\nGenerated metadata for {len(metadata)} items")
-    print(f"Output: {output_file}")
+    print(f"\nGenerated metadata for {len(metadata)} items" + ("" if deps is None else f" ({len(all_items)} refreshed)"))
+    print(f"Output: {output_file}" + ("" if text != previous_text else " (unchanged)"))
+    print(f"Binary: {binary_file} ({binary_size:,} bytes, {len(text.encode('utf-8')):,} as JSON)")
     
     # Print some statistics
     harvestable_count = sum(1 for item in metadata.values() if item['harvest_sources'])
@@ -189,6 +217,11 @@ def generate_item_metadata():
 
 
 if __name__ == '__main__':
-    generate_item_metadata()
+    parser = argparse.ArgumentParser(description="Generate item_metadata.json for tooltips.")
+    parser.add_argument('--no-cache', action='store_true', help="re-parse every file and skip the parse cache and content database")
+    parser.add_argument('--full', action='store_true', help="regenerate every item instead of only those whose sources changed")
+    scan.add_jobs_argument(parser)
+    args = parser.parse_args()
+    generate_item_metadata(use_cache=not args.no_cache, jobs=args.jobs, full=args.full)
 
 
@@ -14,6 +14,8 @@ import shutil
 from pathlib import Path
 from collections import defaultdict
 
+from tinymmo_tools.content import tres
+
 
 def find_items_to_migrate(items_dir):
     """Find all items with _new suffix and check for old versions"""
@@ -46,30 +48,21 @@ def update_recipe_file(recipe_path, slug_mapping):
     """Update recipe to use clean slug names"""
     try:
         with open(recipe_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+            recipe = next((section for section in tres.iter_sections(f) if section.tag == 'resource'), None)
+        if recipe is None:
+            return None
         
-        original_content = content
+        updates = {}
         changes = []
+        for kind, count in (('input', 3), ('output', 2)):
+            for i in range(1, count + 1):
+                key = f'{kind}_{i}_slug'
+                old_slug = recipe.properties.get(key)
+                if old_slug in slug_mapping:
+                    updates[key] = tres.StringName(slug_mapping[old_slug])
+                    changes.append(f"{old_slug} -> {slug_mapping[old_slug]} ({kind})")
         
-        # Update input slugs
-        for old_slug, new_slug in slug_mapping.items():
-            # Match patterns like: input_1_slug = &"grapes_new"
-            pattern = rf'(input_\d_slug\s*=\s*&")({old_slug})(")'
-            matches = re.findall(pattern, content)
-            if matches:
-                content = re.sub(pattern, rf'\1{new_slug}\3', content)
-                changes.append(f"{old_slug} -> {new_slug} (input)")
-            
-            # Match patterns like: output_1_slug = &"grapes_new"
-            pattern = rf'(output_\d_slug\s*=\s*&")({old_slug})(")'
-            matches = re.findall(pattern, content)
-            if matches:
-                content = re.sub(pattern, rf'\1{new_slug}\3', content)
-                changes.append(f"{old_slug} -> {new_slug} (output)")
-        
-        if content != original_content:
-            with open(recipe_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+        if updates and tres.rewrite_properties(recipe_path, 'resource', updates):
             return changes
         
         return None
@@ -1,5 +1,5 @@
 @echo off
 cd /d "%~dp0"
-python update_recipes_index.py
+python update_content_indexes.py recipes items
 pause
 
@@ -9,8 +9,13 @@ extends Resource
 ##	&"slug": &"human_readable,
 ##	&"id": 123,
 ##	&"path": &"res://item.tres" or value ?
+##	&"hash": "sha256 of the resource's canonical content",
 ##}
-## 
+## Deleted files leave {&"deleted": true, &"id": 123, &"slug": ...} so their
+## id is never reused. version is derived from the Merkle root of all entries
+## (see update_content_indexes.py), so equal versions mean equal content.
+## It is a hash, not a counter: a newer index can have a smaller version, so
+## only compare versions for equality (== / !=), never with < or >.
 @export var entries: Array[Dictionary]
 
 @export var scan_path: String
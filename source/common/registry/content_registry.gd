@@ -4,6 +4,7 @@ extends RefCounted
 
 var _id_to_path: Dictionary[int, StringName]
 var _slug_to_id: Dictionary[StringName, int]
+var _id_to_hash: Dictionary[int, String]
 
 
 func _init(content_index: ContentIndex) -> void:
@@ -17,6 +18,7 @@ func load_content_index(content_index: ContentIndex) -> void:
 		var id: int = entry[&"id"]
 		_id_to_path[id] = entry[&"path"]
 		_slug_to_id[entry[&"slug"]] = id
+		_id_to_hash[id] = entry.get(&"hash", "")
 
 
 func id_from_slug(slug: StringName) -> int:
@@ -37,3 +39,20 @@ func has_id(id: int) -> bool:
 
 func has_slug(slug: StringName) -> bool:
 	return _slug_to_id.has(slug)
+
+
+func hash_from_id(id: int) -> String:
+	return _id_to_hash.get(id, "")
+
+
+## Ids whose content hash differs from `hashes` (id -> hash, e.g. kept from
+## a previous version of the index), including ids added or removed since.
+func changed_ids(hashes: Dictionary) -> PackedInt64Array:
+	var changed := PackedInt64Array()
+	for id: int in _id_to_hash:
+		if hashes.get(id, "") != _id_to_hash[id]:
+			changed.append(id)
+	for id: int in hashes:
+		if not _id_to_hash.has(id):
+			changed.append(id)
+	return changed
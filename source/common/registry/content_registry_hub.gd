@@ -29,6 +29,8 @@ static func registry_of(content_name: StringName) -> ContentRegistry:
 	return _content_by_name.get(content_name, null)
 
 
+## Merkle-derived content hash of the index, or 0 if it is not registered.
+## Not monotonic: compare only for equality to detect changed content.
 static func version_of(content_name: StringName) -> int:
 	return _versions.get(content_name, 0)
 
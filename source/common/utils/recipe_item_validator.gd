@@ -19,6 +19,11 @@ var total_items: int = 0
 var total_issues: int = 0
 
 
+## Tombstones ({deleted, id, slug}) only keep a removed file's id taken.
+static func _is_live_entry(entry: Dictionary) -> bool:
+	return not entry.get(&"deleted", false)
+
+
 func validate_all() -> void:
 	print("=== Starting Recipe & Item Validation ===")
 	
@@ -37,9 +42,10 @@ func validate_all() -> void:
 	# Collect all valid item slugs
 	var valid_item_slugs: Dictionary = {}  # slug -> item_id
 	var items_index: ContentIndex = load("res://source/common/registry/indexes/items_index.tres")
-	total_items = items_index.entries.size()
+	var item_entries: Array = items_index.entries.filter(_is_live_entry)
+	total_items = item_entries.size()
 	
-	for entry in items_index.entries:
+	for entry in item_entries:
 		var slug: StringName = entry.get(&"slug", &"")
 		var id: int = entry.get(&"id", 0)
 		if slug != &"":
@@ -49,7 +55,8 @@ func validate_all() -> void:
 	
 	# Collect all recipe data
 	var recipes_index: ContentIndex = load("res://source/common/registry/indexes/recipes_index.tres")
-	total_recipes = recipes_index.entries.size()
+	var recipe_entries: Array = recipes_index.entries.filter(_is_live_entry)
+	total_recipes = recipe_entries.size()
 	
 	var recipes_data: Array[Dictionary] = []
 	var items_produced_by_recipes: Dictionary = {}  # item_slug -> [recipe_ids]
@@ -57,7 +64,7 @@ func validate_all() -> void:
 	
 	print("Loading %d recipes..." % total_recipes)
 	
-	for entry in recipes_index.entries:
+	for entry in recipe_entries:
 		var recipe_id: int = entry.get(&"id", 0)
 		var recipe_path: String = entry.get(&"path", "")
 		var recipe: CraftingRecipe = ContentRegistryHub.load_by_id(&"recipes", recipe_id)
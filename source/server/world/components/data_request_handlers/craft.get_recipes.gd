@@ -35,6 +35,7 @@ func data_request_handler(
 	var response = {
 		"player_class": player_class,
 		"player_level": player_level,
+		# Content hash, not a counter: clients should refetch when it differs (!=).
 		"recipe_version": ContentRegistryHub.version_of(&"recipes")
 	}
 	
@@ -0,0 +1,7 @@
+"""
+Offline Python tooling for the TinyMMO project.
+
+Runs without the Godot runtime: content parsing and validation, network
+analysis and simulation helpers. Scripts at the project root import it
+directly, e.g. `from tinymmo_tools.content import records`.
+"""
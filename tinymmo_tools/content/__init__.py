@@ -0,0 +1,3 @@
+"""
+Content pipeline: parsing and indexing of items, recipes and loot tables.
+"""
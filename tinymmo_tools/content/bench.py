@@ -0,0 +1,144 @@
+"""
+Benchmark the shared tokenizer against the regex parsers it replaced.
+
+The legacy functions below are frozen copies of what validate_recipes.py,
+validate_economy_balance.py and generate_item_metadata.py used to run. Each
+tool scanned the tree on its own, so the legacy total is the sum of every
+tool's pass, while the shared parser reads each file once.
+
+Usage:
+    python -m tinymmo_tools.content.bench [--repeat N]
+"""
+
+import argparse
+import re
+import time
+from pathlib import Path
+
+from .. import paths
+from . import records, scan
+
+
+_LEGACY_RECIPE_PATTERNS = {
+    'slug': r'slug\s*=\s*(.+)',
+    'recipe_name': r'recipe_name\s*=\s*(.+)',
+    'description': r'description\s*=\s*"([^"]*)"',
+    'required_class': r'required_class\s*=\s*"([^"]*)"',
+    'required_level': r'required_level\s*=\s*(\d+)',
+    'gold_cost': r'gold_cost\s*=\s*(\d+)',
+    'energy_cost': r'energy_cost\s*=\s*([0-9.]+)',
+    'input_1_slug': r'input_1_slug\s*=\s*(.+)',
+    'input_1_quantity': r'input_1_quantity\s*=\s*(\d+)',
+    'input_2_slug': r'input_2_slug\s*=\s*(.+)',
+    'input_2_quantity': r'input_2_quantity\s*=\s*(\d+)',
+    'input_3_slug': r'input_3_slug\s*=\s*(.+)',
+    'input_3_quantity': r'input_3_quantity\s*=\s*(\d+)',
+    'output_1_slug': r'output_1_slug\s*=\s*(.+)',
+    'output_1_quantity': r'output_1_quantity\s*=\s*(\d+)',
+    'output_2_slug': r'output_2_slug\s*=\s*(.+)',
+    'output_2_quantity': r'output_2_quantity\s*=\s*(\d+)',
+}
+
+
+def legacy_validate_recipe(path):
+    content = Path(path).read_text(encoding='utf-8')
+    return {key: m.group(1) for key, pattern in _LEGACY_RECIPE_PATTERNS.items()
+            if (m := re.search(pattern, content))}
+
+
+def legacy_validate_item(path):
+    content = Path(path).read_text(encoding='utf-8')
+    name = re.search(r'item_name\s*=\s*(.+)', content)
+    tags = re.search(r'tags\s*=\s*\[([^\]]*)\]', content)
+    return name, tags
+
+
+def legacy_economy_recipe(path):
+    content = Path(path).read_text(encoding='utf-8')
+    found = [re.search(r'required_level = (\d+)', content),
+             re.search(r'required_class = "([^"]+)"', content),
+             re.search(r'recipe_name = &"([^"]+)"', content)]
+    for i in range(1, 4):
+        found.append(re.search(f'input_{i}_slug = &"([^"]*)"', content))
+        found.append(re.search(f'input_{i}_quantity = (\\d+)', content))
+    return found
+
+
+def legacy_economy_item(path):
+    content = Path(path).read_text(encoding='utf-8')
+    return [re.search(r'item_name = &"([^"]+)"', content),
+            re.search(r'minimum_price = (\d+)', content),
+            re.search(r'can_sell = (true|false)', content)]
+
+
+def legacy_metadata_recipe(path):
+    content = Path(path).read_text(encoding='utf-8')
+    return [re.search(pattern, content) for pattern in (
+        r'recipe_name = &?"([^"]+)"', r'required_class = "([^"]+)"', r'required_level = (\d+)',
+        r'slug = &?"([^"]+)"', r'output_1_slug = &?"([^"]+)"', r'output_2_slug = &?"([^"]+)"')]
+
+
+def legacy_metadata_loot_table(path):
+    content = Path(path).read_text(encoding='utf-8')
+    slugs = []
+    for field_name in ('loot_entries', 'rare_bonus_entries'):
+        match = re.search(field_name + r' = Array\[Dictionary\]\(\[(.*?)\]\)', content, re.DOTALL)
+        if match:
+            for entry in re.finditer(r'\{([^}]+)\}', match.group(1)):
+                slugs.append(re.search(r'"item_slug":\s*&"([^"]+)"', entry.group(1)))
+    return slugs
+
+
+def _time(func, files, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for path in files:
+            func(path)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(project_root=paths.PROJECT_ROOT, repeat=5):
+    """Return [(label, files, seconds)] rows; the last two are the totals."""
+    files = scan.discover_content(project_root)
+    legacy = [
+        ("validate_recipes: recipes (17 re.search)", files['recipes'], legacy_validate_recipe),
+        ("validate_recipes: items", files['items'], legacy_validate_item),
+        ("economy_balance: recipes", files['recipes'], legacy_economy_recipe),
+        ("economy_balance: items", files['items'], legacy_economy_item),
+        ("item_metadata: recipes", files['recipes'], legacy_metadata_recipe),
+        ("item_metadata: loot tables", files['loot_tables'], legacy_metadata_loot_table),
+    ]
+    rows = [(label, len(group), _time(func, group, repeat)) for label, group, func in legacy]
+    legacy_files = sum(row[1] for row in rows)
+    legacy_total = sum(row[2] for row in rows)
+
+    every_file = files['items'] + files['recipes'] + files['loot_tables']
+    shared = _time(records.load_record, every_file, repeat)
+
+    rows.append(("legacy total (every tool scans)", legacy_files, legacy_total))
+    rows.append(("shared tokenizer (one pass per file)", len(every_file), shared))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--repeat', type=int, default=5, help="best-of-N timing (default: 5)")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("TRES PARSER BENCHMARK")
+    print("=" * 70)
+    rows = run(repeat=args.repeat)
+    print(f"{'Parser':<42} {'Files':>6} {'ms':>9} {'us/file':>9}")
+    print("-" * 70)
+    for label, count, seconds in rows:
+        print(f"{label:<42} {count:>6} {seconds * 1000:>9.1f} {seconds * 1e6 / max(count, 1):>9.1f}")
+    legacy_total, shared = rows[-2][2], rows[-1][2]
+    print("-" * 70)
+    print(f"Full content scan speedup: {legacy_total / shared:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+"""
+Persistent parse cache for content files.
+
+Parsed records are stored in one pickle under .content_cache/, keyed by
+project-relative path together with (mtime_ns, size, sha256). On a warm
+run a file whose stat is unchanged is served without being opened; a file
+whose stat changed is re-hashed and only re-parsed if its bytes differ.
+The whole cache is dropped when the parser or record code changes.
+"""
+
+import hashlib
+import io
+import os
+import pickle
+import time
+from pathlib import Path
+
+from .. import paths
+from . import hashing, records, tres
+
+
+CACHE_DIR = paths.PROJECT_ROOT / ".content_cache"
+CACHE_PATH = CACHE_DIR / "records.pickle"
+HASH_CACHE_PATH = CACHE_DIR / "hashes.pickle"
+
+# Files modified this close to the previous save may have changed again
+# within the same mtime tick, so they are always re-hashed (as git does).
+RACY_WINDOW_NS = 2_000_000_000
+
+
+def parser_fingerprint():
+    """Hash of the parser sources; a new parser invalidates every entry."""
+    digest = hashlib.sha256()
+    for module in (tres, records):
+        with open(module.__file__, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _hash_fingerprint():
+    digest = hashlib.sha256(parser_fingerprint().encode())
+    with open(hashing.__file__, 'rb') as f:
+        digest.update(f.read())
+    return digest.hexdigest()
+
+
+def ensure_cache_dir(directory=CACHE_DIR):
+    """Create the cache directory, hidden from the Godot editor."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    gdignore = directory / ".gdignore"
+    if not gdignore.exists():
+        gdignore.touch()
+
+
+def project_key(path, root_prefix):
+    """Project-relative, forward-slash key of `path` (`root_prefix` ends with os.sep)."""
+    absolute = os.path.abspath(path)
+    if absolute.startswith(root_prefix):
+        absolute = absolute[len(root_prefix):]
+    return absolute.replace(os.sep, '/')
+
+
+def read_and_parse(path, known_digest=None):
+    """Hash `path` and parse it unless its digest equals `known_digest`.
+
+    Returns (digest, record, reused). Module-level so process pools can
+    run it.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+    if digest == known_digest:
+        return digest, None, True
+    text = data.decode('utf-8-sig')
+    record = records.record_from_resource(tres.parse_stream(io.StringIO(text), str(path)))
+    return digest, record, False
+
+
+class _FileCache:
+    """Per-file entries keyed by project path, starting with (mtime_ns, size, ...).
+
+    The pickle is dropped when `fingerprint` changes; subclasses pass the
+    fingerprint of the code their entries depend on.
+    """
+
+    label = "cache"
+
+    def __init__(self, path, project_root, enabled, fingerprint):
+        self.path = Path(path)
+        self.project_root = Path(project_root).resolve()
+        self._root_prefix = str(self.project_root) + os.sep
+        self.enabled = enabled
+        self.entries = {}
+        self._saved_at_ns = 0
+        self._dirty = False
+        self._fingerprint = fingerprint
+        if enabled:
+            self._read()
+
+    def _read(self):
+        try:
+            with open(self.path, 'rb') as f:
+                data = pickle.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"Ignoring unreadable {self.label} {self.path}: {e}")
+            return
+        if data.get('fingerprint') == self._fingerprint:
+            self.entries = data['entries']
+            self._saved_at_ns = data['saved_at_ns']
+
+    def _key(self, path):
+        return project_key(path, self._root_prefix)
+
+    def is_fresh(self, stat, entry):
+        return (entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size
+                and stat.st_mtime_ns < self._saved_at_ns - RACY_WINDOW_NS)
+
+    def save(self):
+        """Write the cache atomically, dropping entries for deleted files."""
+        if not self.enabled or not self._dirty:
+            return
+        for key in [k for k in self.entries if not (self.project_root / k).exists()]:
+            del self.entries[key]
+        ensure_cache_dir(self.path.parent)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({
+                'fingerprint': self._fingerprint,
+                'saved_at_ns': time.time_ns(),
+                'entries': self.entries,
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.save()
+
+
+class ParseCache(_FileCache):
+    """Map content files to their parsed records, persisting across runs.
+
+    Use as a context manager, or call save() when done:
+
+        with ParseCache() as cache:
+            recipe = cache.load(path)
+    """
+
+    label = "parse cache"
+
+    def __init__(self, path=CACHE_PATH, project_root=paths.PROJECT_ROOT, enabled=True):
+        self.hits = 0
+        self.rehashed = 0
+        self.parsed = 0
+        super().__init__(path, project_root, enabled, parser_fingerprint())
+
+    def lookup(self, path):
+        """Stat `path` and fetch its entry without reading the file.
+
+        Returns (key, stat, entry), where `entry` is the stored
+        (mtime_ns, size, sha256, record) tuple or None.
+        """
+        key = self._key(path)
+        stat = os.stat(path)
+        entry = self.entries.get(key)
+        return key, stat, entry
+
+    def store(self, key, stat, entry, digest, record, reused):
+        """Record the outcome of read_and_parse() and return the record."""
+        if reused:
+            self.rehashed += 1
+            record = entry[3]
+        else:
+            self.parsed += 1
+        self.entries[key] = (stat.st_mtime_ns, stat.st_size, digest, record)
+        self._dirty = True
+        return record
+
+    def served(self, path, record):
+        """Count a cache hit and point the record at the caller's path."""
+        self.hits += 1
+        if record is not None and record.path != str(path):
+            record.path = str(path)
+        return record
+
+    def load(self, path):
+        """Return the typed record for `path` (see records.record_from_resource)."""
+        key, stat, entry = self.lookup(path)
+        if self.is_fresh(stat, entry):
+            return self.served(path, entry[3])
+        record = self.store(key, stat, entry, *read_and_parse(path, entry[2] if entry else None))
+        if record is not None and record.path != str(path):
+            record.path = str(path)
+        return record
+
+    def load_many(self, file_paths):
+        return [self.load(path) for path in file_paths]
+
+    def summary(self):
+        return f"parse cache: {self.hits} hits, {self.rehashed} re-hashed, {self.parsed} parsed"
+
+
+class HashCache(_FileCache):
+    """Canonical content hashes (see hashing.py) of any project file.
+
+    A file is only re-hashed when its stat changes. The cache is dropped
+    when the hashing or parser code changes.
+    """
+
+    label = "hash cache"
+
+    def __init__(self, path=HASH_CACHE_PATH, project_root=paths.PROJECT_ROOT, enabled=True):
+        self.hits = 0
+        self.hashed = 0
+        super().__init__(path, project_root, enabled, _hash_fingerprint())
+
+    def content_hash(self, path):
+        key = self._key(path)
+        stat = os.stat(path)
+        entry = self.entries.get(key)
+        if self.is_fresh(stat, entry):
+            self.hits += 1
+            return entry[2]
+        digest = hashing.content_hash(path)
+        self.hashed += 1
+        self.entries[key] = (stat.st_mtime_ns, stat.st_size, digest)
+        self._dirty = True
+        return digest
+
+    def summary(self):
+        return f"hash cache: {self.hits} hits, {self.hashed} hashed"
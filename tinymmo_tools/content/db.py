@@ -0,0 +1,350 @@
+"""
+SQLite content database compiled from items, recipes, loot tables and indexes.
+
+Every record the tools query lives in one file under .content_cache/, with
+indexes on slugs, ids, class and level, tags, and recipe input/output slugs.
+build() is incremental: rows of files whose (mtime_ns, size) are unchanged
+are kept, changed files are re-parsed (through the parse cache when one is
+given) and rows of deleted files are dropped.
+
+Usage:
+    python -m tinymmo_tools.content.db [--rebuild] [-j N]
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+from .. import paths
+from . import records, scan
+from .cache import CACHE_DIR, CACHE_PATH, RACY_WINDOW_NS, ParseCache, ensure_cache_dir, parser_fingerprint, project_key
+
+
+DB_PATH = CACHE_DIR / "content.sqlite"
+
+# Bump when SCHEMA or the row layout below changes.
+SCHEMA_VERSION = 3
+
+# (kind, directory, recursive)
+SOURCES = (
+    ('item', paths.ITEMS_DIR, True),
+    ('recipe', paths.RECIPES_DIR, True),
+    ('loot_table', paths.LOOT_TABLES_DIR, False),
+    ('index', paths.INDEXES_DIR, False),
+)
+
+SCHEMA = """
+CREATE TABLE meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE files (
+    path TEXT PRIMARY KEY,
+    directory TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX files_directory ON files(directory);
+
+CREATE TABLE items (
+    path TEXT PRIMARY KEY REFERENCES files(path) ON DELETE CASCADE,
+    slug TEXT NOT NULL,
+    folder TEXT NOT NULL,
+    script_class TEXT NOT NULL,
+    item_name TEXT NOT NULL,
+    description TEXT NOT NULL,
+    can_trade INTEGER NOT NULL,
+    can_sell INTEGER NOT NULL,
+    minimum_price INTEGER NOT NULL,
+    stack_limit INTEGER NOT NULL
+);
+CREATE INDEX items_slug ON items(slug);
+CREATE INDEX items_folder ON items(folder);
+
+CREATE TABLE item_tags (
+    path TEXT NOT NULL REFERENCES items(path) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (path, position)
+);
+CREATE INDEX item_tags_tag ON item_tags(tag);
+
+CREATE TABLE recipes (
+    path TEXT PRIMARY KEY REFERENCES files(path) ON DELETE CASCADE,
+    slug TEXT NOT NULL,
+    folder TEXT NOT NULL,
+    recipe_name TEXT NOT NULL,
+    description TEXT NOT NULL,
+    required_class TEXT NOT NULL,
+    required_level INTEGER NOT NULL,
+    gold_cost INTEGER NOT NULL,
+    energy_cost REAL NOT NULL
+);
+CREATE INDEX recipes_slug ON recipes(slug);
+CREATE INDEX recipes_class_level ON recipes(required_class, required_level);
+CREATE INDEX recipes_level ON recipes(required_level);
+
+-- Filled slots only, as returned by CraftingRecipe.get_inputs()/get_outputs().
+CREATE TABLE recipe_slots (
+    path TEXT NOT NULL REFERENCES recipes(path) ON DELETE CASCADE,
+    direction TEXT NOT NULL CHECK (direction IN ('input', 'output')),
+    slot INTEGER NOT NULL,
+    item_slug TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    PRIMARY KEY (path, direction, slot)
+);
+CREATE INDEX recipe_slots_item ON recipe_slots(item_slug, direction);
+
+CREATE TABLE recipe_tags (
+    path TEXT NOT NULL REFERENCES recipes(path) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (path, position)
+);
+CREATE INDEX recipe_tags_tag ON recipe_tags(tag);
+
+CREATE TABLE loot_tables (
+    path TEXT PRIMARY KEY REFERENCES files(path) ON DELETE CASCADE,
+    slug TEXT NOT NULL,
+    harvest_class TEXT NOT NULL,
+    tier INTEGER NOT NULL
+);
+CREATE INDEX loot_tables_class_tier ON loot_tables(harvest_class, tier);
+
+-- loot_entries have a weight, rare_bonus_entries a chance and fixed quantity.
+CREATE TABLE loot_drops (
+    path TEXT NOT NULL REFERENCES loot_tables(path) ON DELETE CASCADE,
+    is_rare INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    item_slug TEXT NOT NULL,
+    weight REAL,
+    chance REAL,
+    quantity_min INTEGER NOT NULL,
+    quantity_max INTEGER NOT NULL,
+    PRIMARY KEY (path, is_rare, position)
+);
+CREATE INDEX loot_drops_item ON loot_drops(item_slug);
+
+CREATE TABLE content_indexes (
+    path TEXT PRIMARY KEY REFERENCES files(path) ON DELETE CASCADE,
+    content_name TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    next_id INTEGER NOT NULL,
+    scan_path TEXT NOT NULL,
+    filters TEXT NOT NULL
+);
+CREATE INDEX content_indexes_name ON content_indexes(content_name);
+
+CREATE TABLE index_entries (
+    path TEXT NOT NULL REFERENCES content_indexes(path) ON DELETE CASCADE,
+    id INTEGER NOT NULL,
+    slug TEXT NOT NULL,
+    res_path TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    deleted INTEGER NOT NULL,
+    PRIMARY KEY (path, id)
+);
+CREATE INDEX index_entries_id ON index_entries(id);
+CREATE INDEX index_entries_slug ON index_entries(slug);
+CREATE INDEX index_entries_res_path ON index_entries(res_path);
+"""
+
+
+def _folder(key):
+    return key.rsplit('/', 2)[-2] if key.count('/') else ''
+
+
+def _insert_item(conn, key, item):
+    conn.execute(
+        "INSERT INTO items VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (key, item.slug, _folder(key), item.script_class, item.item_name, item.description,
+         item.can_trade, item.can_sell, item.minimum_price, item.stack_limit))
+    conn.executemany("INSERT INTO item_tags VALUES (?, ?, ?)",
+                     [(key, i, tag) for i, tag in enumerate(item.tags)])
+
+
+def _insert_recipe(conn, key, recipe):
+    conn.execute(
+        "INSERT INTO recipes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (key, recipe.slug, _folder(key), recipe.recipe_name, recipe.description,
+         recipe.required_class, recipe.required_level, recipe.gold_cost, recipe.energy_cost))
+    slots = [(key, 'input', i, slug, qty) for i, (slug, qty) in enumerate(recipe.inputs)]
+    slots += [(key, 'output', i, slug, qty) for i, (slug, qty) in enumerate(recipe.outputs)]
+    conn.executemany("INSERT INTO recipe_slots VALUES (?, ?, ?, ?, ?)", slots)
+    conn.executemany("INSERT INTO recipe_tags VALUES (?, ?, ?)",
+                     [(key, i, tag) for i, tag in enumerate(recipe.tags)])
+
+
+def _insert_loot_table(conn, key, table):
+    conn.execute("INSERT INTO loot_tables VALUES (?, ?, ?, ?)",
+                 (key, table.slug, table.harvest_class, table.tier))
+    drops = [(key, False, i, e.item_slug, e.weight, None, e.quantity_min, e.quantity_max)
+             for i, e in enumerate(table.loot_entries)]
+    drops += [(key, True, i, b.item_slug, None, b.chance, b.quantity, b.quantity)
+              for i, b in enumerate(table.rare_bonus_entries)]
+    conn.executemany("INSERT INTO loot_drops VALUES (?, ?, ?, ?, ?, ?, ?, ?)", drops)
+
+
+def _insert_content_index(conn, key, index):
+    conn.execute("INSERT INTO content_indexes VALUES (?, ?, ?, ?, ?, ?)",
+                 (key, index.content_name, index.version, index.next_id,
+                  index.scan_path, json.dumps(index.filters)))
+    conn.executemany("INSERT INTO index_entries VALUES (?, ?, ?, ?, ?, ?)",
+                     [(key, e.id, e.slug, e.path, e.hash, e.deleted) for e in index.entries])
+
+
+_INSERTERS = {
+    records.ItemRecord: _insert_item,
+    records.RecipeRecord: _insert_recipe,
+    records.LootTableRecord: _insert_loot_table,
+    records.ContentIndexRecord: _insert_content_index,
+}
+
+
+class ContentDatabase:
+    """Incrementally compiled SQLite view of the game content.
+
+        with ContentDatabase() as db:
+            db.build()
+            rows = db.execute("SELECT slug FROM items WHERE folder = ?", ('materials',))
+
+    Row paths are project-relative with forward slashes. Pass ":memory:"
+    as `path` for a throwaway database.
+    """
+
+    def __init__(self, path=DB_PATH, project_root=paths.PROJECT_ROOT):
+        self.path = path
+        self.project_root = Path(project_root).resolve()
+        self._root_prefix = str(self.project_root) + os.sep
+        if str(path) != ':memory:':
+            ensure_cache_dir(Path(path).parent)
+        self.conn = sqlite3.connect(str(path))
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.unchanged = 0
+        self.updated = 0
+        self.removed = 0
+        self._prepare()
+
+    def _meta(self, key, default=None):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _prepare(self):
+        """Create the schema, or recreate it if the schema or parser changed."""
+        fingerprint = f"{SCHEMA_VERSION}:{parser_fingerprint()}"
+        tables = [row[0] for row in self.conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'")]
+        if 'meta' in tables and self._meta('fingerprint') == fingerprint:
+            return
+        with self.conn:
+            self.conn.execute("PRAGMA foreign_keys = OFF")
+            for table in tables:
+                self.conn.execute(f'DROP TABLE "{table}"')
+            self.conn.executescript(SCHEMA)
+            self.conn.execute("INSERT INTO meta VALUES ('fingerprint', ?)", (fingerprint,))
+            self.conn.execute("INSERT INTO meta VALUES ('built_at_ns', '0')")
+        self.conn.execute("PRAGMA foreign_keys = ON")
+
+    def _key(self, path):
+        return project_key(path, self._root_prefix)
+
+    def discover(self):
+        """Return {key: (kind, path)} for every content file on disk."""
+        found = {}
+        for kind, directory, recursive in SOURCES:
+            directory = self.project_root / directory.relative_to(paths.PROJECT_ROOT)
+            for path in scan.discover(directory, recursive=recursive):
+                found.setdefault(self._key(path), (kind, path))
+        return found
+
+    def build(self, cache=None, jobs=None):
+        """Bring the database up to date with the files on disk."""
+        started_ns = time.time_ns()
+        built_at_ns = int(self._meta('built_at_ns', 0))
+        known = {row[0]: (row[1], row[2])
+                 for row in self.conn.execute("SELECT path, mtime_ns, size FROM files")}
+        discovered = self.discover()
+
+        changed = []
+        for key, (kind, path) in discovered.items():
+            stat = os.stat(path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if known.get(key) == signature and stat.st_mtime_ns < built_at_ns - RACY_WINDOW_NS:
+                continue
+            changed.append((key, kind, path, signature))
+        removed = [key for key in known if key not in discovered]
+
+        parsed = scan.scan([path for _, _, path, _ in changed], cache, jobs)
+
+        with self.conn:
+            self.conn.executemany("DELETE FROM files WHERE path = ?",
+                                  [(key,) for key in removed] + [(key,) for key, *_ in changed])
+            for (key, kind, path, signature), record in zip(changed, parsed):
+                # Parse failures and untracked resources get no row, so
+                # they are looked at again next time.
+                if record is None:
+                    continue
+                self.conn.execute("INSERT INTO files VALUES (?, ?, ?, ?, ?)",
+                                  (key, key.rpartition('/')[0], kind, *signature))
+                _INSERTERS[type(record)](self.conn, key, record)
+            self.conn.execute("UPDATE meta SET value = ? WHERE key = 'built_at_ns'", (str(started_ns),))
+
+        self.unchanged = len(discovered) - len(changed)
+        self.updated = sum(1 for record in parsed if record is not None)
+        self.removed = len(removed)
+        return self
+
+    def execute(self, sql, params=()):
+        return self.conn.execute(sql, params)
+
+    def summary(self):
+        return f"content db: {self.unchanged} unchanged, {self.updated} updated, {self.removed} removed"
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_database(use_cache=True, jobs=None, project_root=paths.PROJECT_ROOT):
+    """Open and build the content database the scripts share.
+
+    The database and parse cache live under project_root's .content_cache/.
+    With use_cache=False everything is re-parsed into an in-memory database.
+    """
+    cache_dir = Path(project_root) / CACHE_DIR.relative_to(paths.PROJECT_ROOT)
+    db_path = cache_dir / DB_PATH.name
+    db = ContentDatabase(db_path if use_cache else ':memory:', project_root)
+    with ParseCache(cache_dir / CACHE_PATH.name, project_root, enabled=use_cache) as cache:
+        db.build(cache, jobs)
+    print(db.summary())
+    return db
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rebuild', action='store_true', help="delete the database and compile it from scratch")
+    scan.add_jobs_argument(parser)
+    args = parser.parse_args()
+
+    if args.rebuild and DB_PATH.exists():
+        DB_PATH.unlink()
+    with open_database(jobs=args.jobs) as db:
+        for table in ('items', 'recipes', 'loot_tables', 'content_indexes', 'index_entries'):
+            count = db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            print(f"  {table:<16}: {count:>4} rows")
+        print(f"Database: {db.path}")
+
+
+if __name__ == '__main__':
+    main()
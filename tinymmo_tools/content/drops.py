@@ -0,0 +1,236 @@
+"""
+Exact per-roll drop distributions of HarvestLootTable.roll_loot().
+
+Each loot entry is an independent Bernoulli(weight / 100) times a uniform
+randi_range(quantity_min, quantity_max); each rare bonus an independent
+Bernoulli(chance) times its fixed quantity. The distribution of an item is
+the convolution of the entries that drop it, and the distribution of the
+total number of items per roll the convolution of all entries, so drop
+rates, means, variances and percentiles come out exactly and instantly.
+
+self_check() samples rolls with the vectorized simulator (sim/loot.py,
+needs NumPy) and tests them against the exact distributions.
+
+Usage:
+    python -m tinymmo_tools.content.drops [table ...] [--check] [--rolls N] [--seed S] [--no-cache] [-j N]
+"""
+
+import argparse
+import json
+from dataclasses import dataclass, field
+
+from . import records, scan
+from .db import open_database
+
+
+# |z| beyond this fails the self-check; loose enough for hundreds of tests.
+CHECK_Z = 4.5
+# Chi-square bins with fewer expected samples are merged into their neighbour.
+MIN_EXPECTED = 5.0
+
+
+def convolve(a, b):
+    """Distribution of the sum of two independent quantities."""
+    result = [0.0] * (len(a) + len(b) - 1)
+    for i, p in enumerate(a):
+        if p:
+            for j, q in enumerate(b):
+                result[i + j] += p * q
+    return result
+
+
+def entry_distribution(chance, quantity_min, quantity_max):
+    """P(quantity) of one entry: hits with `chance`, then uniform in [min, max]."""
+    chance = min(max(chance, 0.0), 1.0)
+    quantity_min = max(quantity_min, 0)
+    quantity_max = max(quantity_max, quantity_min)
+    distribution = [0.0] * (quantity_max + 1)
+    distribution[0] = 1.0 - chance
+    share = chance / (quantity_max - quantity_min + 1)
+    for quantity in range(quantity_min, quantity_max + 1):
+        distribution[quantity] += share
+    return distribution
+
+
+@dataclass
+class DropDistribution:
+    """Exact distribution of how many of an item one roll yields."""
+    item_slug: str
+    probabilities: list = field(default_factory=lambda: [1.0])
+
+    @property
+    def drop_rate(self):
+        return 1.0 - self.probabilities[0]
+
+    @property
+    def mean(self):
+        return sum(quantity * p for quantity, p in enumerate(self.probabilities))
+
+    @property
+    def variance(self):
+        mean = self.mean
+        return sum(quantity * quantity * p for quantity, p in enumerate(self.probabilities)) - mean * mean
+
+    def percentile(self, percent):
+        """Smallest quantity q with P(X <= q) >= percent / 100."""
+        target = percent / 100.0 - 1e-12
+        cumulative = 0.0
+        for quantity, p in enumerate(self.probabilities):
+            cumulative += p
+            if cumulative >= target:
+                return quantity
+        return len(self.probabilities) - 1
+
+    def add(self, distribution):
+        self.probabilities = convolve(self.probabilities, distribution)
+
+
+@dataclass
+class TableDrops:
+    """Exact per-roll drops of one loot table."""
+    slug: str
+    harvest_class: str
+    tier: int
+    weight_total: float
+    items: dict = field(default_factory=dict)
+    total: DropDistribution = field(default_factory=lambda: DropDistribution(''))
+
+
+def table_drops(table):
+    """TableDrops of a records.LootTableRecord, items in first-seen order."""
+    drops = TableDrops(table.slug, table.harvest_class, table.tier,
+                       sum(entry.weight for entry in table.loot_entries if entry.item_slug))
+    entries = [(entry.item_slug, entry_distribution(entry.weight / 100.0, entry.quantity_min, entry.quantity_max))
+               for entry in table.loot_entries]
+    entries += [(bonus.item_slug, entry_distribution(bonus.chance, bonus.quantity, bonus.quantity))
+                for bonus in table.rare_bonus_entries]
+    for item_slug, distribution in entries:
+        if not item_slug:
+            continue
+        drops.items.setdefault(item_slug, DropDistribution(item_slug)).add(distribution)
+        drops.total.add(distribution)
+    return drops
+
+
+def load_table_drops(db, paths=None):
+    """TableDrops of every loot table in the content database (or only `paths`), by tier then class."""
+    tables = {}
+    for row in db.execute("""
+        SELECT t.path, t.slug, t.harvest_class, t.tier, d.is_rare, d.item_slug, d.weight, d.chance,
+               d.quantity_min, d.quantity_max
+        FROM loot_tables t LEFT JOIN loot_drops d ON d.path = t.path
+        WHERE ?1 IS NULL OR t.path IN (SELECT value FROM json_each(?1))
+        ORDER BY t.tier, t.harvest_class, t.slug, d.is_rare, d.position
+    """, (None if paths is None else json.dumps(sorted(paths)),)):
+        table = tables.get(row['path'])
+        if table is None:
+            table = tables[row['path']] = records.LootTableRecord(
+                row['path'], row['slug'], row['harvest_class'], row['tier'])
+        if row['item_slug'] is None:
+            continue
+        if row['is_rare']:
+            table.rare_bonus_entries.append(records.RareBonusEntry(row['item_slug'], row['chance'], row['quantity_min']))
+        else:
+            table.loot_entries.append(records.LootEntry(row['item_slug'], row['weight'], row['quantity_min'],
+                                                        row['quantity_max']))
+    return [table_drops(table) for table in tables.values()]
+
+
+def _chi_square_limit(degrees, z=CHECK_Z):
+    """Upper chi-square quantile matching a one-sided normal z (Wilson-Hilferty)."""
+    scale = 2.0 / (9.0 * degrees)
+    return degrees * (1.0 - scale + z * scale ** 0.5) ** 3
+
+
+def _chi_square(counts, probabilities, rolls):
+    """Chi-square statistic and degrees of freedom, merging sparse bins."""
+    bins = []
+    observed = expected = 0.0
+    for quantity in range(max(len(counts), len(probabilities))):
+        observed += counts[quantity] if quantity < len(counts) else 0
+        expected += rolls * probabilities[quantity] if quantity < len(probabilities) else 0.0
+        if expected >= MIN_EXPECTED:
+            bins.append((observed, expected))
+            observed = expected = 0.0
+    if bins and (observed or expected):
+        last_observed, last_expected = bins.pop()
+        bins.append((last_observed + observed, last_expected + expected))
+    statistic = sum((o - e) ** 2 / e for o, e in bins if e > 0)
+    return statistic, len(bins) - 1
+
+
+def self_check(drops, rolls=1_000_000, seed=None, db=None):
+    """Sample every table with the simulator and test it against the exact drops.
+
+    Returns a list of failure messages (empty when everything agrees): a
+    mean more than CHECK_Z standard errors off, or a chi-square statistic
+    past the matching quantile.
+    """
+    import numpy as np
+
+    from ..sim import loot
+
+    sampled = {table.slug: table for table in loot.load_loot_tables(db)}
+    rng = np.random.default_rng(seed)
+    failures = []
+    for table in drops:
+        if table.slug not in sampled:
+            continue
+        sim_table = sampled[table.slug]
+        amounts = loot.roll_batch(sim_table, rng, rolls)
+        for row, item_slug in enumerate(sim_table.items):
+            exact = table.items[item_slug]
+            counts = np.bincount(amounts[row]).tolist()
+            sample_mean = float(amounts[row].mean())
+            error = (exact.variance / rolls) ** 0.5
+            if error > 0 and abs(sample_mean - exact.mean) > CHECK_Z * error:
+                failures.append(f"{table.slug} {item_slug}: sampled mean {sample_mean:.5f}, "
+                                f"exact {exact.mean:.5f} (> {CHECK_Z} standard errors)")
+            statistic, degrees = _chi_square(counts, exact.probabilities, rolls)
+            if degrees > 0 and statistic > _chi_square_limit(degrees):
+                failures.append(f"{table.slug} {item_slug}: chi-square {statistic:.1f} "
+                                f"on {degrees} degrees of freedom")
+    return failures
+
+
+def print_table(table):
+    print(f"\n{table.slug} ({table.harvest_class} T{table.tier}): weights sum {table.weight_total:g}%, "
+          f"{table.total.mean:.4f} items/roll, {table.total.probabilities[0] * 100:.2f}% empty rolls")
+    print(f"  {'item':<20} {'drop%':>7} {'mean':>8} {'variance':>9} {'p50':>4} {'p95':>4} {'p99':>4}  P(quantity)")
+    for item in table.items.values():
+        shown = ', '.join(f"{q}: {p:.4f}" for q, p in enumerate(item.probabilities) if q and p)
+        print(f"  {item.item_slug:<20} {item.drop_rate * 100:>6.2f}% {item.mean:>8.4f} {item.variance:>9.4f}"
+              f" {item.percentile(50):>4} {item.percentile(95):>4} {item.percentile(99):>4}  {shown}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('tables', nargs='*', help="loot table slugs (default: all)")
+    parser.add_argument('--check', action='store_true', help="test the exact results against sampled rolls (NumPy)")
+    parser.add_argument('--rolls', type=int, default=1_000_000, help="rolls per table for --check (default: 1,000,000)")
+    parser.add_argument('--seed', type=int, default=None, help="random seed for --check")
+    parser.add_argument('--no-cache', action='store_true', help="re-parse everything into an in-memory database")
+    scan.add_jobs_argument(parser)
+    args = parser.parse_args()
+
+    with open_database(use_cache=not args.no_cache, jobs=args.jobs) as db:
+        drops = load_table_drops(db)
+        if args.tables:
+            unknown = sorted(set(args.tables) - {table.slug for table in drops})
+            if unknown:
+                parser.error(f"unknown loot tables: {', '.join(unknown)}")
+            drops = [table for table in drops if table.slug in args.tables]
+        for table in drops:
+            print_table(table)
+        if args.check:
+            failures = self_check(drops, args.rolls, args.seed, db)
+            print(f"\nSelf-check: {len(drops)} tables, {args.rolls:,} sampled rolls each")
+            for failure in failures:
+                print(f"  FAIL {failure}")
+            print("  all exact distributions agree with the samples" if not failures else f"  {len(failures)} failures")
+            if failures:
+                raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,358 @@
+"""
+Item dependency graph over CraftingRecipe inputs/outputs and loot table drops.
+
+Items are nodes; every recipe links each of its inputs to each of its
+outputs. An item that some HarvestLootTable drops, or that no recipe
+produces, is a raw material. On top of that the graph provides:
+
+- topological_order() and cycles() (strongly connected components);
+- bill(slug): the raw materials, gold and energy one unit really costs,
+  following the cheapest-level recipe for every crafted input. Bills are
+  memoized, so costing every item computes each one once;
+- reachability(): the lowest level at which each class can obtain an item
+  on its own, plus the level at which it exists at all when players trade.
+
+Usage:
+    python -m tinymmo_tools.content.graph [slug ...] [--all] [--no-cache] [-j N]
+"""
+
+import argparse
+import graphlib
+import heapq
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from fractions import Fraction
+
+from . import scan
+from .db import open_database
+
+
+CLASSES = ('miner', 'forager', 'trapper')
+
+# Key of the traded (any class) level in reachability() results.
+ANY_CLASS = 'any'
+
+
+def tier_level(tier):
+    """Lowest player level of a harvest tier (T1: 1-5, T2: 6-10, ...)."""
+    return (tier - 1) * 5 + 1
+
+
+@dataclass
+class Recipe:
+    path: str
+    slug: str
+    required_class: str
+    required_level: int
+    gold_cost: int
+    energy_cost: float
+    inputs: list = field(default_factory=list)
+    outputs: list = field(default_factory=list)
+
+    def output_quantity(self, item_slug):
+        return sum(quantity for slug, quantity in self.outputs if slug == item_slug)
+
+
+@dataclass
+class HarvestSource:
+    table: str
+    harvest_class: str
+    tier: int
+
+    @property
+    def level(self):
+        return tier_level(self.tier)
+
+
+@dataclass
+class Bill:
+    """What one unit of an item costs, in raw materials, gold and energy."""
+    raw: dict = field(default_factory=dict)
+    gold: Fraction = Fraction(0)
+    energy: Fraction = Fraction(0)
+    crafts: Fraction = Fraction(0)
+    # Items met again while their own bill was being computed.
+    cyclic: set = field(default_factory=set)
+
+    def add(self, other, times):
+        for slug, quantity in other.raw.items():
+            self.raw[slug] = self.raw.get(slug, 0) + quantity * times
+        self.gold += other.gold * times
+        self.energy += other.energy * times
+        self.crafts += other.crafts * times
+        self.cyclic |= other.cyclic
+
+
+class ContentGraph:
+    """Dependency graph of items, recipes and harvest sources."""
+
+    def __init__(self, items, recipes, sources):
+        self.items = set(items)
+        self.recipes = recipes
+        self.sources = sources
+        self.producers = defaultdict(list)
+        self.consumers = defaultdict(list)
+        for recipe in recipes:
+            for slug, _ in recipe.outputs:
+                self.producers[slug].append(recipe)
+            for slug in {slug for slug, _ in recipe.inputs}:
+                self.consumers[slug].append(recipe)
+        self.slugs = sorted(self.items | set(self.producers) | set(self.consumers) | set(sources))
+        self._bills = {}
+        self._in_progress = set()
+        self._reachability = None
+
+    @classmethod
+    def from_database(cls, db):
+        items = [slug for (slug,) in db.execute("SELECT DISTINCT slug FROM items")]
+        recipes = {}
+        for row in db.execute("""
+            SELECT path, slug, required_class, required_level, gold_cost, energy_cost
+            FROM recipes ORDER BY path
+        """):
+            recipes[row['path']] = Recipe(row['path'], row['slug'], row['required_class'],
+                                          row['required_level'], row['gold_cost'], row['energy_cost'])
+        for row in db.execute("""
+            SELECT path, direction, item_slug, quantity FROM recipe_slots ORDER BY path, direction, slot
+        """):
+            slots = recipes[row['path']].inputs if row['direction'] == 'input' else recipes[row['path']].outputs
+            slots.append((row['item_slug'], row['quantity']))
+        sources = defaultdict(list)
+        for row in db.execute("""
+            SELECT DISTINCT d.item_slug, t.slug, t.harvest_class, t.tier
+            FROM loot_drops d JOIN loot_tables t ON t.path = d.path
+            ORDER BY t.tier, t.harvest_class, t.slug
+        """):
+            sources[row['item_slug']].append(HarvestSource(row['slug'], row['harvest_class'], row['tier']))
+        return cls(items, list(recipes.values()), dict(sources))
+
+    def is_raw(self, slug):
+        return slug in self.sources or slug not in self.producers
+
+    def recipe_for(self, slug):
+        """The recipe a bill follows: lowest level, primary output first, then path."""
+        producers = self.producers.get(slug)
+        if not producers or slug in self.sources:
+            return None
+        return min(producers, key=lambda recipe: (recipe.required_level, recipe.outputs[0][0] != slug, recipe.path))
+
+    def edges(self):
+        """Map each item to the set of items it is a direct input of."""
+        successors = {slug: set() for slug in self.slugs}
+        for recipe in self.recipes:
+            for input_slug, _ in recipe.inputs:
+                successors[input_slug].update(slug for slug, _ in recipe.outputs)
+        return successors
+
+    def cycles(self):
+        """Strongly connected components that form cycles, as sorted slug lists."""
+        successors = {slug: sorted(targets) for slug, targets in self.edges().items()}
+        index = {}
+        lowlink = {}
+        stack = []
+        on_stack = set()
+        found = []
+        counter = 0
+        # Iterative Tarjan: recipe chains are deep enough to hit the recursion limit.
+        for root in self.slugs:
+            if root in index:
+                continue
+            work = [(root, 0)]
+            while work:
+                slug, position = work.pop()
+                if position == 0:
+                    index[slug] = lowlink[slug] = counter
+                    counter += 1
+                    stack.append(slug)
+                    on_stack.add(slug)
+                targets = successors[slug]
+                if position < len(targets):
+                    work.append((slug, position + 1))
+                    target = targets[position]
+                    if target not in index:
+                        work.append((target, 0))
+                    elif target in on_stack:
+                        lowlink[slug] = min(lowlink[slug], index[target])
+                    continue
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[slug])
+                if lowlink[slug] == index[slug]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == slug:
+                            break
+                    if len(component) > 1 or slug in successors[slug]:
+                        found.append(sorted(component))
+        return sorted(found)
+
+    def topological_order(self):
+        """Every item after all of its inputs; raises graphlib.CycleError on a cycle."""
+        predecessors = {slug: set() for slug in self.slugs}
+        for slug, targets in self.edges().items():
+            for target in targets:
+                predecessors[target].add(slug)
+        return list(graphlib.TopologicalSorter(predecessors).static_order())
+
+    def bill(self, slug):
+        """Memoized Bill for one unit of `slug`."""
+        bill = self._bills.get(slug)
+        if bill is not None:
+            return bill
+        recipe = self.recipe_for(slug)
+        if recipe is None:
+            bill = Bill(raw={slug: Fraction(1)})
+        elif slug in self._in_progress:
+            # Not cached: the item is only raw from inside its own cycle.
+            return Bill(raw={slug: Fraction(1)}, cyclic={slug})
+        else:
+            self._in_progress.add(slug)
+            try:
+                per_unit = Fraction(1, recipe.output_quantity(slug))
+                bill = Bill(gold=recipe.gold_cost * per_unit, energy=Fraction(recipe.energy_cost) * per_unit,
+                            crafts=per_unit)
+                for input_slug, quantity in recipe.inputs:
+                    bill.add(self.bill(input_slug), quantity * per_unit)
+            finally:
+                self._in_progress.discard(slug)
+        self._bills[slug] = bill
+        return bill
+
+    def bills(self):
+        return {slug: self.bill(slug) for slug in self.slugs}
+
+    def _reachable_levels(self, harvest_class=None):
+        """Lowest level each item can be obtained at, by one class or (None) by trading.
+
+        Knuth's generalization of Dijkstra: an item settles at the smallest
+        max(recipe level, input levels) over its recipes, or its harvest tier.
+        """
+        allowed = lambda name: harvest_class is None or name == harvest_class
+        heap = [(source.level, slug) for slug, sources in self.sources.items()
+                for source in sources if allowed(source.harvest_class)]
+        waiting = {}
+        for recipe in self.recipes:
+            if not allowed(recipe.required_class):
+                continue
+            waiting[recipe.path] = len({slug for slug, _ in recipe.inputs})
+            if not recipe.inputs:
+                heap.extend((recipe.required_level, slug) for slug, _ in recipe.outputs)
+        heapq.heapify(heap)
+        levels = {}
+        while heap:
+            level, slug = heapq.heappop(heap)
+            if slug in levels:
+                continue
+            levels[slug] = level
+            for recipe in self.consumers.get(slug, ()):
+                if recipe.path not in waiting:
+                    continue
+                waiting[recipe.path] -= 1
+                if waiting[recipe.path] == 0:
+                    needed = max([recipe.required_level] + [levels[s] for s, _ in recipe.inputs])
+                    for output_slug, _ in recipe.outputs:
+                        if output_slug not in levels:
+                            heapq.heappush(heap, (needed, output_slug))
+        return levels
+
+    def reachability(self):
+        """Map slug -> {class or ANY_CLASS: lowest level}; unreachable keys are left out."""
+        if self._reachability is None:
+            result = {slug: {} for slug in self.slugs}
+            for harvest_class in CLASSES + (None,):
+                for slug, level in self._reachable_levels(harvest_class).items():
+                    result[slug][harvest_class or ANY_CLASS] = level
+            self._reachability = result
+        return self._reachability
+
+    def raw_class(self, slug):
+        """Class that harvests a raw material at the lowest tier, or None."""
+        sources = self.sources.get(slug)
+        if not sources:
+            return None
+        return min(sources, key=lambda source: (source.tier, source.harvest_class)).harvest_class
+
+
+def _quantity(value):
+    value = float(value)
+    return f"{value:g}" if value == int(value) else f"{value:.2f}"
+
+
+def print_bill(graph, slug):
+    bill = graph.bill(slug)
+    recipe = graph.recipe_for(slug)
+    reach = graph.reachability().get(slug, {})
+    print(f"\n{slug}")
+    if recipe is None:
+        print(f"  raw material ({graph.raw_class(slug) or 'no harvest source'})")
+    else:
+        print(f"  via {recipe.slug} ({recipe.required_class} L{recipe.required_level})")
+    solo = ', '.join(f"{name} L{reach[name]}" for name in CLASSES if name in reach)
+    traded = f"L{reach[ANY_CLASS]}" if ANY_CLASS in reach else "never"
+    print(f"  reachable: {solo or 'no class alone'}; with trading: {traded}")
+    by_class = defaultdict(list)
+    for raw_slug, quantity in sorted(bill.raw.items()):
+        by_class[graph.raw_class(raw_slug) or 'unobtainable'].append(f"{raw_slug} x{_quantity(quantity)}")
+    for name in sorted(by_class):
+        print(f"  {name:<12}: {', '.join(by_class[name])}")
+    print(f"  gold        : {_quantity(bill.gold)}")
+    print(f"  energy      : {_quantity(bill.energy)}")
+    print(f"  crafts      : {_quantity(bill.crafts)}")
+    if bill.cyclic:
+        print(f"  cyclic      : {', '.join(sorted(bill.cyclic))}")
+
+
+def _depth(graph, order):
+    """Longest recipe chain, in crafting steps."""
+    successors = graph.edges()
+    depth = dict.fromkeys(order, 0)
+    for slug in order:
+        for target in successors[slug]:
+            depth[target] = max(depth[target], depth[slug] + 1)
+    return max(depth.values(), default=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('slugs', nargs='*', help="items to print the bill of")
+    parser.add_argument('--all', action='store_true', help="print the bill of every item")
+    parser.add_argument('--no-cache', action='store_true', help="re-parse everything into an in-memory database")
+    scan.add_jobs_argument(parser)
+    args = parser.parse_args()
+
+    with open_database(use_cache=not args.no_cache, jobs=args.jobs) as db:
+        start = time.perf_counter()
+        graph = ContentGraph.from_database(db)
+    cycles = graph.cycles()
+    bills = graph.bills()
+    reach = graph.reachability()
+    order = graph.topological_order() if not cycles else []
+    elapsed = time.perf_counter() - start
+
+    raw = [slug for slug in graph.slugs if graph.is_raw(slug)]
+    unobtainable = [slug for slug in graph.slugs if not reach[slug]]
+    unknown = sorted(set(graph.slugs) - graph.items)
+    print(f"{len(graph.slugs)} items, {len(graph.recipes)} recipes, {len(raw)} raw materials")
+    print(f"Costed {len(bills)} items in {elapsed * 1000:.1f} ms")
+    if order:
+        print(f"Topological order: {len(order)} items, depth {_depth(graph, order)}")
+    for cycle in cycles:
+        print(f"Cycle: {' -> '.join(cycle)}")
+    if unknown:
+        print(f"Referenced but not defined ({len(unknown)}): {', '.join(unknown)}")
+    if unobtainable:
+        print(f"Unobtainable ({len(unobtainable)}): {', '.join(unobtainable)}")
+
+    for slug in (graph.slugs if args.all else args.slugs):
+        if slug not in reach:
+            print(f"\n{slug}: unknown item")
+            continue
+        print_bill(graph, slug)
+
+
+if __name__ == '__main__':
+    main()
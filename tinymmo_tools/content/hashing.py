@@ -0,0 +1,156 @@
+"""
+Canonical content hashes for indexed files and Merkle roots for indexes.
+
+A .tres/.tscn hash covers what the resource means, not how it was saved:
+whitespace, dictionary key order, ext/sub resource ids, load_steps, uid and
+the metadata/id and metadata/slug the index tooling stamps on resources do
+not affect it. Other text files hash with normalized line endings and
+trailing whitespace; anything else hashes its raw bytes.
+
+An index's root is a Merkle tree over its entries in id order, so two
+indexes are identical exactly when their roots are, and the entries whose
+hashes differ are the ones to reload.
+"""
+
+import hashlib
+import json
+import os
+
+from . import tres
+
+
+# Properties the index tooling writes into resources themselves.
+_BOOKKEEPING_PROPERTIES = frozenset({'metadata/id', 'metadata/slug'})
+_VOLATILE_HEADER_ATTRS = frozenset({'load_steps', 'format', 'uid'})
+_TEXT_SUFFIXES = frozenset({'.gd', '.gdshader', '.json', '.cfg', '.csv', '.txt', '.md', '.import'})
+
+
+class _Canonicalizer:
+    """Turn parsed values into JSON-serializable, order-independent data."""
+
+    def __init__(self, resource):
+        self.resource = resource
+        self._sub_stack = []
+
+    def value(self, value):
+        if isinstance(value, tres.StringName):
+            return {'&': str(value)}
+        if isinstance(value, tres.NodePath):
+            return {'^': str(value)}
+        if isinstance(value, float):
+            return {'f': repr(value)}
+        if isinstance(value, (str, bool, int)) or value is None:
+            return value
+        if isinstance(value, tres.TypedArray):
+            return {'Array': [self.value(value.type), [self.value(v) for v in value]]}
+        if isinstance(value, tres.PackedArray):
+            return {value.type: [self.value(v) for v in value]}
+        if isinstance(value, list):
+            return [self.value(v) for v in value]
+        if isinstance(value, tres.TypedDictionary):
+            return {'Dictionary': [self.value(value.key_type), self.value(value.value_type),
+                                   self.value(dict(value))]}
+        if isinstance(value, dict):
+            pairs = [[self.value(k), self.value(v)] for k, v in value.items()]
+            return {'{}': sorted(pairs, key=lambda pair: json.dumps(pair[0], sort_keys=True))}
+        if isinstance(value, tres.ExtResourceRef):
+            section = self.resource.ext_resources.get(value.id)
+            if section is None:
+                return {'ext': None}
+            return {'ext': [section.attrs.get('type', ''), section.attrs.get('path') or section.attrs.get('uid', '')]}
+        if isinstance(value, tres.SubResourceRef):
+            section = self.resource.sub_resources.get(value.id)
+            if section is None or value.id in self._sub_stack:
+                return {'sub': None}
+            self._sub_stack.append(value.id)
+            try:
+                return {'sub': self.section(section)}
+            finally:
+                self._sub_stack.pop()
+        if isinstance(value, tres.Constructor):
+            args = [[self.value(a[0]), self.value(a[1])] if isinstance(a, tuple) else self.value(a)
+                    for a in value.args]
+            return {'()': [value.name, args]}
+        raise TypeError(f"Cannot canonicalize {type(value).__name__}")
+
+    def properties(self, properties):
+        return {key: self.value(v) for key, v in properties.items() if key not in _BOOKKEEPING_PROPERTIES}
+
+    def attrs(self, attrs, skip=()):
+        return {key: self.value(v) for key, v in attrs.items() if key not in skip}
+
+    def section(self, section, skip_attrs=('id',)):
+        return {'attrs': self.attrs(section.attrs, skip_attrs), 'properties': self.properties(section.properties)}
+
+
+def canonical_resource(resource):
+    """JSON-serializable form of a parsed TextResource's semantic content."""
+    canonicalizer = _Canonicalizer(resource)
+    data = {
+        'kind': resource.header.tag,
+        'header': canonicalizer.attrs(resource.header.attrs, _VOLATILE_HEADER_ATTRS),
+    }
+    if resource.resource is not None:
+        data['resource'] = canonicalizer.properties(resource.resource.properties)
+    if resource.nodes:
+        data['nodes'] = [canonicalizer.section(node, ()) for node in resource.nodes]
+    if resource.connections:
+        data['connections'] = [canonicalizer.attrs(c.attrs) for c in resource.connections]
+    return data
+
+
+def canonical_bytes(path, data):
+    """Bytes that content_hash() digests for a file with the given contents."""
+    suffix = os.path.splitext(str(path))[1].lower()
+    if suffix in ('.tres', '.tscn'):
+        resource = tres.parse_string(data.decode('utf-8-sig'), str(path))
+        return json.dumps(canonical_resource(resource), sort_keys=True, separators=(',', ':'),
+                          ensure_ascii=False).encode('utf-8')
+    if suffix in _TEXT_SUFFIXES:
+        lines = data.decode('utf-8-sig', errors='surrogateescape').replace('\r\n', '\n').split('\n')
+        text = '\n'.join(line.rstrip() for line in lines).strip('\n')
+        return text.encode('utf-8', errors='surrogateescape')
+    return data
+
+
+def content_hash(path):
+    """sha256 hex digest of the canonical content of `path`."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return hashlib.sha256(canonical_bytes(path, data)).hexdigest()
+
+
+def _leaf(entry):
+    if entry.deleted:
+        text = f"{entry.id}\n{entry.slug}\n\ndeleted"
+    else:
+        text = f"{entry.id}\n{entry.slug}\n{entry.path}\n{entry.hash}"
+    return hashlib.sha256(b'\x00' + text.encode('utf-8')).digest()
+
+
+def merkle_root(entries):
+    """Merkle root (hex) over IndexEntry records in id order."""
+    level = [_leaf(entry) for entry in sorted(entries, key=lambda entry: (entry.id, entry.deleted))]
+    if not level:
+        return hashlib.sha256(b'').hexdigest()
+    while len(level) > 1:
+        # An odd node is promoted as is rather than paired with itself.
+        level = [hashlib.sha256(b'\x01' + level[i] + level[i + 1]).digest() if i + 1 < len(level) else level[i]
+                 for i in range(0, len(level), 2)]
+    return level[0].hex()
+
+
+def version_from_root(root):
+    """ContentIndex.version for a root: its first 63 bits as a positive int."""
+    return int(root[:16], 16) >> 1
+
+
+def diff_entries(old_entries, new_entries):
+    """Compare two entry lists by id; returns (added, removed, changed) id lists."""
+    old = {entry.id: entry for entry in old_entries if not entry.deleted}
+    new = {entry.id: entry for entry in new_entries if not entry.deleted}
+    added = sorted(new.keys() - old.keys())
+    removed = sorted(old.keys() - new.keys())
+    changed = sorted(i for i in old.keys() & new.keys()
+                     if (old[i].hash, old[i].path) != (new[i].hash, new[i].path))
+    return added, removed, changed
@@ -0,0 +1,197 @@
+"""
+Incremental, ID-stable builder for the ContentIndex resources.
+
+Each index lists the files under its `scan_path` whose res:// path matches
+one of its `filters` (Godot String.match globs), like the editor's Generate
+button, but ids are never renumbered:
+
+- an entry whose file still exists keeps its id and slug;
+- a new file revives the tombstone (or vanished entry) with its slug, or
+  else takes `next_id`;
+- an entry whose file is gone becomes a tombstone {deleted, id, slug}.
+  ContentRegistry skips it because it has no path, and its id stays taken.
+
+Entry hashes are canonical content hashes and `version` is derived from the
+Merkle root of the entries (see hashing.py). Files are only re-hashed when
+their (mtime_ns, size) changed, and an index file is only rewritten when its
+entries change.
+"""
+
+import os
+import re
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+
+from .. import paths
+from . import hashing, records, scan, tres
+from .cache import HashCache
+
+
+@dataclass
+class IndexUpdate:
+    """Outcome of rebuilding one index."""
+    index: records.ContentIndexRecord
+    entries: list
+    next_id: int
+    added: list = field(default_factory=list)
+    moved: list = field(default_factory=list)
+    revived: list = field(default_factory=list)
+    deleted: list = field(default_factory=list)
+    rehashed: list = field(default_factory=list)
+    duplicate_slugs: list = field(default_factory=list)
+
+    @property
+    def root(self):
+        return hashing.merkle_root(self.entries)
+
+    @property
+    def version(self):
+        return hashing.version_from_root(self.root)
+
+    @property
+    def changed(self):
+        return (self.entries != self.index.entries or self.next_id != self.index.next_id
+                or self.version != self.index.version)
+
+    def summary(self):
+        counts = [(len(self.added), "added"), (len(self.moved), "moved"), (len(self.revived), "revived"),
+                  (len(self.deleted), "deleted"), (len(self.rehashed), "re-hashed")]
+        parts = [f"{count} {label}" for count, label in counts if count]
+        return ', '.join(parts) if parts else "up to date"
+
+
+_GLOB_CACHE = {}
+
+
+def godot_match(pattern, text):
+    """String.match(): `*` matches any run of characters (including /), `?` one."""
+    regex = _GLOB_CACHE.get(pattern)
+    if regex is None:
+        regex = re.compile(''.join(
+            '.*' if c == '*' else '.' if c == '?' else re.escape(c) for c in pattern) + r'\Z', re.DOTALL)
+        _GLOB_CACHE[pattern] = regex
+    return regex.match(text) is not None
+
+
+def slug_for(res_path):
+    """Slug the editor assigns a new file: its basename without the last extension."""
+    return os.path.splitext(res_path.rpartition('/')[2])[0]
+
+
+def scan_index_files(index, project_root=paths.PROJECT_ROOT):
+    """Return the sorted res:// paths an index covers, never the index itself."""
+    if not index.scan_path or not index.filters:
+        raise ValueError(f"{index.path}: scan_path and filters must be set")
+    directory = paths.from_res_path(index.scan_path.rstrip('/'), project_root)
+    own_path = os.path.abspath(index.path)
+    found = []
+    for path in scan.discover(directory, suffix=''):
+        if os.path.abspath(path) == own_path:
+            continue
+        res_path = paths.to_res_path(path, project_root)
+        if any(godot_match(pattern, res_path) for pattern in index.filters):
+            found.append(res_path)
+    return found
+
+
+def plan_update(index, hashes, project_root=paths.PROJECT_ROOT):
+    """Work out the new entry list for `index` without writing anything."""
+    files = scan_index_files(index, project_root)
+    on_disk = set(files)
+    next_id = max([index.next_id] + [entry.id + 1 for entry in index.entries])
+    update = IndexUpdate(index=index, entries=[], next_id=next_id)
+
+    live_paths = set()
+    live_slugs = set()
+    for entry in index.entries:
+        if entry.deleted:
+            update.entries.append(entry)
+        elif entry.path in on_disk:
+            digest = hashes.content_hash(paths.from_res_path(entry.path, project_root))
+            if digest != entry.hash:
+                update.rehashed.append(entry)
+                entry = replace(entry, hash=digest)
+            update.entries.append(entry)
+            live_paths.add(entry.path)
+            live_slugs.add(entry.slug)
+        else:
+            tombstone = records.IndexEntry(id=entry.id, slug=entry.slug, deleted=True)
+            update.entries.append(tombstone)
+            update.deleted.append(entry)
+
+    # A slug can only come back once; later tombstones of it stay dead.
+    tombstones = {}
+    for position, entry in enumerate(update.entries):
+        if entry.deleted and entry.slug not in live_slugs:
+            tombstones.setdefault(entry.slug, position)
+
+    for res_path in files:
+        if res_path in live_paths:
+            continue
+        slug = slug_for(res_path)
+        digest = hashes.content_hash(paths.from_res_path(res_path, project_root))
+        position = tombstones.pop(slug, None)
+        if position is not None:
+            entry = replace(update.entries[position], path=res_path, hash=digest, deleted=False)
+            update.entries[position] = entry
+            # A tombstone created by this very run means the file was moved.
+            if any(old.id == entry.id for old in update.deleted):
+                update.deleted = [old for old in update.deleted if old.id != entry.id]
+                update.moved.append(entry)
+            else:
+                update.revived.append(entry)
+        else:
+            if slug in live_slugs:
+                update.duplicate_slugs.append(res_path)
+            entry = records.IndexEntry(id=update.next_id, slug=slug, path=res_path, hash=digest)
+            update.next_id += 1
+            update.entries.append(entry)
+            update.added.append(entry)
+        live_paths.add(res_path)
+        live_slugs.add(slug)
+    return update
+
+
+def _entry_value(entry):
+    """IndexEntry as the Dictionary Godot saves, keys sorted as Godot writes them."""
+    if entry.deleted:
+        return {tres.StringName('deleted'): True, tres.StringName('id'): entry.id,
+                tres.StringName('slug'): tres.StringName(entry.slug)}
+    return {tres.StringName('hash'): entry.hash, tres.StringName('id'): entry.id,
+            tres.StringName('path'): entry.path, tres.StringName('slug'): tres.StringName(entry.slug)}
+
+
+def write_update(update):
+    """Rewrite the index file in place with the planned entries and root version."""
+    entries = tres.TypedArray('Dictionary', [_entry_value(entry) for entry in update.entries])
+    tres.rewrite_properties(update.index.path, 'resource', {
+        'version': update.version,
+        'next_id': update.next_id,
+        'entries': entries,
+    })
+
+
+def load_indexes(project_root=paths.PROJECT_ROOT):
+    """Load every ContentIndex, ordered so indexes of indexes come last.
+
+    Those hash the other index files, so they must see them rewritten.
+    """
+    indexes_dir = Path(project_root) / paths.INDEXES_DIR.relative_to(paths.PROJECT_ROOT)
+    indexes = [records.load_content_index(path) for path in scan.discover(indexes_dir, recursive=False)]
+    indexes_res_path = paths.to_res_path(indexes_dir, project_root)
+    return sorted(indexes, key=lambda index: index.scan_path.rstrip('/') == indexes_res_path)
+
+
+def update_indexes(names=None, hashes=None, dry_run=False, project_root=paths.PROJECT_ROOT):
+    """Rebuild the named indexes (all by default) and return their IndexUpdates."""
+    if hashes is None:
+        hashes = HashCache(project_root=project_root, enabled=False)
+    updates = []
+    for index in load_indexes(project_root):
+        if names and index.content_name not in names:
+            continue
+        update = plan_update(index, hashes, project_root)
+        if update.changed and not dry_run:
+            write_update(update)
+        updates.append(update)
+    return updates
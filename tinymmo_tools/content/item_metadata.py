@@ -0,0 +1,361 @@
+"""
+Compact binary item metadata with fixed-width lookup indexes.
+
+item_metadata.json has to be parsed whole before a single tooltip can be
+shown. item_metadata.bin holds the same data in a form that is read in
+place. A lookup binary-searches a fixed-width index and decodes one
+record, so startup reads only the header and memory does not grow with
+the item count.
+
+    header   = b'TMIM', u16 version, u16 reserved, u32 item count,
+               u32 offsets of: strings, slug index, id index, records
+    strings  = u32 count, u32 offsets[count + 1], UTF-8 bytes
+               (every distinct string once; refs are u32 string numbers)
+    slug idx = count x (u32 slug ref, i32 item id, u32 record offset),
+               sorted by slug bytes
+    id idx   = (u32 count, count x (i32 item id, u32 slug idx position)),
+               sorted by id, for items the items index knows
+    record   = u16 harvest count, u16 crafted count,
+               harvest x (u32 class ref, u8 tier, u8 is_rare, f64 drop_rate,
+                          f64 expected_per_harvest),
+               crafted x (u32 recipe_name ref, u32 class ref, u16 level, u32 slug ref)
+
+All integers are little-endian and all offsets are from the start of the
+file. Floats are f64, so records decode to exactly what the JSON holds.
+The same seek-and-read lookup works from GDScript with FileAccess.
+
+Usage:
+    python -m tinymmo_tools.content.item_metadata [slug ...] [--verify] [--bench [--scale 1,10,100]] [--no-cache] [-j N]
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from .. import paths
+from . import scan
+from .db import open_database
+
+
+MAGIC = b'TMIM'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIIIII')
+U32 = struct.Struct('<I')
+SLUG_ENTRY = struct.Struct('<IiI')
+ID_ENTRY = struct.Struct('<iI')
+RECORD_HEADER = struct.Struct('<HH')
+HARVEST = struct.Struct('<IBBdd')
+CRAFTED = struct.Struct('<IIHI')
+NO_ID = -1
+
+
+class MetadataFormatError(ValueError):
+    pass
+
+
+# --- Writing ------------------------------------------------------------------
+
+class _Strings:
+    def __init__(self):
+        self.refs = {}
+
+    def ref(self, text):
+        ref = self.refs.get(text)
+        if ref is None:
+            ref = self.refs[text] = len(self.refs)
+        return ref
+
+    def pack(self):
+        blobs = [text.encode('utf-8') for text in self.refs]
+        offsets, position = [], 0
+        for blob in blobs:
+            offsets.append(position)
+            position += len(blob)
+        offsets.append(position)
+        return U32.pack(len(blobs)) + struct.pack(f'<{len(offsets)}I', *offsets) + b''.join(blobs)
+
+
+def encode(metadata, item_ids=None):
+    """item_metadata.bin bytes for `metadata` (the item_metadata.json dict).
+
+    `item_ids` maps slugs to items index ids; slugs without one are only
+    reachable by slug.
+    """
+    item_ids = item_ids or {}
+    strings = _Strings()
+    slugs = sorted(metadata, key=lambda slug: slug.encode('utf-8'))
+    slug_refs = [strings.ref(slug) for slug in slugs]
+    records, record_offsets, position = [], [], 0
+    for slug in slugs:
+        entry = metadata[slug]
+        harvest, crafted = entry.get('harvest_sources', []), entry.get('crafted_by', [])
+        parts = [RECORD_HEADER.pack(len(harvest), len(crafted))]
+        parts += [HARVEST.pack(strings.ref(source['class']), source['tier'], source['is_rare'],
+                               source['drop_rate'], source['expected_per_harvest']) for source in harvest]
+        parts += [CRAFTED.pack(strings.ref(recipe['recipe_name']), strings.ref(recipe['class']), recipe['level'],
+                               strings.ref(recipe['slug'])) for recipe in crafted]
+        record_offsets.append(position)
+        records.append(b''.join(parts))
+        position += len(records[-1])
+
+    string_table = strings.pack()
+    ids = sorted((item_ids[slug], position) for position, slug in enumerate(slugs) if slug in item_ids)
+    strings_offset = HEADER.size
+    slug_offset = strings_offset + len(string_table)
+    id_offset = slug_offset + SLUG_ENTRY.size * len(slugs)
+    records_offset = id_offset + U32.size + ID_ENTRY.size * len(ids)
+    out = bytearray(HEADER.pack(MAGIC, VERSION, 0, len(slugs), strings_offset, slug_offset, id_offset,
+                                records_offset))
+    out += string_table
+    for slug, ref, offset in zip(slugs, slug_refs, record_offsets):
+        out += SLUG_ENTRY.pack(ref, item_ids.get(slug, NO_ID), records_offset + offset)
+    out += U32.pack(len(ids))
+    for item_id, position in ids:
+        out += ID_ENTRY.pack(item_id, position)
+    out += b''.join(records)
+    return bytes(out)
+
+
+def query_item_ids(db):
+    """Map item slugs to their items index ids."""
+    rows = db.execute("""
+        SELECT e.slug, e.id
+        FROM index_entries e JOIN content_indexes c USING (path)
+        WHERE c.content_name = 'items' AND NOT e.deleted
+    """)
+    return {row['slug']: row['id'] for row in rows}
+
+
+def write(path, metadata, item_ids=None):
+    data = encode(metadata, item_ids)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return len(data)
+
+
+# --- Reading ------------------------------------------------------------------
+
+class ItemMetadataFile:
+    """Lazy lookups into an item_metadata.bin file (memory-mapped)."""
+
+    def __init__(self, path=paths.ITEM_METADATA_BIN_PATH):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.data) < HEADER.size:
+            raise MetadataFormatError(f"{path}: too short for a header")
+        (magic, version, _, self.count, self.strings_offset, self.slug_offset, self.id_offset,
+         self.records_offset) = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise MetadataFormatError(f"{path}: not an item metadata file (version {VERSION})")
+        self.string_count = U32.unpack_from(self.data, self.strings_offset)[0]
+        self.string_blob = self.strings_offset + U32.size * (self.string_count + 2)
+        self.id_count = U32.unpack_from(self.data, self.id_offset)[0]
+
+    def __len__(self):
+        return self.count
+
+    def _string_bytes(self, ref):
+        if ref >= self.string_count:
+            raise MetadataFormatError(f"{self.path}: string ref {ref} out of range")
+        start, end = struct.unpack_from('<II', self.data, self.strings_offset + U32.size * (ref + 1))
+        return self.data[self.string_blob + start:self.string_blob + end]
+
+    def string(self, ref):
+        return self._string_bytes(ref).decode('utf-8')
+
+    def _slug_entry(self, position):
+        return SLUG_ENTRY.unpack_from(self.data, self.slug_offset + SLUG_ENTRY.size * position)
+
+    def _find(self, slug):
+        """Slug index position of `slug`, or None (binary search over the fixed-width index)."""
+        key = slug.encode('utf-8')
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            probe = self._string_bytes(self._slug_entry(middle)[0])
+            if probe < key:
+                low = middle + 1
+            elif probe > key:
+                high = middle
+            else:
+                return middle
+        return None
+
+    def _record(self, offset):
+        harvest_count, crafted_count = RECORD_HEADER.unpack_from(self.data, offset)
+        offset += RECORD_HEADER.size
+        harvest = []
+        for _ in range(harvest_count):
+            class_ref, tier, is_rare, drop_rate, expected = HARVEST.unpack_from(self.data, offset)
+            offset += HARVEST.size
+            harvest.append({'class': self.string(class_ref), 'tier': tier, 'is_rare': bool(is_rare),
+                            'drop_rate': drop_rate, 'expected_per_harvest': expected})
+        crafted = []
+        for _ in range(crafted_count):
+            name_ref, class_ref, level, slug_ref = CRAFTED.unpack_from(self.data, offset)
+            offset += CRAFTED.size
+            crafted.append({'recipe_name': self.string(name_ref), 'class': self.string(class_ref),
+                            'level': level, 'slug': self.string(slug_ref)})
+        return {'harvest_sources': harvest, 'crafted_by': crafted}
+
+    def get(self, slug, default=None):
+        """The item_metadata.json entry of `slug`, decoding only that record."""
+        position = self._find(slug)
+        return default if position is None else self._record(self._slug_entry(position)[2])
+
+    def get_by_id(self, item_id, default=None):
+        """(slug, entry) of an items index id, or `default`."""
+        low, high = 0, self.id_count
+        base = self.id_offset + U32.size
+        while low < high:
+            middle = (low + high) // 2
+            probe, position = ID_ENTRY.unpack_from(self.data, base + ID_ENTRY.size * middle)
+            if probe < item_id:
+                low = middle + 1
+            elif probe > item_id:
+                high = middle
+            else:
+                slug_ref, _, offset = self._slug_entry(position)
+                return self.string(slug_ref), self._record(offset)
+        return default
+
+    def __contains__(self, slug):
+        return self._find(slug) is not None
+
+    def items(self):
+        """(slug, item id, entry) for every item in slug order."""
+        for position in range(self.count):
+            slug_ref, item_id, offset = self._slug_entry(position)
+            yield self.string(slug_ref), item_id, self._record(offset)
+
+    def close(self):
+        self.data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# --- Verification -------------------------------------------------------------
+
+def verify(bin_path=paths.ITEM_METADATA_BIN_PATH, json_path=paths.ITEM_METADATA_PATH, item_ids=None):
+    """Problems found comparing the binary file against the JSON (empty when they match)."""
+    with open(json_path, encoding='utf-8') as f:
+        metadata = json.load(f)
+    problems = []
+    with ItemMetadataFile(bin_path) as binary:
+        if len(binary) != len(metadata):
+            problems.append(f"{len(binary)} items in {bin_path}, {len(metadata)} in {json_path}")
+        previous = None
+        seen_ids = 0
+        for slug, item_id, entry in binary.items():
+            key = slug.encode('utf-8')
+            if previous is not None and key <= previous:
+                problems.append(f"slug index out of order at {slug!r}")
+            previous = key
+            if metadata.get(slug) != entry:
+                problems.append(f"{slug}: record differs from the JSON")
+            if binary.get(slug) != entry:
+                problems.append(f"{slug}: lookup by slug does not find its record")
+            if item_id != NO_ID:
+                seen_ids += 1
+                if binary.get_by_id(item_id) != (slug, entry):
+                    problems.append(f"{slug}: lookup by id {item_id} does not find it")
+            if item_ids is not None and item_ids.get(slug, NO_ID) != item_id:
+                problems.append(f"{slug}: id {item_id}, items index has {item_ids.get(slug, NO_ID)}")
+        if seen_ids != binary.id_count:
+            problems.append(f"id index has {binary.id_count} entries, slug index carries {seen_ids} ids")
+    return problems
+
+
+def bench(bin_path=paths.ITEM_METADATA_BIN_PATH, json_path=paths.ITEM_METADATA_PATH, scale=1, repeat=50):
+    """Time and peak memory of 'open, then look up one item' for the JSON and the binary file.
+
+    With `scale` > 1 both files are rebuilt in a temporary directory with
+    every item copied `scale` times under new slugs.
+    """
+    with open(json_path, encoding='utf-8') as f:
+        metadata = json.load(f)
+    with tempfile.TemporaryDirectory() as directory:
+        if scale > 1:
+            metadata = {f"{slug}_{copy}" if copy else slug: entry
+                        for copy in range(scale) for slug, entry in metadata.items()}
+            json_path, bin_path = os.path.join(directory, 'items.json'), os.path.join(directory, 'items.bin')
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump(metadata, f, indent=2, ensure_ascii=False)
+            write(bin_path, metadata)
+        slug = sorted(metadata)[len(metadata) // 2]
+
+        def measure(lookup):
+            tracemalloc.start()
+            lookup()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            start = time.perf_counter()
+            for _ in range(repeat):
+                lookup()
+            return (time.perf_counter() - start) / repeat, peak
+
+        def from_json():
+            with open(json_path, encoding='utf-8') as f:
+                return json.load(f)[slug]
+
+        def from_binary():
+            with ItemMetadataFile(bin_path) as binary:
+                return binary.get(slug)
+
+        return len(metadata), slug, measure(from_json), measure(from_binary)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Look items up in item_metadata.bin and check it against the JSON.")
+    parser.add_argument('slugs', nargs='*', help="item slugs (or ids) to print")
+    parser.add_argument('--bin', default=str(paths.ITEM_METADATA_BIN_PATH), help="binary metadata file")
+    parser.add_argument('--json', default=str(paths.ITEM_METADATA_PATH), help="JSON metadata file")
+    parser.add_argument('--verify', action='store_true', help="check every record and both indexes against the JSON")
+    parser.add_argument('--bench', action='store_true', help="compare open + one lookup against parsing the JSON")
+    parser.add_argument('--scale', default='1', help="with --bench: item counts as copies of the items (default: 1)")
+    parser.add_argument('--no-cache', action='store_true', help="with --verify: re-parse everything into an in-memory database")
+    scan.add_jobs_argument(parser)
+    args = parser.parse_args()
+
+    try:
+        with ItemMetadataFile(args.bin) as binary:
+            for slug in args.slugs:
+                found = binary.get_by_id(int(slug)) if slug.lstrip('-').isdigit() else (slug, binary.get(slug))
+                if found is None or found[1] is None:
+                    print(f"⚠️  {slug}: not found")
+                else:
+                    print(f"{found[0]}: {json.dumps(found[1], indent=2, ensure_ascii=False)}")
+    except (OSError, MetadataFormatError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.verify:
+        with open_database(use_cache=not args.no_cache, jobs=args.jobs) as db:
+            item_ids = query_item_ids(db)
+        problems = verify(args.bin, args.json, item_ids)
+        for problem in problems[:20]:
+            print(f"❌ {problem}")
+        if problems:
+            sys.exit(1)
+        print(f"✅ {args.bin} matches {args.json}")
+    if args.bench:
+        print(f"{'Items':>8} {'JSON':>11} {'JSON peak':>11} {'Binary':>11} {'Binary peak':>12}  (open + one lookup)")
+        for scale in (int(n) for n in args.scale.split(',')):
+            count, _, (json_seconds, json_peak), (bin_seconds, bin_peak) = bench(args.bin, args.json, scale)
+            print(f"{count:>8,} {json_seconds * 1e3:>9.2f}ms {json_peak / 1024:>7.0f} KiB "
+                  f"{bin_seconds * 1e3:>9.3f}ms {bin_peak / 1024:>8.1f} KiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,331 @@
+"""
+Exact reward distributions of QuestManager._generate_quest().
+
+A quest picks an adventurer uniformly from ADVENTURER_TYPES, then 1-3
+draws (uniform) of a pool slug (uniform, with replacement) and a quantity
+randi_range(1, 5). Slugs that ContentRegistryHub cannot resolve through
+items_index.tres are skipped. Every other draw adds _get_item_value() *
+quantity to the quest value, even when it repeats an item that
+required_items already holds. Gold is max(int(value *
+GOLD_REWARD_MULTIPLIER), 10) and experience is max(int(gold *
+XP_REWARD_MULTIPLIER), 5).
+
+The value of one draw has a small discrete distribution, so the value of
+a quest is the mixture of its 1-, 2- and 3-fold convolutions. Means,
+percentiles and the share of quests on the 10 gold floor come out
+exactly. The adventurer pools and reward constants are read from
+quest_manager.gd itself.
+
+Each pool is resolved against the content database and flagged:
+- missing: the slug is not a live items_index entry (the draw is dropped);
+- unreachable: no class can harvest or craft the item, even by trading
+  (content/graph.py), so quests that draw it cannot be completed.
+An adventurer whose draws can all be missing can also hand out empty
+quests, which complete at once for the floor reward.
+
+Usage:
+    python -m tinymmo_tools.content.quests [adventurer ...] [--check] [--no-cache] [-j N]
+"""
+
+import argparse
+import bisect
+import re
+import time
+from dataclasses import dataclass, field
+
+from .. import paths
+from . import scan
+from .db import open_database
+from .graph import ANY_CLASS, ContentGraph
+
+
+QUEST_MANAGER_PATH = paths.SOURCE_DIR / "server" / "world" / "components" / "quest_manager.gd"
+# QuestManager._get_item_value() fallbacks for items without a
+# minimum_price: the first matching tag wins.
+TAG_VALUES = (('ore', 10), ('ingot', 20), ('gem', 50), ('gemstone', 50), ('weapon', 100), ('armor', 80),
+              ('luxury', 150), ('food', 15), ('potion', 25), ('material', 5), ('raw', 5))
+DEFAULT_VALUE = 10
+MIN_GOLD_REWARD = 10
+MIN_XP_REWARD = 5
+MAX_ITEMS = 3
+MAX_QUANTITY = 5
+PERCENTILES = (10, 50, 90)
+
+
+def quest_settings(path=QUEST_MANAGER_PATH):
+    """QuestManager's numeric constants and adventurer item pools, read from the script."""
+    source = path.read_text(encoding='utf-8')
+    constants = {name: float(value) for name, value in
+                 re.findall(r'^const (\w+)\s*:\s*\w+\s*=\s*([-\d.]+)', source, re.M)}
+    block = source[source.index('const ADVENTURER_TYPES'):]
+    block = block[:block.index('\n}')]
+    pools = {name: re.findall(r'"(\w+)"', items) for name, items in re.findall(r'"(\w+)":\s*\[([^\]]*)\]', block)}
+    return constants, pools
+
+
+def item_value(minimum_price, tags):
+    """QuestManager._get_item_value()."""
+    if minimum_price > 0:
+        return minimum_price
+    for tag, value in TAG_VALUES:
+        if tag in tags:
+            return value
+    return DEFAULT_VALUE
+
+
+@dataclass
+class PoolItem:
+    slug: str
+    # None when the draw is dropped (not a live items_index entry).
+    value: int = None
+    # Lowest level the item exists at when players trade; None = never.
+    level: int = None
+
+
+@dataclass
+class AdventurerRewards:
+    """Exact reward distribution of one adventurer type.
+
+    `sums` holds the value of one and of two draws as sorted (values,
+    cumulative probabilities); three draws are evaluated as one draw plus
+    two, so every query stays exact without building the largest
+    convolution.
+    """
+    name: str
+    pool: list
+    gold_multiplier: float
+    xp_multiplier: float
+    draw: dict = field(default_factory=dict)
+    sums: list = field(default_factory=list)
+    mean_gold: float = 0.0
+    mean_xp: float = 0.0
+    # P(every draw is dropped): an empty quest that completes at once.
+    empty: float = 0.0
+    # P(at least one draw is an unreachable item).
+    blocked: float = 0.0
+    # P(quest level <= L): the level its hardest item first exists at.
+    level_cdf: dict = field(default_factory=dict)
+
+    @property
+    def missing(self):
+        return sorted({item.slug for item in self.pool if item.value is None})
+
+    @property
+    def unreachable(self):
+        return sorted({item.slug for item in self.pool if item.value is not None and item.level is None})
+
+    @property
+    def max_value(self):
+        return MAX_ITEMS * max(self.draw)
+
+    def reward(self, value):
+        """(gold, xp) of a quest worth `value`."""
+        gold = max(int(value * self.gold_multiplier), MIN_GOLD_REWARD)
+        return gold, max(int(gold * self.xp_multiplier), MIN_XP_REWARD)
+
+    def value_cdf(self, value):
+        """P(quest value <= value)."""
+        three = sum(p * _cdf(self.sums[1], value - drawn) for drawn, p in self.draw.items())
+        return (_cdf(self.sums[0], value) + _cdf(self.sums[1], value) + three) / MAX_ITEMS
+
+    def value_percentile(self, percent):
+        return _search(self.value_cdf, percent, self.max_value)
+
+    def gold_percentile(self, percent):
+        return self.reward(self.value_percentile(percent))[0]
+
+    def floor_share(self):
+        """P(gold is the MIN_GOLD_REWARD floor)."""
+        return self.value_cdf(_floor_value(self.gold_multiplier))
+
+
+def convolve(a, b):
+    """Distribution of the sum of two independent values ({value: probability})."""
+    result = {}
+    for x, p in a.items():
+        for y, q in b.items():
+            result[x + y] = result.get(x + y, 0) + p * q
+    return result
+
+
+def _cumulative(distribution):
+    values = sorted(distribution)
+    cumulative, total = [], 0.0
+    for value in values:
+        total += distribution[value]
+        cumulative.append(total)
+    return values, cumulative
+
+
+def _cdf(pair, value):
+    values, cumulative = pair
+    index = bisect.bisect_right(values, value)
+    return cumulative[index - 1] if index else 0.0
+
+
+def _search(cdf, percent, high):
+    """Smallest integer v in [0, high] with cdf(v) >= percent / 100."""
+    target = percent / 100.0 - 1e-12
+    low = 0
+    while low < high:
+        middle = (low + high) // 2
+        if cdf(middle) >= target:
+            high = middle
+        else:
+            low = middle + 1
+    return low
+
+
+def _floor_value(gold_multiplier):
+    """Largest quest value whose gold is still the floor."""
+    value = 0
+    while int((value + 1) * gold_multiplier) <= MIN_GOLD_REWARD:
+        value += 1
+    return value
+
+
+def resolve_pools(db, pools):
+    """{adventurer: [PoolItem]} resolved against the items index, item values and reachability."""
+    indexed = {row['slug'] for row in db.execute("""
+        SELECT e.slug FROM index_entries e JOIN content_indexes c ON c.path = e.path
+        WHERE c.content_name = 'items' AND NOT e.deleted
+    """)}
+    tags = {}
+    for row in db.execute("SELECT path, tag FROM item_tags"):
+        tags.setdefault(row['path'], set()).add(row['tag'])
+    values = {row['slug']: item_value(row['minimum_price'], tags.get(row['path'], ()))
+              for row in db.execute("SELECT path, slug, minimum_price FROM items ORDER BY path")}
+    reach = ContentGraph.from_database(db).reachability()
+    resolved = {}
+    for name, slugs in pools.items():
+        resolved[name] = [PoolItem(slug, values.get(slug) if slug in indexed else None,
+                                   reach.get(slug, {}).get(ANY_CLASS)) for slug in slugs]
+    return resolved
+
+
+def adventurer_rewards(name, pool, gold_multiplier, xp_multiplier):
+    rewards = AdventurerRewards(name, pool, gold_multiplier, xp_multiplier)
+    share = 1.0 / (max(len(pool), 1) * MAX_QUANTITY)
+    for item in pool:
+        for quantity in range(1, MAX_QUANTITY + 1):
+            value = (item.value or 0) * quantity
+            rewards.draw[value] = rewards.draw.get(value, 0) + share
+    if not rewards.draw:
+        rewards.draw = {0: 1.0}
+    two = convolve(rewards.draw, rewards.draw)
+    rewards.sums = [_cumulative(rewards.draw), _cumulative(two)]
+
+    # int() and the floors are not linear, so the means go value by value;
+    # three draws are paired up on the fly, with reward() inlined for speed.
+    gold_total = xp_total = 0.0
+    for distribution in (rewards.draw, two):
+        for value, p in distribution.items():
+            gold, xp = rewards.reward(value)
+            gold_total += p * gold
+            xp_total += p * xp
+    pairs = list(two.items())
+    for drawn, p in rewards.draw.items():
+        gold_sum = xp_sum = 0.0
+        for value, q in pairs:
+            gold = int((value + drawn) * gold_multiplier)
+            if gold < MIN_GOLD_REWARD:
+                gold = MIN_GOLD_REWARD
+            xp = int(gold * xp_multiplier)
+            gold_sum += q * gold
+            xp_sum += q * (xp if xp > MIN_XP_REWARD else MIN_XP_REWARD)
+        gold_total += p * gold_sum
+        xp_total += p * xp_sum
+    rewards.mean_gold, rewards.mean_xp = gold_total / MAX_ITEMS, xp_total / MAX_ITEMS
+
+    if pool:
+        p_dropped = sum(item.value is None for item in pool) / len(pool)
+        p_blocked = sum(item.value is not None and item.level is None for item in pool) / len(pool)
+        rewards.empty = sum(p_dropped ** n for n in range(1, MAX_ITEMS + 1)) / MAX_ITEMS
+        rewards.blocked = 1 - sum((1 - p_blocked) ** n for n in range(1, MAX_ITEMS + 1)) / MAX_ITEMS
+        levels = sorted({item.level for item in pool if item.value is not None and item.level is not None})
+        for level in levels:
+            # Dropped draws require nothing, so they never raise the level.
+            within = sum(item.value is None or (item.level is not None and item.level <= level)
+                         for item in pool) / len(pool)
+            rewards.level_cdf[level] = sum(within ** n for n in range(1, MAX_ITEMS + 1)) / MAX_ITEMS
+    return rewards
+
+
+def quest_rewards(db, path=QUEST_MANAGER_PATH):
+    """AdventurerRewards of every adventurer type, in ADVENTURER_TYPES order."""
+    constants, pools = quest_settings(path)
+    gold_multiplier = constants.get('GOLD_REWARD_MULTIPLIER', 1.2)
+    xp_multiplier = constants.get('XP_REWARD_MULTIPLIER', 0.5)
+    return [adventurer_rewards(name, pool, gold_multiplier, xp_multiplier)
+            for name, pool in resolve_pools(db, pools).items()]
+
+
+def overall_gold_percentile(rewards, percent):
+    """Gold percentile of any quest (adventurers are equally likely)."""
+    cdf = lambda value: sum(adventurer.value_cdf(value) for adventurer in rewards) / len(rewards)
+    value = _search(cdf, percent, max(adventurer.max_value for adventurer in rewards))
+    return rewards[0].reward(value)[0]
+
+
+def _median_level(rewards):
+    for level in sorted(rewards.level_cdf):
+        if rewards.level_cdf[level] >= 0.5:
+            return f"L{level}"
+    return '-'
+
+
+def print_rewards(rewards):
+    header = ''.join(f"{'p' + str(p):>10}" for p in PERCENTILES)
+    print(f"{'adventurer':<14} {'pool':>4} {'mean gold':>10}{header} {'max':>10} {'floor':>6} {'mean xp':>9} "
+          f"{'level':>5} {'blocked':>7} {'empty':>6}")
+    for adventurer in rewards:
+        cells = ''.join(f"{adventurer.gold_percentile(p):>10,}" for p in PERCENTILES)
+        print(f"{adventurer.name:<14} {len(adventurer.pool):>4} {adventurer.mean_gold:>10,.1f}{cells} "
+              f"{adventurer.reward(adventurer.max_value)[0]:>10,} {adventurer.floor_share():>6.1%} "
+              f"{adventurer.mean_xp:>9,.1f} {_median_level(adventurer):>5} {adventurer.blocked:>7.1%} "
+              f"{adventurer.empty:>6.2%}")
+    if len(rewards) > 1:
+        cells = ''.join(f"{overall_gold_percentile(rewards, p):>10,}" for p in PERCENTILES)
+        mean_gold = sum(adventurer.mean_gold for adventurer in rewards) / len(rewards)
+        print(f"{'(any)':<14} {'':>4} {mean_gold:>10,.1f}{cells}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('adventurers', nargs='*', help="adventurer types (default: all)")
+    parser.add_argument('--check', action='store_true', help="exit 1 if any pool slug is missing or unreachable")
+    parser.add_argument('--no-cache', action='store_true', help="re-parse everything into an in-memory database")
+    scan.add_jobs_argument(parser)
+    args = parser.parse_args()
+
+    with open_database(use_cache=not args.no_cache, jobs=args.jobs) as db:
+        start = time.perf_counter()
+        rewards = quest_rewards(db)
+    if args.adventurers:
+        unknown = sorted(set(args.adventurers) - {adventurer.name for adventurer in rewards})
+        if unknown:
+            parser.error(f"unknown adventurer types: {', '.join(unknown)}")
+        rewards = [adventurer for adventurer in rewards if adventurer.name in args.adventurers]
+    print_rewards(rewards)
+    seconds = time.perf_counter() - start
+
+    problems = 0
+    for adventurer in rewards:
+        for slug in adventurer.missing:
+            print(f"❌ {adventurer.name}: '{slug}' is not in items_index.tres (draws are dropped)")
+            problems += 1
+        for slug in adventurer.unreachable:
+            print(f"❌ {adventurer.name}: '{slug}' cannot be harvested or crafted (quests drawing it cannot be completed)")
+            problems += 1
+        if adventurer.empty:
+            print(f"⚠️  {adventurer.name}: {adventurer.empty:.2%} of quests require nothing "
+                  f"({MIN_GOLD_REWARD} gold for free)")
+    if not problems:
+        print("✅ Every pool slug resolves to an obtainable item")
+    print(f"\nComputed {len(rewards)} exact reward distributions in {seconds * 1000:.0f} ms")
+    if args.check and problems:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
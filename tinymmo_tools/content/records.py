@@ -0,0 +1,232 @@
+"""
+Typed records for the content resources the Python tools care about.
+
+Each record is built from one parsed TextResource and applies the same
+defaults as the matching GDScript class, so a missing property means
+exactly what it means in game.
+"""
+
+import os
+import re
+from dataclasses import dataclass, field
+
+from . import tres
+
+
+@dataclass
+class ItemRecord:
+    path: str
+    slug: str
+    script_class: str
+    item_name: str = "ItemDefault"
+    description: str = ""
+    can_trade: bool = False
+    can_sell: bool = False
+    minimum_price: int = 0
+    stack_limit: int = 0
+    tags: list = field(default_factory=list)
+
+
+@dataclass
+class RecipeRecord:
+    path: str
+    slug: str
+    recipe_name: str = "RecipeDefault"
+    description: str = ""
+    required_class: str = "miner"
+    required_level: int = 1
+    gold_cost: int = 0
+    energy_cost: float = 0.0
+    inputs: list = field(default_factory=list)
+    outputs: list = field(default_factory=list)
+    tags: list = field(default_factory=list)
+
+
+@dataclass
+class LootEntry:
+    item_slug: str
+    weight: float = 0.0
+    quantity_min: int = 1
+    quantity_max: int = 1
+
+
+@dataclass
+class RareBonusEntry:
+    item_slug: str
+    chance: float = 0.0
+    quantity: int = 1
+
+
+@dataclass
+class LootTableRecord:
+    path: str
+    slug: str
+    harvest_class: str = ""
+    tier: int = 0
+    loot_entries: list = field(default_factory=list)
+    rare_bonus_entries: list = field(default_factory=list)
+
+
+@dataclass
+class IndexEntry:
+    id: int
+    slug: str
+    path: str = ""
+    hash: str = ""
+    # Tombstone of a deleted file: keeps its id reserved, has no path.
+    deleted: bool = False
+
+
+@dataclass
+class ContentIndexRecord:
+    path: str
+    content_name: str = ""
+    version: int = 0
+    next_id: int = 1
+    entries: list = field(default_factory=list)
+    scan_path: str = ""
+    filters: list = field(default_factory=list)
+    metadata: dict = field(default_factory=dict)
+
+
+ITEM_SCRIPT_CLASSES = frozenset({
+    'Item', 'MaterialItem', 'ConsumableItem', 'GearItem', 'WeaponItem', 'QuestItem',
+})
+_LOOT_TABLE_NAME = re.compile(r'(\w+)_t(\d+)_loot_table')
+
+
+def _stem(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def _slot_pairs(props, kind, count):
+    """Mirror CraftingRecipe.get_inputs()/get_outputs()."""
+    pairs = []
+    for i in range(1, count + 1):
+        slug = str(props.get(f'{kind}_{i}_slug', ''))
+        quantity = props.get(f'{kind}_{i}_quantity', 1 if i == 1 else 0)
+        if slug and (i == 1 or quantity > 0):
+            pairs.append((slug, quantity))
+    return pairs
+
+
+def item_from_resource(resource, slug=None):
+    props = resource.properties
+    return ItemRecord(
+        path=resource.path,
+        slug=slug or _stem(resource.path),
+        script_class=resource.script_class,
+        item_name=str(props.get('item_name', 'ItemDefault')),
+        description=props.get('description', ''),
+        can_trade=props.get('can_trade', False),
+        can_sell=props.get('can_sell', False),
+        minimum_price=props.get('minimum_price', 0),
+        stack_limit=props.get('stack_limit', 0),
+        tags=[str(t) for t in props.get('tags', ())],
+    )
+
+
+def recipe_from_resource(resource):
+    props = resource.properties
+    return RecipeRecord(
+        path=resource.path,
+        slug=str(props.get('slug', '')) or _stem(resource.path),
+        recipe_name=str(props.get('recipe_name', 'RecipeDefault')),
+        description=props.get('description', ''),
+        required_class=props.get('required_class', 'miner'),
+        required_level=props.get('required_level', 1),
+        gold_cost=props.get('gold_cost', 0),
+        energy_cost=float(props.get('energy_cost', 0.0)),
+        inputs=_slot_pairs(props, 'input', 3),
+        outputs=_slot_pairs(props, 'output', 2),
+        tags=[str(t) for t in props.get('tags', ())],
+    )
+
+
+def loot_table_from_resource(resource):
+    props = resource.properties
+    slug = _stem(resource.path)
+    match = _LOOT_TABLE_NAME.match(slug)
+    return LootTableRecord(
+        path=resource.path,
+        slug=slug,
+        harvest_class=match.group(1) if match else "",
+        tier=int(match.group(2)) if match else 0,
+        loot_entries=[
+            LootEntry(
+                item_slug=str(entry.get('item_slug', '')),
+                weight=float(entry.get('weight', 0.0)),
+                quantity_min=entry.get('quantity_min', 1),
+                quantity_max=entry.get('quantity_max', 1),
+            )
+            for entry in props.get('loot_entries', ())
+        ],
+        rare_bonus_entries=[
+            RareBonusEntry(
+                item_slug=str(bonus.get('item_slug', '')),
+                chance=float(bonus.get('chance', 0.0)),
+                quantity=bonus.get('quantity', 1),
+            )
+            for bonus in props.get('rare_bonus_entries', ())
+        ],
+    )
+
+
+def content_index_from_resource(resource):
+    props = resource.properties
+    return ContentIndexRecord(
+        path=resource.path,
+        content_name=str(props.get('content_name', '')),
+        version=props.get('version', 0),
+        next_id=props.get('next_id', 1),
+        entries=[
+            IndexEntry(
+                id=entry.get('id', 0),
+                slug=str(entry.get('slug', '')),
+                path=str(entry.get('path', '')),
+                hash=str(entry.get('hash', '')),
+                deleted=entry.get('deleted', False),
+            )
+            for entry in props.get('entries', ())
+        ],
+        scan_path=props.get('scan_path', ''),
+        filters=[str(f) for f in props.get('filters', ())],
+        metadata={k[len('metadata/'):]: v for k, v in props.items() if k.startswith('metadata/')},
+    )
+
+
+_BUILDERS = {
+    'CraftingRecipe': recipe_from_resource,
+    'HarvestLootTable': loot_table_from_resource,
+    'ContentIndex': content_index_from_resource,
+}
+
+
+def record_from_resource(resource):
+    """Return the typed record for a parsed resource, or None if untracked."""
+    script_class = resource.script_class
+    if script_class in ITEM_SCRIPT_CLASSES:
+        return item_from_resource(resource)
+    builder = _BUILDERS.get(script_class)
+    return builder(resource) if builder else None
+
+
+def load_record(path):
+    """Parse `path` once and return its typed record (or None)."""
+    return record_from_resource(tres.parse_file(path))
+
+
+def load_item(path):
+    return item_from_resource(tres.parse_file(path))
+
+
+def load_recipe(path):
+    return recipe_from_resource(tres.parse_file(path))
+
+
+def load_loot_table(path):
+    return loot_table_from_resource(tres.parse_file(path))
+
+
+def load_content_index(path):
+    return content_index_from_resource(tres.parse_file(path))
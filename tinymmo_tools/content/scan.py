@@ -0,0 +1,110 @@
+"""
+Shared content scanning stage: discover once, parse in parallel, merge in order.
+
+Files are discovered with os.scandir and sorted, so every tool sees the
+same order. Files the parse cache cannot serve are hashed and parsed on a
+process pool (the tokenizer is pure Python and holds the GIL); the results
+are merged back in discovery order.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from .. import paths
+from .cache import read_and_parse
+
+
+# Below this many files per worker, process start-up costs more than it saves.
+MIN_FILES_PER_JOB = 32
+
+
+def add_jobs_argument(parser):
+    parser.add_argument(
+        '-j', '--jobs', type=int, default=None,
+        help="parser processes for uncached files (default: CPU count, 1 = serial)",
+    )
+
+
+def discover(directory, suffix='.tres', recursive=True):
+    """Return sorted Paths of the files under `directory` ending with `suffix`."""
+    found = []
+    pending = [os.fspath(directory)]
+    while pending:
+        try:
+            entries = os.scandir(pending.pop())
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        pending.append(entry.path)
+                elif entry.name.endswith(suffix):
+                    found.append(entry.path)
+    found.sort()
+    return [Path(path) for path in found]
+
+
+def discover_content(project_root=paths.PROJECT_ROOT):
+    """Discover item, recipe and loot table files in one pass per directory."""
+    root = Path(project_root)
+    relative = lambda directory: root / directory.relative_to(paths.PROJECT_ROOT)
+    return {
+        'items': discover(relative(paths.ITEMS_DIR)),
+        'recipes': discover(relative(paths.RECIPES_DIR)),
+        'loot_tables': discover(relative(paths.LOOT_TABLES_DIR), recursive=False),
+    }
+
+
+def _effective_jobs(jobs, pending):
+    jobs = jobs or os.cpu_count() or 1
+    return max(1, min(jobs, pending // MIN_FILES_PER_JOB))
+
+
+def _safe_read_and_parse(path, known_digest):
+    try:
+        return read_and_parse(path, known_digest)
+    except Exception as e:
+        return None, e, False
+
+
+def scan(file_paths, cache=None, jobs=None):
+    """Return the typed record of every file, in the order given.
+
+    Files that fail to parse are reported and come back as None.
+    """
+    results = [None] * len(file_paths)
+    pending = []
+    for index, path in enumerate(file_paths):
+        if cache is not None:
+            key, stat, entry = cache.lookup(path)
+            if cache.is_fresh(stat, entry):
+                results[index] = cache.served(path, entry[3])
+                continue
+            pending.append((index, path, key, stat, entry))
+        else:
+            pending.append((index, path, None, None, None))
+
+    if not pending:
+        return results
+
+    args = [(str(path), entry[2] if entry else None) for _, path, _, _, entry in pending]
+    workers = _effective_jobs(jobs, len(pending))
+    if workers == 1:
+        outcomes = [_safe_read_and_parse(*arg) for arg in args]
+    else:
+        chunksize = max(1, len(args) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            outcomes = list(executor.map(_safe_read_and_parse, *zip(*args), chunksize=chunksize))
+
+    for (index, path, key, stat, entry), (digest, record, reused) in zip(pending, outcomes):
+        if digest is None:
+            print(f"Error parsing {path}: {record}")
+            continue
+        if cache is not None:
+            record = cache.store(key, stat, entry, digest, record, reused)
+        if record is not None and record.path != str(path):
+            record.path = str(path)
+        results[index] = record
+    return results
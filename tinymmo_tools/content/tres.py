@@ -0,0 +1,621 @@
+"""
+Single-pass tokenizer and parser for Godot text resources (.tres / .tscn).
+
+Files are read in fixed-size chunks and scanned once, front to back. Every
+section header and property is produced as soon as its last token has been
+read, so callers can either parse a whole resource or stream it section by
+section with bounded memory.
+"""
+
+import re
+from dataclasses import dataclass, field
+
+
+CHUNK_SIZE = 1 << 16
+
+
+class StringName(str):
+    """A Godot StringName literal (&"...")."""
+    __slots__ = ()
+
+
+class NodePath(str):
+    """A Godot NodePath literal (^"...")."""
+    __slots__ = ()
+
+
+class TypedArray(list):
+    """A typed array literal, e.g. Array[Dictionary]([...]).
+
+    `type` is a builtin/class name, or an ExtResourceRef for script types.
+    """
+    __slots__ = ('type',)
+
+    def __init__(self, type_name, items=()):
+        super().__init__(items)
+        self.type = type_name
+
+
+class PackedArray(list):
+    """A packed array literal, e.g. PackedStringArray("a", "b")."""
+    __slots__ = ('type',)
+
+    def __init__(self, type_name, items=()):
+        super().__init__(items)
+        self.type = type_name
+
+
+class TypedDictionary(dict):
+    """A typed dictionary literal, e.g. Dictionary[int, Resource]({...})."""
+    __slots__ = ('key_type', 'value_type')
+
+    def __init__(self, key_type, value_type, items=()):
+        super().__init__(items)
+        self.key_type = key_type
+        self.value_type = value_type
+
+
+@dataclass(frozen=True)
+class ExtResourceRef:
+    id: str
+
+
+@dataclass(frozen=True)
+class SubResourceRef:
+    id: str
+
+
+@dataclass(frozen=True)
+class Constructor:
+    """Any other constructor literal, e.g. Vector2(1, 2) or Color(1, 1, 1, 1)."""
+    name: str
+    args: tuple
+
+
+@dataclass
+class Section:
+    """One [tag attr=value ...] header and the properties that follow it.
+
+    `spans` maps each property key to the (start, end) character offsets of
+    its value text in the source file.
+    """
+    tag: str
+    attrs: dict
+    properties: dict = field(default_factory=dict)
+    spans: dict = field(default_factory=dict)
+
+    @property
+    def id(self):
+        return self.attrs.get('id')
+
+
+@dataclass
+class TextResource:
+    """A fully parsed .tres or .tscn file."""
+    path: str
+    header: Section
+    ext_resources: dict = field(default_factory=dict)
+    sub_resources: dict = field(default_factory=dict)
+    resource: Section = None
+    nodes: list = field(default_factory=list)
+    connections: list = field(default_factory=list)
+
+    @property
+    def script_class(self):
+        return self.header.attrs.get('script_class', '')
+
+    @property
+    def type(self):
+        return self.header.attrs.get('type', '')
+
+    @property
+    def properties(self):
+        """Properties of the main [resource] section (empty for scenes)."""
+        return self.resource.properties if self.resource else {}
+
+
+class TresSyntaxError(ValueError):
+    pass
+
+
+_STRING = r'"(?:[^"\\]|\\.)*"'
+_TOKEN = re.compile(r'''[ \t\r\n]*(?:
+    (?P<str>''' + _STRING + r''')
+  | &(?P<sname>''' + _STRING + r''')
+  | \^(?P<npath>''' + _STRING + r''')
+  | (?P<num>[-+]?(?:inf(?:_neg)?|nan)(?!\w)|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?(?!\w))
+  | (?P<ident>[A-Za-z_]\w*)
+  | (?P<punct>[\[\]{}(),:=])
+)''', re.X | re.S)
+_SKIP = re.compile(r'(?:[ \t\r\n]+|;[^\n]*)*')
+_KEY = re.compile(r'([^\s=\[;][^=\n]*?)[ \t]*=')
+_KEYWORDS = {'true': True, 'false': False, 'null': None, 'nil': None}
+
+# Fast path for the single-line statements that make up most content files.
+# Every complete line matches exactly one alternative, so one finditer() over a
+# window of lines tokenizes it in C; the first `other` line (multi-line or
+# unusual values) hands control back to the general tokenizer. The scan is lazy
+# so files that alternate simple lines with multi-line values (world saves and
+# their inventories) do not rescan the rest of the window at every switch.
+_SIMPLE_STATEMENT = re.compile(r"""(
+    [ \t\r\n]*
+    (?:
+        ([^\s=\[;"][^\s=]*)[ \t]*=[ \t]*
+        (?:
+            ("[^"\\\n]*")
+          | &("[^"\\\n]*")
+          | (-?\d+\.\d+(?:e[-+]?\d+)?|-?\d+e[-+]?\d+)
+          | (-?\d+)
+          | (true|false|null)
+          | ExtResource\(("[^"\\\n]*")\)
+          | SubResource\(("[^"\\\n]*")\)
+          | (\[(?:"[^"\\\n]*"(?:,[ ]"[^"\\\n]*")*)?\])
+        )
+      | \[(\w+)((?:[ \t]+\w+=(?:"[^"\\\n]*"|[-+\w.]+))*)\]
+    )
+    [ \t]*\r?\n
+  | [ \t\r\n]*([^\s][^\n]*\n)
+)""", re.X)
+_SIMPLE_WINDOW = 8192
+_QUOTED = re.compile(r'"([^"\\\n]*)"')
+_SIMPLE_HEADER = re.compile(r'\[(\w+)((?:[ \t]+\w+=(?:"[^"\\\n]*"|[-+\w.]+))*)\][ \t]*\r?\n')
+_SIMPLE_ATTR = re.compile(r'(\w+)=(?:"([^"\\\n]*)"|([-+\w.]+))')
+_ESCAPE = re.compile(r'\\(u[0-9a-fA-F]{4}|U[0-9a-fA-F]{6}|.)', re.S)
+_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f', 'v': '\v', 'a': '\a'}
+_FLOAT_KEYWORDS = {'inf': float('inf'), 'nan': float('nan')}
+
+
+def _unescape_match(match):
+    code = match.group(1)
+    if len(code) > 1:
+        return chr(int(code[1:], 16))
+    return _ESCAPES.get(code, code)
+
+
+def _unescape(text):
+    if '\\' not in text:
+        return text
+    return _ESCAPE.sub(_unescape_match, text)
+
+
+def _number(text):
+    if text[-1].isalpha():
+        return float('-inf') if text.startswith('-') or text.endswith('_neg') else _FLOAT_KEYWORDS[text.lstrip('+')]
+    if '.' in text or 'e' in text or 'E' in text:
+        return float(text)
+    return int(text)
+
+
+def _bare_value(text):
+    if text in _KEYWORDS:
+        return _KEYWORDS[text]
+    try:
+        return _number(text)
+    except (KeyError, ValueError):
+        return text
+
+
+class Tokenizer:
+    """Pull tokenizer over a text stream, refilling its buffer on demand.
+
+    Only the unconsumed tail of the current chunk is kept in memory, so a
+    file is never held in full unless a single value spans all of it.
+    """
+
+    def __init__(self, stream, chunk_size=CHUNK_SIZE):
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._buf = ''
+        self._pos = 0
+        self._base = 0
+        self._eof = False
+
+    @property
+    def offset(self):
+        return self._base + self._pos
+
+    def _refill(self):
+        chunk = self._stream.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._base += self._pos
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _match(self, pattern, single_line=False):
+        """Match at the cursor, reading more input while the match could grow.
+
+        A failed `single_line` pattern only reads more when the rest of the
+        current line has not been buffered yet.
+        """
+        while True:
+            match = pattern.match(self._buf, self._pos)
+            if self._eof or (match is not None and match.end() < len(self._buf)):
+                return match
+            if match is None and single_line and self._buf.find('\n', self._pos) != -1:
+                return None
+            if not self._refill():
+                return pattern.match(self._buf, self._pos)
+
+    def _error(self, message):
+        return TresSyntaxError(f"{message} at offset {self.offset}")
+
+    def skip(self):
+        """Skip whitespace and ; comments. Returns the next char or '' at EOF."""
+        while True:
+            self._pos = _SKIP.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._refill():
+                return ''
+
+    def accept(self, char):
+        if self.skip() == char:
+            self._pos += 1
+            return True
+        return False
+
+    def expect(self, char):
+        if not self.accept(char):
+            raise self._error(f"Expected {char!r}")
+
+    def token(self):
+        match = self._match(_TOKEN)
+        if match is None:
+            raise self._error("Unexpected input")
+        self._pos = match.end()
+        return match
+
+    def key(self):
+        """Read a property key up to and including its '='."""
+        self.skip()
+        match = self._match(_KEY, single_line=True)
+        if match is None:
+            raise self._error("Expected property key")
+        self._pos = match.end()
+        return match.group(1)
+
+    def value(self):
+        match = self.token()
+        kind = match.lastgroup
+        if kind == 'str':
+            return _unescape(match.group(kind)[1:-1])
+        if kind == 'sname':
+            return StringName(_unescape(match.group(kind)[1:-1]))
+        if kind == 'num':
+            return _number(match.group(kind))
+        if kind == 'npath':
+            return NodePath(_unescape(match.group(kind)[1:-1]))
+        if kind == 'ident':
+            return self._ident(match.group(kind))
+        char = match.group(kind)
+        if char == '[':
+            return self._list(']')
+        if char == '{':
+            return self._dict()
+        raise self._error(f"Unexpected {char!r}")
+
+    def _list(self, close):
+        items = []
+        if self.accept(close):
+            return items
+        while True:
+            items.append(self.value())
+            if self.accept(close):
+                return items
+            self.expect(',')
+            if self.accept(close):
+                return items
+
+    def _dict(self):
+        result = {}
+        if self.accept('}'):
+            return result
+        while True:
+            key = self.value()
+            self.expect(':')
+            result[key] = self.value()
+            if self.accept('}'):
+                return result
+            self.expect(',')
+            if self.accept('}'):
+                return result
+
+    def _type_params(self):
+        """Read `T]` or `K, V]`; script types come back as ExtResourceRef."""
+        params = []
+        while True:
+            param = self.value()
+            params.append(param.name if isinstance(param, Constructor) else param)
+            if self.accept(']'):
+                return params
+            self.expect(',')
+
+    def _args(self):
+        args = []
+        if self.accept(')'):
+            return args
+        while True:
+            arg = self.value()
+            if self.accept(':'):
+                arg = (arg, self.value())
+            args.append(arg)
+            if self.accept(')'):
+                return args
+            self.expect(',')
+
+    def _ident(self, name):
+        if name in _KEYWORDS:
+            return _KEYWORDS[name]
+        if name in _FLOAT_KEYWORDS:
+            return _FLOAT_KEYWORDS[name]
+        type_params = None
+        if self.accept('['):
+            type_params = self._type_params()
+        if not self.accept('('):
+            if type_params is None:
+                return Constructor(name, ())
+            raise self._error(f"Expected '(' after {name}[...]")
+        if type_params is not None:
+            inner = self.value()
+            self.expect(')')
+            if name == 'Dictionary':
+                key_type, value_type = (type_params + ['Variant', 'Variant'])[:2]
+                return TypedDictionary(key_type, value_type, inner)
+            return TypedArray(type_params[0] if type_params else 'Variant', inner)
+        args = self._args()
+        if name == 'ExtResource':
+            return ExtResourceRef(str(args[0]))
+        if name == 'SubResource':
+            return SubResourceRef(str(args[0]))
+        if name.startswith('Packed') and name.endswith('Array'):
+            return PackedArray(name, args)
+        if name in ('Array', 'Dictionary') and len(args) == 1:
+            return args[0]
+        return Constructor(name, tuple(args))
+
+    def header(self):
+        """Read a [tag attr=value ...] section header."""
+        self.skip()
+        match = self._match(_SIMPLE_HEADER, single_line=True)
+        if match is not None:
+            self._pos = match.end()
+            attrs = {}
+            for name, quoted, bare in _SIMPLE_ATTR.findall(match.group(2)):
+                attrs[name] = _bare_value(bare) if bare else quoted
+            return Section(match.group(1), attrs)
+        self.expect('[')
+        match = self.token()
+        if match.lastgroup != 'ident':
+            raise self._error("Expected section tag")
+        section = Section(match.group('ident'), {})
+        while not self.accept(']'):
+            match = self.token()
+            if match.lastgroup != 'ident':
+                raise self._error("Expected attribute name")
+            self.expect('=')
+            section.attrs[match.group('ident')] = self.value()
+        return section
+
+    def simple_statements(self, section):
+        """Consume a run of simple lines into `section`, creating new sections
+        at headers. Returns the finished sections and the current one.
+        """
+        finished = []
+        while True:
+            buf = self._buf
+            pos = self._pos
+            end = buf.rfind('\n', pos, pos + _SIMPLE_WINDOW) + 1
+            if not end:
+                return finished, section
+            base = self._base + pos
+            offset = 0
+            for match in _SIMPLE_STATEMENT.finditer(buf, pos, end):
+                (whole, key, text, sname, flt, integer, keyword, ext, sub, strs,
+                 tag, attrs, other) = match.groups()
+                if other:
+                    self._pos = pos + offset
+                    return finished, section
+                if tag:
+                    if section is not None:
+                        finished.append(section)
+                    section = Section(tag, {name: _bare_value(bare) if bare else quoted
+                                            for name, quoted, bare in _SIMPLE_ATTR.findall(attrs)})
+                    offset += len(whole)
+                    continue
+                if section is None:
+                    self._pos = pos + offset
+                    return finished, section
+                if text:
+                    value, size = text[1:-1], len(text)
+                elif sname:
+                    value, size = StringName(sname[1:-1]), len(sname) + 1
+                elif flt:
+                    value, size = float(flt), len(flt)
+                elif integer:
+                    value, size = int(integer), len(integer)
+                elif keyword:
+                    value, size = _KEYWORDS[keyword], len(keyword)
+                elif strs:
+                    value, size = _QUOTED.findall(strs), len(strs)
+                elif ext:
+                    value, size = ExtResourceRef(ext[1:-1]), len(ext) + 13
+                else:
+                    value, size = SubResourceRef(sub[1:-1]), len(sub) + 13
+                stop = base + offset + len(whole.rstrip())
+                section.properties[key] = value
+                section.spans[key] = (stop - size, stop)
+                offset += len(whole)
+            self._pos = pos + offset
+            if self._pos < end:
+                return finished, section
+            if end == len(buf) and not self._refill():
+                return finished, section
+
+    def property(self):
+        """Read one `key = value` statement as (key, value, (start, end))."""
+        key = self.key()
+        self.skip()
+        start = self.offset
+        value = self.value()
+        return key, value, (start, self.offset)
+
+
+def iter_sections(stream, chunk_size=CHUNK_SIZE):
+    """Yield each Section of a text resource as soon as it is complete."""
+    tokenizer = Tokenizer(stream, chunk_size)
+    section = None
+    while True:
+        finished, section = tokenizer.simple_statements(section)
+        yield from finished
+        char = tokenizer.skip()
+        if not char:
+            break
+        if char == '[':
+            if section is not None:
+                yield section
+            section = tokenizer.header()
+            continue
+        key, value, span = tokenizer.property()
+        if section is None:
+            raise tokenizer._error("Property outside of a section")
+        section.properties[key] = value
+        section.spans[key] = span
+    if section is not None:
+        yield section
+
+
+def parse_stream(stream, path=''):
+    sections = iter_sections(stream)
+    header = next(sections, None)
+    if header is None or header.tag not in ('gd_resource', 'gd_scene'):
+        raise TresSyntaxError(f"{path or 'stream'}: not a Godot text resource")
+    resource = TextResource(path, header)
+    for section in sections:
+        tag = section.tag
+        if tag == 'ext_resource':
+            resource.ext_resources[section.id] = section
+        elif tag == 'sub_resource':
+            resource.sub_resources[section.id] = section
+        elif tag == 'resource':
+            resource.resource = section
+        elif tag == 'node':
+            resource.nodes.append(section)
+        elif tag == 'connection':
+            resource.connections.append(section)
+    return resource
+
+
+def parse_file(path):
+    """Parse a .tres/.tscn file in a single streaming pass."""
+    with open(path, 'r', encoding='utf-8') as stream:
+        return parse_stream(stream, str(path))
+
+
+def parse_string(text, path=''):
+    import io
+    return parse_stream(io.StringIO(text), path)
+
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _format_float(number):
+    if number != number:
+        return 'nan'
+    if number in (float('inf'), float('-inf')):
+        return 'inf' if number > 0 else 'inf_neg'
+    text = repr(number)
+    return text if ('.' in text or 'e' in text) else text + '.0'
+
+
+def _format_type(type_param):
+    return type_param if isinstance(type_param, str) else format_value(type_param)
+
+
+def format_value(value):
+    """Serialize a parsed value back to Godot's text resource syntax."""
+    if isinstance(value, StringName):
+        return f'&"{_escape(value)}"'
+    if isinstance(value, NodePath):
+        return f'^"{_escape(value)}"'
+    if isinstance(value, str):
+        return f'"{_escape(value)}"'
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        return _format_float(value)
+    if isinstance(value, PackedArray):
+        return f"{value.type}({', '.join(format_value(v) for v in value)})"
+    if isinstance(value, TypedArray):
+        return f"Array[{_format_type(value.type)}]({format_value(list(value))})"
+    if isinstance(value, list):
+        return '[' + ', '.join(format_value(v) for v in value) + ']'
+    if isinstance(value, TypedDictionary):
+        return f"Dictionary[{_format_type(value.key_type)}, {_format_type(value.value_type)}]({format_value(dict(value))})"
+    if isinstance(value, dict):
+        if not value:
+            return '{}'
+        return '{\n' + ',\n'.join(f"{format_value(k)}: {format_value(v)}" for k, v in value.items()) + '\n}'
+    if isinstance(value, ExtResourceRef):
+        return f'ExtResource("{_escape(value.id)}")'
+    if isinstance(value, SubResourceRef):
+        return f'SubResource("{_escape(value.id)}")'
+    if isinstance(value, Constructor):
+        if not value.args and value.name:
+            return value.name
+        args = (f"{format_value(a[0])}: {format_value(a[1])}" if isinstance(a, tuple) else format_value(a)
+                for a in value.args)
+        return f"{value.name}({', '.join(args)})"
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def format_section(section):
+    """Serialize a Section header and its properties."""
+    attrs = ''.join(f" {k}={format_value(v)}" for k, v in section.attrs.items())
+    lines = [f"[{section.tag}{attrs}]"]
+    lines.extend(f"{k} = {format_value(v)}" for k, v in section.properties.items())
+    return '\n'.join(lines) + '\n'
+
+
+def rewrite_properties(path, section_tag, updates):
+    """Replace property values in place, leaving the rest of the file untouched.
+
+    `updates` maps property keys of the first `section_tag` section to new
+    Python values. Keys the section does not have yet are added after its
+    last non-metadata property, where Godot would save them. Returns the
+    list of keys that actually changed.
+    """
+    with open(path, 'r', encoding='utf-8', newline='') as stream:
+        sections = iter_sections(stream)
+        target = next((s for s in sections if s.tag == section_tag), None)
+    if target is None:
+        return []
+    edits = []
+    for key, new_value in updates.items():
+        if key in target.properties and target.properties[key] != new_value:
+            edits.append((target.spans[key], format_value(new_value), [key]))
+    new_keys = [key for key in updates if key not in target.properties]
+    if new_keys:
+        anchors = [key for key in target.properties if not key.startswith('metadata/')]
+        if not anchors:
+            raise TresSyntaxError(f"{path}: no property to add {', '.join(new_keys)} after")
+        end = target.spans[anchors[-1]][1]
+        text = ''.join(f"\n{key} = {format_value(updates[key])}" for key in new_keys)
+        edits.append(((end, end), text, new_keys))
+    if not edits:
+        return []
+    with open(path, 'r', encoding='utf-8', newline='') as stream:
+        content = stream.read()
+    for (start, end), text, _ in sorted(edits, key=lambda edit: edit[0], reverse=True):
+        content = content[:start] + text + content[end:]
+    with open(path, 'w', encoding='utf-8', newline='') as stream:
+        stream.write(content)
+    return [key for _, _, keys in edits for key in keys]
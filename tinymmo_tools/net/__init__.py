@@ -0,0 +1,4 @@
+"""
+Python ports of the networking wire formats, for offline traffic analysis
+and load testing.
+"""
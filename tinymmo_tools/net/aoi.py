@@ -0,0 +1,420 @@
+"""
+Area-of-interest fan-out simulator.
+
+Today every entity delta goes to every peer (`_aoi_entities_for()` returns
+all entities), and so does every `shop.status` / `shop.update` push
+(ShopManager loops over `instance.connected_peers`). This module replays
+one instance's players and shops through two spatial indexes:
+
+    grid      uniform cells (the zones of SERVER_OPTIMIZATION_GUIDE.md)
+    quadtree  point quadtree split when a leaf holds more than `capacity`
+
+Each index is rebuilt from player positions every `rebuild` seconds, as
+the guide's `_update_player_zones()` does once a second, and queried
+around every event. In "exact" mode the candidates are filtered by
+distance to the AOI radius. In "zone" mode everyone in the touched cells
+or leaves gets the event, with no distance check. An event must reach
+every player whose screen can show it, i.e. who is within `view`
+pixels at event time. Players the stale index misses are counted.
+
+The sweep prints RPC counts against broadcast-to-all for every backend,
+cell size / leaf capacity, radius and mode. It recommends the
+configuration with the least fan-out that misses nobody.
+
+Usage:
+    python -m tinymmo_tools.net.aoi [--players 100,200] [--shops N] [--seconds S] [--view PX] [--rebuild S] [--seed S]
+"""
+
+import argparse
+import math
+import random
+import time
+from dataclasses import dataclass, field
+
+from .swarm import PLAYER_SPEED, SEND_RATE_HZ_ENTITIES
+
+
+# Half the diagonal of the 960x540 viewport at camera zoom 1.
+DEFAULT_VIEW = math.hypot(960, 540) / 2
+DEFAULT_WORLD = 4096.0
+DEFAULT_CELL_SIZES = (128, 256, 512, 1024, 2048)
+DEFAULT_CAPACITIES = (4, 8, 16, 32)
+DEFAULT_MARGINS = (0, 64, 128, 256)
+MODES = ('exact', 'zone')
+
+
+# --- Spatial indexes ----------------------------------------------------------
+
+class GridIndex:
+    """Uniform grid of `cell_size` px cells."""
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.positions = {}
+
+    @property
+    def label(self):
+        return f"grid {self.cell_size:g}px"
+
+    def rebuild(self, positions):
+        self.positions = dict(positions)
+        self.cells = {}
+        size = self.cell_size
+        for pid, (x, y) in self.positions.items():
+            self.cells.setdefault((math.floor(x / size), math.floor(y / size)), []).append(pid)
+
+    def query(self, x, y, radius, exact=True):
+        """Ids near (x, y); returns (ids, candidates examined)."""
+        size = self.cell_size
+        x0, x1 = math.floor((x - radius) / size), math.floor((x + radius) / size)
+        y0, y1 = math.floor((y - radius) / size), math.floor((y + radius) / size)
+        found = []
+        examined = 0
+        cells = self.cells
+        positions = self.positions
+        limit = radius * radius
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                members = cells.get((cx, cy))
+                if not members:
+                    continue
+                examined += len(members)
+                if not exact:
+                    found.extend(members)
+                    continue
+                for pid in members:
+                    px, py = positions[pid]
+                    if (px - x) ** 2 + (py - y) ** 2 <= limit:
+                        found.append(pid)
+        return found, examined
+
+
+@dataclass
+class _Node:
+    x: float
+    y: float
+    size: float
+    depth: int
+    points: list = field(default_factory=list)
+    children: list = None
+
+
+class QuadTree:
+    """Point quadtree over a square world; leaves split past `capacity` points."""
+
+    def __init__(self, capacity, world=DEFAULT_WORLD, max_depth=12):
+        self.capacity = capacity
+        self.world = world
+        self.max_depth = max_depth
+        self.root = _Node(0.0, 0.0, world, 0)
+        self.positions = {}
+
+    @property
+    def label(self):
+        return f"quadtree {self.capacity}/leaf"
+
+    def rebuild(self, positions):
+        self.positions = dict(positions)
+        self.root = _Node(0.0, 0.0, self.world, 0)
+        for pid, (x, y) in self.positions.items():
+            self._insert(self.root, pid, x, y)
+
+    def _insert(self, node, pid, x, y):
+        while node.children is not None:
+            half = node.size / 2
+            node = node.children[(x >= node.x + half) + 2 * (y >= node.y + half)]
+        node.points.append(pid)
+        if len(node.points) > self.capacity and node.depth < self.max_depth:
+            half = node.size / 2
+            node.children = [_Node(node.x + dx * half, node.y + dy * half, half, node.depth + 1)
+                             for dy in (0, 1) for dx in (0, 1)]
+            points, node.points = node.points, []
+            for point in points:
+                self._insert(node, point, *self.positions[point])
+
+    def query(self, x, y, radius, exact=True):
+        """Ids near (x, y); returns (ids, candidates examined)."""
+        found = []
+        examined = 0
+        positions = self.positions
+        limit = radius * radius
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            # Distance from the event to the node's square.
+            dx = max(node.x - x, 0.0, x - node.x - node.size)
+            dy = max(node.y - y, 0.0, y - node.y - node.size)
+            if dx * dx + dy * dy > limit:
+                continue
+            if node.children is not None:
+                stack.extend(node.children)
+                continue
+            examined += len(node.points)
+            if not exact:
+                found.extend(node.points)
+                continue
+            for pid in node.points:
+                px, py = positions[pid]
+                if (px - x) ** 2 + (py - y) ** 2 <= limit:
+                    found.append(pid)
+        return found, examined
+
+
+# --- Scenario ---------------------------------------------------------------
+
+class Wanderer:
+    """A player who walks between points around a home hotspot, pausing in between."""
+
+    def __init__(self, rng, home, spread, world, roam):
+        self.rng = rng
+        self.home = home
+        self.spread = spread
+        self.world = world
+        self.roam = roam
+        self.position = self._pick()
+        self.target = self.position
+        self.wait = rng.uniform(0, 5)
+
+    def _pick(self):
+        if self.rng.random() < self.roam:
+            return (self.rng.uniform(0, self.world), self.rng.uniform(0, self.world))
+        x = self.rng.gauss(self.home[0], self.spread)
+        y = self.rng.gauss(self.home[1], self.spread)
+        return (min(max(x, 0.0), self.world), min(max(y, 0.0), self.world))
+
+    def step(self, delta):
+        """Advance `delta` seconds; True if the player moved."""
+        if self.wait > 0:
+            self.wait -= delta
+            return False
+        dx, dy = self.target[0] - self.position[0], self.target[1] - self.position[1]
+        distance = math.hypot(dx, dy)
+        travel = PLAYER_SPEED * delta
+        if distance <= travel:
+            self.position = self.target
+            self.target = self._pick()
+            self.wait = self.rng.expovariate(1 / 4.0)
+        else:
+            self.position = (self.position[0] + dx / distance * travel, self.position[1] + dy / distance * travel)
+        return True
+
+
+@dataclass
+class Event:
+    kind: str       # 'entity' or 'shop'
+    tick: int
+    x: float
+    y: float
+    source: int     # the moving player (skipped as a recipient), or -1
+    required: frozenset
+
+
+@dataclass
+class Trace:
+    players: int
+    ticks: int
+    tick_hz: int
+    snapshots: dict          # tick -> {player: (x, y)} at every rebuild
+    events: list
+    entity_ticks: int        # sampled ticks carrying entity events
+    movers: int              # entity events (moving players) over those ticks
+    shop_events: int
+
+
+def simulate(players, shops=5, seconds=60.0, tick_hz=SEND_RATE_HZ_ENTITIES, world=DEFAULT_WORLD, hotspots=4,
+             spread=400.0, roam=0.1, shop_events_per_min=6.0, view=DEFAULT_VIEW, rebuild=1.0, sample_every=20,
+             seed=None):
+    """Generate one instance's movement and events.
+
+    Entity events are every moving player's delta on every `sample_every`th
+    tick (fan-out is scaled back up to the full tick rate). Shop events are
+    status and listing pushes from `shops` open shops, each at the seller's
+    position.
+    """
+    rng = random.Random(seed)
+    homes = [(rng.uniform(0.15, 0.85) * world, rng.uniform(0.15, 0.85) * world) for _ in range(hotspots)]
+    walkers = [Wanderer(random.Random(rng.random()), rng.choice(homes), spread, world, roam) for _ in range(players)]
+    shop_positions = [walkers[i].position for i in rng.sample(range(players), min(shops, players))]
+    delta = 1.0 / tick_hz
+    ticks = int(seconds * tick_hz)
+    rebuild_ticks = max(1, round(rebuild * tick_hz))
+    shop_rate = shop_events_per_min / 60.0 * delta
+    limit = view * view
+    snapshots = {}
+    events = []
+    entity_ticks = movers = shop_events = 0
+
+    def required(x, y, source):
+        return frozenset(i for i, w in enumerate(walkers)
+                         if i != source and (w.position[0] - x) ** 2 + (w.position[1] - y) ** 2 <= limit)
+
+    for tick in range(ticks):
+        moved = [i for i, walker in enumerate(walkers) if walker.step(delta)]
+        if tick % rebuild_ticks == 0:
+            snapshots[tick] = {i: w.position for i, w in enumerate(walkers)}
+        if tick % sample_every == 0:
+            entity_ticks += 1
+            movers += len(moved)
+            for i in moved:
+                x, y = walkers[i].position
+                events.append(Event('entity', tick, x, y, i, required(x, y, i)))
+        for index, (x, y) in enumerate(shop_positions):
+            if rng.random() < shop_rate:
+                shop_events += 1
+                events.append(Event('shop', tick, x, y, -1, required(x, y, -1)))
+                # Now and then the shop closes and another player opens one where they stand.
+                if rng.random() < 0.2:
+                    shop_positions[index] = rng.choice(walkers).position
+    return Trace(players, ticks, tick_hz, snapshots, events, entity_ticks, movers, shop_events)
+
+
+# --- Evaluation -------------------------------------------------------------
+
+@dataclass
+class Result:
+    index: str
+    mode: str
+    radius: float
+    entity_blocks_per_sec: float
+    entity_packets_per_sec: float
+    shop_rpcs_per_sec: float
+    missed: int
+    required: int
+    examined_per_query: float
+    query_us: float
+
+    @property
+    def fan_out(self):
+        return self.entity_blocks_per_sec + self.shop_rpcs_per_sec
+
+
+def broadcast(trace):
+    """Per-second fan-out with no AOI (today's behaviour)."""
+    scale = trace.tick_hz / trace.entity_ticks if trace.entity_ticks else 0.0
+    seconds = trace.ticks / trace.tick_hz
+    sampled = [e for e in trace.events if e.kind == 'entity']
+    ticks_with_movers = len({e.tick for e in sampled})
+    return Result('broadcast', '-', math.inf,
+                  entity_blocks_per_sec=trace.movers * (trace.players - 1) * scale,
+                  entity_packets_per_sec=ticks_with_movers * trace.players * scale,
+                  shop_rpcs_per_sec=trace.shop_events * trace.players / seconds,
+                  missed=0, required=sum(len(e.required) for e in trace.events),
+                  examined_per_query=0.0, query_us=0.0)
+
+
+def evaluate(trace, index, radius, mode):
+    exact = mode == 'exact'
+    scale = trace.tick_hz / trace.entity_ticks if trace.entity_ticks else 0.0
+    seconds = trace.ticks / trace.tick_hz
+    rebuild_ticks = sorted(trace.snapshots)
+    next_rebuild = 0
+    blocks = shop_rpcs = missed = required = examined = 0
+    packets = 0
+    receivers = set()
+    current_tick = None
+    elapsed = 0.0
+    for event in trace.events:
+        while next_rebuild < len(rebuild_ticks) and rebuild_ticks[next_rebuild] <= event.tick:
+            index.rebuild(trace.snapshots[rebuild_ticks[next_rebuild]])
+            next_rebuild += 1
+        if event.kind == 'entity' and event.tick != current_tick:
+            packets += len(receivers)
+            receivers = set()
+            current_tick = event.tick
+        start = time.perf_counter()
+        found, seen = index.query(event.x, event.y, radius, exact)
+        elapsed += time.perf_counter() - start
+        examined += seen
+        recipients = set(found)
+        recipients.discard(event.source)
+        required += len(event.required)
+        missed += len(event.required - recipients)
+        if event.kind == 'entity':
+            blocks += len(recipients)
+            receivers |= recipients
+        else:
+            shop_rpcs += len(recipients)
+    packets += len(receivers)
+    queries = len(trace.events) or 1
+    return Result(index.label, mode, radius,
+                  entity_blocks_per_sec=blocks * scale, entity_packets_per_sec=packets * scale,
+                  shop_rpcs_per_sec=shop_rpcs / seconds, missed=missed, required=required,
+                  examined_per_query=examined / queries, query_us=elapsed / queries * 1e6)
+
+
+def sweep(trace, view, world=DEFAULT_WORLD, cell_sizes=DEFAULT_CELL_SIZES, capacities=DEFAULT_CAPACITIES,
+          margins=DEFAULT_MARGINS):
+    results = []
+    indexes = [GridIndex(size) for size in cell_sizes] + [QuadTree(capacity, world) for capacity in capacities]
+    for margin in margins:
+        for index in indexes:
+            for mode in MODES:
+                results.append(evaluate(trace, index, view + margin, mode))
+    return results
+
+
+def best(results):
+    """The least fan-out among results that miss nobody (then the cheapest query)."""
+    complete = [r for r in results if r.missed == 0]
+    return min(complete, key=lambda r: (r.fan_out, r.query_us)) if complete else None
+
+
+def print_results(baseline, results, top):
+    def row(r, label=None):
+        saved = 1 - r.fan_out / baseline.fan_out if baseline.fan_out else 0.0
+        radius = '-' if math.isinf(r.radius) else f"{r.radius:.0f}"
+        miss = f"{r.missed / r.required * 100:.2f}%" if r.required else '-'
+        print(f"  {label or r.index:<18} {r.mode:<6} {radius:>6} {r.entity_blocks_per_sec:>11,.0f} "
+              f"{r.entity_packets_per_sec:>10,.0f} {r.shop_rpcs_per_sec:>9,.1f} {saved * 100:>6.1f}% {miss:>7} "
+              f"{r.examined_per_query:>9.1f} {r.query_us:>8.1f}")
+
+    print(f"  {'Index':<18} {'Mode':<6} {'Radius':>6} {'Blocks/s':>11} {'Packets/s':>10} {'Shop/s':>9} "
+          f"{'Saved':>7} {'Missed':>7} {'Examined':>9} {'µs/query':>8}")
+    row(baseline)
+    complete = sorted((r for r in results if r.missed == 0), key=lambda r: (r.fan_out, r.query_us))
+    for r in complete[:top]:
+        row(r)
+    incomplete = [r for r in results if r.missed]
+    if incomplete:
+        worst = max(incomplete, key=lambda r: r.radius)
+        print(f"  ({len(incomplete)} configurations miss players, e.g. {worst.index} {worst.mode} radius "
+              f"{worst.radius:.0f}: {worst.missed:,} missed deliveries)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep AOI grid/quadtree parameters against broadcast-to-all.")
+    parser.add_argument('--players', default='100,200', help="comma-separated players per instance (default: 100,200)")
+    parser.add_argument('--shops', type=int, default=5, help="open shops (default: 5)")
+    parser.add_argument('--seconds', type=float, default=60.0, help="simulated seconds (default: 60)")
+    parser.add_argument('--world', type=float, default=DEFAULT_WORLD, help="world size in px (default: 4096)")
+    parser.add_argument('--hotspots', type=int, default=4, help="towns/harvest areas players gather around (default: 4)")
+    parser.add_argument('--view', type=float, default=DEFAULT_VIEW, help="radius a player sees in px (default: 551)")
+    parser.add_argument('--rebuild', type=float, default=1.0, help="index rebuild interval in seconds (default: 1)")
+    parser.add_argument('--sample-every', type=int, default=20, help="evaluate entity events every Nth tick (default: 20)")
+    parser.add_argument('--top', type=int, default=8, help="configurations to list (default: 8)")
+    parser.add_argument('--seed', type=int, default=1, help="random seed")
+    args = parser.parse_args()
+
+    for players in (int(count) for count in args.players.split(',')):
+        trace = simulate(players, args.shops, args.seconds, world=args.world, hotspots=args.hotspots, view=args.view,
+                         rebuild=args.rebuild, sample_every=args.sample_every, seed=args.seed)
+        print(f"\n=== {players} players, {args.shops} shops, {args.seconds:g} s, view {args.view:.0f} px, "
+              f"index rebuilt every {args.rebuild:g} s ===")
+        print(f"  {len(trace.events):,} events evaluated ({trace.shop_events} shop pushes)")
+        baseline = broadcast(trace)
+        results = sweep(trace, args.view, args.world)
+        print_results(baseline, results, args.top)
+        choice = best(results)
+        if choice is None:
+            print("  ⚠️  Every configuration misses players; widen --view margins or rebuild more often")
+            continue
+        print(f"  ✅ Best: {choice.index}, {choice.mode}, radius {choice.radius:.0f} px: "
+              f"{choice.fan_out:,.0f} sends/s vs {baseline.fan_out:,.0f} broadcast "
+              f"({(1 - choice.fan_out / baseline.fan_out) * 100:.0f}% fewer)")
+        print(f"  Players move up to {args.rebuild * PLAYER_SPEED:.0f} px between rebuilds; a radius of at least "
+              f"{args.view + args.rebuild * PLAYER_SPEED:.0f} px never misses anyone whatever the traffic.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Append-only capture files of delta packets.
+
+    file   = b'TMMOCAP1', record*
+    record = u32 payload length, u8 kind, f64 time, u32 peer, payload
+
+A DELTA record holds the raw WireCodec delta one peer was sent (or, for
+client deltas, the peer that sent it). A MAP record holds a bootstrap with
+no objects whose map updates describe the PathRegistry in force from then
+on, so a capture decodes on its own. Times are Unix seconds.
+
+Records are written whole and never rewritten, so a capture that was cut
+off mid-record (a crashed recorder) reads up to its last complete record.
+"""
+
+import os
+import struct
+import time
+from collections import namedtuple
+
+from .codec import WireCodec, WireError
+
+
+MAGIC = b'TMMOCAP1'
+RECORD = struct.Struct('<IBdI')
+KIND_DELTA = 1
+KIND_MAP = 2
+KIND_CLIENT_DELTA = 3
+
+Record = namedtuple('Record', 'kind time peer payload')
+
+
+class CaptureWriter:
+    """Append records to a capture file, creating it if needed."""
+
+    def __init__(self, path, buffer_size=1 << 20):
+        self.path = path
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        if exists:
+            with open(path, 'rb') as f:
+                if f.read(len(MAGIC)) != MAGIC:
+                    raise WireError(f"{path} is not a delta capture")
+        self.file = open(path, 'ab', buffering=buffer_size)
+        if not exists:
+            self.file.write(MAGIC)
+        self.records = 0
+
+    def write(self, kind, peer, payload, timestamp=None):
+        self.file.write(RECORD.pack(len(payload), kind, time.time() if timestamp is None else timestamp, peer))
+        self.file.write(payload)
+        self.records += 1
+
+    def write_delta(self, peer, data, timestamp=None):
+        self.write(KIND_DELTA, peer, data, timestamp)
+
+    def write_client_delta(self, peer, data, timestamp=None):
+        self.write(KIND_CLIENT_DELTA, peer, data, timestamp)
+
+    def write_map(self, registry, timestamp=None):
+        self.write(KIND_MAP, 0, WireCodec(registry).encode_bootstrap(registry.get_full_map_updates(), []), timestamp)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CaptureReader:
+    """Stream the records of a capture file in order.
+
+    `truncated` is set once iteration hits an incomplete final record.
+    """
+
+    def __init__(self, path, buffer_size=1 << 20):
+        self.path = path
+        self.buffer_size = buffer_size
+        self.truncated = False
+        self.bytes_read = 0
+
+    def __iter__(self):
+        with open(self.path, 'rb', buffering=self.buffer_size) as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise WireError(f"{self.path} is not a delta capture")
+            self.bytes_read = len(MAGIC)
+            while True:
+                header = f.read(RECORD.size)
+                if not header:
+                    return
+                if len(header) < RECORD.size:
+                    self.truncated = True
+                    return
+                length, kind, timestamp, peer = RECORD.unpack(header)
+                payload = f.read(length)
+                if len(payload) < length:
+                    self.truncated = True
+                    return
+                self.bytes_read += RECORD.size + length
+                yield Record(kind, timestamp, peer, payload)
+
+
+def deltas(path, registry, peer=None, client=False):
+    """Yield (time, peer, delta bytes) from a capture, applying MAP records to `registry`.
+
+    Only deltas sent to `peer` when given; client deltas instead with `client`.
+    """
+    codec = WireCodec(registry)
+    wanted = KIND_CLIENT_DELTA if client else KIND_DELTA
+    for record in CaptureReader(path):
+        if record.kind == KIND_MAP:
+            codec.decode_bootstrap(record.payload)
+        elif record.kind == wanted and (peer is None or record.peer == peer):
+            yield record.time, record.peer, record.payload
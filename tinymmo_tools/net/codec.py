@@ -0,0 +1,180 @@
+"""
+Port of WireCodec (source/common/network/wire_codec.gd): delta and bootstrap
+packets, byte for byte.
+
+    delta     = u16 block_count, block*
+    block     = u32 eid, u16 pair_count, (u16 pid, value)*
+    bootstrap = u16 update_count, (u16 pid, u32 len, utf8 path, u8 wire_type)*,
+                u16 object_count, block*
+
+Integers are little-endian (StreamPeerBuffer's default). A value is encoded
+by its pid's wire type in the PathRegistry: u8 bool, u32 int, f32, two f32
+for a Vector2, or else a u32-length-prefixed Variant (put_var).
+
+Decoding reads precompiled struct.Struct layouts straight out of a
+memoryview and never copies a slice of the packet.
+"""
+
+import struct
+
+from . import variant
+from .registry import WIRE_BOOL, WIRE_F32, WIRE_I32, WIRE_VARIANT, WIRE_VEC2_F32, PathRegistry
+
+
+U8 = struct.Struct('<B')
+U16 = struct.Struct('<H')
+U32 = struct.Struct('<I')
+F32 = struct.Struct('<f')
+VEC2_F32 = struct.Struct('<2f')
+# u32 eid, u16 pair_count
+BLOCK_HEADER = struct.Struct('<IH')
+
+# Fixed-size values by wire type, and the same prefixed by their u16 pid so a
+# pair unpacks in one call.
+VALUE_STRUCTS = {WIRE_BOOL: U8, WIRE_I32: U32, WIRE_F32: F32, WIRE_VEC2_F32: VEC2_F32}
+PAIR_STRUCTS = {wire_type: struct.Struct('<H' + layout.format[1:]) for wire_type, layout in VALUE_STRUCTS.items()}
+VALUE_SIZES = {wire_type: layout.size for wire_type, layout in VALUE_STRUCTS.items()}
+
+
+class WireError(ValueError):
+    """A packet is truncated or otherwise malformed."""
+
+
+class WireCodec:
+    """Encode and decode packets against one PathRegistry."""
+
+    def __init__(self, registry=None):
+        self.registry = registry if registry is not None else PathRegistry()
+
+    # --- Values ---------------------------------------------------------------
+
+    def _encode_value(self, out, wire_type, value):
+        if wire_type == WIRE_BOOL:
+            out += U8.pack(1 if value else 0)
+        elif wire_type == WIRE_I32:
+            out += U32.pack(int(value) & 0xFFFFFFFF)
+        elif wire_type == WIRE_F32:
+            out += F32.pack(float(value))
+        elif wire_type == WIRE_VEC2_F32:
+            out += VEC2_F32.pack(float(value[0]), float(value[1]))
+        else:
+            # Variant fallback, as StreamPeer.put_var() writes it.
+            data = variant.encode(value)
+            out += U32.pack(len(data))
+            out += data
+
+    def _encode_pairs(self, out, pairs):
+        out += U16.pack(len(pairs))
+        type_of = self.registry.type_of
+        for pair in pairs:
+            pid = int(pair[0])
+            out += U16.pack(pid)
+            self._encode_value(out, type_of(pid), pair[1])
+
+    def _decode_pairs(self, view, offset, count):
+        """Decode `count` pairs at `offset`; returns (pairs, end offset)."""
+        types = self.registry.id_to_type
+        pairs = []
+        for _ in range(count):
+            pid = U16.unpack_from(view, offset)[0]
+            wire_type = types.get(pid, WIRE_VARIANT)
+            layout = PAIR_STRUCTS.get(wire_type)
+            if layout is not None:
+                fields = layout.unpack_from(view, offset)
+                offset += layout.size
+                if wire_type == WIRE_BOOL:
+                    value = fields[1] != 0
+                elif wire_type == WIRE_VEC2_F32:
+                    value = variant.Vector2(fields[1], fields[2])
+                else:
+                    # WIRE_I32 is read back with get_u32(), so negatives wrap.
+                    value = fields[1]
+            else:
+                length = U32.unpack_from(view, offset + 2)[0]
+                offset += 6
+                value, end = variant.decode_from(view, offset)
+                if end > offset + length:
+                    raise WireError(f"Variant at offset {offset} overruns its {length} bytes")
+                offset += length
+            pairs.append([pid, value])
+        return pairs, offset
+
+    def _decode_blocks(self, view, offset, count):
+        blocks = []
+        for _ in range(count):
+            eid, pair_count = BLOCK_HEADER.unpack_from(view, offset)
+            pairs, offset = self._decode_pairs(view, offset + BLOCK_HEADER.size, pair_count)
+            blocks.append({'eid': eid, 'pairs': pairs})
+        return blocks, offset
+
+    # --- Delta ----------------------------------------------------------------
+
+    def encode_entity_block(self, eid, pairs):
+        out = bytearray(U32.pack(eid))
+        self._encode_pairs(out, pairs)
+        return bytes(out)
+
+    def assemble_delta_from_blocks(self, blocks_bytes):
+        out = bytearray(U16.pack(len(blocks_bytes)))
+        for block in blocks_bytes:
+            out += block
+        return bytes(out)
+
+    def encode_delta(self, blocks):
+        """blocks = [{'eid': int, 'pairs': [[pid, value], ...]}, ...]"""
+        out = bytearray(U16.pack(len(blocks)))
+        for block in blocks:
+            out += U32.pack(int(block['eid']))
+            self._encode_pairs(out, block.get('pairs', []))
+        return bytes(out)
+
+    def decode_delta(self, data):
+        view = memoryview(data)
+        try:
+            blocks, _ = self._decode_blocks(view, 2, U16.unpack_from(view, 0)[0])
+        except (struct.error, variant.VariantError) as e:
+            raise WireError(f"Malformed delta: {e}") from None
+        return blocks
+
+    # --- Bootstrap ------------------------------------------------------------
+
+    def encode_bootstrap(self, map_updates, objects):
+        """map_updates = [[pid, path, wire_type], ...]; objects as for encode_delta().
+
+        Like the GDScript encoder, object values are typed with the registry
+        as it is now, before the updates are applied.
+        """
+        out = bytearray(U16.pack(len(map_updates)))
+        for pid, path, wire_type in map_updates:
+            data = str(path).encode('utf-8')
+            out += U16.pack(int(pid))
+            out += U32.pack(len(data))
+            out += data
+            out += U8.pack(int(wire_type))
+        out += U16.pack(len(objects))
+        for obj in objects:
+            out += U32.pack(int(obj['eid']))
+            self._encode_pairs(out, obj.get('pairs', []))
+        return bytes(out)
+
+    def decode_bootstrap(self, data):
+        """Decode a bootstrap, applying its map updates before the objects."""
+        view = memoryview(data)
+        try:
+            updates = []
+            offset = 2
+            for _ in range(U16.unpack_from(view, 0)[0]):
+                pid = U16.unpack_from(view, offset)[0]
+                length = U32.unpack_from(view, offset + 2)[0]
+                offset += 6
+                if offset + length > len(view):
+                    raise WireError(f"Path at offset {offset} runs past the end of the packet")
+                path = str(view[offset:offset + length], 'utf-8')
+                offset += length
+                updates.append([pid, path, U8.unpack_from(view, offset)[0]])
+                offset += 1
+            self.registry.apply_map_updates(updates)
+            objects, _ = self._decode_blocks(view, offset + 2, U16.unpack_from(view, offset)[0])
+        except (struct.error, variant.VariantError) as e:
+            raise WireError(f"Malformed bootstrap: {e}") from None
+        return {'map_updates': updates, 'objects': objects}
@@ -0,0 +1,421 @@
+"""
+Codec lab: replay entity delta traces through candidate wire encodings.
+
+PathRegistry lists WIRE_I16_QPOS and WIRE_U8 as "later". This module
+measures what they and two other ideas would save before any GDScript
+changes:
+
+    qpos     :position as two i16 steps from its chunk's centre. An entity
+             that changes chunk first gets a chunk pair (pid 0, two i16).
+    u8 enums :anim as a u8 instead of a put_var() Variant.
+    bools    the bool pairs of a block packed into one flags byte: bit n
+             means the block has the registry's nth bool field, and bit
+             n + 4 holds its value. The low bit of the pair count says
+             whether the byte is present.
+    varints  LEB128 block counts, eids, pair counts and pids.
+
+With every option off, LabCodec output is byte-identical to WireCodec.
+A trace is a sequence of ticks, each a list of {'eid', 'pairs'} blocks
+like WireCodec.decode_delta() returns. Every tick is broadcast to every
+player except the block's owner, whose own fields owner-predict
+suppression removes.
+
+Usage:
+    python -m tinymmo_tools.net.codec_lab [--players N] [--seconds S] [--chunk PX] [--step PX] [--seed S]
+    python -m tinymmo_tools.net.codec_lab --capture FILE [--peer P]
+"""
+
+import argparse
+import math
+import random
+import struct
+from collections import defaultdict
+
+from . import capture, variant
+from .codec import U8, U16, U32, VALUE_STRUCTS, WireCodec, WireError
+from .registry import WIRE_BOOL, WIRE_VEC2_F32, PathRegistry
+from .swarm import PHYSICS_HZ, SEND_RATE_HZ_ENTITIES, Walker, percentile
+
+
+I16X2 = struct.Struct('<2h')
+# Pid carrying an entity's chunk coordinates; real pids start at 1.
+CHUNK_PID = 0
+MAX_PACKED_BOOLS = 4
+DEFAULT_CHUNK_SIZE = 1024.0
+DEFAULT_QPOS_STEP = 1.0 / 16.0
+
+HEADERS = 'headers'
+BOOL_FLAGS = 'bool flags'
+
+
+def varint(value):
+    """Unsigned LEB128 bytes of `value`."""
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def read_varint(view, offset):
+    """Decode a LEB128 value at `offset`; returns (value, end offset)."""
+    value = shift = 0
+    while True:
+        if offset >= len(view):
+            raise WireError("Varint runs past the end of the packet")
+        byte = view[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+
+
+class LabCodec:
+    """Encode and decode deltas with any mix of the experimental encodings.
+
+    Chunk origins are state: keep one LabCodec per stream, in order, and
+    use a fresh one to decode what another encoded.
+    """
+
+    def __init__(self, registry=None, qpos=False, u8_enums=False, packed_bools=False, varints=False,
+                 chunk_size=DEFAULT_CHUNK_SIZE, qpos_step=DEFAULT_QPOS_STEP,
+                 qpos_paths=(':position',), enum_paths=(':anim',)):
+        self.wire = WireCodec(registry)
+        self.registry = self.wire.registry
+        self.qpos = qpos
+        self.u8_enums = u8_enums
+        self.packed_bools = packed_bools
+        self.varints = varints
+        self.chunk_size = chunk_size
+        self.qpos_step = qpos_step
+        self.qpos_pids = {self.registry.id_of(path) for path in qpos_paths} if qpos else set()
+        self.enum_pids = {self.registry.id_of(path) for path in enum_paths} if u8_enums else set()
+        bool_pids = sorted(pid for pid, wire_type in self.registry.id_to_type.items() if wire_type == WIRE_BOOL)
+        self.bool_bits = {pid: bit for bit, pid in enumerate(bool_pids[:MAX_PACKED_BOOLS])} if packed_bools else {}
+        self.bool_pids = {bit: pid for pid, bit in self.bool_bits.items()}
+        # Widest offset from the chunk centre that fits an i16.
+        if qpos and chunk_size / 2 / qpos_step > 0x7FFF:
+            raise ValueError(f"A {chunk_size} px chunk needs a qpos step of at least {chunk_size / 2 / 0x7FFF:.4f} px")
+        self.chunks = {}
+        self.max_qpos_error = 0.0
+
+    # --- Integers -------------------------------------------------------------
+
+    def _count(self, value):
+        return varint(value) if self.varints else U16.pack(value)
+
+    def _eid(self, value):
+        return varint(value) if self.varints else U32.pack(value)
+
+    def _read_count(self, view, offset):
+        return read_varint(view, offset) if self.varints else (U16.unpack_from(view, offset)[0], offset + 2)
+
+    def _read_eid(self, view, offset):
+        return read_varint(view, offset) if self.varints else (U32.unpack_from(view, offset)[0], offset + 4)
+
+    # --- Encoding -------------------------------------------------------------
+
+    def _quantize(self, eid, value, out, sizes, path):
+        cx = math.floor(value[0] / self.chunk_size)
+        cy = math.floor(value[1] / self.chunk_size)
+        if self.chunks.get(eid) != (cx, cy):
+            self.chunks[eid] = (cx, cy)
+            pair = self._count(CHUNK_PID) + I16X2.pack(cx, cy)
+            out += pair
+            sizes[path] += len(pair)
+        steps = []
+        for axis, chunk in zip(value, (cx, cy)):
+            centre = (chunk + 0.5) * self.chunk_size
+            step = round((axis - centre) / self.qpos_step)
+            steps.append(step)
+            self.max_qpos_error = max(self.max_qpos_error, abs(centre + step * self.qpos_step - axis))
+        return I16X2.pack(*steps)
+
+    def encode_entity_block(self, eid, pairs, sizes=None):
+        """Encode one block; adds its bytes by category to `sizes` (HEADERS, paths, BOOL_FLAGS)."""
+        sizes = sizes if sizes is not None else defaultdict(int)
+        flags = 0
+        body = bytearray()
+        count = 0
+        for pid, value in pairs:
+            pid = int(pid)
+            path = self.registry.path_of(pid) or f"pid {pid}"
+            if pid in self.bool_bits:
+                bit = self.bool_bits[pid]
+                flags |= (1 << bit) | ((1 if value else 0) << (bit + MAX_PACKED_BOOLS))
+                continue
+            start = len(body)
+            count += 1
+            body += self._count(pid) if self.varints else U16.pack(pid)
+            if pid in self.qpos_pids:
+                prefix = bytearray()
+                data = self._quantize(eid, value, prefix, sizes, path)
+                if prefix:
+                    # The chunk pair goes in front of the position pair.
+                    body[start:start] = prefix
+                    count += 1
+                    start += len(prefix)
+                body += data
+            elif pid in self.enum_pids:
+                if not isinstance(value, int) or not 0 <= value <= 0xFF:
+                    raise WireError(f"{path} value {value!r} does not fit a u8 enum")
+                body += U8.pack(value)
+            else:
+                self.wire._encode_value(body, self.registry.type_of(pid), value)
+            sizes[path] += len(body) - start
+        if self.packed_bools:
+            header = self._eid(eid) + self._count(count << 1 | (1 if flags else 0))
+            if flags:
+                header += U8.pack(flags)
+                sizes[BOOL_FLAGS] += 1
+        else:
+            header = self._eid(eid) + self._count(count)
+        sizes[HEADERS] += len(header) - (1 if flags else 0)
+        return header + bytes(body)
+
+    def assemble_delta_from_blocks(self, blocks_bytes):
+        return self._count(len(blocks_bytes)) + b''.join(blocks_bytes)
+
+    def encode_delta(self, blocks):
+        return self.assemble_delta_from_blocks([self.encode_entity_block(b['eid'], b.get('pairs', [])) for b in blocks])
+
+    # --- Decoding -------------------------------------------------------------
+
+    def _decode_block(self, view, offset):
+        eid, offset = self._read_eid(view, offset)
+        count, offset = self._read_count(view, offset)
+        flags = 0
+        if self.packed_bools:
+            count, has_flags = count >> 1, count & 1
+            if has_flags:
+                flags = view[offset]
+                offset += 1
+        pairs = []
+        for _ in range(count):
+            pid, offset = self._read_count(view, offset)
+            if pid == CHUNK_PID:
+                self.chunks[eid] = I16X2.unpack_from(view, offset)
+                offset += I16X2.size
+            elif pid in self.qpos_pids:
+                steps = I16X2.unpack_from(view, offset)
+                offset += I16X2.size
+                chunk = self.chunks.get(eid)
+                if chunk is None:
+                    raise WireError(f"Entity {eid} position before any chunk")
+                pairs.append([pid, tuple((c + 0.5) * self.chunk_size + s * self.qpos_step for c, s in zip(chunk, steps))])
+            elif pid in self.enum_pids:
+                pairs.append([pid, view[offset]])
+                offset += 1
+            else:
+                value, offset = self._decode_value(view, offset, self.registry.type_of(pid))
+                pairs.append([pid, value])
+        for bit in range(MAX_PACKED_BOOLS):
+            if flags & (1 << bit):
+                pairs.append([self.bool_pids[bit], bool(flags & (1 << (bit + MAX_PACKED_BOOLS)))])
+        return {'eid': eid, 'pairs': pairs}, offset
+
+    def _decode_value(self, view, offset, wire_type):
+        """Decode a WireCodec value; returns (value, end offset)."""
+        layout = VALUE_STRUCTS.get(wire_type)
+        if layout is None:
+            length = U32.unpack_from(view, offset)[0]
+            return variant.decode_from(view, offset + 4)[0], offset + 4 + length
+        fields = layout.unpack_from(view, offset)
+        if wire_type == WIRE_BOOL:
+            value = fields[0] != 0
+        elif wire_type == WIRE_VEC2_F32:
+            value = variant.Vector2(*fields)
+        else:
+            value = fields[0]
+        return value, offset + layout.size
+
+    def decode_delta(self, data):
+        view = memoryview(data)
+        try:
+            count, offset = self._read_count(view, 0)
+            blocks = []
+            for _ in range(count):
+                block, offset = self._decode_block(view, offset)
+                blocks.append(block)
+        except (struct.error, IndexError, variant.VariantError) as e:
+            raise WireError(f"Malformed delta: {e}") from None
+        return blocks
+
+
+# --- Traces -----------------------------------------------------------------
+
+def simulated_ticks(players, seconds, registry=None, rate_hz=SEND_RATE_HZ_ENTITIES, physics_hz=PHYSICS_HZ, seed=None):
+    """Server ticks of `players` swarm walkers: each tick holds the latest changed values per entity."""
+    registry = registry if registry is not None else PathRegistry()
+    rng = random.Random(seed)
+    walkers = {2 + i: Walker(random.Random(rng.random())) for i in range(players)}
+    sent = {eid: {} for eid in walkers}
+    steps_per_tick = max(1, round(physics_hz / rate_hz))
+    delta = 1.0 / physics_hz
+    ticks = []
+    for _ in range(int(seconds * rate_hz)):
+        dirty = defaultdict(dict)
+        for _ in range(steps_per_tick):
+            for eid, walker in walkers.items():
+                for path, value in walker.step(delta).items():
+                    pid = registry.id_of(path)
+                    if sent[eid].get(pid) != value:
+                        sent[eid][pid] = value
+                        dirty[eid][pid] = value
+        ticks.append([{'eid': eid, 'pairs': [[pid, value] for pid, value in pairs.items()]}
+                      for eid, pairs in dirty.items()])
+    return ticks, list(walkers)
+
+
+def ticks_from_deltas(packets, registry=None):
+    """A trace from recorded delta packets, one tick per packet."""
+    codec = WireCodec(registry)
+    return [codec.decode_delta(packet) for packet in packets]
+
+
+# --- Measurement ------------------------------------------------------------
+
+def measure(codec, ticks, players):
+    """Bytes each player receives per tick with `codec`.
+
+    Returns (per-packet sizes, total bytes by category); ticks where a
+    player has nothing to receive send no packet and are not counted.
+    """
+    packet_sizes = []
+    totals = defaultdict(int)
+    for blocks in ticks:
+        encoded = {}
+        categories = {}
+        for block in blocks:
+            sizes = defaultdict(int)
+            encoded[block['eid']] = len(codec.encode_entity_block(block['eid'], block['pairs'], sizes))
+            categories[block['eid']] = sizes
+        if not encoded:
+            continue
+        tick_bytes = sum(encoded.values())
+        tick_categories = defaultdict(int)
+        for sizes in categories.values():
+            for name, size in sizes.items():
+                tick_categories[name] += size
+        for player in players:
+            own = encoded.get(player)
+            count = len(encoded) - (1 if own is not None else 0)
+            if not count:
+                continue
+            header = len(codec._count(count))
+            packet_sizes.append(header + tick_bytes - (own or 0))
+            totals[HEADERS] += header
+            own_sizes = categories.get(player, {})
+            for name, size in tick_categories.items():
+                totals[name] += size - own_sizes.get(name, 0)
+    return packet_sizes, totals
+
+
+def verify(codec_factory, ticks, tolerance):
+    """Check a fresh encoder/decoder pair round-trips the trace; returns the number of blocks checked."""
+    encoder, decoder = codec_factory(), codec_factory()
+    checked = 0
+    for blocks in ticks:
+        decoded = decoder.decode_delta(encoder.encode_delta(blocks))
+        for original, block in zip(blocks, decoded):
+            expected = dict((pid, value) for pid, value in original['pairs'])
+            got = dict((pid, value) for pid, value in block['pairs'])
+            if block['eid'] != original['eid'] or expected.keys() != got.keys():
+                raise WireError(f"Block for entity {original['eid']} did not round-trip")
+            for pid, value in expected.items():
+                if isinstance(value, tuple):
+                    if max(abs(a - b) for a, b in zip(value, got[pid])) > tolerance:
+                        raise WireError(f"Entity {original['eid']} pid {pid}: {got[pid]} != {value}")
+                elif got[pid] != value:
+                    raise WireError(f"Entity {original['eid']} pid {pid}: {got[pid]!r} != {value!r}")
+            checked += 1
+    return checked
+
+
+ENCODINGS = (
+    ('current (WireCodec)', {}),
+    ('qpos', {'qpos': True}),
+    ('u8 enums', {'u8_enums': True}),
+    ('packed bools', {'packed_bools': True}),
+    ('varints', {'varints': True}),
+    ('all', {'qpos': True, 'u8_enums': True, 'packed_bools': True, 'varints': True}),
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare entity delta encodings on a simulated trace.")
+    parser.add_argument('--players', type=int, default=100, help="simulated players (default: 100)")
+    parser.add_argument('--seconds', type=float, default=30.0, help="trace length (default: 30)")
+    parser.add_argument('--rate', type=int, default=SEND_RATE_HZ_ENTITIES, help="ticks per second (default: 20)")
+    parser.add_argument('--chunk', type=float, default=DEFAULT_CHUNK_SIZE, help="qpos chunk size in px (default: 1024)")
+    parser.add_argument('--step', type=float, default=DEFAULT_QPOS_STEP, help="qpos step in px (default: 1/16)")
+    parser.add_argument('--seed', type=int, default=1, help="random seed")
+    parser.add_argument('--capture', metavar='FILE', help="replay the deltas one peer received in a capture instead")
+    parser.add_argument('--peer', type=int, default=None, help="with --capture: peer to replay (default: the first)")
+    args = parser.parse_args()
+
+    if args.capture:
+        registry = PathRegistry(fields=())
+        recorded = list(capture.deltas(args.capture, registry, args.peer))
+        if not recorded:
+            raise SystemExit(f"No deltas in {args.capture}")
+        peer = recorded[0][1]
+        recorded = [(timestamp, data) for timestamp, sender, data in recorded if sender == peer]
+        ticks = ticks_from_deltas([data for _, data in recorded], registry)
+        # The packets are already one peer's view: there is no own block to drop.
+        players = [0]
+        seconds = max(recorded[-1][0] - recorded[0][0], 1.0 / args.rate)
+        print(f"Peer {peer}: {len(ticks)} deltas over {seconds:.1f} s, {sum(len(t) for t in ticks):,} entity blocks")
+    else:
+        registry = PathRegistry()
+        ticks, players = simulated_ticks(args.players, args.seconds, registry, args.rate, seed=args.seed)
+        seconds = args.seconds
+        blocks = sum(len(t) for t in ticks)
+        print(f"{args.players} players, {len(ticks)} ticks at {args.rate} Hz, {blocks:,} entity blocks")
+
+    # Sanity: the lab's baseline is WireCodec, byte for byte.
+    wire = WireCodec(registry)
+    baseline = LabCodec(registry)
+    for tick in ticks[:50]:
+        if baseline.encode_delta(tick) != wire.encode_delta(tick):
+            raise SystemExit("LabCodec with no options differs from WireCodec")
+
+    results = []
+    for name, options in ENCODINGS:
+        def factory(options=options):
+            return LabCodec(registry, chunk_size=args.chunk, qpos_step=args.step, **options)
+        try:
+            verify(factory, ticks, args.step / 2 + 1e-3)
+            codec = factory()
+            sizes, totals = measure(codec, ticks, players)
+        except WireError as e:
+            print(f"  {name}: {e}")
+            continue
+        results.append((name, sizes, totals, codec.max_qpos_error))
+
+    current = sum(results[0][1]) / len(results[0][1]) if results and results[0][1] else 0.0
+    print(f"\n{'Encoding':<22} {'B/packet':>9} {'p95':>6} {'B/s/player':>11} {'vs current':>11}")
+    for name, sizes, _, _ in results:
+        mean = sum(sizes) / len(sizes) if sizes else 0.0
+        per_second = sum(sizes) / len(players) / seconds
+        change = f"{(mean / current - 1) * 100:+.1f}%" if current else '-'
+        print(f"{name:<22} {mean:>9.1f} {percentile(sizes, 95):>6.0f} {per_second:>11.0f} {change:>11}")
+
+    categories = sorted({name for _, _, totals, _ in results for name in totals}, key=lambda c: (c != HEADERS, c))
+    print("\nBytes per packet by field:")
+    print(f"{'Encoding':<22} " + ' '.join(f"{c:>13}" for c in categories))
+    for name, sizes, totals, _ in results:
+        packets = len(sizes) or 1
+        print(f"{name:<22} " + ' '.join(f"{totals.get(c, 0) / packets:>13.1f}" for c in categories))
+    qpos_error = max(error for *_, error in results)
+    if qpos_error:
+        print(f"\nqpos: {args.chunk:g} px chunks, {args.step:g} px steps, max position error {qpos_error:.4f} px")
+
+
+if __name__ == '__main__':
+    main()
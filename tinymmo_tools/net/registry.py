@@ -0,0 +1,79 @@
+"""
+Port of PathRegistry (source/common/registry/path_registry.gd).
+
+Maps property paths to the u16 field ids (pids) deltas carry, and each pid
+to the wire type its values are encoded with.
+"""
+
+WIRE_VARIANT = 0
+WIRE_BOOL = 1
+WIRE_I32 = 2
+WIRE_F32 = 3
+WIRE_VEC2_F32 = 10
+
+# Registered by PathRegistry._static_init(), in this order.
+DEFAULT_FIELDS = (
+    (':position', WIRE_VEC2_F32),
+    (':flipped', WIRE_BOOL),
+    (':anim', WIRE_VARIANT),
+    (':pivot', WIRE_F32),
+    (':scale', WIRE_VEC2_F32),
+    (':display_name', WIRE_VARIANT),
+    (':character_class', WIRE_VARIANT),
+)
+
+
+class PathRegistry:
+    """One client's or server's view of the field id map."""
+
+    def __init__(self, fields=DEFAULT_FIELDS):
+        self.reset()
+        for path, wire_type in fields:
+            self.register_field(path, wire_type)
+
+    def reset(self):
+        self.id_to_path = {}
+        self.path_to_id = {}
+        self.id_to_type = {}
+        self.next_id = 1
+        self.version = 1
+
+    def register_field(self, path, wire_type=WIRE_VARIANT):
+        """Register (or fetch) a field; a non-Variant type overrides the stored one."""
+        pid = self.path_to_id.get(path, 0)
+        if pid == 0:
+            pid = self.next_id
+            self.next_id += 1
+            self.path_to_id[path] = pid
+            self.id_to_path[pid] = path
+            self.id_to_type[pid] = wire_type
+            self.version += 1
+        elif wire_type != WIRE_VARIANT and self.id_to_type.get(pid, WIRE_VARIANT) != wire_type:
+            self.id_to_type[pid] = wire_type
+            self.version += 1
+        return pid
+
+    def ensure_id(self, path):
+        return self.path_to_id.get(path) or self.register_field(path)
+
+    def id_of(self, path):
+        return self.path_to_id.get(path, 0)
+
+    def path_of(self, pid):
+        return self.id_to_path.get(pid, "")
+
+    def type_of(self, pid):
+        return self.id_to_type.get(pid, WIRE_VARIANT)
+
+    def get_full_map_updates(self):
+        return [[pid, path, self.id_to_type.get(pid, WIRE_VARIANT)] for pid, path in self.id_to_path.items()]
+
+    def apply_map_updates(self, updates):
+        if not updates:
+            return
+        for pid, path, wire_type in updates:
+            self.id_to_path[pid] = path
+            self.path_to_id[path] = pid
+            self.id_to_type[pid] = wire_type
+            self.next_id = max(self.next_id, pid + 1)
+        self.version += 1
@@ -0,0 +1,519 @@
+"""
+Asyncio bot swarm and stand-in world server for entity state sync load tests.
+
+The stand-in server plays StateSynchronizerManagerServer. It accepts
+owner-pushed client deltas and, every 1 / send_rate_hz_entities seconds,
+encodes one block per changed entity. It then assembles a delta per peer
+containing every other entity, because AOI is still "everyone". It also
+suppresses echoes of a peer's own fresh values. Bots play the local
+player: they walk around and stop, and at the physics rate they send
+whichever of `:position`, `:flipped` and `:anim` changed.
+
+Frames travel over localhost TCP as u32 length, u8 kind and payload,
+standing in for the game's reliable RPCs. The payloads are real WireCodec
+bytes. The server prefixes each state delta with its tick number and send
+time, so bots can measure jitter and transit latency.
+
+Usage:
+    python -m tinymmo_tools.net.swarm server [--port P] [--rate HZ] [--capture FILE]
+    python -m tinymmo_tools.net.swarm bots -n 200 [--port P] [--duration S] [--processes K]
+    python -m tinymmo_tools.net.swarm scale [--players 10,50,100,200,500] [--duration S]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import signal
+import struct
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+
+from .capture import CaptureWriter
+from .codec import WireCodec
+from .registry import PathRegistry
+
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 48043
+# StateSynchronizerManagerServer defaults.
+SEND_RATE_HZ_ENTITIES = 20
+OWNER_PREDICT_SUPPRESS_MS = 120
+# Godot's default physics tick rate; LocalPlayer sends its delta every tick.
+PHYSICS_HZ = 60
+# LocalPlayer.speed, and the Character.Animations values bots use.
+PLAYER_SPEED = 125.0
+ANIM_IDLE, ANIM_RUN = 0, 1
+WORLD_SIZE = 2048.0
+
+FRAME = struct.Struct('<IB')
+# Server tick and send time (time.monotonic) in front of each state delta.
+DELTA_STAMP = struct.Struct('<Id')
+
+FRAME_WELCOME = 1
+FRAME_BOOTSTRAP = 2
+FRAME_STATE_DELTA = 3
+FRAME_CLIENT_DELTA = 4
+FRAME_STATS_REQUEST = 5
+FRAME_STATS = 6
+
+# Peer ids start at 2 like ENet's; 1 is the server.
+FIRST_PEER_ID = 2
+
+
+def frame(kind, payload=b''):
+    return FRAME.pack(len(payload) + 1, kind) + payload
+
+
+async def read_frame(reader):
+    """Return (kind, payload, frame size in bytes)."""
+    header = await reader.readexactly(FRAME.size)
+    length, kind = FRAME.unpack(header)
+    payload = await reader.readexactly(length - 1)
+    return kind, payload, FRAME.size + length - 1
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of a list (0.0 when empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(percent / 100.0 * len(ordered)) - 1))]
+
+
+# --- Stand-in server --------------------------------------------------------
+
+class StandInServer:
+    """Entity half of StateSynchronizerManagerServer over TCP."""
+
+    def __init__(self, rate_hz=SEND_RATE_HZ_ENTITIES, suppress_ms=OWNER_PREDICT_SUPPRESS_MS, registry=None,
+                 capture=None):
+        self.codec = WireCodec(registry if registry is not None else PathRegistry())
+        self.rate_hz = rate_hz
+        self.suppress_s = suppress_ms / 1000.0
+        # Optional capture.CaptureWriter recording every delta sent and received.
+        self.capture = capture
+        if capture is not None:
+            capture.write_map(self.codec.registry)
+        self.client_owned = {self.codec.registry.id_of(path) for path in (':position', ':anim', ':flipped', ':pivot')}
+        self.next_peer_id = FIRST_PEER_ID
+        self.peers = {}          # peer id -> StreamWriter
+        self.state = {}          # eid -> {pid: value}
+        self.dirty = {}          # eid -> {pid: value}
+        self.owner_recent = {}   # eid -> {pid: (time, value)}
+        self.tick = 0
+        self.tick_seconds = []
+        self.late_ticks = 0
+        self.bytes_sent = 0
+        self.client_deltas = 0
+        self.started_at = time.monotonic()
+
+    async def handle(self, reader, writer):
+        peer_id = None
+        try:
+            kind, payload, _ = await read_frame(reader)
+            if kind == FRAME_STATS_REQUEST:
+                writer.write(frame(FRAME_STATS, json.dumps(self.stats()).encode()))
+                await writer.drain()
+                return
+            peer_id = self.next_peer_id
+            self.next_peer_id += 1
+            writer.write(frame(FRAME_WELCOME, struct.pack('<I', peer_id)))
+            self._send_bootstrap(writer)
+            self.peers[peer_id] = writer
+            self.state.setdefault(peer_id, {})
+            while True:
+                if kind == FRAME_CLIENT_DELTA:
+                    self._on_client_delta(peer_id, payload)
+                kind, payload, _ = await read_frame(reader)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if peer_id is not None:
+                self.peers.pop(peer_id, None)
+                for table in (self.state, self.dirty, self.owner_recent):
+                    table.pop(peer_id, None)
+            writer.close()
+
+    def _send_bootstrap(self, writer):
+        objects = [{'eid': eid, 'pairs': [[pid, value] for pid, value in pairs.items()]}
+                   for eid, pairs in self.state.items() if pairs]
+        payload = self.codec.encode_bootstrap(self.codec.registry.get_full_map_updates(), objects)
+        writer.write(frame(FRAME_BOOTSTRAP, payload))
+
+    def _on_client_delta(self, peer_id, payload):
+        blocks = self.codec.decode_delta(payload)
+        if not blocks or blocks[0]['eid'] != peer_id:
+            return
+        self.client_deltas += 1
+        if self.capture is not None:
+            self.capture.write_client_delta(peer_id, payload)
+        now = time.monotonic()
+        state = self.state.setdefault(peer_id, {})
+        dirty = self.dirty.setdefault(peer_id, {})
+        recent = self.owner_recent.setdefault(peer_id, {})
+        for pid, value in blocks[0]['pairs']:
+            state[pid] = value
+            dirty[pid] = value
+            recent[pid] = (now, value)
+
+    def _suppressed(self, eid, pid, value, now):
+        if pid not in self.client_owned:
+            return False
+        sent_at, sent_value = self.owner_recent.get(eid, {}).get(pid, (None, None))
+        return sent_at is not None and now - sent_at <= self.suppress_s and sent_value == value
+
+    def send_deltas(self):
+        """One _send_entity_deltas_one_shot(): pre-encode blocks, assemble per peer."""
+        changed = {eid: pairs for eid, pairs in self.dirty.items() if pairs}
+        self.dirty = {}
+        if not changed or not self.peers:
+            return
+        now = time.monotonic()
+        blocks = [self.codec.encode_entity_block(eid, [[pid, value] for pid, value in pairs.items()])
+                  for eid, pairs in changed.items()]
+        joined = b''.join(blocks)
+        spans = {}
+        position = 0
+        for eid, block in zip(changed, blocks):
+            spans[eid] = (position, position + len(block))
+            position += len(block)
+
+        stamp = DELTA_STAMP.pack(self.tick, time.monotonic())
+        for peer_id, writer in self.peers.items():
+            count = len(blocks)
+            body = joined
+            span = spans.get(peer_id)
+            if span is not None:
+                own = [[pid, value] for pid, value in changed[peer_id].items()
+                       if not self._suppressed(peer_id, pid, value, now)]
+                own_block = self.codec.encode_entity_block(peer_id, own) if own else b''
+                count -= 0 if own else 1
+                body = joined[:span[0]] + own_block + joined[span[1]:]
+            if not count:
+                continue
+            delta = struct.pack('<H', count) + body
+            data = frame(FRAME_STATE_DELTA, stamp + delta)
+            if self.capture is not None:
+                self.capture.write_delta(peer_id, delta)
+            writer.write(data)
+            self.bytes_sent += len(data)
+
+    async def run_ticks(self):
+        period = 1.0 / self.rate_hz
+        next_tick = time.monotonic() + period
+        while True:
+            await asyncio.sleep(max(0.0, next_tick - time.monotonic()))
+            start = time.monotonic()
+            if start - next_tick > period:
+                self.late_ticks += 1
+            self.tick += 1
+            self.send_deltas()
+            self.tick_seconds.append(time.monotonic() - start)
+            # Keep the schedule (like the accumulator in _process) unless a whole tick was lost.
+            next_tick = max(next_tick + period, time.monotonic() - period)
+
+    def stats(self):
+        elapsed = time.monotonic() - self.started_at
+        tick_ms = [seconds * 1000.0 for seconds in self.tick_seconds]
+        return {
+            'peers': len(self.peers),
+            'ticks': self.tick,
+            'tick_rate': self.tick / elapsed if elapsed else 0.0,
+            'late_ticks': self.late_ticks,
+            'tick_ms_p50': percentile(tick_ms, 50),
+            'tick_ms_p99': percentile(tick_ms, 99),
+            'tick_ms_max': max(tick_ms, default=0.0),
+            'bytes_sent_per_sec': self.bytes_sent / elapsed if elapsed else 0.0,
+            'client_deltas_per_sec': self.client_deltas / elapsed if elapsed else 0.0,
+        }
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, rate_hz=SEND_RATE_HZ_ENTITIES, capture=None):
+    server = StandInServer(rate_hz, capture=capture)
+    listener = await asyncio.start_server(server.handle, host, port)
+    print(f"Stand-in world server on {host}:{port}, {rate_hz} Hz", flush=True)
+    async with listener:
+        await asyncio.gather(listener.serve_forever(), server.run_ticks())
+
+
+async def fetch_server_stats(host=DEFAULT_HOST, port=DEFAULT_PORT):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(frame(FRAME_STATS_REQUEST))
+    await writer.drain()
+    _, payload, _ = await read_frame(reader)
+    writer.close()
+    return json.loads(payload)
+
+
+# --- Bots -------------------------------------------------------------------
+
+@dataclass
+class BotStats:
+    """What one bot measured over the measurement window."""
+    peer_id: int = 0
+    seconds: float = 0.0
+    bytes_received: int = 0
+    bytes_sent: int = 0
+    deltas: int = 0
+    decode_ms: list = field(default_factory=list)
+    intervals_ms: list = field(default_factory=list)
+    transit_ms: list = field(default_factory=list)
+
+    @property
+    def bytes_per_sec(self):
+        return self.bytes_received / self.seconds if self.seconds else 0.0
+
+    @property
+    def jitter_ms(self):
+        """Standard deviation of delta inter-arrival times."""
+        if len(self.intervals_ms) < 2:
+            return 0.0
+        mean = sum(self.intervals_ms) / len(self.intervals_ms)
+        return (sum((v - mean) ** 2 for v in self.intervals_ms) / (len(self.intervals_ms) - 1)) ** 0.5
+
+
+class Walker:
+    """A player wandering the world: runs in random directions and stops now and then."""
+
+    def __init__(self, rng, world_size=WORLD_SIZE):
+        self.rng = rng
+        self.world_size = world_size
+        self.position = (rng.uniform(0, world_size), rng.uniform(0, world_size))
+        self.direction = (0.0, 0.0)
+        self.flipped = False
+        self.anim = ANIM_IDLE
+
+    def step(self, delta):
+        """Advance `delta` seconds; returns the synced values {path: value}."""
+        if self.rng.random() < delta / 1.5:
+            if self.rng.random() < 0.3:
+                self.direction = (0.0, 0.0)
+            else:
+                angle = self.rng.uniform(0, 2 * math.pi)
+                self.direction = (math.cos(angle), math.sin(angle))
+        x = min(max(self.position[0] + self.direction[0] * PLAYER_SPEED * delta, 0.0), self.world_size)
+        y = min(max(self.position[1] + self.direction[1] * PLAYER_SPEED * delta, 0.0), self.world_size)
+        self.position = (x, y)
+        if self.direction[0]:
+            self.flipped = self.direction[0] < 0
+        self.anim = ANIM_RUN if self.direction != (0.0, 0.0) else ANIM_IDLE
+        return {':position': self.position, ':flipped': self.flipped, ':anim': self.anim}
+
+
+class Bot:
+    """One headless client: walks, sends owner deltas, receives and decodes deltas."""
+
+    def __init__(self, rng, physics_hz=PHYSICS_HZ, decode_every=1):
+        self.walker = Walker(rng)
+        self.physics_hz = physics_hz
+        self.decode_every = decode_every
+        self.codec = WireCodec(PathRegistry(fields=()))
+        self.sent = {}
+        self.stats = BotStats()
+
+    def _step(self, delta):
+        """Advance the walk and return the pairs that changed, like define_sync_state()."""
+        registry = self.codec.registry
+        pairs = []
+        for path, value in self.walker.step(delta).items():
+            pid = registry.id_of(path)
+            if pid and self.sent.get(pid) != value:
+                self.sent[pid] = value
+                pairs.append([pid, value])
+        return pairs
+
+    async def _walk(self, writer, stop_at, measure_from):
+        period = 1.0 / self.physics_hz
+        next_step = time.monotonic()
+        while time.monotonic() < stop_at:
+            pairs = self._step(period)
+            if pairs:
+                data = frame(FRAME_CLIENT_DELTA, self.codec.encode_delta([{'eid': self.stats.peer_id, 'pairs': pairs}]))
+                writer.write(data)
+                if time.monotonic() >= measure_from:
+                    self.stats.bytes_sent += len(data)
+            next_step += period
+            await asyncio.sleep(max(0.0, next_step - time.monotonic()))
+
+    async def run(self, host, port, measure_from, stop_at):
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(frame(FRAME_WELCOME))
+        _, payload, _ = await read_frame(reader)
+        self.stats.peer_id = struct.unpack('<I', payload)[0]
+        # The field ids come from the bootstrap, so apply it before sending anything.
+        _, payload, _ = await read_frame(reader)
+        self.codec.decode_bootstrap(payload)
+        walker = asyncio.ensure_future(self._walk(writer, stop_at, measure_from))
+        last_arrival = None
+        try:
+            while True:
+                remaining = stop_at - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    kind, payload, size = await asyncio.wait_for(read_frame(reader), remaining)
+                except asyncio.TimeoutError:
+                    break
+                now = time.monotonic()
+                if kind != FRAME_STATE_DELTA:
+                    continue
+                measuring = now >= measure_from
+                if measuring:
+                    self.stats.bytes_received += size
+                    self.stats.deltas += 1
+                    _, sent_at = DELTA_STAMP.unpack_from(payload)
+                    self.stats.transit_ms.append((now - sent_at) * 1000.0)
+                    if last_arrival is not None:
+                        self.stats.intervals_ms.append((now - last_arrival) * 1000.0)
+                    if self.stats.deltas % self.decode_every == 0:
+                        start = time.perf_counter()
+                        self.codec.decode_delta(memoryview(payload)[DELTA_STAMP.size:])
+                        self.stats.decode_ms.append((time.perf_counter() - start) * 1000.0)
+                last_arrival = now
+        finally:
+            walker.cancel()
+            writer.close()
+        self.stats.seconds = max(0.0, min(time.monotonic(), stop_at) - measure_from)
+        return self.stats
+
+
+async def run_bots(count, host=DEFAULT_HOST, port=DEFAULT_PORT, duration=10.0, warmup=2.0,
+                   physics_hz=PHYSICS_HZ, decode_every=1, seed=None):
+    """Connect `count` bots, measure for `duration` seconds after `warmup`, return their BotStats."""
+    rng = random.Random(seed)
+    start = time.monotonic()
+    measure_from = start + warmup
+    stop_at = measure_from + duration
+    bots = [Bot(random.Random(rng.random()), physics_hz, decode_every) for _ in range(count)]
+    return await asyncio.gather(*(bot.run(host, port, measure_from, stop_at) for bot in bots))
+
+
+def _run_bot_process(args):
+    count, host, port, duration, warmup, physics_hz, decode_every, seed = args
+    stats = asyncio.run(run_bots(count, host, port, duration, warmup, physics_hz, decode_every, seed))
+    return [asdict(s) for s in stats]
+
+
+def swarm(count, host=DEFAULT_HOST, port=DEFAULT_PORT, duration=10.0, warmup=2.0, physics_hz=PHYSICS_HZ,
+          decode_every=1, processes=1, seed=None):
+    """Run `count` bots split over `processes` processes; returns all BotStats."""
+    if processes <= 1:
+        return asyncio.run(run_bots(count, host, port, duration, warmup, physics_hz, decode_every, seed))
+    shares = [count // processes + (1 if i < count % processes else 0) for i in range(processes)]
+    jobs = [(share, host, port, duration, warmup, physics_hz, decode_every, None if seed is None else seed + i)
+            for i, share in enumerate(shares) if share]
+    with ProcessPoolExecutor(max_workers=len(jobs)) as executor:
+        return [BotStats(**stats) for batch in executor.map(_run_bot_process, jobs) for stats in batch]
+
+
+def summarize(stats, server=None):
+    """Print per-client distributions (p50 / p95 / max across bots) and server stats."""
+    def row(label, values, unit):
+        print(f"  {label:<22} p50 {percentile(values, 50):>10.2f}  p95 {percentile(values, 95):>10.2f}"
+              f"  max {max(values, default=0.0):>10.2f} {unit}")
+
+    active = [s for s in stats if s.seconds > 0]
+    print(f"{len(stats)} bots, {sum(s.deltas for s in active):,} deltas received")
+    row("bytes/sec in", [s.bytes_per_sec for s in active], "B/s")
+    row("bytes/sec out", [s.bytes_sent / s.seconds for s in active], "B/s")
+    row("decode latency (mean)", [sum(s.decode_ms) / len(s.decode_ms) for s in active if s.decode_ms], "ms")
+    row("decode latency (p99)", [percentile(s.decode_ms, 99) for s in active if s.decode_ms], "ms")
+    row("tick jitter (sd)", [s.jitter_ms for s in active], "ms")
+    row("transit (p99)", [percentile(s.transit_ms, 99) for s in active], "ms")
+    row("deltas/sec", [s.deltas / s.seconds for s in active], "/s")
+    if server:
+        print(f"  server: {server['tick_rate']:.1f} ticks/s ({server['late_ticks']} late), tick p50 "
+              f"{server['tick_ms_p50']:.2f} ms, p99 {server['tick_ms_p99']:.2f} ms, max {server['tick_ms_max']:.2f} ms, "
+              f"{server['bytes_sent_per_sec'] / 1e6:.2f} MB/s out, {server['client_deltas_per_sec']:.0f} client deltas/s")
+
+
+def _wait_for_server(host, port, timeout=10.0):
+    deadline = time.monotonic() + timeout
+
+    async def probe():
+        _, writer = await asyncio.open_connection(host, port)
+        writer.close()
+
+    while True:
+        try:
+            asyncio.run(probe())
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def scale(players, port=DEFAULT_PORT, rate_hz=SEND_RATE_HZ_ENTITIES, **bot_options):
+    """Run a fresh server subprocess and a swarm for each player count."""
+    host = DEFAULT_HOST
+    for count in players:
+        print(f"\n=== {count} players ===", flush=True)
+        server = subprocess.Popen([sys.executable, '-m', __spec__.name, 'server', '--port', str(port),
+                                   '--rate', str(rate_hz)], stdout=subprocess.DEVNULL)
+        try:
+            _wait_for_server(host, port)
+            stats = swarm(count, host, port, **bot_options)
+            summarize(stats, asyncio.run(fetch_server_stats(host, port)))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    server_parser = commands.add_parser('server', help="run the stand-in world server")
+    server_parser.add_argument('--host', default=DEFAULT_HOST)
+    server_parser.add_argument('--capture', metavar='FILE', help="append every delta to a capture file (see capture.py)")
+
+    bots_parser = commands.add_parser('bots', help="run a bot swarm against a running server")
+    bots_parser.add_argument('-n', '--bots', type=int, default=100, help="number of bots (default: 100)")
+    bots_parser.add_argument('--host', default=DEFAULT_HOST)
+
+    scale_parser = commands.add_parser('scale', help="start a server and run swarms of increasing size")
+    scale_parser.add_argument('--players', default='10,50,100,200,500', help="comma-separated bot counts")
+
+    for sub in (server_parser, bots_parser, scale_parser):
+        sub.add_argument('--port', type=int, default=DEFAULT_PORT)
+    for sub in (server_parser, scale_parser):
+        sub.add_argument('--rate', type=int, default=SEND_RATE_HZ_ENTITIES, help="send_rate_hz_entities (default: 20)")
+    for sub in (bots_parser, scale_parser):
+        sub.add_argument('--duration', type=float, default=10.0, help="measured seconds (default: 10)")
+        sub.add_argument('--warmup', type=float, default=2.0, help="seconds before measuring (default: 2)")
+        sub.add_argument('--physics-hz', type=int, default=PHYSICS_HZ, help="bot send rate (default: 60)")
+        sub.add_argument('--decode-every', type=int, default=1, help="decode every Nth delta (default: 1)")
+        sub.add_argument('--processes', type=int, default=1, help="bot processes (default: 1)")
+        sub.add_argument('--seed', type=int, default=None, help="random seed")
+    args = parser.parse_args()
+
+    if args.command == 'server':
+        capture = CaptureWriter(args.capture) if args.capture else None
+        # Exit cleanly on SIGTERM too (scale() and kill), so the capture is flushed.
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        try:
+            asyncio.run(serve(args.host, args.port, args.rate, capture))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if capture is not None:
+                capture.close()
+        return
+
+    bot_options = dict(duration=args.duration, warmup=args.warmup, physics_hz=args.physics_hz,
+                       decode_every=args.decode_every, processes=args.processes, seed=args.seed)
+    if args.command == 'bots':
+        stats = swarm(args.bots, args.host, args.port, **bot_options)
+        summarize(stats, asyncio.run(fetch_server_stats(args.host, args.port)))
+    else:
+        scale([int(count) for count in args.players.split(',')], args.port, args.rate, **bot_options)
+
+
+if __name__ == '__main__':
+    main()
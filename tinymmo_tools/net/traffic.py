@@ -0,0 +1,248 @@
+"""
+Per-field traffic analysis of delta captures (see capture.py).
+
+Streams a capture through the WireCodec decoder and breaks traffic down by
+PathRegistry field, entity and peer. It reports bytes, update counts and
+redundant updates, meaning a value equal to the last one that peer got
+for the same entity and field.
+
+Exact by default, which keeps one entry per (peer, entity, field) and per
+entity and peer. With --bounded, memory stays fixed on captures of any
+size. Entities and peers are then counted with weighted Space-Saving,
+which keeps the heaviest --max-keys, each with its worst-case
+over-count. The last values live in an LRU of --max-values entries, and
+an evicted entry makes its next update count as changed. So bounded mode
+only ever under-reports redundancy.
+
+Usage:
+    python -m tinymmo_tools.net.traffic CAPTURE [--peer P] [--client] [--top N]
+                                        [--bounded] [--max-keys K] [--max-values V]
+"""
+
+import argparse
+import heapq
+import struct
+import time
+from collections import OrderedDict
+
+from .capture import CaptureReader, KIND_CLIENT_DELTA, KIND_DELTA, KIND_MAP
+from .codec import BLOCK_HEADER, U16, WireCodec, WireError
+from .registry import PathRegistry
+
+
+DEFAULT_MAX_KEYS = 10_000
+DEFAULT_MAX_VALUES = 250_000
+BYTES, UPDATES, REDUNDANT, ERROR = range(4)
+
+
+class TopTally:
+    """Bytes, updates and redundant updates per key.
+
+    Exact when `capacity` is None. Otherwise at most `capacity` keys are
+    kept (weighted Space-Saving). A new key replaces the one with the
+    fewest bytes and inherits that count as its ERROR, so its bytes are
+    over-stated by at most ERROR.
+    """
+
+    def __init__(self, capacity=None):
+        self.capacity = capacity
+        self.rows = {}
+        self._heap = []
+
+    def add(self, key, size, updates=0, redundant=0):
+        row = self.rows.get(key)
+        if row is None:
+            floor = self._evict() if self.capacity is not None and len(self.rows) >= self.capacity else 0
+            row = self.rows[key] = [floor, 0, 0, floor]
+        row[BYTES] += size
+        row[UPDATES] += updates
+        row[REDUNDANT] += redundant
+        if self.capacity is not None:
+            heapq.heappush(self._heap, (row[BYTES], key))
+            if len(self._heap) > 8 * self.capacity:
+                self._heap = [(row[BYTES], key) for key, row in self.rows.items()]
+                heapq.heapify(self._heap)
+
+    def _evict(self):
+        while True:
+            size, key = heapq.heappop(self._heap)
+            row = self.rows.get(key)
+            # Stale heap entries (the key grew or is gone) are skipped.
+            if row is not None and row[BYTES] == size:
+                del self.rows[key]
+                return size
+
+    def top(self, count):
+        return sorted(self.rows.items(), key=lambda item: -item[1][BYTES])[:count]
+
+
+class LastValues:
+    """The last value digest per key; an LRU of `capacity` keys when bounded."""
+
+    def __init__(self, capacity=None):
+        self.capacity = capacity
+        self.values = OrderedDict() if capacity is not None else {}
+
+    def repeat(self, key, digest):
+        """Record `digest` for `key`; True if it equals the previous one."""
+        previous = self.values.get(key)
+        self.values[key] = digest
+        if self.capacity is not None:
+            self.values.move_to_end(key)
+            if len(self.values) > self.capacity:
+                self.values.popitem(last=False)
+        return previous == digest
+
+
+def digest(value):
+    try:
+        return hash(value)
+    except TypeError:
+        return hash(repr(value))
+
+
+class TrafficAnalyzer:
+    """Accumulates per-field, per-entity and per-peer traffic from delta packets."""
+
+    def __init__(self, registry=None, max_keys=None, max_values=None):
+        self.codec = WireCodec(registry if registry is not None else PathRegistry())
+        self.fields = {}                       # pid -> [bytes, updates, redundant]
+        self.entities = TopTally(max_keys)
+        self.peers = TopTally(max_keys)
+        self.last = LastValues(max_values)
+        self.packets = 0
+        self.blocks = 0
+        self.bytes = 0
+        self.header_bytes = 0
+        self.malformed = 0
+        self.first_time = None
+        self.last_time = None
+
+    def feed(self, timestamp, peer, data):
+        """Add one delta packet `peer` sent or received at `timestamp`."""
+        if self.first_time is None:
+            self.first_time = timestamp
+        self.last_time = timestamp
+        view = memoryview(data)
+        try:
+            blocks = self._walk(view)
+        except (WireError, ValueError, struct.error):
+            self.malformed += 1
+            return
+        self.packets += 1
+        self.bytes += len(data)
+        self.header_bytes += U16.size + BLOCK_HEADER.size * len(blocks)
+        peer_updates = peer_redundant = 0
+        for eid, pairs in blocks:
+            self.blocks += 1
+            block_bytes = BLOCK_HEADER.size
+            block_redundant = 0
+            for pid, value, size in pairs:
+                redundant = self.last.repeat((peer, eid, pid), digest(value))
+                row = self.fields.get(pid)
+                if row is None:
+                    row = self.fields[pid] = [0, 0, 0]
+                row[BYTES] += size
+                row[UPDATES] += 1
+                row[REDUNDANT] += redundant
+                block_bytes += size
+                block_redundant += redundant
+            self.entities.add(eid, block_bytes, len(pairs), block_redundant)
+            peer_updates += len(pairs)
+            peer_redundant += block_redundant
+        self.peers.add(peer, len(data), peer_updates, peer_redundant)
+
+    def _walk(self, view):
+        """[(eid, [(pid, value, pair bytes), ...]), ...] of one packet."""
+        decode_pairs = self.codec._decode_pairs
+        blocks = []
+        offset = 2
+        for _ in range(U16.unpack_from(view, 0)[0]):
+            eid, count = BLOCK_HEADER.unpack_from(view, offset)
+            offset += BLOCK_HEADER.size
+            pairs = []
+            for _ in range(count):
+                (pair,), end = decode_pairs(view, offset, 1)
+                pairs.append((pair[0], pair[1], end - offset))
+                offset = end
+            blocks.append((eid, pairs))
+        if offset != len(view):
+            raise WireError(f"{len(view) - offset} trailing bytes")
+        return blocks
+
+    @property
+    def seconds(self):
+        return (self.last_time - self.first_time) if self.packets else 0.0
+
+    def report(self, top=10):
+        registry = self.codec.registry
+        seconds = self.seconds or 1.0
+        print(f"{self.packets:,} packets, {self.blocks:,} blocks, {self.bytes / 1e6:.2f} MB over {self.seconds:.1f} s "
+              f"({self.bytes / seconds / 1e3:.1f} kB/s)" + (f", {self.malformed:,} malformed" if self.malformed else ""))
+
+        def share(part, whole):
+            return f"{part / whole * 100:.1f}%" if whole else '-'
+
+        print(f"\n{'Field':<22} {'pid':>4} {'Bytes':>13} {'Share':>7} {'Updates':>12} {'/s':>9} "
+              f"{'Redundant':>10} {'B/update':>9}")
+        print(f"{'(packet+block headers)':<22} {'':>4} {self.header_bytes:>13,} {share(self.header_bytes, self.bytes):>7}")
+        for pid, row in sorted(self.fields.items(), key=lambda item: -item[1][BYTES]):
+            print(f"{registry.path_of(pid) or '?':<22} {pid:>4} {row[BYTES]:>13,} {share(row[BYTES], self.bytes):>7} "
+                  f"{row[UPDATES]:>12,} {row[UPDATES] / seconds:>9.0f} {share(row[REDUNDANT], row[UPDATES]):>10} "
+                  f"{row[BYTES] / row[UPDATES]:>9.1f}")
+
+        for title, tally in (("Top entities", self.entities), ("Top peers", self.peers)):
+            bounded = tally.capacity is not None
+            print(f"\n{title:<12} {'Bytes':>13} {'Share':>7} {'Updates':>12} {'Redundant':>10}"
+                  + (f" {'± bytes':>10}" if bounded else ""))
+            for key, row in tally.top(top):
+                print(f"{key:<12} {row[BYTES]:>13,} {share(row[BYTES], self.bytes):>7} {row[UPDATES]:>12,} "
+                      f"{share(row[REDUNDANT], row[UPDATES]):>10}" + (f" {row[ERROR]:>10,}" if bounded else ""))
+            if bounded:
+                print(f"  ({len(tally.rows):,} of at most {tally.capacity:,} tracked: bytes may be over-stated by up "
+                      f"to ± bytes, updates of keys that were evicted and came back are lower bounds)")
+
+
+def analyze(path, peer=None, client=False, max_keys=None, max_values=None, progress=False):
+    """Stream a capture into a TrafficAnalyzer; returns (analyzer, reader)."""
+    analyzer = TrafficAnalyzer(PathRegistry(fields=()), max_keys, max_values)
+    wanted = KIND_CLIENT_DELTA if client else KIND_DELTA
+    reader = CaptureReader(path)
+    next_report = time.monotonic() + 5.0
+    for record in reader:
+        if record.kind == KIND_MAP:
+            analyzer.codec.decode_bootstrap(record.payload)
+        elif record.kind == wanted and (peer is None or record.peer == peer):
+            analyzer.feed(record.time, record.peer, record.payload)
+            if progress and time.monotonic() > next_report:
+                print(f"  ... {reader.bytes_read / 1e6:,.0f} MB read", flush=True)
+                next_report = time.monotonic() + 5.0
+    return analyzer, reader
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Break down delta capture traffic by field, entity and peer.")
+    parser.add_argument('capture', help="capture file")
+    parser.add_argument('--peer', type=int, default=None, help="only deltas sent to this peer")
+    parser.add_argument('--client', action='store_true', help="analyze client-sent deltas instead")
+    parser.add_argument('--top', type=int, default=10, help="entities and peers to list (default: 10)")
+    parser.add_argument('--bounded', action='store_true', help="fixed memory for captures of any size")
+    parser.add_argument('--max-keys', type=int, default=DEFAULT_MAX_KEYS,
+                        help=f"with --bounded: entities/peers tracked (default: {DEFAULT_MAX_KEYS:,})")
+    parser.add_argument('--max-values', type=int, default=DEFAULT_MAX_VALUES,
+                        help=f"with --bounded: last values kept for redundancy (default: {DEFAULT_MAX_VALUES:,})")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    analyzer, reader = analyze(args.capture, args.peer, args.client,
+                               args.max_keys if args.bounded else None,
+                               args.max_values if args.bounded else None, progress=True)
+    analyzer.report(args.top)
+    if reader.truncated:
+        print("\n⚠️  Capture ends in an incomplete record (ignored)")
+    elapsed = time.perf_counter() - start
+    print(f"\nAnalyzed {reader.bytes_read / 1e6:.1f} MB in {elapsed:.1f} s ({reader.bytes_read / 1e6 / elapsed:.1f} MB/s)")
+
+
+if __name__ == '__main__':
+    main()
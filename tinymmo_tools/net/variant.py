@@ -0,0 +1,274 @@
+"""
+Godot 4 Variant binary serialization (StreamPeer.put_var / get_var).
+
+Covers the types the game sends as Variants: nil, bool, int, float, String,
+StringName, Vector2/2i/3/3i, Color, Array, Dictionary and packed arrays.
+Values are little-endian and strings and byte arrays are padded to 4 bytes.
+Objects, NodePaths, Callables and the other engine types are rejected.
+"""
+
+import struct
+from collections import namedtuple
+
+
+# Variant.Type values.
+NIL = 0
+BOOL = 1
+INT = 2
+FLOAT = 3
+STRING = 4
+VECTOR2 = 5
+VECTOR2I = 6
+VECTOR3 = 9
+VECTOR3I = 10
+COLOR = 20
+STRING_NAME = 21
+DICTIONARY = 27
+ARRAY = 28
+PACKED_BYTE_ARRAY = 29
+PACKED_INT32_ARRAY = 30
+PACKED_INT64_ARRAY = 31
+PACKED_FLOAT32_ARRAY = 32
+PACKED_FLOAT64_ARRAY = 33
+PACKED_STRING_ARRAY = 34
+PACKED_VECTOR2_ARRAY = 35
+PACKED_VECTOR3_ARRAY = 36
+PACKED_COLOR_ARRAY = 37
+
+HEADER_TYPE_MASK = 0xFF
+ENCODE_FLAG_64 = 1 << 16
+# Typed Array element / Dictionary key and value kinds (Godot 4.4).
+_TYPED_ARRAY_SHIFT = 16
+_TYPED_KEY_SHIFT = 16
+_TYPED_VALUE_SHIFT = 18
+_KIND_NONE, _KIND_BUILTIN, _KIND_CLASS_NAME, _KIND_SCRIPT = range(4)
+
+
+Vector2 = namedtuple('Vector2', 'x y')
+Vector2i = namedtuple('Vector2i', 'x y')
+Vector3 = namedtuple('Vector3', 'x y z')
+Vector3i = namedtuple('Vector3i', 'x y z')
+Color = namedtuple('Color', 'r g b a')
+
+
+class StringName(str):
+    """A str sent as a StringName."""
+    __slots__ = ()
+
+    def __repr__(self):
+        return f"&{super().__repr__()}"
+
+
+class PackedArray(list):
+    """A Packed*Array, remembering its Variant type so it re-encodes as one."""
+    __slots__ = ('type',)
+
+    def __init__(self, type, items=()):
+        super().__init__(items)
+        self.type = type
+
+
+class VariantError(ValueError):
+    pass
+
+
+U32 = struct.Struct('<I')
+I32 = struct.Struct('<i')
+I64 = struct.Struct('<q')
+F32 = struct.Struct('<f')
+F64 = struct.Struct('<d')
+
+_VECTOR_TYPES = {
+    VECTOR2: (struct.Struct('<2f'), Vector2),
+    VECTOR2I: (struct.Struct('<2i'), Vector2i),
+    VECTOR3: (struct.Struct('<3f'), Vector3),
+    VECTOR3I: (struct.Struct('<3i'), Vector3i),
+    COLOR: (struct.Struct('<4f'), Color),
+}
+_PACKED_ELEMENTS = {
+    PACKED_INT32_ARRAY: (I32, None),
+    PACKED_INT64_ARRAY: (I64, None),
+    PACKED_FLOAT32_ARRAY: (F32, None),
+    PACKED_FLOAT64_ARRAY: (F64, None),
+    PACKED_VECTOR2_ARRAY: (struct.Struct('<2f'), Vector2),
+    PACKED_VECTOR3_ARRAY: (struct.Struct('<3f'), Vector3),
+    PACKED_COLOR_ARRAY: (struct.Struct('<4f'), Color),
+}
+_PYTHON_VECTORS = {Vector2: VECTOR2, Vector2i: VECTOR2I, Vector3: VECTOR3, Vector3i: VECTOR3I, Color: COLOR}
+
+
+def _pad(length):
+    return -length % 4
+
+
+def _encode_string(out, text):
+    data = text.encode('utf-8')
+    out += U32.pack(len(data))
+    out += data
+    out += bytes(_pad(len(data)))
+
+
+def encode_into(out, value):
+    """Append the encode_variant() bytes of `value` to bytearray `out`."""
+    if value is None:
+        out += U32.pack(NIL)
+    elif isinstance(value, bool):
+        out += U32.pack(BOOL)
+        out += U32.pack(int(value))
+    elif isinstance(value, int):
+        if -0x80000000 <= value <= 0x7FFFFFFF:
+            out += U32.pack(INT)
+            out += I32.pack(value)
+        else:
+            out += U32.pack(INT | ENCODE_FLAG_64)
+            out += I64.pack(value)
+    elif isinstance(value, float):
+        single = F32.pack(value)
+        if F32.unpack(single)[0] == value:
+            out += U32.pack(FLOAT)
+            out += single
+        else:
+            out += U32.pack(FLOAT | ENCODE_FLAG_64)
+            out += F64.pack(value)
+    elif isinstance(value, StringName):
+        out += U32.pack(STRING_NAME)
+        _encode_string(out, value)
+    elif isinstance(value, str):
+        out += U32.pack(STRING)
+        _encode_string(out, value)
+    elif type(value) in _PYTHON_VECTORS:
+        type_id = _PYTHON_VECTORS[type(value)]
+        out += U32.pack(type_id)
+        out += _VECTOR_TYPES[type_id][0].pack(*value)
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        out += U32.pack(PACKED_BYTE_ARRAY)
+        out += U32.pack(len(value))
+        out += value
+        out += bytes(_pad(len(value)))
+    elif isinstance(value, PackedArray):
+        _encode_packed(out, value)
+    elif isinstance(value, dict):
+        out += U32.pack(DICTIONARY)
+        out += U32.pack(len(value))
+        for key, item in value.items():
+            encode_into(out, key)
+            encode_into(out, item)
+    elif isinstance(value, (list, tuple)):
+        out += U32.pack(ARRAY)
+        out += U32.pack(len(value))
+        for item in value:
+            encode_into(out, item)
+    else:
+        raise VariantError(f"Cannot encode {type(value).__name__} as a Variant")
+    return out
+
+
+def _encode_packed(out, value):
+    out += U32.pack(value.type)
+    out += U32.pack(len(value))
+    if value.type == PACKED_BYTE_ARRAY:
+        out += bytes(value)
+        out += bytes(_pad(len(value)))
+    elif value.type == PACKED_STRING_ARRAY:
+        for text in value:
+            _encode_string(out, text)
+    elif value.type in _PACKED_ELEMENTS:
+        element = _PACKED_ELEMENTS[value.type][0]
+        for item in value:
+            out += element.pack(*item) if isinstance(item, tuple) else element.pack(item)
+    else:
+        raise VariantError(f"Unsupported packed array type {value.type}")
+
+
+def encode(value):
+    """encode_variant() bytes of `value`."""
+    return bytes(encode_into(bytearray(), value))
+
+
+def _decode_string(view, offset):
+    length = U32.unpack_from(view, offset)[0]
+    offset += 4
+    end = offset + length
+    if end > len(view):
+        raise VariantError("String runs past the end of the buffer")
+    return str(view[offset:end], 'utf-8'), end + _pad(length)
+
+
+def _skip_container_type(view, offset, kind):
+    if kind == _KIND_BUILTIN:
+        return offset + 4
+    if kind in (_KIND_CLASS_NAME, _KIND_SCRIPT):
+        return _decode_string(view, offset)[1]
+    return offset
+
+
+def decode_from(view, offset=0):
+    """Decode one Variant from `view` at `offset`; returns (value, end offset)."""
+    header = U32.unpack_from(view, offset)[0]
+    offset += 4
+    type_id = header & HEADER_TYPE_MASK
+    if type_id == NIL:
+        return None, offset
+    if type_id == BOOL:
+        return U32.unpack_from(view, offset)[0] != 0, offset + 4
+    if type_id == INT:
+        if header & ENCODE_FLAG_64:
+            return I64.unpack_from(view, offset)[0], offset + 8
+        return I32.unpack_from(view, offset)[0], offset + 4
+    if type_id == FLOAT:
+        if header & ENCODE_FLAG_64:
+            return F64.unpack_from(view, offset)[0], offset + 8
+        return F32.unpack_from(view, offset)[0], offset + 4
+    if type_id in (STRING, STRING_NAME):
+        text, offset = _decode_string(view, offset)
+        return (StringName(text) if type_id == STRING_NAME else text), offset
+    if type_id in _VECTOR_TYPES:
+        layout, cls = _VECTOR_TYPES[type_id]
+        return cls(*layout.unpack_from(view, offset)), offset + layout.size
+    if type_id == DICTIONARY:
+        offset = _skip_container_type(view, offset, (header >> _TYPED_KEY_SHIFT) & 3)
+        offset = _skip_container_type(view, offset, (header >> _TYPED_VALUE_SHIFT) & 3)
+        count = U32.unpack_from(view, offset)[0] & 0x7FFFFFFF
+        offset += 4
+        result = {}
+        for _ in range(count):
+            key, offset = decode_from(view, offset)
+            result[key], offset = decode_from(view, offset)
+        return result, offset
+    if type_id == ARRAY:
+        offset = _skip_container_type(view, offset, (header >> _TYPED_ARRAY_SHIFT) & 3)
+        count = U32.unpack_from(view, offset)[0] & 0x7FFFFFFF
+        offset += 4
+        result = []
+        for _ in range(count):
+            item, offset = decode_from(view, offset)
+            result.append(item)
+        return result, offset
+    if type_id == PACKED_BYTE_ARRAY:
+        length = U32.unpack_from(view, offset)[0]
+        offset += 4
+        return bytes(view[offset:offset + length]), offset + length + _pad(length)
+    if type_id == PACKED_STRING_ARRAY:
+        count = U32.unpack_from(view, offset)[0]
+        offset += 4
+        result = PackedArray(type_id)
+        for _ in range(count):
+            text, offset = _decode_string(view, offset)
+            result.append(text)
+        return result, offset
+    if type_id in _PACKED_ELEMENTS:
+        element, cls = _PACKED_ELEMENTS[type_id]
+        count = U32.unpack_from(view, offset)[0]
+        offset += 4
+        items = [values if cls is None else cls(*values)
+                 for values in element.iter_unpack(view[offset:offset + count * element.size])]
+        if cls is None:
+            items = [values[0] for values in items]
+        return PackedArray(type_id, items), offset + count * element.size
+    raise VariantError(f"Unsupported Variant type {type_id} at offset {offset - 4}")
+
+
+def decode(data):
+    """Decode a whole encode_variant() buffer."""
+    value, _ = decode_from(memoryview(data))
+    return value
@@ -0,0 +1,29 @@
+"""
+Well-known locations inside the Godot project.
+"""
+
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+SOURCE_DIR = PROJECT_ROOT / "source"
+ITEMS_DIR = SOURCE_DIR / "common" / "gameplay" / "items"
+MATERIALS_DIR = ITEMS_DIR / "materials"
+RECIPES_DIR = SOURCE_DIR / "common" / "gameplay" / "crafting" / "recipes"
+LOOT_TABLES_DIR = SOURCE_DIR / "server" / "world" / "components" / "harvesting" / "loot_tables"
+INDEXES_DIR = SOURCE_DIR / "common" / "registry" / "indexes"
+ITEM_METADATA_PATH = ITEMS_DIR / "item_metadata.json"
+ITEM_METADATA_BIN_PATH = ITEMS_DIR / "item_metadata.bin"
+
+RES_PREFIX = "res://"
+
+
+def to_res_path(path, project_root=PROJECT_ROOT):
+    """Convert a filesystem path into a res:// path."""
+    return RES_PREFIX + Path(path).resolve().relative_to(Path(project_root).resolve()).as_posix()
+
+
+def from_res_path(res_path, project_root=PROJECT_ROOT):
+    """Convert a res:// path into a filesystem path."""
+    return Path(project_root) / res_path[len(RES_PREFIX):] if res_path.startswith(RES_PREFIX) else Path(res_path)
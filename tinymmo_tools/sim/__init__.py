@@ -0,0 +1,3 @@
+"""
+Balance simulations of harvesting, loot, progression and the economy (NumPy).
+"""
@@ -0,0 +1,484 @@
+"""
+Vectorized agent-based simulation of the gold and item economy.
+
+Advances thousands of players together in NumPy arrays, one simulated hour
+per step. Each hour a player is online with probability play_hours / 24,
+and an online hour is spent like this:
+
+- harvesting at the highest-tier node of their class they have the level
+  for (the node scenes, through sim/harvest.py). Energy regeneration pauses
+  while harvesting, so a player stops when energy runs out. Rolls come from
+  the node's base_yield_per_sec, and items from its loot table (binomial
+  hits per entry, sim/loot.py tables). Each item gives tier * 5 experience;
+- crafting CraftingRecipes of their class, highest level first, with the
+  regenerated energy. Each craft pays gold_cost and energy_cost, consumes
+  the inputs, gives the outputs and required_level * 250 experience;
+- completing QuestManager quests they hold the items for. Quests take 1-3
+  draws from an adventurer's pool, and reward GOLD_REWARD_MULTIPLIER (gold)
+  and XP_REWARD_MULTIPLIER (experience) times the summed item value. They
+  reset every RESET_INTERVAL_SECONDS, or as soon as the list is empty;
+- selling everything above `--keep` of the items their recipes and the
+  quest pools use (and everything else) to the market at get_sell_price().
+
+Gold faucets are market sales and quest rewards; the sink is recipe
+gold_cost. Items enter by harvesting and crafting, and leave as recipe
+inputs, quest hand-ins and market sales. There is no player-to-player
+trade, so recipes that need another class's items only run on a player's
+own stock; node competition is left to sim/harvest.py.
+
+Reports money supply, item supply, faucets, sinks and sink/faucet ratios
+per day, and `--csv` writes the same series for charting.
+
+Usage:
+    python -m tinymmo_tools.sim.economy [--players N] [--days D] [--play-hours H] [--harvest-share F]
+                                        [--crafts N] [--keep N] [--csv FILE] [--seed S]
+"""
+
+import argparse
+import csv
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from ..content import scan
+from ..content.db import open_database
+from ..content.graph import CLASSES
+from ..content.quests import MAX_ITEMS as QUEST_ITEMS, item_value, quest_settings
+from . import harvest, loot
+
+
+MAX_LEVEL = 30
+# player_resource.gd's get_exp_for_level() curve.
+XP_AT_L1 = 1000
+XP_AT_LMAX = 500000
+POWER_P = 2.2
+CRAFT_EXP_PER_LEVEL = 250
+# MarketArea._get_default_item_price() fallbacks for items without a
+# minimum_price, first matching tag wins.
+MARKET_TAG_PRICES = (('material', 5), ('ore', 10), ('weapon', 50), ('armor', 40))
+MARKET_DEFAULT_PRICE = 1
+SERIES_FIELDS = ('day', 'players_online', 'mean_level', 'money_supply', 'gold_sold', 'gold_quests', 'gold_crafting',
+                 'gold_sink_ratio', 'item_supply', 'items_harvested', 'items_crafted', 'items_consumed',
+                 'items_quests', 'items_sold', 'item_sink_ratio', 'crafts', 'quests')
+
+
+def exp_table():
+    """Experience needed to leave each level (index = level; 0 at MAX_LEVEL)."""
+    def exp_for_level(level):
+        if level <= 1:
+            return 0
+        t1 = (1 / MAX_LEVEL) ** POWER_P
+        alpha = (XP_AT_LMAX - XP_AT_L1) / (1 - t1)
+        beta = XP_AT_L1 - alpha * t1
+        return int(max(1.0, round(alpha * (level / MAX_LEVEL) ** POWER_P + beta)))
+    return np.array([exp_for_level(level + 1) if level < MAX_LEVEL else 0 for level in range(MAX_LEVEL + 1)],
+                    dtype=np.int64)
+
+
+@dataclass
+class Content:
+    """Content tables as arrays over item indexes."""
+    slugs: list
+    sell_price: np.ndarray
+    quest_value: np.ndarray
+    recipes: list
+    tables: dict
+    kinds: dict
+    pools: np.ndarray
+    pool_sizes: np.ndarray
+    gold_multiplier: float
+    xp_multiplier: float
+    quests_per_player: int
+    reset_hours: float
+    needed: np.ndarray
+    skipped_recipes: int = 0
+
+
+@dataclass
+class Recipe:
+    slug: str
+    class_index: int
+    required_level: int
+    gold_cost: int
+    energy_cost: float
+    inputs: list = field(default_factory=list)
+    outputs: list = field(default_factory=list)
+
+
+def market_price(can_sell, minimum_price, tags):
+    """MarketArea's sell price of an item (0 when it cannot be sold)."""
+    if not can_sell:
+        return 0
+    if minimum_price > 0:
+        return minimum_price
+    for tag, price in MARKET_TAG_PRICES:
+        if tag in tags:
+            return price
+    return MARKET_DEFAULT_PRICE
+
+
+def load_content(db):
+    items = db.execute("SELECT path, slug, can_sell, minimum_price FROM items ORDER BY slug").fetchall()
+    slugs = [row['slug'] for row in items]
+    position = {slug: index for index, slug in enumerate(slugs)}
+    tags = {}
+    for row in db.execute("SELECT path, tag FROM item_tags"):
+        tags.setdefault(row['path'], set()).add(row['tag'])
+    sell_price = np.array([market_price(row['can_sell'], row['minimum_price'], tags.get(row['path'], ()))
+                           for row in items], dtype=np.int64)
+    quest_value = np.array([item_value(row['minimum_price'], tags.get(row['path'], ())) for row in items],
+                           dtype=np.int64)
+
+    recipes, skipped = {}, 0
+    for row in db.execute("""
+        SELECT r.path, r.slug, r.required_class, r.required_level, r.gold_cost, r.energy_cost,
+               s.direction, s.item_slug, s.quantity
+        FROM recipes r JOIN recipe_slots s ON s.path = r.path
+        ORDER BY r.required_level DESC, r.slug, s.direction, s.slot
+    """):
+        if row['required_class'] not in CLASSES:
+            continue
+        recipe = recipes.setdefault(row['path'], Recipe(row['slug'], CLASSES.index(row['required_class']),
+                                                        row['required_level'], row['gold_cost'], row['energy_cost']))
+        slot = (position.get(row['item_slug'], -1), max(row['quantity'], 1))
+        (recipe.inputs if row['direction'] == 'input' else recipe.outputs).append(slot)
+    usable = []
+    for recipe in recipes.values():
+        if not recipe.outputs or any(item < 0 for item, _ in recipe.inputs + recipe.outputs):
+            skipped += 1
+        else:
+            usable.append(recipe)
+
+    tables = {}
+    for table in loot.load_loot_tables(db):
+        tables[table.slug] = (table, np.array([position.get(slug, -1) for slug in table.items], dtype=np.intp))
+    slug_by_path = {row['path']: row['slug'] for row in db.execute("SELECT path, slug FROM loot_tables")}
+    kinds = {}
+    for kind in harvest.load_node_kinds():
+        if kind.harvest_class in CLASSES:
+            kind.loot_table = slug_by_path.get(kind.loot_table, '')
+            kinds.setdefault(CLASSES.index(kind.harvest_class), []).append(kind)
+
+    constants, adventurers = quest_settings()
+    width = max(len(pool) for pool in adventurers.values())
+    pools = np.full((len(adventurers), width), -1, dtype=np.intp)
+    for row, pool in enumerate(adventurers.values()):
+        # ContentRegistryHub.id_from_slug() misses become -1 and are skipped.
+        pools[row, :len(pool)] = [position.get(slug, -1) for slug in pool]
+
+    needed = np.zeros((len(CLASSES), len(slugs)), dtype=bool)
+    quest_items = pools[pools >= 0]
+    needed[:, quest_items] = True
+    for recipe in usable:
+        needed[recipe.class_index, [item for item, _ in recipe.inputs]] = True
+
+    return Content(slugs, sell_price, quest_value, usable, tables, kinds, pools,
+                   np.array([len(pool) for pool in adventurers.values()], dtype=np.intp),
+                   constants.get('GOLD_REWARD_MULTIPLIER', 1.2), constants.get('XP_REWARD_MULTIPLIER', 0.5),
+                   int(constants.get('QUESTS_PER_PLAYER', 5)), constants.get('RESET_INTERVAL_SECONDS', 86400) / 3600,
+                   needed, skipped)
+
+
+class Economy:
+    def __init__(self, content, players=10000, play_hours=2.0, harvest_share=0.6, crafts=20, keep=10, seed=None):
+        self.content = content
+        self.rng = np.random.default_rng(seed)
+        self.players, self.play_hours, self.harvest_share = players, play_hours, harvest_share
+        self.crafts, self.keep = crafts, keep
+        self.exp_needed = exp_table()
+        self.level = np.ones(players, dtype=np.int64)
+        self.experience = np.zeros(players, dtype=np.int64)
+        self.gold = np.zeros(players, dtype=np.int64)
+        self.class_index = self.rng.integers(0, len(CLASSES), players)
+        self.energy = harvest.energy_max(self.level).astype(np.float64)
+        self.inventory = np.zeros((players, len(content.slugs)), dtype=np.int64)
+        shape = (players, content.quests_per_player, QUEST_ITEMS)
+        self.quest_items = np.full(shape, -1, dtype=np.intp)
+        self.quest_quantities = np.zeros(shape, dtype=np.int64)
+        self.quest_gold = np.zeros(shape[:2], dtype=np.int64)
+        self.quest_xp = np.zeros(shape[:2], dtype=np.int64)
+        self.quest_open = np.zeros(shape[:2], dtype=bool)
+        self.quest_reset_at = np.zeros(players)
+        self.hour = 0
+        self.totals = {}
+
+    # --- helpers -----------------------------------------------------------
+
+    def _count(self, key, amount):
+        self.totals[key] = self.totals.get(key, 0) + int(amount)
+
+    def _add_experience(self, players, amount):
+        """Award experience and apply level-ups; nothing at MAX_LEVEL, like the handlers."""
+        amount = np.where(self.level[players] < MAX_LEVEL, amount, 0)
+        np.add.at(self.experience, players, amount)
+        unique = np.unique(players)
+        while True:
+            needed = self.exp_needed[self.level[unique]]
+            up = (self.level[unique] < MAX_LEVEL) & (self.experience[unique] >= needed)
+            if not up.any():
+                break
+            leveled = unique[up]
+            self.experience[leveled] -= needed[up]
+            self.level[leveled] += 1
+            # Level-ups refill energy to the new maximum.
+            self.energy[leveled] = harvest.energy_max(self.level[leveled])
+
+    def _generate_quests(self, players):
+        content, rng = self.content, self.rng
+        shape = (len(players), content.quests_per_player, QUEST_ITEMS)
+        adventurer = rng.integers(0, len(content.pools), shape[:2])
+        picks = (rng.random(shape) * content.pool_sizes[adventurer][..., None]).astype(np.intp)
+        items = content.pools[adventurer[..., None], picks]
+        counts = rng.integers(1, QUEST_ITEMS + 1, shape[:2])
+        items[np.arange(QUEST_ITEMS) >= counts[..., None]] = -1
+        quantities = rng.integers(1, 6, shape)
+        quantities[items < 0] = 0
+        # Rewards add up every draw, but required_items is keyed by item id:
+        # a repeated item keeps its first slot with the last draw's quantity.
+        value = (content.quest_value[np.maximum(items, 0)] * quantities * (items >= 0)).sum(axis=2)
+        for later in range(1, QUEST_ITEMS):
+            for earlier in range(later):
+                same = (items[..., earlier] >= 0) & (items[..., earlier] == items[..., later])
+                quantities[..., earlier] = np.where(same, quantities[..., later], quantities[..., earlier])
+                items[..., later] = np.where(same, -1, items[..., later])
+        gold = np.maximum((value * content.gold_multiplier).astype(np.int64), 10)
+        xp = np.maximum((gold * content.xp_multiplier).astype(np.int64), 5)
+        self.quest_items[players] = items
+        self.quest_quantities[players] = np.where(items >= 0, quantities, 0)
+        self.quest_gold[players] = gold
+        self.quest_xp[players] = xp
+        self.quest_open[players] = True
+        self.quest_reset_at[players] = self.hour + content.reset_hours
+
+    # --- phases ------------------------------------------------------------
+
+    def _harvest(self, online, seconds):
+        content, rng = self.content, self.rng
+        for class_index, kinds in content.kinds.items():
+            members = online[self.class_index[online] == class_index]
+            if not len(members):
+                continue
+            levels = self.level[members]
+            best = np.zeros(len(members), dtype=np.intp)
+            for position, kind in enumerate(kinds):
+                best[levels >= kind.required_level] = position
+            for position, kind in enumerate(kinds):
+                group = members[best == position]
+                if not len(group) or kind.loot_table not in content.tables:
+                    continue
+                # Regen pauses while harvesting, so energy runs out after
+                # (energy + regen * phase) / (cost + regen) seconds.
+                energy = self.energy[group]
+                regen = harvest.ENERGY_REGEN_PER_SEC
+                active = np.minimum(seconds, (energy + regen * seconds) / (kind.energy_cost_per_sec + regen))
+                self.energy[group] = np.minimum(harvest.energy_max(self.level[group]),
+                                                energy + regen * (seconds - active)
+                                                - kind.energy_cost_per_sec * active)
+                expected = active * kind.base_yield_per_sec
+                rolls = np.floor(expected + rng.random(len(group))).astype(np.int64)
+                table, items = content.tables[kind.loot_table]
+                gained = np.zeros((len(group), len(table.items)), dtype=np.int64)
+                for entry, item in enumerate(table.entry_items):
+                    hits = rng.binomial(rolls, min(max(table.weights[entry] / 100.0, 0.0), 1.0))
+                    low, high = int(table.quantity_min[entry]), int(table.quantity_max[entry])
+                    amount = hits * low
+                    if high > low:
+                        span = high - low
+                        spread = np.sqrt(hits * ((span + 1) ** 2 - 1) / 12.0)
+                        extra = np.rint(rng.normal(hits * span / 2.0, spread))
+                        amount = amount + np.clip(extra, 0, hits * span).astype(np.int64)
+                    gained[:, item] += amount
+                for entry, item in enumerate(table.rare_items):
+                    gained[:, item] += rng.binomial(rolls, float(table.chances[entry])) * int(table.rare_quantities[entry])
+                valid = items >= 0
+                self.inventory[group[:, None], items[valid]] += gained[:, valid]
+                total = gained[:, valid].sum(axis=1)
+                self._count('items_harvested', total.sum())
+                self._add_experience(group, total * kind.tier * 5)
+
+    def _craft(self, online, seconds):
+        content = self.content
+        inventory = self.inventory[online]
+        gold = self.gold[online]
+        energy = np.minimum(harvest.energy_max(self.level[online]),
+                            self.energy[online] + harvest.ENERGY_REGEN_PER_SEC * seconds)
+        budget = np.full(len(online), self.crafts, dtype=np.int64)
+        levels, classes = self.level[online], self.class_index[online]
+        exp_gained = np.zeros(len(online), dtype=np.int64)
+        for recipe in content.recipes:
+            chosen = np.flatnonzero((classes == recipe.class_index) & (levels >= recipe.required_level) & (budget > 0))
+            if not len(chosen):
+                continue
+            count = budget[chosen]
+            for item, quantity in recipe.inputs:
+                count = np.minimum(count, inventory[chosen, item] // quantity)
+            if recipe.gold_cost > 0:
+                count = np.minimum(count, gold[chosen] // recipe.gold_cost)
+            if recipe.energy_cost > 0:
+                count = np.minimum(count, (energy[chosen] // recipe.energy_cost).astype(np.int64))
+            made = count > 0
+            if not made.any():
+                continue
+            chosen, count = chosen[made], count[made]
+            for item, quantity in recipe.inputs:
+                inventory[chosen, item] -= count * quantity
+                self._count('items_consumed', count.sum() * quantity)
+            for item, quantity in recipe.outputs:
+                inventory[chosen, item] += count * quantity
+                self._count('items_crafted', count.sum() * quantity)
+            gold[chosen] -= count * recipe.gold_cost
+            energy[chosen] -= count * recipe.energy_cost
+            budget[chosen] -= count
+            exp_gained[chosen] += count * recipe.required_level * CRAFT_EXP_PER_LEVEL
+            self._count('gold_crafting', count.sum() * recipe.gold_cost)
+            self._count('crafts', count.sum())
+        self.inventory[online] = inventory
+        self.gold[online] = gold
+        self.energy[online] = energy
+        self._add_experience(online, exp_gained)
+
+    def _quests(self, online):
+        content = self.content
+        due = online[(self.quest_reset_at[online] <= self.hour) | ~self.quest_open[online].any(axis=1)]
+        if len(due):
+            self._generate_quests(due)
+        rows = online[:, None]
+        for slot in range(content.quests_per_player):
+            items = self.quest_items[online, slot]
+            quantities = self.quest_quantities[online, slot]
+            held = self.inventory[rows, np.maximum(items, 0)]
+            ready = self.quest_open[online, slot] & ((items < 0) | (held >= quantities)).all(axis=1)
+            if not ready.any():
+                continue
+            players = online[ready]
+            np.subtract.at(self.inventory, (np.repeat(players, QUEST_ITEMS), np.maximum(items[ready], 0).ravel()),
+                           quantities[ready].ravel())
+            self.gold[players] += self.quest_gold[players, slot]
+            self.quest_open[players, slot] = False
+            self._add_experience(players, self.quest_xp[players, slot])
+            self._count('gold_quests', self.quest_gold[players, slot].sum())
+            self._count('items_quests', quantities[ready].sum())
+            self._count('quests', len(players))
+
+    def _sell(self, online):
+        content = self.content
+        inventory = self.inventory[online]
+        kept = np.where(content.needed[self.class_index[online]], np.minimum(inventory, self.keep), 0)
+        sold = np.where(content.sell_price > 0, inventory - kept, 0)
+        self.inventory[online] = inventory - sold
+        earned = sold @ content.sell_price
+        self.gold[online] += earned
+        self._count('gold_sold', earned.sum())
+        self._count('items_sold', sold.sum())
+
+    def step(self):
+        """Advance one hour."""
+        online = np.flatnonzero(self.rng.random(self.players) < self.play_hours / 24.0)
+        offline = np.ones(self.players, dtype=bool)
+        offline[online] = False
+        # An offline hour regenerates more than any energy pool holds.
+        self.energy[offline] = harvest.energy_max(self.level[offline])
+        if len(online):
+            self._harvest(online, 3600.0 * self.harvest_share)
+            self._craft(online, 3600.0 * (1.0 - self.harvest_share))
+            self._quests(online)
+            self._sell(online)
+        self._count('players_online', len(online))
+        self.hour += 1
+
+    def run(self, days, on_day=None):
+        series = []
+        for day in range(days):
+            self.totals = {}
+            for _ in range(24):
+                self.step()
+            row = self.snapshot(day + 1)
+            series.append(row)
+            if on_day:
+                on_day(row)
+        return series
+
+    def snapshot(self, day):
+        totals = self.totals
+        faucet = totals.get('gold_sold', 0) + totals.get('gold_quests', 0)
+        item_faucet = totals.get('items_harvested', 0) + totals.get('items_crafted', 0)
+        item_sink = totals.get('items_consumed', 0) + totals.get('items_quests', 0) + totals.get('items_sold', 0)
+        values = {key: totals.get(key, 0) for key in SERIES_FIELDS}
+        values.update(
+            day=day, players_online=totals.get('players_online', 0) / 24.0, mean_level=float(self.level.mean()),
+            money_supply=int(self.gold.sum()), item_supply=int(self.inventory.sum()),
+            gold_sink_ratio=totals.get('gold_crafting', 0) / faucet if faucet else 0.0,
+            item_sink_ratio=item_sink / item_faucet if item_faucet else 0.0)
+        return values
+
+
+def print_header():
+    print(f"{'day':>4} {'online':>7} {'level':>5} {'money':>13} {'+sold':>11} {'+quests':>11} {'-craft':>11} "
+          f"{'sink/fct':>8} {'items':>11} {'+harv':>10} {'+craft':>9} {'-used':>9} {'-quest':>8} {'-sold':>10} "
+          f"{'sink/fct':>8}")
+
+
+def print_row(row):
+    print(f"{row['day']:>4} {row['players_online']:>7,.0f} {row['mean_level']:>5.1f} {row['money_supply']:>13,} "
+          f"{row['gold_sold']:>11,} {row['gold_quests']:>11,} {row['gold_crafting']:>11,} "
+          f"{row['gold_sink_ratio']:>8.3f} {row['item_supply']:>11,} {row['items_harvested']:>10,} "
+          f"{row['items_crafted']:>9,} {row['items_consumed']:>9,} {row['items_quests']:>8,} {row['items_sold']:>10,} "
+          f"{row['item_sink_ratio']:>8.3f}", flush=True)
+
+
+def print_summary(economy, series, seconds):
+    content = economy.content
+    levels = np.bincount(economy.level, minlength=MAX_LEVEL + 1)
+    print(f"\nLevels after {len(series)} days: " + ', '.join(
+        f"L{level} {count:,}" for level, count in enumerate(levels) if count))
+    held = economy.inventory.sum(axis=0)
+    top = np.argsort(held)[::-1][:10]
+    print("Most held items: " + ', '.join(f"{content.slugs[i]} {held[i]:,}" for i in top if held[i]))
+    gold = np.sort(economy.gold)
+    share = gold[-max(len(gold) // 10, 1):].sum() / max(gold.sum(), 1)
+    print(f"Gold: median {int(np.median(gold)):,}, top 10% hold {share:.0%}")
+    faucet = sum(row['gold_sold'] + row['gold_quests'] for row in series)
+    sink = sum(row['gold_crafting'] for row in series)
+    print(f"Overall gold sink/faucet {sink / faucet if faucet else 0.0:.3f} "
+          f"({sum(row['crafts'] for row in series):,} crafts, {sum(row['quests'] for row in series):,} quests)")
+    if content.skipped_recipes:
+        print(f"⚠️  {content.skipped_recipes} recipes skipped (unknown item slugs or no outputs)")
+    print(f"\n{economy.players:,} players x {len(series) * 24:,} hours in {seconds:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--players', type=int, default=10000, help="simulated players (default: 10000)")
+    parser.add_argument('--days', type=int, default=30, help="simulated days (default: 30)")
+    parser.add_argument('--play-hours', type=float, default=2.0, help="mean hours online per day (default: 2)")
+    parser.add_argument('--harvest-share', type=float, default=0.6,
+                        help="share of an online hour spent harvesting, the rest crafting (default: 0.6)")
+    parser.add_argument('--crafts', type=int, default=20, help="most crafts per online hour (default: 20)")
+    parser.add_argument('--keep', type=int, default=10,
+                        help="stack of each recipe/quest item kept back from selling (default: 10)")
+    parser.add_argument('--csv', help="write the daily series to this CSV file")
+    parser.add_argument('--seed', type=int, default=None, help="random seed")
+    parser.add_argument('--no-cache', action='store_true', help="re-parse everything into an in-memory database")
+    scan.add_jobs_argument(parser)
+    args = parser.parse_args()
+
+    with open_database(use_cache=not args.no_cache, jobs=args.jobs) as db:
+        content = load_content(db)
+    print(f"📦 {len(content.slugs)} items, {len(content.recipes)} recipes, {len(content.tables)} loot tables, "
+          f"{len(content.pools)} adventurer pools")
+    start = time.perf_counter()
+    economy = Economy(content, args.players, args.play_hours, args.harvest_share, args.crafts, args.keep, args.seed)
+    print_header()
+    series = economy.run(args.days, print_row)
+    print_summary(economy, series, time.perf_counter() - start)
+    if args.csv:
+        with open(args.csv, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, SERIES_FIELDS)
+            writer.writeheader()
+            writer.writerows(series)
+        print(f"📈 Wrote {len(series)} days to {args.csv}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,561 @@
+"""
+Discrete-event simulation of the HarvestNode lifecycle.
+
+Models thousands of harvest nodes built from the 18 node scenes in
+harvesting/nodes/ and a closed population of gatherers, driven by an event
+heap rather than per-frame stepping: idle nodes cost nothing, and only the
+1 Hz harvest ticks, joins, leaves, encourages and respawns are events.
+
+Each node follows harvest_node.gd: while it has harvesters it ticks every
+second (the `_tick_accum` remainder carries over between sessions); every
+harvester pays `energy_cost_per_sec` and adds min(base_yield_per_sec *
+compute_multiplier(count), remaining) to its own pool, and each whole unit
+is one loot roll. The harvester that empties the node sends everyone away
+and starts `cooldown_seconds`, after which the node refills. Processing is
+switched on by the first join and by depletion, and off only when the last
+harvester leaves outside cooldown, so a node that respawned keeps running
+_process every frame until its next join/leave cycle.
+
+Encourage sessions follow request_encourage(): the first request opens a
+`encourage_session_window` window, each further unique contributor adds a
+stack up to the caps, and everyone has a per-peer `encourage_cooldown`. The
+bonus is applied to `pool_amount`, which immediate distribution keeps at 0,
+so encourages do not change yield; `--encourage-boost` models the intended
+behaviour instead (production scaled by 1 + the session's bonus).
+
+Players alternate between time away (exponential, regenerating energy at
+EnergyResource's rate) and a harvest session at a node of their class that
+they have the level for, which ends when they leave (exponential), run out
+of energy or the node depletes. Items come from the exact expected items per
+roll of each node's loot table (content/drops.py).
+
+Reports items per hour per node tier, node utilization (harvested, cooling
+down, idle), and how many nodes run _process on each server frame.
+
+Usage:
+    python -m tinymmo_tools.sim.harvest [--nodes N] [--players N] [--hours H] [--session S] [--away S]
+                                        [--encourage S] [--encourage-boost] [--fix-idle] [--seed S]
+"""
+
+import argparse
+import heapq
+import random
+import time
+from dataclasses import dataclass, field
+
+from .. import paths
+from ..content import drops, scan, tres
+from ..content.db import open_database
+
+
+NODES_DIR = paths.SOURCE_DIR / "server" / "world" / "components" / "harvesting" / "nodes"
+MAX_LEVEL = 30
+# harvest_node.gd export defaults, used when a scene leaves a property unset.
+NODE_DEFAULTS = {
+    'base_yield_per_sec': 1.0, 'max_amount': 100.0, 'cooldown_seconds': 300.0, 'energy_cost_per_sec': 5.0 / 30.0,
+    'encourage_session_window': 10.0, 'encourage_cooldown': 10.0, 'encourage_bonus_pct': 0.25,
+    'encourage_max_stacks': 5, 'encourage_max_total_bonus_pct': 1.0, 'required_class': '', 'required_level': 1,
+    'tier': 1,
+}
+TICK_INTERVAL = 1.0
+# player_resource.gd get_energy_max() and EnergyResource regeneration.
+BASE_ENERGY_MAX = 100.0
+ENERGY_PER_LEVEL = 50.0
+ENERGY_REGEN_PER_SEC = 1.0
+ENERGY_REGEN_DELAY = 1.5
+PERCENTILES = (50, 95, 99)
+
+# Event kinds, in the order simultaneous events are handled.
+RESPAWN, TICK, LEAVE, ENCOURAGE, ARRIVE = range(5)
+
+
+def compute_multiplier(count):
+    if count <= 1:
+        return 1.0
+    return {2: 1.1, 3: 1.2, 4: 1.3}.get(count, 1.5)
+
+
+def energy_max(level):
+    return BASE_ENERGY_MAX + ENERGY_PER_LEVEL * (level - 1)
+
+
+@dataclass
+class NodeKind:
+    """Parameters of one node scene."""
+    name: str
+    harvest_class: str
+    tier: int
+    required_level: int
+    base_yield_per_sec: float
+    max_amount: float
+    cooldown_seconds: float
+    energy_cost_per_sec: float
+    encourage_session_window: float
+    encourage_cooldown: float
+    encourage_bonus_pct: float
+    encourage_max_stacks: int
+    encourage_max_total_bonus_pct: float
+    loot_table: str = ''
+    items_per_roll: float = 1.0
+
+
+def load_node_kinds(nodes_dir=NODES_DIR):
+    """NodeKind of every harvest node scene, by tier then class."""
+    kinds = []
+    for path in sorted(nodes_dir.glob('*.tscn')):
+        scene = tres.parse_file(path)
+        root = scene.nodes[0]
+        values = {**NODE_DEFAULTS, **{k: v for k, v in root.properties.items() if k in NODE_DEFAULTS}}
+        loot = root.properties.get('loot_table')
+        loot_path = scene.ext_resources[loot.id].attrs.get('path', '') if isinstance(loot, tres.ExtResourceRef) else ''
+        kinds.append(NodeKind(
+            name=path.stem, harvest_class=str(values['required_class']), tier=int(values['tier']),
+            required_level=int(values['required_level']),
+            base_yield_per_sec=float(values['base_yield_per_sec']), max_amount=float(values['max_amount']),
+            cooldown_seconds=float(values['cooldown_seconds']),
+            energy_cost_per_sec=float(values['energy_cost_per_sec']),
+            encourage_session_window=float(values['encourage_session_window']),
+            encourage_cooldown=float(values['encourage_cooldown']),
+            encourage_bonus_pct=float(values['encourage_bonus_pct']),
+            encourage_max_stacks=int(values['encourage_max_stacks']),
+            encourage_max_total_bonus_pct=float(values['encourage_max_total_bonus_pct']),
+            loot_table=paths.from_res_path(loot_path).relative_to(paths.PROJECT_ROOT).as_posix() if loot_path else '',
+        ))
+    return sorted(kinds, key=lambda kind: (kind.tier, kind.harvest_class))
+
+
+def attach_loot(kinds, db):
+    """Set each kind's items_per_roll to the exact mean of its loot table."""
+    means = {table.slug: table.total.mean for table in drops.load_table_drops(db)}
+    slugs = {row['path']: row['slug'] for row in db.execute("SELECT path, slug FROM loot_tables")}
+    for kind in kinds:
+        slug = slugs.get(kind.loot_table)
+        if slug in means:
+            kind.items_per_roll = means[slug]
+
+
+class _Pool:
+    """Set with O(1) add, remove and uniform random choice."""
+
+    def __init__(self):
+        self.items = []
+        self.index = {}
+
+    def __len__(self):
+        return len(self.items)
+
+    def add(self, item):
+        if item not in self.index:
+            self.index[item] = len(self.items)
+            self.items.append(item)
+
+    def discard(self, item):
+        position = self.index.pop(item, None)
+        if position is None:
+            return
+        last = self.items.pop()
+        if position < len(self.items):
+            self.items[position] = last
+            self.index[last] = position
+
+    def choice(self, rng):
+        return self.items[int(rng.random() * len(self.items))]
+
+
+@dataclass(eq=False)
+class Node:
+    kind: NodeKind
+    number: int
+    remaining: float = 0.0
+    cooling: bool = False
+    processing: bool = False
+    harvesters: dict = field(default_factory=dict)
+    # _tick_accum as (value, time it was last updated while accumulating).
+    tick_accum: float = 0.0
+    accum_since: float = 0.0
+    tick_token: int = 0
+    session_expires: float = -1.0
+    session_contributors: set = field(default_factory=set)
+    session_stacks: int = 0
+    session_bonus: float = 0.0
+    encourage_until: dict = field(default_factory=dict)
+
+
+@dataclass(eq=False)
+class Player:
+    number: int
+    harvest_class: str
+    level: int
+    energy: float
+    node: Node = None
+    token: int = 0
+    left_at: float = 0.0
+
+
+@dataclass
+class TierStats:
+    nodes: int = 0
+    rolls: int = 0
+    items: float = 0.0
+    depletions: int = 0
+    harvested_s: float = 0.0
+    cooldown_s: float = 0.0
+    idle_processing_s: float = 0.0
+    harvester_s: float = 0.0
+
+
+@dataclass
+class Result:
+    seconds: float
+    tiers: dict
+    processing_histogram: dict
+    harvesting_s: float
+    cooldown_s: float
+    idle_processing_s: float
+    counters: dict
+    events: int
+    wall_seconds: float
+
+
+class Simulation:
+    def __init__(self, kinds, nodes_per_kind=100, players=1000, session=300.0, away=120.0, encourage=20.0,
+                 encourage_boost=False, fix_idle=False, top_tier=0.7, seed=None):
+        self.rng = random.Random(seed)
+        self.session, self.away, self.encourage = session, away, encourage
+        self.encourage_boost, self.fix_idle, self.top_tier = encourage_boost, fix_idle, top_tier
+        self.now = 0.0
+        self.events = []
+        self.sequence = 0
+        self.event_count = 0
+        self.measuring = False
+        self.last_change = 0.0
+        self.tiers = {}
+        self.histogram = {}
+        self.totals = {'harvesting': 0.0, 'cooldown': 0.0, 'idle': 0.0}
+        self.counters = dict.fromkeys(('sessions', 'turned_away', 'left', 'out_of_energy', 'depleted',
+                                       'encourage_sessions', 'encourage_hits', 'encourage_rejected',
+                                       'status_pushes', 'tick_pushes'), 0)
+
+        self.nodes = []
+        self.available = {}
+        self.occupied = {}
+        for kind in kinds:
+            self.tiers.setdefault(kind.tier, TierStats()).nodes += nodes_per_kind
+            self.available[kind.name], self.occupied[kind.name] = _Pool(), _Pool()
+            for _ in range(nodes_per_kind):
+                node = Node(kind, len(self.nodes), remaining=kind.max_amount)
+                self.nodes.append(node)
+                self.available[kind.name].add(node)
+        # Live counts of nodes per state, integrated over time by _advance().
+        self.harvesting = {tier: 0 for tier in self.tiers}
+        self.cooling = {tier: 0 for tier in self.tiers}
+        self.idle = {tier: 0 for tier in self.tiers}
+        self.harvester_count = {tier: 0 for tier in self.tiers}
+
+        self.kinds_for = {}
+        for number in range(players):
+            # Levels skewed towards the low end, like world/generate.py.
+            level = min(MAX_LEVEL, int(self.rng.paretovariate(1.2)))
+            harvest_class = self.rng.choice(sorted({kind.harvest_class for kind in kinds}))
+            player = Player(number, harvest_class, level, energy_max(level))
+            key = (harvest_class, level)
+            if key not in self.kinds_for:
+                self.kinds_for[key] = [kind for kind in kinds if kind.harvest_class in ('', harvest_class)
+                                       and level >= kind.required_level]
+            self._push(self.rng.uniform(0.0, away), ARRIVE, player, 0)
+
+    # --- event plumbing --------------------------------------------------
+
+    def _push(self, at, kind, target, token):
+        self.sequence += 1
+        heapq.heappush(self.events, (at, kind, self.sequence, target, token))
+
+    def _advance(self, at):
+        if self.measuring:
+            dt = at - self.last_change
+            if dt > 0:
+                processing = 0
+                for tier, stats in self.tiers.items():
+                    stats.harvested_s += self.harvesting[tier] * dt
+                    stats.cooldown_s += self.cooling[tier] * dt
+                    stats.idle_processing_s += self.idle[tier] * dt
+                    stats.harvester_s += self.harvester_count[tier] * dt
+                    processing += self.harvesting[tier] + self.cooling[tier] + self.idle[tier]
+                self.histogram[processing] = self.histogram.get(processing, 0.0) + dt
+                self.totals['harvesting'] += sum(self.harvesting.values()) * dt
+                self.totals['cooldown'] += sum(self.cooling.values()) * dt
+                self.totals['idle'] += sum(self.idle.values()) * dt
+        self.last_change = at
+        self.now = at
+
+    # --- node lifecycle ----------------------------------------------------
+
+    def _join(self, player, node):
+        tier = node.kind.tier
+        if not node.harvesters:
+            if node.processing:
+                self.idle[tier] -= 1
+            self.harvesting[tier] += 1
+            self.occupied[node.kind.name].add(node)
+            node.processing = True
+            node.accum_since = self.now
+            node.tick_token += 1
+            self._push(self.now + TICK_INTERVAL - node.tick_accum, TICK, node, node.tick_token)
+        node.harvesters[player] = 0.0
+        self.harvester_count[tier] += 1
+        player.node = node
+        player.token += 1
+        self.counters['sessions'] += 1
+        self.counters['status_pushes'] += len(node.harvesters)
+        self._push(self.now + self.rng.expovariate(1.0 / self.session), LEAVE, player, player.token)
+        if self.encourage > 0:
+            self._push(self.now + self.rng.expovariate(1.0 / self.encourage), ENCOURAGE, player, player.token)
+
+    def _leave(self, player, reason):
+        node = player.node
+        tier = node.kind.tier
+        del node.harvesters[player]
+        self.harvester_count[tier] -= 1
+        if reason == 'depleted':
+            node.encourage_until.pop(player, None)
+        player.node = None
+        player.token += 1
+        player.left_at = self.now
+        self.counters[reason] += 1
+        if not node.harvesters:
+            self.harvesting[tier] -= 1
+            self.occupied[node.kind.name].discard(node)
+            if not node.cooling:
+                node.tick_accum += self.now - node.accum_since
+                node.processing = False
+        self.counters['status_pushes'] += len(node.harvesters)
+        self._push(self.now + self.rng.expovariate(1.0 / self.away), ARRIVE, player, player.token)
+
+    def _tick(self, node):
+        kind = node.kind
+        node.tick_accum, node.accum_since = 0.0, self.now
+        if node.session_expires >= 0 and self.now >= node.session_expires:
+            self._end_encourage(node)
+        rate = kind.base_yield_per_sec * compute_multiplier(len(node.harvesters))
+        if self.encourage_boost and node.session_expires >= 0:
+            rate *= 1.0 + node.session_bonus
+        stats = self.tiers[kind.tier]
+        for player in list(node.harvesters):
+            if player.energy < kind.energy_cost_per_sec:
+                self._leave(player, 'out_of_energy')
+                continue
+            player.energy -= kind.energy_cost_per_sec
+            produce = min(rate, node.remaining) if node.remaining > 0 else 0.0
+            node.remaining -= produce
+            pool = node.harvesters[player] + produce
+            rolls = int(pool)
+            node.harvesters[player] = pool - rolls
+            if self.measuring and rolls:
+                stats.rolls += rolls
+                stats.items += rolls * kind.items_per_roll
+                self.counters['tick_pushes'] += rolls
+            if node.remaining <= 0:
+                self._deplete(node)
+                return
+        if node.harvesters:
+            self.counters['status_pushes'] += len(node.harvesters)
+            self._push(self.now + TICK_INTERVAL, TICK, node, node.tick_token)
+
+    def _deplete(self, node):
+        tier = node.kind.tier
+        node.cooling = True
+        self.available[node.kind.name].discard(node)
+        self.cooling[tier] += 1
+        if self.measuring:
+            self.tiers[tier].depletions += 1
+        for player in list(node.harvesters):
+            self._leave(player, 'depleted')
+        self._end_encourage(node)
+        node.processing = True
+        node.tick_token += 1
+        self._push(self.now + node.kind.cooldown_seconds, RESPAWN, node, 0)
+
+    def _respawn(self, node):
+        tier = node.kind.tier
+        node.cooling = False
+        node.remaining = node.kind.max_amount
+        self.cooling[tier] -= 1
+        self.available[node.kind.name].add(node)
+        if self.fix_idle:
+            node.processing = False
+        else:
+            self.idle[tier] += 1
+
+    def _end_encourage(self, node):
+        node.session_expires = -1.0
+        node.session_contributors.clear()
+        node.session_stacks = 0
+        node.session_bonus = 0.0
+
+    def _request_encourage(self, player, node):
+        kind = node.kind
+        # node._clock only advances while the node processes; it does here.
+        if node.encourage_until.get(player, 0.0) > self.now:
+            self.counters['encourage_rejected'] += 1
+            return
+        if node.session_expires >= 0 and self.now >= node.session_expires:
+            self._end_encourage(node)
+        if node.session_expires < 0:
+            node.session_expires = self.now + kind.encourage_session_window
+            node.session_contributors = {player}
+            node.session_stacks = 1
+            node.encourage_until[player] = self.now + kind.encourage_cooldown
+            self.counters['encourage_sessions'] += 1
+            return
+        if (player in node.session_contributors or node.session_stacks >= kind.encourage_max_stacks
+                or node.session_bonus >= kind.encourage_max_total_bonus_pct):
+            self.counters['encourage_rejected'] += 1
+            return
+        node.session_contributors.add(player)
+        node.session_stacks += 1
+        node.session_bonus += min(kind.encourage_bonus_pct, kind.encourage_max_total_bonus_pct - node.session_bonus)
+        node.encourage_until[player] = self.now + kind.encourage_cooldown
+        self.counters['encourage_hits'] += 1
+
+    # --- players ---------------------------------------------------------
+
+    def _arrive(self, player):
+        away = self.now - player.left_at
+        player.energy = min(energy_max(player.level),
+                            player.energy + max(0.0, away - ENERGY_REGEN_DELAY) * ENERGY_REGEN_PER_SEC)
+        eligible = self.kinds_for[(player.harvest_class, player.level)]
+        if not eligible:
+            return
+        top = eligible[-1] if self.rng.random() < self.top_tier else self.rng.choice(eligible)
+        # Players gravitate to nodes others are already on for the multiplier.
+        occupied, available = self.occupied[top.name], self.available[top.name]
+        if len(occupied) and self.rng.random() < 0.5:
+            self._join(player, occupied.choice(self.rng))
+        elif len(available):
+            self._join(player, available.choice(self.rng))
+        else:
+            self.counters['turned_away'] += 1
+            player.left_at = self.now
+            self._push(self.now + self.rng.expovariate(1.0 / self.away), ARRIVE, player, player.token)
+
+    # --- driver ----------------------------------------------------------
+
+    def run(self, seconds, warmup=600.0):
+        start = time.perf_counter()
+        end = warmup + seconds
+        events = self.events
+        while events and events[0][0] <= end:
+            at, kind, _, target, token = heapq.heappop(events)
+            if not self.measuring and at >= warmup:
+                self._advance(warmup)
+                self.measuring = True
+                self.counters = dict.fromkeys(self.counters, 0)
+            self._advance(at)
+            self.event_count += 1
+            if kind == TICK:
+                if token == target.tick_token and target.harvesters:
+                    self._tick(target)
+            elif kind == LEAVE:
+                if token == target.token and target.node is not None:
+                    self._leave(target, 'left')
+            elif kind == ENCOURAGE:
+                if token == target.token and target.node is not None:
+                    self._request_encourage(target, target.node)
+                    self._push(self.now + self.rng.expovariate(1.0 / self.encourage), ENCOURAGE, target, token)
+            elif kind == ARRIVE:
+                if token == target.token and target.node is None:
+                    self._arrive(target)
+            elif kind == RESPAWN:
+                self._respawn(target)
+        self._advance(end)
+        return Result(seconds, self.tiers, self.histogram, self.totals['harvesting'], self.totals['cooldown'],
+                      self.totals['idle'], self.counters, self.event_count, time.perf_counter() - start)
+
+
+def _histogram_percentile(histogram, percent):
+    total = sum(histogram.values())
+    cumulative = 0.0
+    for count in sorted(histogram):
+        cumulative += histogram[count]
+        if cumulative >= total * percent / 100.0:
+            return count
+    return 0
+
+
+def print_kinds(kinds):
+    print(f"{'node':<18} {'class':<8} {'tier':>4} {'level':>5} {'yield/s':>7} {'amount':>6} {'cooldown':>8} "
+          f"{'energy/s':>8} {'items/roll':>10}")
+    for kind in kinds:
+        print(f"{kind.name:<18} {kind.harvest_class:<8} {kind.tier:>4} {kind.required_level:>5} "
+              f"{kind.base_yield_per_sec:>7g} {kind.max_amount:>6g} {kind.cooldown_seconds:>7g}s "
+              f"{kind.energy_cost_per_sec:>8g} {kind.items_per_roll:>10.3f}")
+
+
+def print_result(result, frame_hz):
+    hours = result.seconds / 3600.0
+    print(f"\nPer tier over {hours:g} h:")
+    print(f"  {'tier':<5} {'nodes':>6} {'rolls/h/node':>12} {'items/h/node':>12} {'items/h':>10} {'harvested':>9} "
+          f"{'cooldown':>8} {'idle+proc':>9} {'depl/h/node':>11} {'harvesters':>10}")
+    for tier in sorted(result.tiers):
+        stats = result.tiers[tier]
+        node_seconds = stats.nodes * result.seconds
+        print(f"  T{tier:<4} {stats.nodes:>6,} {stats.rolls / hours / stats.nodes:>12.1f} "
+              f"{stats.items / hours / stats.nodes:>12.1f} {stats.items / hours:>10,.0f} "
+              f"{stats.harvested_s / node_seconds:>8.1%} {stats.cooldown_s / node_seconds:>8.1%} "
+              f"{stats.idle_processing_s / node_seconds:>9.1%} {stats.depletions / hours / stats.nodes:>11.2f} "
+              f"{stats.harvester_s / stats.harvested_s if stats.harvested_s else 0.0:>10.2f}")
+
+    histogram = result.processing_histogram
+    total = sum(histogram.values()) or 1.0
+    mean = sum(count * seconds for count, seconds in histogram.items()) / total
+    shown = ' '.join(f"p{p} {_histogram_percentile(histogram, p):,}" for p in PERCENTILES)
+    print(f"\nNodes running _process per server frame: mean {mean:,.1f}, {shown}, max {max(histogram, default=0):,}")
+    print(f"  harvesting {result.harvesting_s / result.seconds:,.1f} (1 Hz harvest ticks), "
+          f"cooling down {result.cooldown_s / result.seconds:,.1f}, "
+          f"idle after respawn {result.idle_processing_s / result.seconds:,.1f}")
+    print(f"  ≈ {mean * frame_hz:,.0f} _process calls/s at {frame_hz:g} fps")
+
+    counters = result.counters
+    print(f"\nSessions {counters['sessions']:,}: left {counters['left']:,}, out of energy {counters['out_of_energy']:,}, "
+          f"node depleted {counters['depleted']:,}; turned away (no node) {counters['turned_away']:,}")
+    print(f"Encourage: {counters['encourage_sessions']:,} sessions, {counters['encourage_hits']:,} stacks, "
+          f"{counters['encourage_rejected']:,} rejected")
+    print(f"data_push/s: harvest.tick {counters['tick_pushes'] / result.seconds:,.1f}, "
+          f"harvest.status {counters['status_pushes'] / result.seconds:,.1f}")
+    print(f"\n{result.events:,} events in {result.wall_seconds:.1f}s "
+          f"({result.events / max(result.wall_seconds, 1e-9):,.0f} events/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--nodes', type=int, default=100, help="nodes per node scene (default: 100)")
+    parser.add_argument('--players', type=int, default=1000, help="gathering players (default: 1000)")
+    parser.add_argument('--hours', type=float, default=1.0, help="simulated hours after warm-up (default: 1)")
+    parser.add_argument('--warmup', type=float, default=600.0, help="warm-up seconds not measured (default: 600)")
+    parser.add_argument('--session', type=float, default=300.0, help="mean seconds a player stays on a node (default: 300)")
+    parser.add_argument('--away', type=float, default=120.0, help="mean seconds between sessions (default: 120)")
+    parser.add_argument('--encourage', type=float, default=20.0,
+                        help="mean seconds between encourage requests per harvester, 0 = never (default: 20)")
+    parser.add_argument('--encourage-boost', action='store_true',
+                        help="let encourage bonuses scale production (harvest_node.gd applies them to pool_amount, always 0)")
+    parser.add_argument('--fix-idle', action='store_true', help="stop processing when a node respawns with no harvesters")
+    parser.add_argument('--top-tier', type=float, default=0.7,
+                        help="chance a player picks their highest eligible tier (default: 0.7)")
+    parser.add_argument('--frame-hz', type=float, default=60.0, help="server frames per second (default: 60)")
+    parser.add_argument('--seed', type=int, default=None, help="random seed")
+    parser.add_argument('--no-cache', action='store_true', help="re-parse everything into an in-memory database")
+    scan.add_jobs_argument(parser)
+    args = parser.parse_args()
+
+    kinds = load_node_kinds()
+    with open_database(use_cache=not args.no_cache, jobs=args.jobs) as db:
+        attach_loot(kinds, db)
+    print_kinds(kinds)
+    simulation = Simulation(kinds, args.nodes, args.players, args.session, args.away, args.encourage,
+                            args.encourage_boost, args.fix_idle, args.top_tier, args.seed)
+    print(f"\n{len(simulation.nodes):,} nodes, {args.players:,} players, {args.hours:g} h after {args.warmup:g}s warm-up")
+    print_result(simulation.run(args.hours * 3600.0, args.warmup), args.frame_hz)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,261 @@
+"""
+Vectorized Monte Carlo simulation of HarvestLootTable.roll_loot().
+
+Every loot entry hits independently when randf() * 100 <= weight and then
+drops randi_range(quantity_min, quantity_max); every rare bonus hits when
+randf() <= chance and drops its fixed quantity. Rolls are simulated in
+batches of NumPy arrays (one row per entry), so tens of millions of rolls
+per table take seconds.
+
+For each item a table drops this reports the drop rate and the mean,
+variance and percentiles of the yield per harvest tick, then per hour at
+the base_yield_per_sec of the node scene using the table (one roll per whole unit harvested, one
+harvester, ignoring depletion and cooldown), then totals per tier.
+
+Usage:
+    python -m tinymmo_tools.sim.loot [table ...] [--rolls N] [--yield R] [--seed S] [--no-cache] [-j N]
+"""
+
+import argparse
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from ..content import scan
+from ..content.db import open_database
+from .harvest import NODE_DEFAULTS, load_node_kinds
+
+
+PERCENTILES = (5, 50, 95)
+DEFAULT_ROLLS = 10_000_000
+# Rolls per batch; bounds memory to a few arrays of this length per entry.
+BATCH_ROLLS = 1 << 20
+
+
+@dataclass
+class LootTable:
+    """One HarvestLootTable as arrays; `items` are the distinct slugs it drops."""
+    slug: str
+    harvest_class: str
+    tier: int
+    items: list = field(default_factory=list)
+    entry_items: np.ndarray = None
+    weights: np.ndarray = None
+    quantity_min: np.ndarray = None
+    quantity_max: np.ndarray = None
+    rare_items: np.ndarray = None
+    chances: np.ndarray = None
+    rare_quantities: np.ndarray = None
+    # Of the first node scene (by tier) that uses the table.
+    base_yield_per_sec: float = NODE_DEFAULTS['base_yield_per_sec']
+
+    @property
+    def weight_total(self):
+        return float(self.weights.sum())
+
+    def max_per_roll(self):
+        """Largest quantity of each item one roll can drop."""
+        most = np.zeros(len(self.items), dtype=np.int64)
+        np.add.at(most, self.entry_items, self.quantity_max)
+        np.add.at(most, self.rare_items, self.rare_quantities)
+        return most
+
+
+def load_loot_tables(db):
+    """Every loot table in the content database, ordered by tier then class."""
+    yields = {}
+    for kind in load_node_kinds():
+        yields.setdefault(kind.loot_table, kind.base_yield_per_sec)
+    drops = {}
+    for row in db.execute("""
+        SELECT t.path, t.slug, t.harvest_class, t.tier, d.is_rare, d.item_slug, d.weight, d.chance, d.quantity_min,
+               d.quantity_max
+        FROM loot_tables t JOIN loot_drops d ON d.path = t.path
+        WHERE d.item_slug != ''
+        ORDER BY t.tier, t.harvest_class, t.slug, d.is_rare, d.position
+    """):
+        table = drops.setdefault(row['slug'], (row['path'], row['harvest_class'], row['tier'], [], []))
+        table[4 if row['is_rare'] else 3].append(row)
+
+    tables = []
+    for slug, (path, harvest_class, tier, entries, rares) in drops.items():
+        items = list(dict.fromkeys(row['item_slug'] for row in entries + rares))
+        position = {item: index for index, item in enumerate(items)}
+        tables.append(LootTable(
+            slug=slug, harvest_class=harvest_class, tier=tier, items=items,
+            entry_items=np.array([position[row['item_slug']] for row in entries], dtype=np.intp),
+            weights=np.array([row['weight'] for row in entries], dtype=np.float64),
+            quantity_min=np.array([row['quantity_min'] for row in entries], dtype=np.int64),
+            quantity_max=np.array([row['quantity_max'] for row in entries], dtype=np.int64),
+            rare_items=np.array([position[row['item_slug']] for row in rares], dtype=np.intp),
+            chances=np.array([row['chance'] for row in rares], dtype=np.float64),
+            rare_quantities=np.array([row['quantity_min'] for row in rares], dtype=np.int64),
+            base_yield_per_sec=yields.get(path, NODE_DEFAULTS['base_yield_per_sec']),
+        ))
+    return tables
+
+
+def roll_batch(table, rng, rolls):
+    """Simulate `rolls` calls of roll_loot(); returns an (items, rolls) quantity array."""
+    amounts = np.zeros((len(table.items), rolls), dtype=np.int32)
+    if len(table.weights):
+        draws = rng.random((len(table.weights), rolls), dtype=np.float32)
+        draws *= np.float32(100.0)
+        for entry, item in enumerate(table.entry_items):
+            weight = np.float32(table.weights[entry])
+            low, high = table.quantity_min[entry], table.quantity_max[entry]
+            hits = draws[entry] <= weight
+            if low == high or weight <= 0:
+                amounts[item] += hits * np.int32(low)
+            else:
+                # Given a hit the draw is uniform on [0, weight], so it also
+                # picks the quantity; this saves a second random draw.
+                span = np.float32(high - low + 1) / weight
+                quantities = np.minimum((draws[entry] * span).astype(np.int32), high - low) + np.int32(low)
+                amounts[item] += hits * quantities
+    if len(table.chances):
+        hits = rng.random((len(table.chances), rolls), dtype=np.float32) <= table.chances[:, None].astype(np.float32)
+        for entry, item in enumerate(table.rare_items):
+            amounts[item] += hits[entry] * np.int32(table.rare_quantities[entry])
+    return amounts
+
+
+@dataclass
+class ItemYield:
+    """Simulated yield of one item from one table."""
+    item_slug: str
+    drop_rate: float
+    mean: float
+    variance: float
+    percentiles: tuple
+    hour_mean: float
+    hour_sd: float
+    hour_percentiles: tuple
+
+
+@dataclass
+class TableResult:
+    table: LootTable
+    rolls: int
+    rolls_per_hour: int
+    items: list
+    seconds: float
+
+    @property
+    def mean_per_roll(self):
+        return sum(item.mean for item in self.items)
+
+    @property
+    def mean_per_hour(self):
+        return sum(item.hour_mean for item in self.items)
+
+
+def _histogram_percentiles(counts, percentiles):
+    cumulative = np.cumsum(counts)
+    return tuple(int(np.searchsorted(cumulative, cumulative[-1] * p / 100.0)) for p in percentiles)
+
+
+def simulate(table, rolls=DEFAULT_ROLLS, rng=None, yield_per_sec=None):
+    """Roll `table` about `rolls` times (rounded up to whole hours) and return a TableResult.
+
+    Per-roll statistics come from exact per-item histograms accumulated over
+    batches; per-hour percentiles from the simulated hour totals.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    yield_per_sec = table.base_yield_per_sec if yield_per_sec is None else yield_per_sec
+    rolls_per_hour = max(1, int(yield_per_sec * 3600))
+    hours = max(1, -(-rolls // rolls_per_hour))
+    hours_per_batch = max(1, BATCH_ROLLS // rolls_per_hour)
+
+    start = time.perf_counter()
+    histograms = np.zeros((len(table.items), int(table.max_per_roll().max(initial=0)) + 1), dtype=np.int64)
+    hour_totals = np.empty((len(table.items), hours), dtype=np.int64)
+    done = 0
+    while done < hours:
+        batch_hours = min(hours_per_batch, hours - done)
+        amounts = roll_batch(table, rng, batch_hours * rolls_per_hour)
+        for item in range(len(table.items)):
+            histograms[item] += np.bincount(amounts[item], minlength=histograms.shape[1])
+        hour_totals[:, done:done + batch_hours] = amounts.reshape(len(table.items), batch_hours, rolls_per_hour).sum(axis=2)
+        done += batch_hours
+
+    total_rolls = hours * rolls_per_hour
+    values = np.arange(histograms.shape[1])
+    items = []
+    for item, slug in enumerate(table.items):
+        counts = histograms[item]
+        mean = float(values @ counts) / total_rolls
+        variance = float((values * values) @ counts) / total_rolls - mean * mean
+        items.append(ItemYield(
+            item_slug=slug,
+            drop_rate=1.0 - counts[0] / total_rolls,
+            mean=mean,
+            variance=variance,
+            percentiles=_histogram_percentiles(counts, PERCENTILES),
+            hour_mean=mean * rolls_per_hour,
+            hour_sd=(variance * rolls_per_hour) ** 0.5,
+            hour_percentiles=tuple(int(v) for v in np.percentile(hour_totals[item], PERCENTILES, method='lower')),
+        ))
+    return TableResult(table, total_rolls, rolls_per_hour, items, time.perf_counter() - start)
+
+
+def print_result(result):
+    table = result.table
+    print(f"\n{table.slug} ({table.harvest_class} T{table.tier}): weights sum {table.weight_total:g}%, "
+          f"{result.rolls_per_hour} rolls/h, {result.rolls:,} rolls in {result.seconds:.2f}s")
+    header = '/'.join(f"p{p}" for p in PERCENTILES)
+    print(f"  {'item':<20} {'drop%':>7} {'mean/roll':>10} {'var/roll':>9} {header + ' roll':>14}"
+          f" {'mean/h':>9} {'sd/h':>7} {header + ' h':>16}")
+    for item in result.items:
+        per_roll = '/'.join(str(v) for v in item.percentiles)
+        per_hour = '/'.join(str(v) for v in item.hour_percentiles)
+        print(f"  {item.item_slug:<20} {item.drop_rate * 100:>6.2f}% {item.mean:>10.4f} {item.variance:>9.4f}"
+              f" {per_roll:>14} {item.hour_mean:>9.1f} {item.hour_sd:>7.1f} {per_hour:>16}")
+    print(f"  {'total':<20} {'':>7} {result.mean_per_roll:>10.4f} {'':>9} {'':>14} {result.mean_per_hour:>9.1f}")
+
+
+def print_tier_summary(results):
+    classes = sorted({result.table.harvest_class for result in results})
+    print("\nItems per hour by tier:")
+    print(f"  {'tier':<6}" + ''.join(f"{name:>12}" for name in classes))
+    for tier in sorted({result.table.tier for result in results}):
+        cells = []
+        for name in classes:
+            per_hour = [r.mean_per_hour for r in results if r.table.tier == tier and r.table.harvest_class == name]
+            cells.append(f"{sum(per_hour):>12.1f}" if per_hour else f"{'-':>12}")
+        print(f"  T{tier:<5}" + ''.join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('tables', nargs='*', help="loot table slugs (default: all)")
+    parser.add_argument('--rolls', type=int, default=DEFAULT_ROLLS, help=f"rolls per table (default: {DEFAULT_ROLLS:,})")
+    parser.add_argument('--yield', dest='yield_per_sec', type=float, default=None,
+                        help="base_yield_per_sec for every table (default: from the node scenes)")
+    parser.add_argument('--seed', type=int, default=None, help="random seed")
+    parser.add_argument('--no-cache', action='store_true', help="re-parse everything into an in-memory database")
+    scan.add_jobs_argument(parser)
+    args = parser.parse_args()
+
+    with open_database(use_cache=not args.no_cache, jobs=args.jobs) as db:
+        tables = load_loot_tables(db)
+    if args.tables:
+        unknown = sorted(set(args.tables) - {table.slug for table in tables})
+        if unknown:
+            parser.error(f"unknown loot tables: {', '.join(unknown)}")
+        tables = [table for table in tables if table.slug in args.tables]
+
+    rng = np.random.default_rng(args.seed)
+    start = time.perf_counter()
+    results = []
+    for table in tables:
+        result = simulate(table, args.rolls, rng, args.yield_per_sec)
+        print_result(result)
+        results.append(result)
+    print_tier_summary(results)
+    print(f"\nSimulated {sum(r.rolls for r in results):,} rolls in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
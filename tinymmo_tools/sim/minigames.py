@@ -0,0 +1,346 @@
+"""
+Vectorized Monte Carlo of minigame gold flow: HorseRacingGame and HotPotatoGame.
+
+Horse racing: every betting player stakes gold on one of NUM_HORSES
+horses, choosing by strategy (random, favorite = most backed so far,
+longshot = least backed, same = everyone on horse 0, mixed). Each horse
+gets randf_range(0.8, 1.2) speed and finishes on the first position
+update (every RACE_UPDATE_INTERVAL) where progress * speed >= 1; horses
+finishing on the same update tie and sort_custom keeps them in horse
+order, the rest are ranked by position. int(pot * 0.7) is shared pro
+rata (truncated) by bettors on the winner, int(pot * 0.3) by bettors on
+second place, and a share nobody backed is destroyed. Payouts never
+exceed the pot, so the game can only sink gold.
+
+Hot potato moves no gold: the last player standing receives one random
+entry of the items registry. Passing does not reset the potato timer, so
+every elimination takes exactly POTATO_DURATION whatever the players do.
+Passes are modelled as a per-second tag rate per player (log-normal
+skill) with GRACE_PERIOD blocking the passer, which decides who wins;
+the item it creates is valued at the market sell price.
+
+MinigameManager alternates the two games every INVITATION_INTERVAL, so
+each runs a fixed number of rounds an hour however many players join;
+the hourly figures assume every round is played.
+
+Usage:
+    python -m tinymmo_tools.sim.minigames [--rounds N] [--players 1,2,4,8,12] [--strategies random,mixed]
+        [--bet G] [--tag-rate R] [--seed S] [--no-cache] [-j N]
+"""
+
+import argparse
+import re
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from .. import paths
+from ..content import scan
+from ..content.db import open_database
+from .economy import market_price
+
+
+MINIGAMES_DIR = paths.SOURCE_DIR / "server" / "world" / "components"
+HORSE_RACING_PATH = MINIGAMES_DIR / "minigames" / "horse_racing_game.gd"
+HOT_POTATO_PATH = MINIGAMES_DIR / "minigames" / "hot_potato_game.gd"
+MINIGAME_MANAGER_PATH = MINIGAMES_DIR / "minigame_manager.gd"
+# Literals in HorseRacingGame.start_race() and calculate_winnings().
+SPEED_MIN, SPEED_MAX = 0.8, 1.2
+FIRST_SHARE, SECOND_SHARE = 0.7, 0.3
+STRATEGIES = ('random', 'favorite', 'longshot', 'same')
+MIXED = 'mixed'
+DEFAULT_ROUNDS = 200_000
+# Rounds per batch; bounds memory to a few (rounds, players) arrays.
+BATCH_ROUNDS = 1 << 17
+
+
+def game_constants(path):
+    """Numeric constants of a GDScript file ({name: float})."""
+    source = path.read_text(encoding='utf-8')
+    return {name: float(value) for name, value in
+            re.findall(r'^const (\w+)\s*:\s*\w+\s*=\s*([-\d.]+)', source, re.M)}
+
+
+@dataclass
+class Settings:
+    max_players: int
+    horses: int
+    race_ticks: int
+    potato_duration: float
+    grace_period: float
+    rounds_per_hour: float
+
+    @classmethod
+    def load(cls):
+        horse = game_constants(HORSE_RACING_PATH)
+        potato = game_constants(HOT_POTATO_PATH)
+        manager = game_constants(MINIGAME_MANAGER_PATH)
+        # Two games alternate, one session per invitation.
+        rounds_per_hour = 3600.0 / manager.get('INVITATION_INTERVAL', 900.0) / 2
+        return cls(int(horse.get('MAX_PLAYERS', 12)), int(horse.get('NUM_HORSES', 5)),
+                   round(horse.get('RACE_DURATION', 30.0) / horse.get('RACE_UPDATE_INTERVAL', 0.1)),
+                   potato.get('POTATO_DURATION', 5.0), potato.get('GRACE_PERIOD', 1.0), rounds_per_hour)
+
+
+@dataclass
+class RaceResult:
+    strategy: str
+    players: int
+    rounds: int
+    pot: float
+    net: float
+    net_std: float
+    # Mean gold destroyed per round because nobody backed 1st / 2nd place.
+    unbacked_first: float
+    unbacked_second: float
+    truncated: float
+    tie_rate: float
+    win_share: np.ndarray
+    # Gold returned per gold staked, by strategy ({strategy: ratio}).
+    returns: dict
+
+
+@dataclass
+class PotatoResult:
+    players: int
+    rounds: int
+    seconds: float
+    passes: float
+    # Win rate of the fastest and slowest skill quartile, relative to 1/players.
+    top_quartile: float
+    bottom_quartile: float
+
+
+def race_order(rng, rounds, settings):
+    """(winner, second, tied) horse per round."""
+    speed = rng.uniform(SPEED_MIN, SPEED_MAX, (rounds, settings.horses))
+    ticks = np.ceil(settings.race_ticks / speed)
+    finished = ticks <= settings.race_ticks
+    # Stragglers rank after every finisher, by final position (= speed).
+    key = np.where(finished, ticks, settings.race_ticks + 1 + (SPEED_MAX - speed))
+    order = np.argsort(key, axis=1, kind='stable')
+    first = np.take_along_axis(key, order[:, :2], axis=1)
+    return order[:, 0], order[:, 1], first[:, 0] == first[:, 1]
+
+
+def place_bets(rng, strategies, bets, settings):
+    """Horse of every seat (columns bet in order, seeing the odds so far)."""
+    rounds, players = bets.shape
+    odds = np.zeros((rounds, settings.horses))
+    horses = np.empty((rounds, players), dtype=np.int64)
+    rows = np.arange(rounds)
+    for seat in range(players):
+        # Integer odds + noise in [0, 0.5) breaks ties at random.
+        noisy = odds + rng.random(odds.shape) * 0.5
+        choice = {
+            'random': rng.integers(0, settings.horses, rounds),
+            'favorite': noisy.argmax(axis=1),
+            'longshot': noisy.argmin(axis=1),
+            'same': np.zeros(rounds, dtype=np.int64),
+        }
+        strategy = strategies[:, seat]
+        horse = np.zeros(rounds, dtype=np.int64)
+        for index, name in enumerate(STRATEGIES):
+            horse = np.where(strategy == index, choice[name], horse)
+        horses[:, seat] = horse
+        odds[rows, horse] += bets[:, seat]
+    return horses
+
+
+def simulate_races(rng, strategy, players, rounds, bet, spread, settings):
+    totals = {'pot': 0.0, 'net': 0.0, 'net_sq': 0.0, 'first': 0.0, 'second': 0.0, 'truncated': 0.0, 'ties': 0}
+    staked = np.zeros(len(STRATEGIES))
+    returned = np.zeros(len(STRATEGIES))
+    wins = np.zeros(settings.horses, dtype=np.int64)
+    done = 0
+    while done < rounds:
+        batch = min(BATCH_ROUNDS, rounds - done)
+        done += batch
+        # Log-normal stakes with mean `bet`, at least 1 gold (0 = not betting).
+        bets = np.maximum(np.rint(rng.lognormal(np.log(bet) - spread ** 2 / 2, spread, (batch, players))), 1)
+        if strategy == MIXED:
+            strategies = rng.integers(0, len(STRATEGIES), (batch, players))
+        else:
+            strategies = np.full((batch, players), STRATEGIES.index(strategy))
+        horses = place_bets(rng, strategies, bets, settings)
+        winner, second, tied = race_order(rng, batch, settings)
+
+        pot = bets.sum(axis=1)
+        payout = np.zeros_like(bets)
+        lost = {}
+        for place, share, horse in (('first', FIRST_SHARE, winner), ('second', SECOND_SHARE, second)):
+            backing = horses == horse[:, None]
+            backed = np.where(backing, bets, 0).sum(axis=1)
+            pool = np.floor(pot * share)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                payout += np.where(backing, np.floor(pool[:, None] * (bets / backed[:, None])), 0)
+            lost[place] = np.where(backed > 0, 0, pool)
+
+        net = payout.sum(axis=1) - pot
+        totals['pot'] += pot.sum()
+        totals['net'] += net.sum()
+        totals['net_sq'] += (net ** 2).sum()
+        totals['first'] += lost['first'].sum()
+        totals['second'] += lost['second'].sum()
+        totals['truncated'] += (-net - lost['first'] - lost['second']).sum()
+        totals['ties'] += int(tied.sum())
+        wins += np.bincount(winner, minlength=settings.horses)
+        staked += np.bincount(strategies.ravel(), bets.ravel(), len(STRATEGIES))
+        returned += np.bincount(strategies.ravel(), payout.ravel(), len(STRATEGIES))
+
+    mean = totals['net'] / rounds
+    return RaceResult(
+        strategy, players, rounds, totals['pot'] / rounds, mean,
+        float(np.sqrt(max(totals['net_sq'] / rounds - mean ** 2, 0.0))),
+        totals['first'] / rounds, totals['second'] / rounds, totals['truncated'] / rounds,
+        totals['ties'] / rounds, wins / rounds,
+        {name: returned[i] / staked[i] for i, name in enumerate(STRATEGIES) if staked[i]})
+
+
+def simulate_potato(rng, players, rounds, tag_rate, spread, settings):
+    """Elimination rounds with `players` taggers; one event-driven stage per elimination."""
+    passes = 0
+    top = bottom = 0
+    done = 0
+    while done < rounds:
+        batch = min(BATCH_ROUNDS, rounds - done)
+        done += batch
+        rows = np.arange(batch)
+        rate = rng.lognormal(np.log(tag_rate) - spread ** 2 / 2, spread, (batch, players))
+        alive = np.ones((batch, players), dtype=bool)
+        grace_until = np.full((batch, players), -np.inf)
+        for stage in range(players - 1):
+            end = (stage + 1) * settings.potato_duration
+            # assign_random_potato(): uniform over the remaining players.
+            holder = np.where(alive, rng.random(alive.shape), -1.0).argmax(axis=1)
+            now = np.full(batch, stage * settings.potato_duration)
+            # Rows still before the timer runs out; shrinks as stages end.
+            live = rows
+            while len(live):
+                now[live] += rng.exponential(1.0 / rate[live, holder[live]])
+                eligible = alive[live] & (grace_until[live] <= now[live, None])
+                eligible[np.arange(len(live)), holder[live]] = False
+                # Nobody can be tagged yet: wait for the first grace to run out.
+                blocked = ~eligible.any(axis=1)
+                waiting = np.where(alive[live] & ~eligible, grace_until[live], np.inf)
+                waiting[np.arange(len(live)), holder[live]] = np.inf
+                now[live] = np.where(blocked, np.minimum(waiting.min(axis=1), end), now[live])
+                keep = now[live] < end
+                target = np.where(eligible, rng.random(eligible.shape), -1.0).argmax(axis=1)
+                tag = keep & ~blocked
+                tagged = live[tag]
+                grace_until[tagged, holder[tagged]] = now[tagged] + settings.grace_period
+                holder[tagged] = target[tag]
+                passes += len(tagged)
+                live = live[keep]
+            alive[rows, holder] = False
+        winner = alive.argmax(axis=1)
+        rank = rate.argsort(axis=1).argsort(axis=1)[rows, winner]
+        quartile = max(players // 4, 1)
+        top += int((rank >= players - quartile).sum())
+        bottom += int((rank < quartile).sum())
+    quartile = max(players // 4, 1)
+    fair = quartile / players
+    return PotatoResult(players, rounds, (players - 1) * settings.potato_duration,
+                        passes / max(rounds * (players - 1), 1),
+                        top / rounds / fair, bottom / rounds / fair)
+
+
+def registry_prices(db):
+    """Market price of every entry HotPotatoGame.award_winner() can draw (0 = fails to load)."""
+    tags = {}
+    for row in db.execute("SELECT path, tag FROM item_tags"):
+        tags.setdefault(row['path'], set()).add(row['tag'])
+    prices = {paths.RES_PREFIX + row['path']: market_price(row['can_sell'], row['minimum_price'],
+                                                           tags.get(row['path'], ()))
+              for row in db.execute("SELECT path, can_sell, minimum_price FROM items")}
+    entries = db.execute("""
+        SELECT e.res_path FROM index_entries e JOIN content_indexes c ON c.path = e.path
+        WHERE c.content_name = 'items' AND NOT e.deleted ORDER BY e.id
+    """).fetchall()
+    return np.array([prices.get(row['res_path'], 0) for row in entries], dtype=np.float64)
+
+
+def print_races(results, settings):
+    print(f"🏇 Horse racing ({settings.horses} horses, {settings.rounds_per_hour:g} rounds/hour)")
+    print(f"{'strategy':<9} {'players':>7} {'rounds':>10} {'mean pot':>9} {'net/round':>10} {'std':>9} "
+          f"{'sink %':>7} {'no 1st':>8} {'no 2nd':>8} {'trunc':>6} {'net/hour':>9}")
+    for r in results:
+        print(f"{r.strategy:<9} {r.players:>7} {r.rounds:>10,} {r.pot:>9,.1f} {r.net:>+10,.1f} {r.net_std:>9,.1f} "
+              f"{-r.net / r.pot if r.pot else 0.0:>7.1%} {r.unbacked_first:>8,.1f} {r.unbacked_second:>8,.1f} "
+              f"{r.truncated:>6.2f} {r.net * settings.rounds_per_hour:>+9,.1f}")
+    mixed = [r for r in results if r.strategy == MIXED]
+    if mixed:
+        print("\nGold returned per gold staked in mixed rounds:")
+        for r in mixed:
+            print(f"  {r.players:>2} players: " + ', '.join(f"{name} {ratio:.3f}" for name, ratio in r.returns.items()))
+    rounds = sum(r.rounds for r in results)
+    ties = sum(r.tie_rate * r.rounds for r in results) / rounds
+    share = sum(r.win_share * r.rounds for r in results) / rounds
+    print(f"\nPhoto finishes (1st and 2nd on the same update): {ties:.2%}; "
+          f"win share by horse: " + ', '.join(f"{i}: {s:.2%}" for i, s in enumerate(share)))
+
+
+def print_potato(results, prices, settings):
+    mean, std = prices.mean(), prices.std()
+    print(f"\n🥔 Hot potato ({settings.rounds_per_hour:g} rounds/hour, prize: 1 random item of {len(prices)}, "
+          f"market value mean {mean:,.1f}, median {np.median(prices):,.0f}, std {std:,.1f}, "
+          f"{(prices == 0).mean():.0%} unsellable)")
+    print(f"{'players':>7} {'rounds':>10} {'seconds':>8} {'passes/elim':>11} {'top 25% win':>11} "
+          f"{'bottom 25%':>10} {'item value/hour':>15}")
+    for r in results:
+        print(f"{r.players:>7} {r.rounds:>10,} {r.seconds:>8.0f} {r.passes:>11.2f} {r.top_quartile:>10.2f}x "
+              f"{r.bottom_quartile:>9.2f}x {mean * settings.rounds_per_hour:>+15,.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rounds', type=int, default=DEFAULT_ROUNDS,
+                        help=f"rounds per strategy and player count (default: {DEFAULT_ROUNDS:,})")
+    parser.add_argument('--players', default='1,2,4,8,12', help="participant counts (default: 1,2,4,8,12)")
+    parser.add_argument('--strategies', default=','.join(STRATEGIES + (MIXED,)),
+                        help=f"horse racing strategies (default: {','.join(STRATEGIES + (MIXED,))})")
+    parser.add_argument('--bet', type=float, default=100.0, help="mean stake in gold (default: 100)")
+    parser.add_argument('--bet-spread', type=float, default=1.0,
+                        help="log-normal sigma of stakes and tag rates (default: 1)")
+    parser.add_argument('--tag-rate', type=float, default=0.5,
+                        help="mean hot potato passes per second while holding (default: 0.5)")
+    parser.add_argument('--seed', type=int, default=None, help="random seed")
+    parser.add_argument('--no-cache', action='store_true', help="re-parse everything into an in-memory database")
+    scan.add_jobs_argument(parser)
+    args = parser.parse_args()
+
+    counts = [int(n) for n in args.players.split(',')]
+    strategies = args.strategies.split(',')
+    unknown = sorted(set(strategies) - set(STRATEGIES + (MIXED,)))
+    if unknown:
+        parser.error(f"unknown strategies: {', '.join(unknown)}")
+    settings = Settings.load()
+    with open_database(use_cache=not args.no_cache, jobs=args.jobs) as db:
+        prices = registry_prices(db)
+
+    rng = np.random.default_rng(args.seed)
+    start = time.perf_counter()
+    races = [simulate_races(rng, strategy, players, args.rounds, args.bet, args.bet_spread, settings)
+             for strategy in strategies for players in counts if players <= settings.max_players]
+    potatoes = [simulate_potato(rng, players, args.rounds, args.tag_rate, args.bet_spread, settings)
+                for players in counts if players >= 2]
+    seconds = time.perf_counter() - start
+    print_races(races, settings)
+    print_potato(potatoes, prices, settings)
+
+    worst = min(races, key=lambda r: r.net)
+    gained = max(r.net for r in races)
+    if gained > 0:
+        print(f"\n❌ Horse racing created gold: {gained:+,.1f} per round")
+    else:
+        print(f"\n✅ Horse racing only sinks gold: up to {-worst.net * settings.rounds_per_hour:,.0f} an hour "
+              f"({worst.strategy}, {worst.players} players); it pays out nothing the pot did not collect")
+    print(f"⚠️  Hot potato creates {settings.rounds_per_hour:g} items an hour (~{prices.mean() * settings.rounds_per_hour:,.0f} "
+          f"gold at market price) whatever the turnout; it takes no gold")
+    print(f"\nSimulated {sum(r.rounds for r in races + potatoes):,} rounds in {seconds:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
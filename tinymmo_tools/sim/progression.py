@@ -0,0 +1,311 @@
+"""
+Time-to-level model for each harvesting class.
+
+Combines the experience rules with node yields and recipe availability:
+
+- harvesting gives tier * 5 experience per item (HarvestNode). A node's
+  items per hour at level L come from its base_yield_per_sec, the group
+  multiplier, its loot table's exact items per roll (content/drops.py) and
+  how long energy lasts: regeneration pauses while harvesting, so an hour
+  holds min(3600, (energy_max(L) + 3600 * regen) / (cost + regen)) active
+  seconds;
+- crafting gives required_level * 250 experience per craft
+  (craft.execute). A recipe of the class that the class can reach at L
+  (content/graph.py reachability) becomes an option once all of its raw
+  materials drop from the class's own nodes. Its rate is the experience of
+  the craft plus its intermediate crafts plus the items harvested while
+  gathering the bill, divided by the gathering time and the time needed to
+  regenerate its energy_cost;
+- levels follow player_resource.gd's get_exp_for_level() curve.
+
+Thousands of behaviour profiles are evaluated together as NumPy arrays.
+Each profile sets efficiency (the productive share of play time), group
+size, crafting share and skill (how far up its options, ranked by
+experience per hour, a profile picks). The report gives the mean and
+percentile hours of play to reach each level, per class.
+
+Results are cached in .content_cache/progression.json. Each class is
+keyed by a hash of its option tables, the profile settings and this
+model's source, so after a content edit only the classes it touches are
+re-sampled.
+
+Usage:
+    python -m tinymmo_tools.sim.progression [--profiles N] [--levels 5,10,20,30] [--seed S] [--no-cache]
+"""
+
+import argparse
+import hashlib
+import json
+import time
+from fractions import Fraction
+
+import numpy as np
+
+from ..content import drops, scan
+from ..content.cache import CACHE_DIR, ensure_cache_dir
+from ..content.db import open_database
+from ..content.graph import CLASSES, ContentGraph
+from . import economy, harvest
+from .economy import CRAFT_EXP_PER_LEVEL, MAX_LEVEL, exp_table
+
+
+RESULTS_PATH = CACHE_DIR / "progression.json"
+RESULTS_VERSION = 1
+MAX_CACHED = 32
+GROUP_WEIGHTS = (0.5, 0.2, 0.15, 0.1, 0.05)
+PERCENTILES = (10, 50, 90)
+DEFAULT_LEVELS = '2,5,10,15,20,25,30'
+
+
+def active_seconds(level, energy_cost):
+    """Seconds of an hour a harvester at `level` can keep paying `energy_cost`."""
+    regen = harvest.ENERGY_REGEN_PER_SEC
+    return min(3600.0, (harvest.energy_max(level) + 3600.0 * regen) / (energy_cost + regen))
+
+
+def _craft_exp(graph, slug, memo, in_progress=frozenset()):
+    """Experience from every craft in one unit's bill, following graph.recipe_for()."""
+    if slug in memo:
+        return memo[slug]
+    recipe = graph.recipe_for(slug)
+    if recipe is None or slug in in_progress:
+        return 0.0
+    inner = in_progress | {slug}
+    total = recipe.required_level * CRAFT_EXP_PER_LEVEL + sum(
+        quantity * _craft_exp(graph, input_slug, memo, inner) for input_slug, quantity in recipe.inputs)
+    memo[slug] = total / recipe.output_quantity(slug)
+    return memo[slug]
+
+
+def option_tables(db):
+    """{class: {'harvest': [[...] per group size] per level, 'craft': ...}} of experience per hour.
+
+    Index [group - 1][level - 1] holds every option's rate at that level, sorted.
+    """
+    kinds = harvest.load_node_kinds()
+    harvest.attach_loot(kinds, db)
+    slugs = {row['path']: row['slug'] for row in db.execute("SELECT path, slug FROM loot_tables")}
+    tables = {table.slug: table for table in drops.load_table_drops(db)}
+    graph = ContentGraph.from_database(db)
+    reach = graph.reachability()
+    memo = {}
+
+    result = {}
+    for harvest_class in CLASSES:
+        nodes = [(kind, tables.get(slugs.get(kind.loot_table))) for kind in kinds if kind.harvest_class == harvest_class]
+        recipes = []
+        for recipe in graph.recipes:
+            if recipe.required_class != harvest_class or not recipe.outputs:
+                continue
+            raw, energy = {}, Fraction(recipe.energy_cost)
+            for input_slug, quantity in recipe.inputs:
+                bill = graph.bill(input_slug)
+                for slug, amount in bill.raw.items():
+                    raw[slug] = raw.get(slug, 0) + amount * quantity
+                energy += bill.energy * quantity
+            level = max([recipe.required_level] + [reach.get(slug, {}).get(harvest_class, MAX_LEVEL + 1)
+                                                    for slug, _ in recipe.outputs])
+            exp = recipe.required_level * CRAFT_EXP_PER_LEVEL + sum(
+                quantity * _craft_exp(graph, slug, memo) for slug, quantity in recipe.inputs)
+            recipes.append((level, {slug: float(amount) for slug, amount in raw.items()}, float(energy), exp))
+
+        harvest_rates, craft_rates = [], []
+        for group in range(1, len(GROUP_WEIGHTS) + 1):
+            multiplier = harvest.compute_multiplier(group)
+            by_level_harvest, by_level_craft = [], []
+            for level in range(1, MAX_LEVEL + 1):
+                open_nodes = []
+                for kind, table in nodes:
+                    if kind.required_level > level or table is None:
+                        continue
+                    rolls = kind.base_yield_per_sec * multiplier * active_seconds(level, kind.energy_cost_per_sec)
+                    open_nodes.append((kind, table, rolls))
+                by_level_harvest.append(sorted(rolls * kind.items_per_roll * kind.tier * 5
+                                               for kind, _, rolls in open_nodes))
+                crafts = []
+                for recipe_level, raw, energy, exp in recipes:
+                    if recipe_level > level:
+                        continue
+                    # Each raw material comes from the node that drops it fastest;
+                    # a node gathers all of its materials at once.
+                    node_hours, feasible = {}, True
+                    for slug, amount in raw.items():
+                        best = max(((table.items[slug].mean * rolls, index) for index, (_, table, rolls)
+                                    in enumerate(open_nodes) if slug in table.items), default=(0.0, -1))
+                        if best[0] <= 0:
+                            feasible = False
+                            break
+                        node_hours[best[1]] = max(node_hours.get(best[1], 0.0), amount / best[0])
+                    if not feasible:
+                        continue
+                    gathered = sum(hours * open_nodes[index][2] * open_nodes[index][0].items_per_roll
+                                   * open_nodes[index][0].tier * 5 for index, hours in node_hours.items())
+                    hours = sum(node_hours.values()) + energy / harvest.ENERGY_REGEN_PER_SEC / 3600.0
+                    if hours > 0:
+                        crafts.append((exp + gathered) / hours)
+                by_level_craft.append(sorted(crafts))
+            harvest_rates.append(by_level_harvest)
+            craft_rates.append(by_level_craft)
+        result[harvest_class] = {'harvest': harvest_rates, 'craft': craft_rates}
+    return result
+
+
+def _padded(rates):
+    """(groups, levels, options) array of sorted rates (NaN padding) and the option counts."""
+    width = max((len(options) for by_level in rates for options in by_level), default=0) or 1
+    table = np.full((len(rates), len(rates[0]), width), np.nan)
+    counts = np.zeros(table.shape[:2], dtype=np.intp)
+    for group, by_level in enumerate(rates):
+        for level, options in enumerate(by_level):
+            table[group, level, :len(options)] = options
+            counts[group, level] = len(options)
+    return table, counts
+
+
+def sample_profiles(profiles, seed):
+    rng = np.random.default_rng(seed)
+    return {
+        'efficiency': rng.uniform(0.5, 1.0, profiles),
+        'group': rng.choice(len(GROUP_WEIGHTS), profiles, p=GROUP_WEIGHTS),
+        'craft_share': rng.uniform(0.0, 1.0, profiles),
+        'skill': rng.uniform(0.0, 1.0, profiles),
+    }
+
+
+def _pick(table, counts, group, skill):
+    """Rate of the option at `skill` quantile for each profile and level; NaN when none."""
+    levels = np.arange(table.shape[1])
+    count = counts[group[:, None], levels[None, :]]
+    index = np.rint(skill[:, None] * np.maximum(count - 1, 0)).astype(np.intp)
+    picked = table[group[:, None], levels[None, :], index]
+    return np.where(count > 0, picked, np.nan)
+
+
+def hours_to_level(options, profiles):
+    """(profiles, MAX_LEVEL) cumulative hours to reach each level (column 0 = level 1)."""
+    harvest_table, harvest_counts = _padded(options['harvest'])
+    craft_table, craft_counts = _padded(options['craft'])
+    harvest_rate = _pick(harvest_table, harvest_counts, profiles['group'], profiles['skill'])
+    craft_rate = _pick(craft_table, craft_counts, profiles['group'], profiles['skill'])
+    craft_rate = np.where(np.isnan(craft_rate), harvest_rate, craft_rate)
+    share = profiles['craft_share'][:, None]
+    rate = profiles['efficiency'][:, None] * ((1.0 - share) * harvest_rate + share * craft_rate)
+    needed = exp_table()[1:MAX_LEVEL].astype(np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        per_level = np.where(rate[:, :MAX_LEVEL - 1] > 0, needed / rate[:, :MAX_LEVEL - 1], np.inf)
+    per_level = np.where(np.isnan(per_level), np.inf, per_level)
+    return np.concatenate([np.zeros((len(per_level), 1)), np.cumsum(per_level, axis=1)], axis=1)
+
+
+def best_case(options):
+    """Hours to each level for one efficient solo player taking the best option."""
+    rates = np.array([max(harvest_options[-1:] + craft_options[-1:], default=0.0) for harvest_options, craft_options
+                      in zip(options['harvest'][0], options['craft'][0])])
+    needed = exp_table()[1:MAX_LEVEL].astype(np.float64)
+    with np.errstate(divide='ignore'):
+        per_level = np.where(rates[:MAX_LEVEL - 1] > 0, needed / np.maximum(rates[:MAX_LEVEL - 1], 1e-12), np.inf)
+    return np.concatenate([[0.0], np.cumsum(per_level)])
+
+
+def summarize(options, profiles):
+    hours = hours_to_level(options, profiles)
+    finite = np.where(np.isfinite(hours), hours, np.nan)
+    return {
+        'mean': np.nanmean(finite, axis=0).tolist(),
+        'percentiles': {str(p): np.nanpercentile(finite, p, axis=0).tolist() for p in PERCENTILES},
+        'stuck': (~np.isfinite(hours)).mean(axis=0).tolist(),
+        'best': best_case(options).tolist(),
+    }
+
+
+def _fingerprint():
+    """Hash of the code and curves results depend on, beyond the content options."""
+    digest = hashlib.sha256()
+    for module_file in (__file__, harvest.__file__, economy.__file__):
+        with open(module_file, 'rb') as f:
+            digest.update(f.read())
+    digest.update(json.dumps([exp_table().tolist(), CRAFT_EXP_PER_LEVEL, MAX_LEVEL]).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def class_key(harvest_class, options, settings, fingerprint):
+    text = json.dumps([RESULTS_VERSION, fingerprint, harvest_class, settings, options], sort_keys=True,
+                      default=lambda value: round(value, 9))
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def load_results(path=RESULTS_PATH):
+    try:
+        results = json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+    return results.get('entries', {}) if results.get('version') == RESULTS_VERSION else {}
+
+
+def save_results(entries, path=RESULTS_PATH):
+    ensure_cache_dir(path.parent)
+    # Newest last; keep the most recent MAX_CACHED.
+    kept = dict(list(entries.items())[-MAX_CACHED:])
+    tmp = path.with_suffix('.json.tmp')
+    tmp.write_text(json.dumps({'version': RESULTS_VERSION, 'entries': kept}), encoding='utf-8')
+    tmp.replace(path)
+
+
+def _hours(value):
+    if value != value or value == float('inf'):
+        return '-'
+    return f"{value:,.1f}" if value < 1000 else f"{value:,.0f}"
+
+
+def print_class(harvest_class, summary, levels):
+    print(f"\n{harvest_class}: hours of play to reach each level")
+    header = ''.join(f"{'p' + str(p):>9}" for p in PERCENTILES)
+    print(f"  {'level':<6} {'mean':>9}{header} {'best':>9} {'stuck':>6}")
+    for level in levels:
+        column = level - 1
+        cells = ''.join(f"{_hours(summary['percentiles'][str(p)][column]):>9}" for p in PERCENTILES)
+        stuck = summary['stuck'][column]
+        print(f"  L{level:<5} {_hours(summary['mean'][column]):>9}{cells} {_hours(summary['best'][column]):>9} "
+              f"{stuck:>6.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--profiles', type=int, default=10000, help="behaviour profiles per class (default: 10000)")
+    parser.add_argument('--levels', default=DEFAULT_LEVELS, help=f"levels to report (default: {DEFAULT_LEVELS})")
+    parser.add_argument('--seed', type=int, default=1, help="random seed for the profiles (default: 1)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="re-parse everything into an in-memory database and ignore cached results")
+    scan.add_jobs_argument(parser)
+    args = parser.parse_args()
+    levels = [int(level) for level in args.levels.split(',')]
+    if any(not 1 <= level <= MAX_LEVEL for level in levels):
+        parser.error(f"levels must be between 1 and {MAX_LEVEL}")
+
+    start = time.perf_counter()
+    with open_database(use_cache=not args.no_cache, jobs=args.jobs) as db:
+        options = option_tables(db)
+    settings = {'profiles': args.profiles, 'seed': args.seed, 'groups': GROUP_WEIGHTS}
+    fingerprint = _fingerprint()
+    entries = {} if args.no_cache else load_results()
+    profiles = None
+    reused = []
+    for harvest_class in CLASSES:
+        key = class_key(harvest_class, options[harvest_class], settings, fingerprint)
+        summary = entries.pop(key, None)
+        if summary is None:
+            profiles = sample_profiles(args.profiles, args.seed) if profiles is None else profiles
+            summary = summarize(options[harvest_class], profiles)
+        else:
+            reused.append(harvest_class)
+        # Re-inserted so it counts as recently used.
+        entries[key] = summary
+        print_class(harvest_class, summary, levels)
+    if not args.no_cache:
+        save_results(entries)
+    note = f", cached: {', '.join(reused)}" if reused else ""
+    print(f"\n{args.profiles:,} profiles per class in {time.perf_counter() - start:.2f}s{note}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,3 @@
+"""
+Offline tools for the world save databases (WorldPlayerData `.tres` files).
+"""
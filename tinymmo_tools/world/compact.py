@@ -0,0 +1,324 @@
+"""
+Offline compactor and integrity checker for world databases.
+
+Streams a WorldPlayerData save twice. The first pass collects player ids,
+guilds and the main [resource]. The second pass writes a repaired copy.
+Repairs and removals:
+
+- bans and mutes whose `until` has passed are dropped, as is_banned() and
+  is_muted() would drop them the next time they are checked;
+- account character lists lose ids with no PlayerResource, empty
+  accounts are removed, and characters missing from their own account's
+  list (by `account_name`) are put back;
+- guild members with no PlayerResource are removed;
+- players whose `guild` is not in the `guilds` map have it cleared, and
+  Guild sub-resources nothing references any more are dropped;
+- `next_player_id` is raised to the highest player id if it fell behind;
+- properties equal to their script default are dropped (ResourceSaver
+  leaves them out too, so the file reads back the same).
+
+Leaderless guilds, orphan characters and dangling admin/role ids are
+reported, not changed. The output goes to a temporary file that is
+fsynced and renamed over the target, so the target is either the old
+file or the complete new one.
+
+Usage:
+    python -m tinymmo_tools.world.compact WORLD.tres [-o OUT.tres] [--check] [--now UNIX_TIME] [--keep-defaults]
+"""
+
+import argparse
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+
+from ..content import tres
+from . import reader
+
+
+# Script defaults of the properties ResourceSaver omits when unchanged.
+PLAYER_DEFAULTS = {
+    'account_name': "", 'display_name': "Player", 'character_class': "miner", 'golds': 0, 'inventory': {},
+    'attributes': {}, 'available_attributes_points': 0, 'level': 1, 'experience': 0, 'server_roles': {},
+    'quest_stats': {},
+}
+GUILD_DEFAULTS = {'guild_name': "", 'leader_id': 0, 'members': {}}
+
+
+@dataclass
+class Scan:
+    """What the first pass learns about a world database."""
+    # player id -> (resource id, account name, guild resource id or None)
+    players: dict = field(default_factory=dict)
+    guilds: dict = field(default_factory=dict)     # resource id -> GuildRecord
+    world: reader.WorldRecord = None
+    player_script: str = None
+    guild_script: str = None
+
+
+@dataclass
+class Plan:
+    """Every change the second pass makes, and what is only reported."""
+    now: int
+    expired_bans: list = field(default_factory=list)
+    expired_mutes: list = field(default_factory=list)
+    dangling_account_ids: list = field(default_factory=list)   # (account, player id)
+    empty_accounts: list = field(default_factory=list)
+    restored_account_ids: list = field(default_factory=list)   # (account, player id)
+    dangling_members: list = field(default_factory=list)       # (guild, player id)
+    cleared_guild_refs: list = field(default_factory=list)     # (player id, guild resource id)
+    dropped_guilds: list = field(default_factory=list)         # guild resource ids
+    next_player_id: tuple = None                               # (old, new)
+    # Reported only.
+    orphan_players: list = field(default_factory=list)
+    leaderless_guilds: list = field(default_factory=list)
+    dangling_admin_ids: list = field(default_factory=list)
+    dangling_role_ids: list = field(default_factory=list)
+    defaults_dropped: int = 0
+
+    @property
+    def repairs(self):
+        return (len(self.expired_bans) + len(self.expired_mutes) + len(self.dangling_account_ids)
+                + len(self.empty_accounts) + len(self.restored_account_ids) + len(self.dangling_members)
+                + len(self.cleared_guild_refs) + len(self.dropped_guilds) + (self.next_player_id is not None))
+
+
+def scan(path):
+    result = Scan()
+    scripts = {}
+    for section in reader.iter_sections(path):
+        if section.tag == 'ext_resource':
+            name = os.path.basename(section.attrs.get('path', ''))
+            scripts[section.id] = name
+            if name == reader.PLAYER_SCRIPT:
+                result.player_script = section.id
+            elif name == reader.GUILD_SCRIPT:
+                result.guild_script = section.id
+        elif section.tag == 'sub_resource':
+            script = section.properties.get('script')
+            kind = scripts.get(script.id) if isinstance(script, tres.ExtResourceRef) else None
+            if kind == reader.PLAYER_SCRIPT:
+                player = reader.player_from_section(section)
+                result.players[player.player_id] = (section.id, player.account_name, player.guild)
+            elif kind == reader.GUILD_SCRIPT:
+                result.guilds[section.id] = reader.guild_from_section(section)
+        elif section.tag == 'resource':
+            result.world = reader.world_from_section(section)
+    if result.world is None:
+        raise reader.WorldFormatError(f"{path}: no [resource] section")
+    return result
+
+
+def _expired(entry, now):
+    until = int(entry.get('until', 0)) if isinstance(entry, dict) else 0
+    return until != 0 and until <= now
+
+
+def plan(found, now):
+    world = found.world
+    result = Plan(now)
+    result.expired_bans = [name for name, entry in world.banned_players.items() if _expired(entry, now)]
+    result.expired_mutes = [name for name, entry in world.muted_players.items() if _expired(entry, now)]
+
+    listed = set()
+    for account, ids in world.accounts.items():
+        for pid in ids:
+            if pid in found.players:
+                listed.add(pid)
+            else:
+                result.dangling_account_ids.append((account, pid))
+    for pid, (_, account, _) in sorted(found.players.items()):
+        if pid in listed:
+            continue
+        if account in world.accounts:
+            result.restored_account_ids.append((account, pid))
+        else:
+            result.orphan_players.append(pid)
+    dangling = {}
+    for account, pid in result.dangling_account_ids:
+        dangling.setdefault(account, set()).add(pid)
+    restored = {account for account, _ in result.restored_account_ids}
+    result.empty_accounts = [account for account, ids in world.accounts.items()
+                             if account not in restored and not set(ids) - dangling.get(account, set())]
+
+    mapped = {resource_id for resource_id in world.guilds.values() if resource_id}
+    result.cleared_guild_refs = [(pid, guild) for pid, (_, _, guild) in sorted(found.players.items())
+                                 if guild is not None and guild not in mapped]
+    referenced = mapped | {guild for _, (_, _, guild) in found.players.items() if guild in mapped}
+    result.dropped_guilds = [resource_id for resource_id in found.guilds if resource_id not in referenced]
+    for resource_id, guild in found.guilds.items():
+        if resource_id not in referenced:
+            continue
+        result.dangling_members += [(guild.guild_name, pid) for pid in guild.members if pid not in found.players]
+        if guild.leader_id not in found.players:
+            result.leaderless_guilds.append(guild.guild_name)
+
+    highest = max(found.players, default=0)
+    if world.next_player_id < highest:
+        result.next_player_id = (world.next_player_id, highest)
+    result.dangling_admin_ids = [pid for pid in world.admin_ids if pid not in found.players]
+    result.dangling_role_ids = [pid for pid in world.user_roles if pid not in found.players]
+    return result
+
+
+def _same_type(original, items):
+    """A container like `original` (keeping Godot's typed/packed type) holding `items`."""
+    if isinstance(original, tres.TypedDictionary):
+        return tres.TypedDictionary(original.key_type, original.value_type, items)
+    if isinstance(original, tres.PackedArray):
+        return tres.PackedArray(original.type, items)
+    if isinstance(original, tres.TypedArray):
+        return tres.TypedArray(original.type, items)
+    return type(original)(items)
+
+
+def _drop_defaults(properties, defaults, result):
+    for name, default in defaults.items():
+        value = properties.get(name)
+        if isinstance(value, type(default)) and value == default:
+            del properties[name]
+            result.defaults_dropped += 1
+
+
+def _rewrite_world(section, found, result):
+    props = section.properties
+    if 'accounts' in props:
+        dangling = set(result.dangling_account_ids)
+        restored = {}
+        for account, pid in result.restored_account_ids:
+            restored.setdefault(account, []).append(pid)
+        empty = set(result.empty_accounts)
+        accounts = props['accounts']
+        items = []
+        for account, ids in accounts.items():
+            if account in empty:
+                continue
+            kept = [pid for pid in ids if (account, pid) not in dangling] + restored.get(account, [])
+            items.append((account, _same_type(ids, kept)))
+        props['accounts'] = _same_type(accounts, items)
+    for key, expired in (('banned_players', result.expired_bans), ('muted_players', result.expired_mutes)):
+        if expired and key in props:
+            gone = set(expired)
+            props[key] = _same_type(props[key], [(k, v) for k, v in props[key].items() if k not in gone])
+    if result.next_player_id is not None:
+        props['next_player_id'] = result.next_player_id[1]
+
+
+def write(path, out_path, found, result, keep_defaults=False):
+    """Second pass: write the repaired database to `out_path` atomically."""
+    cleared = {pid for pid, _ in result.cleared_guild_refs}
+    dropped = set(result.dropped_guilds)
+    dangling_members = {}
+    for name, pid in result.dangling_members:
+        dangling_members.setdefault(name, set()).add(pid)
+    tmp_path = out_path + '.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8', newline='\n') as out:
+            previous = None
+            for section in reader.iter_sections(path):
+                if section.tag == 'gd_resource' and 'load_steps' in section.attrs:
+                    section.attrs['load_steps'] = int(section.attrs['load_steps']) - len(dropped)
+                elif section.tag == 'sub_resource':
+                    if section.id in dropped:
+                        continue
+                    script = section.properties.get('script')
+                    script_id = script.id if isinstance(script, tres.ExtResourceRef) else None
+                    props = section.properties
+                    if script_id == found.player_script:
+                        if int(props.get('player_id', 0)) in cleared:
+                            props.pop('guild', None)
+                        if not keep_defaults:
+                            _drop_defaults(props, PLAYER_DEFAULTS, result)
+                    elif script_id == found.guild_script:
+                        gone = dangling_members.get(str(props.get('guild_name', "")), set())
+                        if gone and 'members' in props:
+                            props['members'] = _same_type(props['members'], [
+                                (k, v) for k, v in props['members'].items() if int(k) not in gone])
+                        if not keep_defaults:
+                            _drop_defaults(props, GUILD_DEFAULTS, result)
+                elif section.tag == 'resource':
+                    _rewrite_world(section, found, result)
+                # Godot groups the ext_resource lines; every other section follows a blank line.
+                if previous is not None and not (previous == section.tag == 'ext_resource'):
+                    out.write('\n')
+                out.write(tres.format_section(section))
+                previous = section.tag
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp_path, out_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def print_plan(result, found):
+    def listing(title, items, icon='🧹'):
+        if not items:
+            return
+        shown = ', '.join(str(item) for item in items[:8]) + (f" (+{len(items) - 8} more)" if len(items) > 8 else "")
+        print(f"  {icon} {title}: {len(items)} — {shown}")
+
+    print(f"{len(found.players):,} characters, {len(found.world.accounts):,} accounts, {len(found.guilds):,} guilds "
+          f"(checked at {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(result.now))})")
+    listing("expired bans", result.expired_bans)
+    listing("expired mutes", result.expired_mutes)
+    listing("account ids without a character", [f"{a}:{p}" for a, p in result.dangling_account_ids])
+    listing("empty accounts", result.empty_accounts)
+    listing("characters put back on their account", [f"{a}:{p}" for a, p in result.restored_account_ids], '🔧')
+    listing("guild members without a character", [f"{g}:{p}" for g, p in result.dangling_members])
+    listing("guild references cleared (guild not in `guilds`)", [f"{p}→{g}" for p, g in result.cleared_guild_refs], '🔧')
+    listing("unreferenced guild resources", result.dropped_guilds)
+    if result.next_player_id:
+        print(f"  🔧 next_player_id raised from {result.next_player_id[0]} to {result.next_player_id[1]}")
+    listing("characters with no account (kept)", result.orphan_players, '⚠️ ')
+    listing("guilds whose leader has no character (kept)", result.leaderless_guilds, '⚠️ ')
+    listing("admin_ids without a character (kept)", result.dangling_admin_ids, '⚠️ ')
+    listing("user_roles without a character (kept)", result.dangling_role_ids, '⚠️ ')
+    if not result.repairs:
+        print("  ✅ No repairs needed")
+
+
+def _load_seconds(path):
+    start = time.perf_counter()
+    for _ in reader.iter_records(path):
+        pass
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact and repair a world database into a new file.")
+    parser.add_argument('path', help="world .tres file")
+    parser.add_argument('-o', '--output', help="output file (default: <name>.compact.tres next to the input)")
+    parser.add_argument('--check', action='store_true', help="only report; exit 1 if any repair is needed")
+    parser.add_argument('--now', type=int, default=None, help="Unix time bans and mutes expire against (default: now)")
+    parser.add_argument('--keep-defaults', action='store_true', help="keep properties equal to their default")
+    args = parser.parse_args()
+
+    try:
+        found = scan(args.path)
+    except (reader.WorldFormatError, tres.TresSyntaxError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(2)
+    result = plan(found, int(time.time()) if args.now is None else args.now)
+    print_plan(result, found)
+    if args.check:
+        sys.exit(1 if result.repairs else 0)
+
+    out_path = args.output or os.path.splitext(args.path)[0] + '.compact.tres'
+    if os.path.abspath(out_path) == os.path.abspath(args.path):
+        print("❌ Refusing to overwrite the input; write a new file and swap it in while the server is down",
+              file=sys.stderr)
+        sys.exit(2)
+    write(args.path, out_path, found, result, args.keep_defaults)
+
+    before, after = os.path.getsize(args.path), os.path.getsize(out_path)
+    load_before, load_after = _load_seconds(args.path), _load_seconds(out_path)
+    print(f"\nWrote {out_path}")
+    print(f"  size: {before:,} → {after:,} bytes ({(after / before - 1) * 100:+.1f}%), "
+          f"{result.defaults_dropped:,} default-valued properties dropped")
+    print(f"  load: {load_before * 1000:.0f} → {load_after * 1000:.0f} ms ({(load_after / load_before - 1) * 100:+.1f}%)")
+
+
+if __name__ == '__main__':
+    main()
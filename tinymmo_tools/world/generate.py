@@ -0,0 +1,252 @@
+"""
+Synthetic world databases for save/load scaling benchmarks.
+
+Writes WorldPlayerData text resources of any size, laid out the way
+ResourceSaver writes them (through journal.to_tres()). The contents:
+
+- accounts with 1..max_character_per_account characters each;
+- levels skewed towards the low end, with experience inside the level
+  and gold that grows with level;
+- inventories drawn from the live ids in items_index.tres, favouring a
+  few common items, with stacks capped by each item's stack_limit;
+- guilds with a leader and members, and ban/mute lists that mix
+  permanent, expired and running entries.
+
+`bench` generates one world per scale and appends a CSV row per scale:
+file size, write time (the cost of the full ResourceSaver-style save)
+and parse time through world/reader.py (a stand-in for the load), plus
+the same two numbers for a journal.py snapshot. Run it on every change
+to the save path and chart the CSV over time.
+
+Usage:
+    python -m tinymmo_tools.world.generate write OUT.tres [--accounts N] [--characters MEAN] [--inventory MEAN]
+                                                   [--guilds N] [--bans N] [--mutes N] [--seed S]
+    python -m tinymmo_tools.world.generate bench [--scales 1000,10000,50000] [--csv FILE] [--label TEXT]
+"""
+
+import argparse
+import csv
+import math
+import os
+import random
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from .. import paths
+from ..content import records
+from ..content.graph import CLASSES
+from . import journal, reader
+
+
+MAX_LEVEL = 30
+# player_resource.gd's get_exp_for_level() curve.
+XP_AT_L1 = 1000
+XP_AT_LMAX = 500000
+POWER_P = 2.2
+ADVENTURER_TYPES = ('Knight', 'Archer', 'Mage', 'Alchemist', 'Merchant', 'Lord', 'Blacksmith', 'Builder', 'Chef',
+                    'Priest', 'Farmer', 'Jeweler')
+GUILD_RANKS = ('Officer', 'Member', 'Member', 'Member', 'Recruit')
+SYLLABLES = ('ka', 'lo', 'mi', 'ra', 'to', 'ven', 'dor', 'sil', 'an', 'el', 'rin', 'zu', 'bel', 'tha', 'gor', 'ny')
+DEFAULT_SCALES = '1000,10000,50000'
+BENCH_FIELDS = ('date', 'label', 'accounts', 'characters', 'guilds', 'inventory_slots', 'tres_bytes',
+                'tres_write_s', 'tres_parse_s', 'snapshot_bytes', 'snapshot_write_s', 'snapshot_read_s')
+
+
+def exp_for_level(level):
+    if level <= 1:
+        return 0
+    t1 = (1 / MAX_LEVEL) ** POWER_P
+    alpha = (XP_AT_LMAX - XP_AT_L1) / (1 - t1)
+    beta = XP_AT_L1 - alpha * t1
+    return int(max(1.0, round(alpha * (level / MAX_LEVEL) ** POWER_P + beta)))
+
+
+def item_stack_limits(index_path=paths.INDEXES_DIR / 'items_index.tres'):
+    """item id -> stack_limit (0 = unlimited) for every live entry of the items index."""
+    limits = {}
+    for entry in records.load_content_index(index_path).entries:
+        if entry.deleted:
+            continue
+        item_path = paths.from_res_path(entry.path)
+        limits[entry.id] = records.load_item(item_path).stack_limit if item_path.exists() else 0
+    return limits
+
+
+def _binomial(rng, trials, p):
+    return sum(rng.random() < p for _ in range(trials))
+
+
+def _poisson(rng, mean):
+    # Knuth's method; the means here are small.
+    threshold, count, product = math.exp(-mean), 0, rng.random()
+    while product > threshold:
+        count += 1
+        product *= rng.random()
+    return count
+
+
+def _name(rng):
+    return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+
+
+def generate(accounts=1000, characters=1.6, inventory=12.0, guilds=None, bans=None, mutes=None,
+             max_characters=3, limits=None, seed=1, now=None):
+    """A WorldState with `accounts` accounts and about `characters` characters each."""
+    rng = random.Random(seed)
+    now = int(time.time()) if now is None else now
+    limits = item_stack_limits() if limits is None else limits
+    item_ids = sorted(limits)
+    # Zipf-like popularity, so a few items are everywhere and most are rare.
+    popularity = [1 / (rank + 1) for rank in range(len(item_ids))]
+    rng.shuffle(item_ids)
+    state = journal.WorldState(scripts={
+        '1_player': journal.PLAYER_SCRIPT_PATH, '2_guild': journal.GUILD_SCRIPT_PATH,
+        '3_world': journal.WORLD_SCRIPT_PATH})
+    world = state.world
+    world.max_character_per_account = max_characters
+    p_extra = min(max(characters - 1, 0) / max(max_characters - 1, 1), 1.0)
+
+    player_id = 0
+    for account in range(accounts):
+        handle = f"user{account:06d}"
+        ids = world.accounts[handle] = []
+        for _ in range(1 + _binomial(rng, max_characters - 1, p_extra)):
+            player_id += 1
+            level = min(MAX_LEVEL, int(rng.paretovariate(1.2)))
+            player = reader.PlayerRecord(
+                f"Resource_p{player_id}", player_id=player_id, account_name=handle, display_name=_name(rng),
+                character_class=rng.choice(CLASSES), level=level,
+                experience=rng.randrange(exp_for_level(level + 1)) if level < MAX_LEVEL else 0,
+                golds=int(rng.lognormvariate(math.log(100 * level), 1.0)),
+                available_attributes_points=rng.randint(0, 10 + 3 * (level - 1)))
+            if item_ids:
+                for item_id in rng.choices(item_ids, popularity, k=_poisson(rng, inventory)):
+                    limit = limits[item_id]
+                    stack = 1 if limit == 1 else min(int(rng.expovariate(1 / 15)) + 1, limit or 999)
+                    player.inventory[item_id] = min(player.inventory.get(item_id, 0) + stack, limit or 999)
+            if rng.random() < 0.3:
+                completed = {rng.choice(ADVENTURER_TYPES): rng.randint(1, 5) for _ in range(rng.randint(1, 3))}
+                player.quest_stats = {"by_adventurer": completed, "total_completed": sum(completed.values())}
+            state.players[player_id] = player
+            world.players[player_id] = player.resource_id
+            ids.append(player_id)
+    world.next_player_id = player_id
+    world.admin_ids = list(range(1, min(player_id, 2) + 1))
+    for admin in world.admin_ids:
+        state.players[admin].server_roles = {"senior_admin": {}}
+
+    guilds = max(accounts // 50, 1) if guilds is None else guilds
+    free = list(state.players)
+    rng.shuffle(free)
+    for number in range(guilds):
+        if not free:
+            break
+        guild = reader.GuildRecord(f"Resource_g{number + 1}", guild_name=f"{_name(rng)} {number + 1}")
+        members = [free.pop() for _ in range(min(1 + int(rng.expovariate(1 / 8)), len(free)))]
+        guild.leader_id = members[0]
+        guild.members = {member: ("Leader" if i == 0 else rng.choice(GUILD_RANKS)) for i, member in enumerate(members)}
+        for member in members:
+            state.players[member].guild = guild.resource_id
+        state.guilds[guild.resource_id] = guild
+        world.guilds[guild.guild_name] = guild.resource_id
+
+    handles = list(world.accounts)
+    for count, target, by in ((accounts // 200 if bans is None else bans, world.banned_players, "banned_by"),
+                              (accounts // 200 if mutes is None else mutes, world.muted_players, "muted_by")):
+        for handle in rng.sample(handles, min(count, len(handles))):
+            # A third permanent, a third already expired, a third still running.
+            until = rng.choice((0, now - rng.randint(60, 90 * 86400), now + rng.randint(60, 30 * 86400)))
+            target[handle] = {by: "admin", "reason": "Synthetic", "until": until}
+    return state
+
+
+def _timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def _parse(path):
+    for _ in reader.iter_records(path):
+        pass
+
+
+def _label():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def bench(scales, csv_path=None, label=None, seed=1, **options):
+    limits = item_stack_limits()
+    label = _label() if label is None else label
+    rows = []
+    print(f"{'Accounts':>9} {'Chars':>8} {'Slots':>9} {'.tres':>9} {'Write':>8} {'Parse':>8} "
+          f"{'Snapshot':>9} {'Write':>8} {'Read':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        tres_path, snap_path = os.path.join(directory, 'world.tres'), os.path.join(directory, 'world.snap')
+        for accounts in scales:
+            state = generate(accounts, limits=limits, seed=seed, **options)
+            tres_bytes, tres_write = _timed(journal.to_tres, state, tres_path)
+            _, tres_parse = _timed(_parse, tres_path)
+            snap_bytes, snap_write = _timed(journal.write_snapshot, state, snap_path)
+            _, snap_read = _timed(journal.read_snapshot, snap_path)
+            slots = sum(len(player.inventory) for player in state.players.values())
+            rows.append(dict(zip(BENCH_FIELDS, (
+                datetime.now(timezone.utc).isoformat(timespec='seconds'), label, accounts, len(state.players),
+                len(state.guilds), slots, tres_bytes, f"{tres_write:.4f}", f"{tres_parse:.4f}",
+                snap_bytes, f"{snap_write:.4f}", f"{snap_read:.4f}"))))
+            print(f"{accounts:>9,} {len(state.players):>8,} {slots:>9,} {tres_bytes / 1e6:>7.1f}MB "
+                  f"{tres_write:>7.2f}s {tres_parse:>7.2f}s {snap_bytes / 1e6:>7.1f}MB {snap_write:>7.2f}s "
+                  f"{snap_read:>7.2f}s", flush=True)
+    if csv_path:
+        new = not os.path.exists(csv_path) or os.path.getsize(csv_path) == 0
+        with open(csv_path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, BENCH_FIELDS)
+            if new:
+                writer.writeheader()
+            writer.writerows(rows)
+        print(f"\n📈 Appended {len(rows)} rows to {csv_path}")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic world databases and benchmark their save/load cost.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    write = commands.add_parser('write', help="write one synthetic world .tres")
+    write.add_argument('output')
+    bench_parser = commands.add_parser('bench', help="generate, save and parse worlds at several scales")
+    bench_parser.add_argument('--scales', default=DEFAULT_SCALES, help=f"account counts (default: {DEFAULT_SCALES})")
+    bench_parser.add_argument('--csv', help="append one row per scale to this CSV file")
+    bench_parser.add_argument('--label', default=None, help="label for the CSV rows (default: git short hash)")
+    write.add_argument('--accounts', type=int, default=1000, help="accounts (default: 1000)")
+    for command in (write, bench_parser):
+        command.add_argument('--characters', type=float, default=1.6,
+                             help="mean characters per account (default: 1.6)")
+        command.add_argument('--max-characters', type=int, default=3,
+                             help="max_character_per_account (default: 3)")
+        command.add_argument('--inventory', type=float, default=12.0, help="mean inventory slots (default: 12)")
+        command.add_argument('--guilds', type=int, default=None, help="guilds (default: accounts / 50)")
+        command.add_argument('--bans', type=int, default=None, help="banned accounts (default: accounts / 200)")
+        command.add_argument('--mutes', type=int, default=None, help="muted accounts (default: accounts / 200)")
+        command.add_argument('--seed', type=int, default=1, help="random seed (default: 1)")
+    args = parser.parse_args()
+
+    options = dict(characters=args.characters, inventory=args.inventory, guilds=args.guilds, bans=args.bans,
+                   mutes=args.mutes, max_characters=args.max_characters)
+    if args.command == 'write':
+        start = time.perf_counter()
+        state = generate(args.accounts, seed=args.seed, **options)
+        size = journal.to_tres(state, args.output)
+        print(f"✅ {args.output}: {len(state.world.accounts):,} accounts, {len(state.players):,} characters, "
+              f"{len(state.guilds):,} guilds, {size / 1e6:.1f} MB in {time.perf_counter() - start:.1f} s")
+    else:
+        bench([int(n) for n in args.scales.split(',')], args.csv, args.label, args.seed, **options)
+
+
+if __name__ == '__main__':
+    main()
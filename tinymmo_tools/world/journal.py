@@ -0,0 +1,637 @@
+"""
+Snapshot + append-only journal save format for world data (prototype).
+
+save_world_database() re-serializes every player on each save, so its
+cost grows with the world. Here a save appends only what changed since
+the last one and syncs once. Every so often compaction folds the journal
+into a new snapshot.
+
+    STORE.snap    = b'TMMOSNP1', record*   WORLD, GUILD*, PLAYER*, END
+    STORE.journal = b'TMMOJRN1', record*   one change per record
+    record        = u32 payload length, u32 crc32, u64 seq, u8 kind, payload
+
+The crc32 covers seq, kind and payload. Snapshot payloads are Godot
+Variants (var_to_bytes / net/variant.py). The WORLD record is a
+Dictionary that also lists the guild and player field names once; each
+GUILD and PLAYER record is an Array of values in that order. Every
+snapshot record carries the last journal seq the snapshot includes. Journal payloads are fixed structs for gold, inventory stacks
+and level/experience, and Variants for whole new characters and
+world-level fields.
+
+Recovery reads the journal up to its first torn or corrupt record and
+cuts it there. Replay skips records the snapshot already holds, so a
+crash between writing a snapshot and emptying the journal is harmless.
+Snapshots and .tres exports are written to a temporary file, fsynced and
+renamed into place.
+
+The .tres converter keeps everything world/reader.py reads. Godot adds
+metadata/_custom_type_script lines that are not written back; Godot does
+not need them to load the resource.
+
+Usage:
+    python -m tinymmo_tools.world.journal convert WORLD.tres STORE
+    python -m tinymmo_tools.world.journal export STORE OUT.tres
+    python -m tinymmo_tools.world.journal compact STORE
+    python -m tinymmo_tools.world.journal recover STORE
+    python -m tinymmo_tools.world.journal bench [WORLD.tres] [--copies 1,20] [--changes 100,1000,10000] [--seed S]
+"""
+
+import argparse
+import os
+import random
+import stat
+import struct
+import sys
+import tempfile
+import time
+import zlib
+from dataclasses import dataclass, field, fields, replace
+
+from ..content import tres
+from ..net import variant
+from . import reader
+
+
+SNAPSHOT_MAGIC = b'TMMOSNP1'
+JOURNAL_MAGIC = b'TMMOJRN1'
+RECORD = struct.Struct('<IIQB')
+STAMP = struct.Struct('<QB')
+
+# Snapshot record kinds.
+SNAP_WORLD = 1
+SNAP_GUILD = 2
+SNAP_PLAYER = 3
+SNAP_END = 4
+
+# Journal record kinds.
+OP_GOLDS = 1       # player id, golds
+OP_STACK = 2       # player id, item id, stack (0 removes the item)
+OP_LEVEL = 3       # player id, level, experience
+OP_PLAYER = 4      # player id, Variant of the whole PlayerRecord (new or replaced)
+OP_WORLD = 5       # Variant [field name, value] of a WorldRecord field
+GOLDS = struct.Struct('<Iq')
+STACK = struct.Struct('<Iiq')
+LEVEL = struct.Struct('<Iiq')
+PLAYER_ID = struct.Struct('<I')
+COUNT = struct.Struct('<I')
+
+PLAYER_SCRIPT_PATH = 'res://source/common/gameplay/characters/player/player_resource.gd'
+GUILD_SCRIPT_PATH = 'res://source/server/world/data/guild.gd'
+WORLD_SCRIPT_PATH = 'res://source/server/world/data/world_player_data.gd'
+
+
+class JournalError(ValueError):
+    pass
+
+
+@dataclass
+class WorldState:
+    """A whole world in memory: the [resource] fields, characters and guilds."""
+    world: reader.WorldRecord = field(default_factory=reader.WorldRecord)
+    players: dict = field(default_factory=dict)    # player id -> PlayerRecord
+    guilds: dict = field(default_factory=dict)     # resource id -> GuildRecord
+    # ext_resource id -> res:// path, as found in the .tres
+    scripts: dict = field(default_factory=dict)
+    # Last journal seq folded in.
+    seq: int = 0
+
+
+# --- Records ------------------------------------------------------------------
+
+def _pack(seq, kind, payload):
+    crc = zlib.crc32(payload, zlib.crc32(STAMP.pack(seq, kind)))
+    return RECORD.pack(len(payload), crc, seq, kind) + payload
+
+
+class RecordReader:
+    """Stream (seq, kind, payload) from a snapshot or journal.
+
+    Stops at the first record that is cut off or fails its crc32 and sets
+    `torn`; `good_bytes` is the length of the intact prefix.
+    """
+
+    def __init__(self, path, magic, buffer_size=1 << 20):
+        self.path = path
+        self.magic = magic
+        self.buffer_size = buffer_size
+        self.torn = False
+        self.good_bytes = 0
+
+    def __iter__(self):
+        with open(self.path, 'rb', buffering=self.buffer_size) as f:
+            if f.read(len(self.magic)) != self.magic:
+                raise JournalError(f"{self.path}: bad magic (expected {self.magic.decode()})")
+            self.good_bytes = len(self.magic)
+            while True:
+                header = f.read(RECORD.size)
+                if not header:
+                    return
+                if len(header) < RECORD.size:
+                    self.torn = True
+                    return
+                length, crc, seq, kind = RECORD.unpack(header)
+                payload = f.read(length)
+                if len(payload) < length or zlib.crc32(payload, zlib.crc32(STAMP.pack(seq, kind))) != crc:
+                    self.torn = True
+                    return
+                self.good_bytes += RECORD.size + length
+                yield seq, kind, payload
+
+
+def _non_default(record, names=None):
+    """{name: value} of the fields of a reader record that differ from their defaults."""
+    if names is None:
+        names = [f.name for f in fields(record)]
+    defaults = type(record)(record.resource_id) if hasattr(record, 'resource_id') else type(record)()
+    return {name: getattr(record, name) for name in names
+            if name == 'resource_id' or getattr(record, name) != getattr(defaults, name)}
+
+
+def _player_from_fields(data):
+    player = reader.PlayerRecord(data.pop('resource_id', None), **data)
+    player.inventory = {int(k): int(v) for k, v in player.inventory.items()}
+    return player
+
+
+# --- Snapshots ----------------------------------------------------------------
+
+def _file_mode(path):
+    """Mode for a new `path`: that of the file it replaces, else 0o666 less the umask (as open() gives)."""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def _atomic_write(path, write):
+    """Call `write(binary file)` on a temp file next to `path`, fsync it and rename it over `path`."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb', buffering=1 << 20) as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+            # mkstemp() creates the file owner-only (0600).
+            os.fchmod(f.fileno(), _file_mode(path))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def write_snapshot(state, path):
+    """Write `state` as a snapshot file; returns its size."""
+    guild_fields = [spec.name for spec in fields(reader.GuildRecord)]
+    player_fields = [spec.name for spec in fields(reader.PlayerRecord)]
+
+    def write(f):
+        seq = state.seq
+        f.write(SNAPSHOT_MAGIC)
+        world = _non_default(state.world, [spec.name for spec in fields(state.world) if spec.name != 'players'])
+        world.update(scripts=state.scripts, guild_fields=guild_fields, player_fields=player_fields)
+        f.write(_pack(seq, SNAP_WORLD, variant.encode(world)))
+        for guild in state.guilds.values():
+            f.write(_pack(seq, SNAP_GUILD, variant.encode([getattr(guild, name) for name in guild_fields])))
+        for player in state.players.values():
+            f.write(_pack(seq, SNAP_PLAYER, variant.encode([getattr(player, name) for name in player_fields])))
+        f.write(_pack(seq, SNAP_END, COUNT.pack(1 + len(state.guilds) + len(state.players))))
+    _atomic_write(path, write)
+    return os.path.getsize(path)
+
+
+def read_snapshot(path):
+    state = WorldState()
+    guild_fields = player_fields = None
+    records = 0
+    snapshot = RecordReader(path, SNAPSHOT_MAGIC)
+    for seq, kind, payload in snapshot:
+        if kind == SNAP_END:
+            if COUNT.unpack(payload)[0] != records:
+                raise JournalError(f"{path}: END counts {COUNT.unpack(payload)[0]} records, read {records}")
+            state.seq = seq
+            state.world.players = {pid: player.resource_id for pid, player in state.players.items()}
+            return state
+        data = variant.decode(payload)
+        if kind == SNAP_WORLD:
+            state.scripts = dict(data.pop('scripts', {}))
+            guild_fields = data.pop('guild_fields')
+            player_fields = data.pop('player_fields')
+            state.world = reader.WorldRecord(**data)
+        elif guild_fields is None:
+            raise JournalError(f"{path}: record kind {kind} before the WORLD record")
+        elif kind == SNAP_GUILD:
+            guild = reader.GuildRecord(**dict(zip(guild_fields, data)))
+            state.guilds[guild.resource_id] = guild
+        elif kind == SNAP_PLAYER:
+            player = _player_from_fields(dict(zip(player_fields, data)))
+            state.players[player.player_id] = player
+        else:
+            raise JournalError(f"{path}: unknown snapshot record kind {kind}")
+        records += 1
+    raise JournalError(f"{path}: incomplete snapshot (no END record{', torn tail' if snapshot.torn else ''})")
+
+
+# --- Journal ------------------------------------------------------------------
+
+def recover(path):
+    """Cut a journal back to its last intact record; returns (last seq, records, bytes dropped)."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        with open(path, 'wb') as f:
+            f.write(JOURNAL_MAGIC)
+            f.flush()
+            os.fsync(f.fileno())
+        return 0, 0, 0
+    journal = RecordReader(path, JOURNAL_MAGIC)
+    last_seq = records = 0
+    for seq, _, _ in journal:
+        last_seq = seq
+        records += 1
+    dropped = os.path.getsize(path) - journal.good_bytes
+    if dropped:
+        with open(path, 'r+b') as f:
+            f.truncate(journal.good_bytes)
+            os.fsync(f.fileno())
+    return last_seq, records, dropped
+
+
+class JournalWriter:
+    """Append change records to a journal; commit() makes them durable.
+
+    Opening recovers the journal first, so appends never follow a torn
+    record. Seqs continue from the journal's last record, or from
+    `min_seq` (the snapshot's seq) when that is higher.
+    """
+
+    def __init__(self, path, min_seq=0, buffer_size=1 << 16):
+        self.path = path
+        last_seq, _, self.recovered_bytes = recover(path)
+        self.seq = max(last_seq, min_seq)
+        self.file = open(path, 'ab', buffering=buffer_size)
+        self.pending = 0
+
+    def append(self, kind, payload):
+        self.seq += 1
+        self.file.write(_pack(self.seq, kind, payload))
+        self.pending += 1
+
+    def golds(self, player_id, golds):
+        self.append(OP_GOLDS, GOLDS.pack(player_id, golds))
+
+    def stack(self, player_id, item_id, stack):
+        self.append(OP_STACK, STACK.pack(player_id, item_id, stack))
+
+    def level(self, player_id, level, experience):
+        self.append(OP_LEVEL, LEVEL.pack(player_id, level, experience))
+
+    def player(self, record):
+        if record.resource_id is None:
+            record.resource_id = f"Resource_p{record.player_id}"
+        self.append(OP_PLAYER, PLAYER_ID.pack(record.player_id) + variant.encode(_non_default(record)))
+
+    def world_field(self, name, value):
+        self.append(OP_WORLD, variant.encode([name, value]))
+
+    def commit(self):
+        """Flush and fsync everything appended so far; returns the number of records."""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        committed, self.pending = self.pending, 0
+        return committed
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _player(state, player_id):
+    player = state.players.get(player_id)
+    if player is None:
+        raise JournalError(f"journal changes unknown player {player_id}")
+    return player
+
+
+def apply(state, kind, payload):
+    """Apply one journal record to `state`."""
+    if kind == OP_GOLDS:
+        player_id, golds = GOLDS.unpack(payload)
+        _player(state, player_id).golds = golds
+    elif kind == OP_STACK:
+        player_id, item_id, stack = STACK.unpack(payload)
+        inventory = _player(state, player_id).inventory
+        if stack > 0:
+            inventory[item_id] = stack
+        else:
+            inventory.pop(item_id, None)
+    elif kind == OP_LEVEL:
+        player_id, level, experience = LEVEL.unpack(payload)
+        player = _player(state, player_id)
+        player.level, player.experience = level, experience
+    elif kind == OP_PLAYER:
+        player = _player_from_fields(variant.decode(payload[PLAYER_ID.size:]))
+        if player.resource_id is None:
+            player.resource_id = f"Resource_p{player.player_id}"
+        world = state.world
+        state.players[player.player_id] = player
+        world.players[player.player_id] = player.resource_id
+        # Mirrors WorldPlayerData.create_player_character().
+        characters = world.accounts.setdefault(player.account_name, [])
+        if player.player_id not in characters:
+            characters.append(player.player_id)
+        world.next_player_id = max(world.next_player_id, player.player_id)
+    elif kind == OP_WORLD:
+        name, value = variant.decode(payload)
+        if name == 'players' or not hasattr(state.world, name):
+            raise JournalError(f"journal sets unknown world field {name!r}")
+        setattr(state.world, name, value)
+    else:
+        raise JournalError(f"unknown journal record kind {kind}")
+
+
+def replay(state, journal_path):
+    """Apply the journal records newer than `state.seq`; returns (applied, skipped, torn)."""
+    applied = skipped = 0
+    journal = RecordReader(journal_path, JOURNAL_MAGIC)
+    for seq, kind, payload in journal:
+        if seq <= state.seq:
+            skipped += 1
+            continue
+        apply(state, kind, payload)
+        state.seq = seq
+        applied += 1
+    return applied, skipped, journal.torn
+
+
+def store_paths(store):
+    return store + '.snap', store + '.journal'
+
+
+def load(store):
+    """Snapshot plus journal replay; returns (state, applied, skipped, torn)."""
+    snap_path, journal_path = store_paths(store)
+    state = read_snapshot(snap_path)
+    if not os.path.exists(journal_path):
+        return state, 0, 0, False
+    return (state, *replay(state, journal_path))
+
+
+def compact(store):
+    """Fold the journal into a new snapshot and start an empty journal; returns (state, applied)."""
+    snap_path, journal_path = store_paths(store)
+    state, applied, _, _ = load(store)
+    write_snapshot(state, snap_path)
+    # The new snapshot already holds every record, so a crash before this rename just replays nothing.
+    _atomic_write(journal_path, lambda f: f.write(JOURNAL_MAGIC))
+    return state, applied
+
+
+# --- .tres conversion ---------------------------------------------------------
+
+def from_tres(path):
+    """Read a WorldPlayerData .tres into a WorldState."""
+    state = WorldState()
+    kinds = {}
+    for section in reader.iter_sections(path):
+        if section.tag == 'ext_resource':
+            state.scripts[section.id] = section.attrs.get('path', '')
+            kinds[section.id] = os.path.basename(state.scripts[section.id])
+        elif section.tag == 'sub_resource':
+            script = section.properties.get('script')
+            kind = kinds.get(script.id) if isinstance(script, tres.ExtResourceRef) else None
+            if kind == reader.PLAYER_SCRIPT:
+                player = reader.player_from_section(section)
+                state.players[player.player_id] = player
+            elif kind == reader.GUILD_SCRIPT:
+                guild = reader.guild_from_section(section)
+                state.guilds[guild.resource_id] = guild
+        elif section.tag == 'resource':
+            state.world = reader.world_from_section(section)
+    return state
+
+
+def _script_ids(state):
+    """ext_resource ids of the player, guild and world scripts, adding any that are missing."""
+    ids = {}
+    for script_id, path in state.scripts.items():
+        ids.setdefault(os.path.basename(path), script_id)
+    for number, path in enumerate((PLAYER_SCRIPT_PATH, GUILD_SCRIPT_PATH, WORLD_SCRIPT_PATH), 1):
+        name = os.path.basename(path)
+        if name not in ids:
+            ids[name] = f"{number}_journal"
+            state.scripts[ids[name]] = path
+    return ids[reader.PLAYER_SCRIPT], ids[reader.GUILD_SCRIPT], ids['world_player_data.gd']
+
+
+def tres_sections(state):
+    """The Sections of `state` as ResourceSaver lays them out."""
+    player_script, guild_script, world_script = _script_ids(state)
+    world = state.world
+    yield tres.Section('gd_resource', {
+        'type': "Resource", 'script_class': reader.WORLD_SCRIPT_CLASS,
+        'load_steps': len(state.scripts) + len(state.guilds) + len(state.players) + 1, 'format': 3})
+    for script_id, path in state.scripts.items():
+        yield tres.Section('ext_resource', {'type': "Script", 'path': path, 'id': script_id})
+    for guild in state.guilds.values():
+        props = {'script': tres.ExtResourceRef(guild_script)}
+        props.update(_non_default(guild, ('guild_name', 'leader_id')))
+        if guild.members:
+            props['members'] = tres.TypedDictionary('int', 'String', guild.members)
+        yield tres.Section('sub_resource', {'type': "Resource", 'id': guild.resource_id}, props)
+    for player in state.players.values():
+        props = {'script': tres.ExtResourceRef(player_script)}
+        for name, value in _non_default(player, [f.name for f in fields(player) if f.name != 'resource_id']).items():
+            if name == 'inventory':
+                value = {item_id: {"stack": stack} for item_id, stack in value.items()}
+            elif name == 'guild':
+                value = tres.SubResourceRef(value)
+            props[name] = value
+        yield tres.Section('sub_resource', {'type': "Resource", 'id': player.resource_id}, props)
+
+    props = {'script': tres.ExtResourceRef(world_script)}
+    if world.accounts:
+        props['accounts'] = tres.TypedDictionary('String', 'PackedInt32Array', {
+            name: tres.PackedArray('PackedInt32Array', ids) for name, ids in world.accounts.items()})
+    props.update(_non_default(world, ('max_character_per_account',)))
+    if state.players:
+        props['players'] = tres.TypedDictionary('int', tres.ExtResourceRef(player_script), {
+            player_id: tres.SubResourceRef(player.resource_id) for player_id, player in state.players.items()})
+    props.update(_non_default(world, ('next_player_id',)))
+    if world.admin_ids:
+        props['admin_ids'] = tres.PackedArray('PackedInt32Array', world.admin_ids)
+    if world.user_roles:
+        props['user_roles'] = tres.TypedDictionary('int', 'Array', world.user_roles)
+    if world.guilds:
+        props['guilds'] = tres.TypedDictionary('String', tres.ExtResourceRef(guild_script), {
+            name: tres.SubResourceRef(resource_id) for name, resource_id in world.guilds.items()})
+    for name in ('banned_players', 'muted_players'):
+        if getattr(world, name):
+            props[name] = tres.TypedDictionary('String', 'Dictionary', getattr(world, name))
+    yield tres.Section('resource', {}, props)
+
+
+def to_tres(state, path):
+    """Write `state` as a WorldPlayerData .tres; returns its size."""
+    def write(f):
+        previous = None
+        for section in tres_sections(state):
+            if previous is not None and not (previous == section.tag == 'ext_resource'):
+                f.write(b'\n')
+            f.write(tres.format_section(section).encode('utf-8'))
+            previous = section.tag
+    _atomic_write(path, write)
+    return os.path.getsize(path)
+
+
+# --- Benchmark ----------------------------------------------------------------
+
+def scaled(state, copies):
+    """`state` with every character cloned `copies` times under fresh player ids."""
+    if copies <= 1:
+        return state
+    stride = max(state.players, default=0) + 1
+    result = replace(state, players={}, world=replace(state.world, accounts={}))
+    for copy in range(copies):
+        for player_id, player in state.players.items():
+            clone = replace(player, player_id=player_id + copy * stride, inventory=dict(player.inventory),
+                            resource_id=f"{player.resource_id}_{copy}" if copy else player.resource_id)
+            result.players[clone.player_id] = clone
+            result.world.accounts.setdefault(clone.account_name, []).append(clone.player_id)
+    result.world.players = {pid: player.resource_id for pid, player in result.players.items()}
+    result.world.next_player_id = max(result.players, default=0)
+    return result
+
+
+def random_changes(writer, state, count, rng):
+    """Append `count` gold / inventory / level changes the way a play session would."""
+    player_ids = list(state.players)
+    item_ids = sorted({item for player in state.players.values() for item in player.inventory}) or [1]
+    for _ in range(count):
+        player = state.players[rng.choice(player_ids)]
+        roll = rng.random()
+        if roll < 0.5:
+            player.golds = max(0, player.golds + rng.randint(-50, 200))
+            writer.golds(player.player_id, player.golds)
+        elif roll < 0.85:
+            item_id = rng.choice(item_ids)
+            stack = max(0, player.inventory.get(item_id, 0) + rng.randint(-3, 5))
+            if stack:
+                player.inventory[item_id] = stack
+            else:
+                player.inventory.pop(item_id, None)
+            writer.stack(player.player_id, item_id, stack)
+        else:
+            player.experience += rng.randint(10, 500)
+            writer.level(player.player_id, player.level, player.experience)
+
+
+def bench(source, copies_list, changes_list, seed):
+    base = from_tres(source)
+    rng = random.Random(seed)
+    print(f"{source}: {len(base.players):,} characters\n")
+    print(f"{'Chars':>8} {'.tres save':>11} {'.tres size':>11} {'Snapshot':>9} {'Snap size':>10} "
+          f"{'Changes':>8} {'Append+sync':>12} {'Journal':>10} {'Replay':>8} {'Compact':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for copies in copies_list:
+            state = scaled(base, copies)
+            tres_path = os.path.join(directory, 'world.tres')
+            start = time.perf_counter()
+            tres_size = to_tres(state, tres_path)
+            tres_seconds = time.perf_counter() - start
+
+            store = os.path.join(directory, f'world{copies}')
+            snap_path, journal_path = store_paths(store)
+            start = time.perf_counter()
+            snap_size = write_snapshot(state, snap_path)
+            snap_seconds = time.perf_counter() - start
+            for changes in changes_list:
+                if os.path.exists(journal_path):
+                    os.remove(journal_path)
+                with JournalWriter(journal_path, state.seq) as writer:
+                    start = time.perf_counter()
+                    random_changes(writer, state, changes, rng)
+                    writer.commit()
+                    append_seconds = time.perf_counter() - start
+                journal_size = os.path.getsize(journal_path)
+                start = time.perf_counter()
+                loaded, applied, _, _ = load(store)
+                replay_seconds = time.perf_counter() - start
+                if applied != changes or loaded.players != state.players:
+                    print(f"❌ replay of {changes} changes does not match the live state", file=sys.stderr)
+                    sys.exit(1)
+                start = time.perf_counter()
+                compact(store)
+                compact_seconds = time.perf_counter() - start
+                state.seq = loaded.seq
+                print(f"{len(state.players):>8,} {tres_seconds * 1000:>9.0f}ms {tres_size / 1e6:>9.2f}MB "
+                      f"{snap_seconds * 1000:>7.0f}ms {snap_size / 1e6:>8.2f}MB {changes:>8,} "
+                      f"{append_seconds * 1000:>10.1f}ms {journal_size:>9,}B "
+                      f"{replay_seconds * 1000:>6.0f}ms {compact_seconds * 1000:>6.0f}ms")
+    print("\nAppend+sync is the save cost: it follows the number of changes, while a full .tres save follows "
+          "the world size.\nReplay loads the snapshot and applies the journal; compaction folds the journal into "
+          "a new snapshot.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshot + journal world save format: convert, compact, recover, bench.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    convert = commands.add_parser('convert', help="world .tres -> STORE.snap (and an empty STORE.journal)")
+    convert.add_argument('tres_path')
+    convert.add_argument('store')
+    export = commands.add_parser('export', help="STORE.snap + STORE.journal -> world .tres")
+    export.add_argument('store')
+    export.add_argument('tres_path')
+    compact_parser = commands.add_parser('compact', help="fold STORE.journal into a new STORE.snap")
+    compact_parser.add_argument('store')
+    recover_parser = commands.add_parser('recover', help="cut a torn journal tail and report what replays")
+    recover_parser.add_argument('store')
+    bench_parser = commands.add_parser('bench', help="save cost of .tres vs snapshot + journal")
+    bench_parser.add_argument('tres_path', nargs='?', help="world .tres (default: the first in source/server/world/data)")
+    bench_parser.add_argument('--copies', default='1,20', help="world sizes as copies of its characters (default: 1,20)")
+    bench_parser.add_argument('--changes', default='100,1000,10000', help="changes per save (default: 100,1000,10000)")
+    bench_parser.add_argument('--seed', type=int, default=1, help="random seed (default: 1)")
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'convert':
+            state = from_tres(args.tres_path)
+            snap_path, journal_path = store_paths(args.store)
+            size = write_snapshot(state, snap_path)
+            _atomic_write(journal_path, lambda f: f.write(JOURNAL_MAGIC))
+            print(f"✅ {args.tres_path} ({os.path.getsize(args.tres_path):,} bytes) -> {snap_path} ({size:,} bytes), "
+                  f"{len(state.players):,} characters")
+        elif args.command == 'export':
+            state, applied, _, torn = load(args.store)
+            size = to_tres(state, args.tres_path)
+            print(f"✅ {args.store} (+{applied:,} journal records) -> {args.tres_path} ({size:,} bytes)")
+            if torn:
+                print("⚠️  Journal ends in a torn record (ignored); run `recover` to cut it")
+        elif args.command == 'compact':
+            start = time.perf_counter()
+            state, applied = compact(args.store)
+            print(f"✅ Folded {applied:,} journal records into {store_paths(args.store)[0]} "
+                  f"(seq {state.seq}, {(time.perf_counter() - start) * 1000:.0f} ms)")
+        elif args.command == 'recover':
+            snap_path, journal_path = store_paths(args.store)
+            last_seq, records, dropped = recover(journal_path)
+            if dropped:
+                print(f"⚠️  Cut {dropped:,} bytes of torn journal tail")
+            state, applied, skipped, _ = load(args.store)
+            print(f"✅ Snapshot + {records:,} journal records (last seq {last_seq}): {applied:,} replayed, "
+                  f"{skipped:,} already in the snapshot; {len(state.players):,} characters")
+        else:
+            bench(args.tres_path or reader.world_files()[0],
+                  [int(n) for n in args.copies.split(',')], [int(n) for n in args.changes.split(',')], args.seed)
+    except (JournalError, reader.WorldFormatError, tres.TresSyntaxError, variant.VariantError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+"""
+Streaming reader for world databases saved by world_database.gd.
+
+`ResourceSaver.save()` writes the whole WorldPlayerData as one text
+resource. Every PlayerResource and Guild is a [sub_resource], and they
+all come before the main [resource] section, which holds the accounts,
+the player id -> SubResource map, bans and mutes. The reader walks the
+file with tres.iter_sections() and yields one record per section as soon
+as it is parsed. Memory is bounded by the largest single section, not by
+the number of characters.
+
+Records apply the same defaults as the GDScript classes, so a property
+that ResourceSaver left out (because it held its default) reads back as
+that default.
+
+Usage:
+    python -m tinymmo_tools.world.reader [WORLD.tres ...]
+"""
+
+import argparse
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+
+from ..content import tres
+
+
+PLAYER_SCRIPT = 'player_resource.gd'
+GUILD_SCRIPT = 'guild.gd'
+WORLD_SCRIPT_CLASS = 'WorldPlayerData'
+DEFAULT_WORLD_DIR = os.path.join('source', 'server', 'world', 'data')
+
+
+class WorldFormatError(ValueError):
+    pass
+
+
+@dataclass
+class PlayerRecord:
+    """One PlayerResource sub-resource."""
+    resource_id: str
+    player_id: int = 0
+    account_name: str = ""
+    display_name: str = "Player"
+    character_class: str = "miner"
+    golds: int = 0
+    # item id -> stack
+    inventory: dict = field(default_factory=dict)
+    attributes: dict = field(default_factory=dict)
+    available_attributes_points: int = 0
+    level: int = 1
+    experience: int = 0
+    # SubResource id of the Guild, or None
+    guild: str = None
+    server_roles: dict = field(default_factory=dict)
+    quest_stats: dict = field(default_factory=dict)
+
+
+@dataclass
+class GuildRecord:
+    """One Guild sub-resource."""
+    resource_id: str
+    guild_name: str = ""
+    leader_id: int = 0
+    # player id -> rank name
+    members: dict = field(default_factory=dict)
+
+
+@dataclass
+class WorldRecord:
+    """The main [resource] section of a WorldPlayerData."""
+    accounts: dict = field(default_factory=dict)
+    max_character_per_account: int = 3
+    # player id -> SubResource id
+    players: dict = field(default_factory=dict)
+    next_player_id: int = 0
+    admin_ids: list = field(default_factory=list)
+    user_roles: dict = field(default_factory=dict)
+    # guild name -> SubResource id
+    guilds: dict = field(default_factory=dict)
+    banned_players: dict = field(default_factory=dict)
+    muted_players: dict = field(default_factory=dict)
+
+
+def _stack(entry):
+    """Stack size of an inventory entry ({"stack": n}, or a bare count)."""
+    if isinstance(entry, dict):
+        return int(entry.get('stack', 1))
+    return int(entry)
+
+
+def _ref_id(value):
+    return value.id if isinstance(value, tres.SubResourceRef) else None
+
+
+def player_from_section(section):
+    props = section.properties
+    record = PlayerRecord(section.id)
+    for name in ('player_id', 'golds', 'available_attributes_points', 'level', 'experience'):
+        if name in props:
+            setattr(record, name, int(props[name]))
+    for name in ('account_name', 'display_name', 'character_class'):
+        if name in props:
+            setattr(record, name, str(props[name]))
+    for name in ('attributes', 'server_roles', 'quest_stats'):
+        if isinstance(props.get(name), dict):
+            setattr(record, name, dict(props[name]))
+    record.inventory = {int(item_id): _stack(entry) for item_id, entry in (props.get('inventory') or {}).items()}
+    record.guild = _ref_id(props.get('guild'))
+    return record
+
+
+def guild_from_section(section):
+    props = section.properties
+    return GuildRecord(
+        section.id,
+        guild_name=str(props.get('guild_name', "")),
+        leader_id=int(props.get('leader_id', 0)),
+        members={int(k): str(v) for k, v in (props.get('members') or {}).items()},
+    )
+
+
+def world_from_section(section):
+    props = section.properties
+    return WorldRecord(
+        accounts={str(k): [int(i) for i in v] for k, v in (props.get('accounts') or {}).items()},
+        max_character_per_account=int(props.get('max_character_per_account', 3)),
+        players={int(k): _ref_id(v) for k, v in (props.get('players') or {}).items()},
+        next_player_id=int(props.get('next_player_id', 0)),
+        admin_ids=[int(i) for i in props.get('admin_ids') or ()],
+        user_roles={int(k): list(v) for k, v in (props.get('user_roles') or {}).items()},
+        guilds={str(k): _ref_id(v) for k, v in (props.get('guilds') or {}).items()},
+        banned_players={str(k): dict(v) for k, v in (props.get('banned_players') or {}).items()},
+        muted_players={str(k): dict(v) for k, v in (props.get('muted_players') or {}).items()},
+    )
+
+
+def iter_sections(path):
+    """Yield the raw Sections of a world database, checking its header."""
+    with open(path, 'r', encoding='utf-8') as stream:
+        sections = tres.iter_sections(stream)
+        header = next(sections, None)
+        if header is None or header.tag != 'gd_resource' or header.attrs.get('script_class') != WORLD_SCRIPT_CLASS:
+            raise WorldFormatError(f"{path}: not a {WORLD_SCRIPT_CLASS} resource")
+        yield header
+        yield from sections
+
+
+def iter_records(path):
+    """Yield PlayerRecord, GuildRecord and (last) WorldRecord objects in file order.
+
+    Sub-resources of other scripts are skipped.
+    """
+    scripts = {}
+    for section in iter_sections(path):
+        if section.tag == 'ext_resource':
+            scripts[section.id] = os.path.basename(section.attrs.get('path', ''))
+        elif section.tag == 'sub_resource':
+            script = section.properties.get('script')
+            kind = scripts.get(script.id) if isinstance(script, tres.ExtResourceRef) else None
+            if kind == PLAYER_SCRIPT:
+                yield player_from_section(section)
+            elif kind == GUILD_SCRIPT:
+                yield guild_from_section(section)
+        elif section.tag == 'resource':
+            yield world_from_section(section)
+
+
+def iter_players(path):
+    """Yield only the PlayerRecords of a world database."""
+    for record in iter_records(path):
+        if isinstance(record, PlayerRecord):
+            yield record
+
+
+def world_files(directory=DEFAULT_WORLD_DIR):
+    return sorted(entry.path for entry in os.scandir(directory) if entry.name.endswith('.tres'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream world databases and summarize them.")
+    parser.add_argument('paths', nargs='*', help=f"world .tres files (default: {DEFAULT_WORLD_DIR}/*.tres)")
+    args = parser.parse_args()
+
+    for path in args.paths or world_files():
+        start = time.perf_counter()
+        players = guilds = items = stacks = golds = 0
+        world = None
+        try:
+            for record in iter_records(path):
+                if isinstance(record, PlayerRecord):
+                    players += 1
+                    items += len(record.inventory)
+                    stacks += sum(record.inventory.values())
+                    golds += record.golds
+                elif isinstance(record, GuildRecord):
+                    guilds += 1
+                else:
+                    world = record
+        except (WorldFormatError, tres.TresSyntaxError) as e:
+            print(f"❌ {e}", file=sys.stderr)
+            continue
+        elapsed = time.perf_counter() - start
+        print(f"{path}: {players:,} characters, {len(world.accounts) if world else 0:,} accounts, {guilds:,} guilds, "
+              f"{items:,} inventory slots ({stacks:,} items), {golds:,} gold "
+              f"[{os.path.getsize(path) / 1e6:.2f} MB in {elapsed * 1000:.0f} ms]")
+        if world is not None and len(world.players) != players:
+            print(f"  ⚠️  [resource] maps {len(world.players):,} players but the file has {players:,} PlayerResources")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Update the ContentIndex resources in source/common/registry/indexes.
+Scans each index's scan_path/filters, keeps existing ids, appends new files
+from next_id and tombstones deleted ones. Unchanged indexes are not rewritten.
+"""
+
+import argparse
+import sys
+
+from tinymmo_tools.content.cache import HashCache
+from tinymmo_tools.content.indexes import update_indexes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Update content indexes.")
+    parser.add_argument('names', nargs='*', help="content names to update (default: all), e.g. recipes items")
+    parser.add_argument('--check', action='store_true', help="only report changes; exit 1 if any index is out of date")
+    parser.add_argument('--no-cache', action='store_true', help="re-hash every file and skip the hash cache")
+    args = parser.parse_args()
+    
+    with HashCache(enabled=not args.no_cache) as hashes:
+        updates = update_indexes(args.names, hashes, dry_run=args.check)
+    
+    for update in updates:
+        index = update.index
+        state = "out of date" if args.check and update.changed else "updated" if update.changed else "unchanged"
+        print(f"{index.content_name:<24} {state:<12} {update.summary()} (next_id {update.next_id}, root {update.root[:12]})")
+        for label, entries in (("+", update.added), ("~", update.moved), ("^", update.revived), ("-", update.deleted)):
+            for entry in entries:
+                print(f"    {label} {entry.id:>4} {entry.slug}")
+        for res_path in update.duplicate_slugs:
+            print(f"    ! duplicate slug for {res_path}")
+    print(hashes.summary())
+    
+    if args.check and any(update.changed for update in updates):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,89 +4,40 @@ Economy Balance Validation Script
 Checks that recipes and items are properly balanced after rebalancing
 """
 
-import re
+import argparse
 from pathlib import Path
-from collections import defaultdict
 
-PROJECT_ROOT = Path(__file__).parent
+from tinymmo_tools.content import drops, scan
+from tinymmo_tools.content.db import open_database
 
-def parse_recipe(filepath):
-    """Extract key fields from recipe"""
-    content = filepath.read_text(encoding='utf-8')
-    
-    level_match = re.search(r'required_level = (\d+)', content)
-    level = int(level_match.group(1)) if level_match else 1
-    
-    class_match = re.search(r'required_class = "([^"]+)"', content)
-    class_name = class_match.group(1) if class_match else "unknown"
-    
-    name_match = re.search(r'recipe_name = &"([^"]+)"', content)
-    name = name_match.group(1) if name_match else filepath.stem
-    
-    # Get input quantities
-    inputs = []
-    for i in range(1, 4):
-        slug_match = re.search(f'input_{i}_slug = &"([^"]*)"', content)
-        qty_match = re.search(f'input_{i}_quantity = (\d+)', content)
-        if slug_match and slug_match.group(1):
-            qty = int(qty_match.group(1)) if qty_match else 1
-            inputs.append((slug_match.group(1), qty))
-    
-    total_inputs = sum(qty for _, qty in inputs)
-    
-    return {
-        'name': name,
-        'level': level,
-        'class': class_name,
-        'inputs': inputs,
-        'total_inputs': total_inputs,
-        'folder': filepath.parent.name,
-    }
+PROJECT_ROOT = Path(__file__).parent
 
-def parse_item(filepath):
-    """Extract key fields from item"""
-    content = filepath.read_text(encoding='utf-8')
-    
-    name_match = re.search(r'item_name = &"([^"]+)"', content)
-    name = name_match.group(1) if name_match else filepath.stem
-    
-    price_match = re.search(r'minimum_price = (\d+)', content)
-    price = int(price_match.group(1)) if price_match else 0
-    
-    can_sell_match = re.search(r'can_sell = (true|false)', content)
-    can_sell = can_sell_match.group(1) == 'true' if can_sell_match else False
-    
-    return {
-        'name': name,
-        'price': price,
-        'can_sell': can_sell,
-        'folder': filepath.parent.name,
-    }
+def query_level_distribution(db):
+    """Recipe count and total input quantity stats per required level"""
+    rows = db.execute("""
+        WITH totals AS (
+            SELECT r.path, r.required_level, COALESCE(SUM(s.quantity), 0) AS total_inputs
+            FROM recipes r
+            LEFT JOIN recipe_slots s ON s.path = r.path AND s.direction = 'input'
+            GROUP BY r.path
+        )
+        SELECT required_level, COUNT(*) AS count, MIN(total_inputs) AS min_inputs,
+               MAX(total_inputs) AS max_inputs, AVG(total_inputs) AS avg_inputs
+        FROM totals GROUP BY required_level
+    """)
+    return {row['required_level']: row for row in rows}
 
-def main():
+def main(use_cache=True, jobs=None):
     print("=" * 70)
     print("ECONOMY BALANCE VALIDATION")
     print("=" * 70)
     
-    recipes_dir = PROJECT_ROOT / "source" / "common" / "gameplay" / "crafting" / "recipes"
-    items_dir = PROJECT_ROOT / "source" / "common" / "gameplay" / "items"
+    db = open_database(use_cache, jobs, PROJECT_ROOT)
     
     # Scan recipes
     print("\n📋 Scanning Recipes...")
-    recipes_by_level = defaultdict(list)
-    recipes_by_class = defaultdict(list)
-    all_recipes = []
-    
-    for recipe_file in recipes_dir.glob('**/*.tres'):
-        try:
-            recipe = parse_recipe(recipe_file)
-            all_recipes.append(recipe)
-            recipes_by_level[recipe['level']].append(recipe)
-            recipes_by_class[recipe['class']].append(recipe)
-        except Exception as e:
-            print(f"  ⚠️  Error parsing {recipe_file.name}: {e}")
-    
-    print(f"  ✓ Found {len(all_recipes)} recipes")
+    recipe_count = db.execute("SELECT COUNT(*) FROM recipes").fetchone()[0]
+    print(f"  ✓ Found {recipe_count} recipes")
     
     # Validate recipe distribution
     print("\n📊 Recipe Distribution:")
@@ -94,22 +45,17 @@ def main():
     print("-" * 60)
     
     issues = []
+    recipes_by_level = query_level_distribution(db)
     
     for level in range(1, 31):
-        recipes = recipes_by_level.get(level, [])
-        if recipes:
-            total_inputs = [r['total_inputs'] for r in recipes]
-            min_inputs = min(total_inputs)
-            max_inputs = max(total_inputs)
-            avg_inputs = sum(total_inputs) / len(total_inputs)
-            
-            print(f"L{level:<7} {len(recipes):<8} {min_inputs:<12} {max_inputs:<12} {avg_inputs:<12.1f}")
+        stats = recipes_by_level.get(level)
+        if stats:
+            count = stats['count']
+            print(f"L{level:<7} {count:<8} {stats['min_inputs']:<12} {stats['max_inputs']:<12} {stats['avg_inputs']:<12.1f}")
             
             # Check for issues
-            if level <= 10 and len(recipes) == 0:
-                issues.append(f"Level {level}: No recipes assigned (should have 1)")
-            elif level <= 10 and len(recipes) > 1:
-                issues.append(f"Level {level}: {len(recipes)} recipes (should have only 1)")
+            if level <= 10 and count > 1:
+                issues.append(f"Level {level}: {count} recipes (should have only 1)")
         else:
             print(f"L{level:<7} {'0':<8} {'-':<12} {'-':<12} {'-':<12}")
             if level <= 10:
@@ -117,17 +63,18 @@ def main():
     
     # Check class balance
     print("\n👥 Class Distribution:")
-    for class_name in sorted(recipes_by_class.keys()):
-        count = len(recipes_by_class[class_name])
+    for row in db.execute("SELECT required_class, COUNT(*) FROM recipes GROUP BY required_class ORDER BY required_class"):
+        class_name, count = row
         print(f"  {class_name:<15}: {count:>3} recipes")
     
     # Check interdependency
-    interdependent_count = sum(1 for r in all_recipes if r['folder'] == 'interdependent')
-    print(f"\n🔗 Interdependent recipes: {interdependent_count}")
+    interdep_by_level = db.execute("""
+        SELECT required_level, recipe_name FROM recipes
+        WHERE folder = 'interdependent' ORDER BY required_level, recipe_name
+    """).fetchall()
+    print(f"\n🔗 Interdependent recipes: {len(interdep_by_level)}")
     
     # Find first interdependent
-    interdep_by_level = [(r['level'], r['name']) for r in all_recipes if r['folder'] == 'interdependent']
-    interdep_by_level.sort()
     if interdep_by_level:
         first_level, first_name = interdep_by_level[0]
         print(f"  First interdependent at level {first_level}: {first_name}")
@@ -136,19 +83,9 @@ def main():
     
     # Scan items
     print("\n💰 Scanning Items...")
-    items_by_folder = defaultdict(list)
-    sellable_items = []
-    
-    for item_file in items_dir.glob('**/*.tres'):
-        try:
-            item = parse_item(item_file)
-            items_by_folder[item['folder']].append(item)
-            if item['can_sell'] and item['price'] > 0:
-                sellable_items.append(item)
-        except Exception as e:
-            pass  # Skip parsing errors for items
-    
-    print(f"  ✓ Found {len(sellable_items)} sellable items")
+    sellable = "FROM items WHERE can_sell AND minimum_price > 0"
+    sellable_count = db.execute(f"SELECT COUNT(*) {sellable}").fetchone()[0]
+    print(f"  ✓ Found {sellable_count} sellable items")
     
     # Price distribution
     print("\n💵 Price Distribution:")
@@ -162,10 +99,21 @@ def main():
     ]
     
     for min_p, max_p, label in price_ranges:
-        count = sum(1 for item in sellable_items if min_p <= item['price'] <= max_p)
+        count = db.execute(f"SELECT COUNT(*) {sellable} AND minimum_price BETWEEN ? AND ?",
+                           (min_p, max_p)).fetchone()[0]
         if count > 0:
             print(f"  {label:<15} ({min_p:>3}-{max_p:>4}g): {count:>3} items")
     
+    # Exact loot table yields per harvest roll
+    print("\n🎲 Loot Table Yields (per harvest roll):")
+    print(f"{'Table':<24} {'Weights':<9} {'Items':<8} {'Empty':<8} {'Top drop'}")
+    print("-" * 78)
+    for table in drops.load_table_drops(db):
+        top = max(table.items.values(), key=lambda item: item.mean, default=None)
+        top_text = f"{top.item_slug} ({top.drop_rate * 100:.0f}%)" if top else "-"
+        empty = f"{table.total.probabilities[0] * 100:.1f}%"
+        print(f"{table.slug:<24} {table.weight_total:<9g} {table.total.mean:<8.3f} {empty:<8} {top_text}")
+    
     # Report issues
     print("\n" + "=" * 70)
     if issues:
@@ -179,13 +127,20 @@ def main():
     
     # Summary
     print("\n📈 Summary:")
-    print(f"  Total Recipes: {len(all_recipes)}")
-    print(f"  Level Range: {min(r['level'] for r in all_recipes)} - {max(r['level'] for r in all_recipes)}")
-    print(f"  Sellable Items: {len(sellable_items)}")
-    print(f"  Price Range: {min(i['price'] for i in sellable_items if i['price'] > 0)}g - {max(i['price'] for i in sellable_items)}g")
+    min_level, max_level = db.execute("SELECT MIN(required_level), MAX(required_level) FROM recipes").fetchone()
+    min_price, max_price = db.execute(f"SELECT MIN(minimum_price), MAX(minimum_price) {sellable}").fetchone()
+    db.close()
+    print(f"  Total Recipes: {recipe_count}")
+    print(f"  Level Range: {min_level} - {max_level}")
+    print(f"  Sellable Items: {sellable_count}")
+    print(f"  Price Range: {min_price}g - {max_price}g")
     
     print("\n✓ Validation complete!\n")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Check recipe and item economy balance.")
+    parser.add_argument('--no-cache', action='store_true', help="re-parse every file and skip the parse cache and content database")
+    scan.add_jobs_argument(parser)
+    args = parser.parse_args()
+    main(use_cache=not args.no_cache, jobs=args.jobs)
 
@@ -4,124 +4,153 @@ Standalone Python script to validate recipes and items without needing Godot run
 Parses .tres files directly and generates validation report.
 """
 
-import re
-import os
+import argparse
 from pathlib import Path
-from collections import defaultdict
+from itertools import groupby
 from datetime import datetime
 
+from tinymmo_tools.content import scan
+from tinymmo_tools.content.db import open_database
 
-class TresParser:
-    """Simple parser for Godot .tres files"""
-    
-    @staticmethod
-    def parse_value(value_str):
-        """Parse a GDScript value to Python"""
-        value_str = value_str.strip()
-        
-        # Handle StringName
-        if value_str.startswith('&"') and value_str.endswith('"'):
-            return value_str[2:-1]
-        
-        # Handle empty StringName
-        if value_str == '&""':
-            return ""
-        
-        # Handle numbers
-        try:
-            if '.' in value_str:
-                return float(value_str)
-            return int(value_str)
-        except ValueError:
-            pass
-        
-        # Handle strings
-        if value_str.startswith('"') and value_str.endswith('"'):
-            return value_str[1:-1]
-        
-        # Handle null
-        if value_str == 'null':
-            return None
-        
-        return value_str
-    
-    @staticmethod
-    def parse_recipe(file_path):
-        """Parse a recipe .tres file"""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            recipe = {}
-            
-            # Parse fields
-            patterns = {
-                'slug': r'slug\s*=\s*(.+)',
-                'recipe_name': r'recipe_name\s*=\s*(.+)',
-                'description': r'description\s*=\s*"([^"]*)"',
-                'required_class': r'required_class\s*=\s*"([^"]*)"',
-                'required_level': r'required_level\s*=\s*(\d+)',
-                'gold_cost': r'gold_cost\s*=\s*(\d+)',
-                'energy_cost': r'energy_cost\s*=\s*([0-9.]+)',
-                'input_1_slug': r'input_1_slug\s*=\s*(.+)',
-                'input_1_quantity': r'input_1_quantity\s*=\s*(\d+)',
-                'input_2_slug': r'input_2_slug\s*=\s*(.+)',
-                'input_2_quantity': r'input_2_quantity\s*=\s*(\d+)',
-                'input_3_slug': r'input_3_slug\s*=\s*(.+)',
-                'input_3_quantity': r'input_3_quantity\s*=\s*(\d+)',
-                'output_1_slug': r'output_1_slug\s*=\s*(.+)',
-                'output_1_quantity': r'output_1_quantity\s*=\s*(\d+)',
-                'output_2_slug': r'output_2_slug\s*=\s*(.+)',
-                'output_2_quantity': r'output_2_quantity\s*=\s*(\d+)',
-            }
-            
-            for key, pattern in patterns.items():
-                match = re.search(pattern, content)
-                if match:
-                    recipe[key] = TresParser.parse_value(match.group(1))
-                else:
-                    # Set defaults
-                    if 'slug' in key or 'class' in key or 'description' in key or 'name' in key:
-                        recipe[key] = ""
-                    else:
-                        recipe[key] = 0 if 'quantity' in key or 'cost' in key or 'level' in key else ""
-            
-            return recipe
-        except Exception as e:
-            print(f"Error parsing {file_path}: {e}")
-            return None
+
+ITEMS_DIR = "source/common/gameplay/items"
+
+# Item folders whose items count as valid recipe references, in report order
+ITEM_FOLDERS = ['materials', 'combat', 'consumables', 'construction', 'food', 'furniture',
+                'guild', 'household', 'luxury', 'storage', 'tools']
+
+RAW_MATERIAL_TAGS = ['ore', 'wood', 'hide', 'meat', 'herb', 'plant', 'gathered', 'raw']
+RAW_MATERIAL_SLUG_PARTS = ['_ore', '_wood', '_hide', '_meat']
+
+
+def create_valid_items(db):
+    """Create the temp valid_items table: one row per slug in ITEM_FOLDERS.
     
-    @staticmethod
-    def parse_item(file_path):
-        """Parse an item .tres file"""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            item = {}
-            
-            # Parse item name
-            match = re.search(r'item_name\s*=\s*(.+)', content)
-            if match:
-                item['item_name'] = TresParser.parse_value(match.group(1))
-            else:
-                item['item_name'] = ""
-            
-            # Parse tags
-            match = re.search(r'tags\s*=\s*\[([^\]]*)\]', content)
-            if match:
-                tags_str = match.group(1)
-                item['tags'] = [t.strip().strip('"') for t in tags_str.split(',') if t.strip()]
-            else:
-                item['tags'] = []
-            
-            return item
-        except Exception as e:
-            print(f"Error parsing {file_path}: {e}")
-            return None
+    Like a dict keyed by slug, the first folder fixes the order (seq) and
+    the last folder supplies the data.
+    """
+    scope = ', '.join('(?, ?)' for _ in ITEM_FOLDERS)
+    params = [value for rank, folder in enumerate(ITEM_FOLDERS)
+              for value in (f"{ITEMS_DIR}/{folder}", rank)]
+    db.execute(f"""
+        CREATE TEMP TABLE valid_items AS
+        WITH scope(directory, rank) AS (VALUES {scope}),
+        ranked AS (
+            SELECT i.slug, i.path, i.item_name,
+                   ROW_NUMBER() OVER (ORDER BY s.rank, i.path) AS seq
+            FROM items i
+            JOIN files f ON f.path = i.path
+            JOIN scope s ON s.directory = f.directory
+        ),
+        spans AS (SELECT slug, MIN(seq) AS first_seq, MAX(seq) AS last_seq FROM ranked GROUP BY slug)
+        SELECT r.slug, r.path, r.item_name, spans.first_seq AS seq
+        FROM spans JOIN ranked r ON r.seq = spans.last_seq
+    """, params)
+    db.execute("CREATE INDEX temp.valid_items_slug ON valid_items(slug)")
+
+
+def create_numbered_recipes(db):
+    """Create the temp numbered_recipes table, giving each recipe its report ID."""
+    db.execute("""
+        CREATE TEMP TABLE numbered_recipes AS
+        SELECT ROW_NUMBER() OVER (ORDER BY path) AS recipe_id, * FROM recipes
+    """)
+    db.execute("CREATE UNIQUE INDEX temp.numbered_recipes_path ON numbered_recipes(path)")
+
+
+def query_recipes_with_no_inputs(db):
+    rows = db.execute("""
+        SELECT recipe_name, slug, path, gold_cost, energy_cost FROM recipes r
+        WHERE NOT EXISTS (SELECT 1 FROM recipe_slots s WHERE s.path = r.path AND s.direction = 'input')
+        ORDER BY path
+    """)
+    return [dict(row) for row in rows]
+
+
+def query_broken_references(db):
+    """Recipes with inputs or outputs that are not valid item slugs."""
+    rows = db.execute("""
+        SELECT r.recipe_name, r.slug, r.path, s.direction, s.item_slug
+        FROM recipe_slots s JOIN recipes r ON r.path = s.path
+        WHERE s.item_slug NOT IN (SELECT slug FROM valid_items)
+        ORDER BY r.path, s.direction, s.slot
+    """)
+    broken = []
+    for path, refs in groupby(rows, key=lambda row: row['path']):
+        refs = list(refs)
+        broken.append({
+            'recipe_name': refs[0]['recipe_name'],
+            'slug': refs[0]['slug'],
+            'path': path,
+            'broken_refs': [f"{ref['direction']}: {ref['item_slug']}" for ref in refs]
+        })
+    return broken
+
 
+def query_recipes_by_first_output(db):
+    """Group recipes by their first output, in order of first appearance."""
+    rows = db.execute("""
+        WITH first_outputs AS (
+            SELECT s.item_slug, n.recipe_name, n.recipe_id, n.path, n.required_class, n.required_level,
+                   MIN(n.recipe_id) OVER (PARTITION BY s.item_slug) AS first_id
+            FROM recipe_slots s JOIN numbered_recipes n ON n.path = s.path
+            WHERE s.direction = 'output' AND s.slot = 0
+        )
+        SELECT * FROM first_outputs ORDER BY first_id, recipe_id
+    """)
+    by_output = {}
+    for item_slug, group in groupby(rows, key=lambda row: row['item_slug']):
+        by_output[item_slug] = [{
+            'recipe_name': row['recipe_name'],
+            'recipe_id': row['recipe_id'],
+            'path': row['path'],
+            'class': row['required_class'],
+            'level': row['required_level']
+        } for row in group]
+    return by_output
 
-def validate_recipes_and_items(project_root):
+
+def query_unused_crafted_items(db, recipes_by_first_output):
+    """Crafted items that no recipe takes as an input."""
+    rows = db.execute("""
+        WITH outputs AS (
+            SELECT s.item_slug, ROW_NUMBER() OVER (ORDER BY n.recipe_id, s.slot) AS seq
+            FROM recipe_slots s JOIN numbered_recipes n ON n.path = s.path
+            WHERE s.direction = 'output'
+        )
+        SELECT item_slug, COUNT(*) AS recipe_count FROM outputs o
+        WHERE NOT EXISTS (SELECT 1 FROM recipe_slots i WHERE i.item_slug = o.item_slug AND i.direction = 'input')
+        GROUP BY item_slug
+        ORDER BY MIN(seq)
+    """)
+    return [{
+        'item_slug': row['item_slug'],
+        'recipe_count': row['recipe_count'],
+        'recipes': recipes_by_first_output.get(row['item_slug'], [])
+    } for row in rows]
+
+
+def query_items_without_recipes(db):
+    """Valid items no recipe outputs, excluding raw materials."""
+    tags = ', '.join('?' for _ in RAW_MATERIAL_TAGS)
+    slug_parts = ' '.join("AND v.slug NOT LIKE ? ESCAPE '\\'" for _ in RAW_MATERIAL_SLUG_PARTS)
+    rows = db.execute(f"""
+        SELECT v.slug, v.item_name, v.path FROM valid_items v
+        WHERE NOT EXISTS (SELECT 1 FROM recipe_slots s WHERE s.item_slug = v.slug AND s.direction = 'output')
+          AND NOT EXISTS (SELECT 1 FROM item_tags t WHERE t.path = v.path AND t.tag IN ({tags}))
+          {slug_parts}
+        ORDER BY v.seq
+    """, RAW_MATERIAL_TAGS + ['%' + part.replace('_', '\\_') + '%' for part in RAW_MATERIAL_SLUG_PARTS])
+    return [{
+        'item_slug': row['slug'],
+        'item_name': row['item_name'],
+        'path': row['path'],
+        'tags': [tag for (tag,) in db.execute(
+            "SELECT tag FROM item_tags WHERE path = ? ORDER BY position", (row['path'],))]
+    } for row in rows.fetchall()]
+
+
+def validate_recipes_and_items(project_root, use_cache=True, jobs=None):
     """Main validation function"""
     
     print("="*60)
@@ -131,171 +160,36 @@ def validate_recipes_and_items(project_root):
     
     project_path = Path(project_root)
     
+    db = open_database(use_cache, jobs, project_path)
+    
     # Load all item slugs
     print("Loading items...")
-    valid_item_slugs = set()
-    items_by_slug = {}
-    items_dir = project_path / "source" / "common" / "gameplay" / "items" / "materials"
-    
-    for item_file in items_dir.glob("*.tres"):
-        slug = item_file.stem
-        item = TresParser.parse_item(item_file)
-        if item:
-            valid_item_slugs.add(slug)
-            items_by_slug[slug] = {
-                'path': str(item_file.relative_to(project_path)),
-                'name': item['item_name'],
-                'tags': item['tags']
-            }
-    
-    # Also check other item directories
-    for item_subdir in ['combat', 'consumables', 'construction', 'food', 'furniture', 
-                        'guild', 'household', 'luxury', 'storage', 'tools']:
-        subdir = project_path / "source" / "common" / "gameplay" / "items" / item_subdir
-        if subdir.exists():
-            for item_file in subdir.glob("*.tres"):
-                slug = item_file.stem
-                item = TresParser.parse_item(item_file)
-                if item:
-                    valid_item_slugs.add(slug)
-                    items_by_slug[slug] = {
-                        'path': str(item_file.relative_to(project_path)),
-                        'name': item['item_name'],
-                        'tags': item['tags']
-                    }
-    
-    print(f"Loaded {len(valid_item_slugs)} items")
+    create_valid_items(db)
+    item_count = db.execute("SELECT COUNT(*) FROM valid_items").fetchone()[0]
+    print(f"Loaded {item_count} items")
     
     # Load all recipes
     print("Loading recipes...")
-    recipes = []
-    recipes_dir = project_path / "source" / "common" / "gameplay" / "crafting" / "recipes"
-    
-    for recipe_dir in recipes_dir.rglob("*.tres"):
-        recipe = TresParser.parse_recipe(recipe_dir)
-        if recipe:
-            recipe['path'] = str(recipe_dir.relative_to(project_path))
-            recipes.append(recipe)
-    
-    print(f"Loaded {len(recipes)} recipes")
+    create_numbered_recipes(db)
+    recipe_count = db.execute("SELECT COUNT(*) FROM recipes").fetchone()[0]
+    print(f"Loaded {recipe_count} recipes")
     print()
     
     # Run validations
     print("Running validation checks...")
     
-    recipes_with_no_inputs = []
-    broken_recipe_references = []
-    duplicate_recipes = defaultdict(list)
-    items_produced_by_recipes = defaultdict(list)
-    items_used_as_inputs = set()
-    
-    # Check each recipe
-    for idx, recipe in enumerate(recipes):
-        recipe_id = idx + 1
-        
-        # Check for no inputs
-        has_input = False
-        inputs = []
-        
-        if recipe.get('input_1_slug'):
-            has_input = True
-            inputs.append(recipe['input_1_slug'])
-            items_used_as_inputs.add(recipe['input_1_slug'])
-        
-        if recipe.get('input_2_slug') and recipe.get('input_2_quantity', 0) > 0:
-            has_input = True
-            inputs.append(recipe['input_2_slug'])
-            items_used_as_inputs.add(recipe['input_2_slug'])
-        
-        if recipe.get('input_3_slug') and recipe.get('input_3_quantity', 0) > 0:
-            has_input = True
-            inputs.append(recipe['input_3_slug'])
-            items_used_as_inputs.add(recipe['input_3_slug'])
-        
-        if not has_input:
-            recipes_with_no_inputs.append({
-                'recipe_name': recipe.get('recipe_name', 'Unknown'),
-                'slug': recipe.get('slug', 'unknown'),
-                'path': recipe['path'],
-                'gold_cost': recipe.get('gold_cost', 0),
-                'energy_cost': recipe.get('energy_cost', 0.0)
-            })
-        
-        # Check for broken references
-        broken_refs = []
-        
-        for input_slug in inputs:
-            if input_slug and input_slug not in valid_item_slugs:
-                broken_refs.append(f"input: {input_slug}")
-        
-        # Check outputs
-        if recipe.get('output_1_slug'):
-            output_slug = recipe['output_1_slug']
-            items_produced_by_recipes[output_slug].append(recipe_id)
-            if output_slug not in valid_item_slugs:
-                broken_refs.append(f"output: {output_slug}")
-        
-        if recipe.get('output_2_slug') and recipe.get('output_2_quantity', 0) > 0:
-            output_slug = recipe['output_2_slug']
-            items_produced_by_recipes[output_slug].append(recipe_id)
-            if output_slug not in valid_item_slugs:
-                broken_refs.append(f"output: {output_slug}")
-        
-        if broken_refs:
-            broken_recipe_references.append({
-                'recipe_name': recipe.get('recipe_name', 'Unknown'),
-                'slug': recipe.get('slug', 'unknown'),
-                'path': recipe['path'],
-                'broken_refs': broken_refs
-            })
-        
-        # Track duplicates
-        if recipe.get('output_1_slug'):
-            duplicate_recipes[recipe['output_1_slug']].append({
-                'recipe_name': recipe.get('recipe_name', 'Unknown'),
-                'recipe_id': recipe_id,
-                'path': recipe['path'],
-                'class': recipe.get('required_class', 'unknown'),
-                'level': recipe.get('required_level', 1)
-            })
+    recipes_with_no_inputs = query_recipes_with_no_inputs(db)
+    broken_recipe_references = query_broken_references(db)
+    duplicate_recipes = query_recipes_by_first_output(db)
     
     # Find duplicates (more than one recipe producing same item)
     actual_duplicates = {k: v for k, v in duplicate_recipes.items() if len(v) > 1}
     
-    # Find unused crafted items
-    unused_crafted_items = []
-    for item_slug, recipe_ids in items_produced_by_recipes.items():
-        if item_slug not in items_used_as_inputs:
-            producing_recipes = duplicate_recipes.get(item_slug, [])
-            unused_crafted_items.append({
-                'item_slug': item_slug,
-                'recipe_count': len(recipe_ids),
-                'recipes': producing_recipes
-            })
+    unused_crafted_items = query_unused_crafted_items(db, duplicate_recipes)
     
     # Find items without recipes (excluding raw materials)
-    RAW_MATERIAL_TAGS = ['ore', 'wood', 'hide', 'meat', 'herb', 'plant', 'gathered', 'raw']
-    
-    items_without_recipes = []
-    for slug, item_data in items_by_slug.items():
-        if slug in items_produced_by_recipes:
-            continue
-        
-        # Check if it's a raw material
-        is_raw = any(tag in RAW_MATERIAL_TAGS for tag in item_data['tags'])
-        if is_raw:
-            continue
-        
-        # Check path patterns
-        if '_ore' in slug or '_wood' in slug or '_hide' in slug or '_meat' in slug:
-            continue
-        
-        items_without_recipes.append({
-            'item_slug': slug,
-            'item_name': item_data['name'],
-            'path': item_data['path'],
-            'tags': item_data['tags']
-        })
+    items_without_recipes = query_items_without_recipes(db)
+    db.close()
     
     # Generate report
     print("Generating report...")
@@ -314,8 +208,8 @@ def validate_recipes_and_items(project_root):
     
     # Summary
     report.append("## Summary\n\n")
-    report.append(f"- Total Recipes: {len(recipes)}\n")
-    report.append(f"- Total Items: {len(valid_item_slugs)}\n")
+    report.append(f"- Total Recipes: {recipe_count}\n")
+    report.append(f"- Total Items: {item_count}\n")
     report.append(f"- **Total Issues Found: {total_issues}**\n\n")
     
     # Issue breakdown
@@ -392,8 +286,8 @@ def validate_recipes_and_items(project_root):
     print(f"\nReport saved to: {report_path}")
     print("\n" + "="*60)
     print("QUICK SUMMARY:")
-    print(f"- Total Recipes: {len(recipes)}")
-    print(f"- Total Items: {len(valid_item_slugs)}")
+    print(f"- Total Recipes: {recipe_count}")
+    print(f"- Total Items: {item_count}")
     print(f"- Total Issues: {total_issues}")
     print("")
     print(f"  - Recipes with No Inputs: {len(recipes_with_no_inputs)}")
@@ -405,7 +299,12 @@ def validate_recipes_and_items(project_root):
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate recipes and items.")
+    parser.add_argument('--no-cache', action='store_true', help="re-parse every file and skip the parse cache and content database")
+    scan.add_jobs_argument(parser)
+    args = parser.parse_args()
+    
     # Detect project root
     script_dir = Path(__file__).parent
-    validate_recipes_and_items(script_dir)
+    validate_recipes_and_items(script_dir, use_cache=not args.no_cache, jobs=args.jobs)
 